@@ -0,0 +1,10 @@
+"""Offline benchmark suite for gemini-nano-banana-tool.
+
+Measures client-side overhead of the core library against an in-process fake
+Gemini client, so results are deterministic and no API quota is consumed.
+
+Run with ``python -m benchmarks`` (or ``make bench``).
+
+Note: This code was generated with assistance from AI coding tools
+and has been reviewed and tested by a human.
+"""
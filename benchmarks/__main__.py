@@ -0,0 +1,201 @@
+"""Run the offline benchmark suite.
+
+Usage:
+    python -m benchmarks                      # run and compare against baseline
+    python -m benchmarks --update-baseline    # run and store a new baseline
+    python -m benchmarks --quick -o out.json  # fewer iterations, save results
+
+Exits with status 1 when any metric regresses beyond the threshold.
+
+Note: This code was generated with assistance from AI coding tools
+and has been reviewed and tested by a human.
+"""
+
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+
+import click
+
+from benchmarks.fake_client import FakeClient
+from benchmarks.harness import (
+    DEFAULT_THRESHOLD,
+    baseline_caveats,
+    build_report,
+    find_regressions,
+    load_baseline,
+    measure,
+    metric,
+    save_report,
+)
+from gemini_nano_banana_tool.core.conversation import Conversation, ConversationTurn
+from gemini_nano_banana_tool.core.generator import generate_image
+from gemini_nano_banana_tool.core.prompt_templates import detect_category
+from gemini_nano_banana_tool.core.promptgen import generate_prompt
+
+DEFAULT_BASELINE = str(Path(__file__).parent / "baselines" / "baseline.json")
+
+# Size of a 4K Pro image, for the decode and write path benchmarks
+PAYLOAD_4K = 24 << 20
+
+SAMPLE_DESCRIPTIONS = [
+    "a portrait photo of an old fisherman at golden hour",
+    "fantasy hero character in ornate armor",
+    "cozy cabin interior scene with a fireplace",
+    "plate of fresh sushi with wasabi and ginger",
+    "abstract geometric pattern in bold colors",
+    "minimalist logo for a coffee brand",
+    "a cat sitting on a windowsill",
+]
+
+
+def bench_overhead(workdir: Path, iterations: int) -> dict[str, dict[str, Any]]:
+    """Measure per-request client-side overhead with a zero-latency fake client."""
+    client: Any = FakeClient()
+    results: dict[str, dict[str, Any]] = {}
+
+    output = str(workdir / "overhead.png")
+    stats = measure(
+        lambda: generate_image(client, "A beautiful sunset", output, aspect_ratio="16:9"),
+        iterations,
+    )
+    results["generate_image.gemini.median"] = metric(stats["median_us"], "us")
+
+    stats = measure(
+        lambda: generate_image(
+            client, "A beautiful sunset", output, model="imagen-4.0-fast-generate-001"
+        ),
+        iterations,
+    )
+    results["generate_image.imagen.median"] = metric(stats["median_us"], "us")
+
+    stats = measure(lambda: generate_prompt(client, "wizard cat", style="anime"), iterations)
+    results["generate_prompt.median"] = metric(stats["median_us"], "us")
+
+    stats = measure(
+        lambda: [detect_category(d) for d in SAMPLE_DESCRIPTIONS],
+        iterations * 10,
+    )
+    per_call = stats["median_us"] / len(SAMPLE_DESCRIPTIONS)
+    results["detect_category.median"] = metric(per_call, "us")
+
+    conversation = Conversation(model="gemini-2.5-flash-image", conversation_id="bench")
+    for i in range(20):
+        conversation.add_turn(
+            ConversationTurn(
+                prompt=f"Refinement step {i}",
+                output_path=f"step{i}.png",
+                metadata={"token_count": 1290},
+            )
+        )
+    conversation_file = str(workdir / "conversation.json")
+    stats = measure(lambda: conversation.save(conversation_file), iterations)
+    results["conversation.save.median"] = metric(stats["median_us"], "us")
+    stats = measure(lambda: Conversation.load(conversation_file), iterations)
+    results["conversation.load.median"] = metric(stats["median_us"], "us")
+    return results
+
+
+def bench_write_path(workdir: Path, iterations: int) -> dict[str, dict[str, Any]]:
+    """Measure response decode and write time for 4K-sized images."""
+    client: Any = FakeClient(payload_size=PAYLOAD_4K)
+    results: dict[str, dict[str, Any]] = {}
+    output = str(workdir / "write_4k.png")
+    for name, model in (
+        ("gemini", "gemini-3-pro-image-preview"),
+        ("imagen", "imagen-4.0-generate-001"),
+    ):
+        stats = measure(
+            lambda model=model: generate_image(client, "A 4K scene", output, model=model),
+            iterations,
+        )
+        results[f"write_path.4k.{name}.median"] = metric(stats["median_us"] / 1000, "ms")
+    return results
+
+
+def bench_throughput(
+    workdir: Path, requests: int, latency: float, levels: list[int]
+) -> dict[str, dict[str, Any]]:
+    """Measure batch throughput against a fake client with fixed latency."""
+    results: dict[str, dict[str, Any]] = {}
+    for concurrency in levels:
+        client: Any = FakeClient(latency=latency)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            futures = [
+                pool.submit(generate_image, client, f"Image {i}", str(workdir / f"batch_{i}.png"))
+                for i in range(requests)
+            ]
+            for future in futures:
+                future.result()
+        elapsed = time.perf_counter() - start
+        results[f"batch.throughput.c{concurrency}"] = metric(
+            requests / elapsed, "images/s", better="higher"
+        )
+    return results
+
+
+@click.command()
+@click.option("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON file to compare with")
+@click.option("--update-baseline", is_flag=True, help="Store this run as the new baseline")
+@click.option("-o", "--output", type=click.Path(), help="Also write results JSON to this file")
+@click.option(
+    "--threshold",
+    default=DEFAULT_THRESHOLD,
+    show_default=True,
+    help="Allowed relative regression before failing (0.25 = 25%)",
+)
+@click.option("--quick", is_flag=True, help="Fewer iterations (smoke test, noisier numbers)")
+def main(
+    baseline: str,
+    update_baseline: bool,
+    output: str | None,
+    threshold: float,
+    quick: bool,
+) -> None:
+    """Run the offline benchmark suite against the fake Gemini client."""
+    iterations = 20 if quick else 200
+    with tempfile.TemporaryDirectory(prefix="nano-banana-bench-") as tmp:
+        workdir = Path(tmp)
+        metrics = bench_overhead(workdir, iterations)
+        metrics.update(bench_write_path(workdir, max(5, iterations // 10)))
+        metrics.update(
+            bench_throughput(
+                workdir,
+                requests=32 if quick else 128,
+                latency=0.02,
+                levels=[1, 4, 16],
+            )
+        )
+    report = build_report(metrics)
+
+    for name, entry in sorted(metrics.items()):
+        click.echo(f"{name:40} {entry['value']:>12.2f} {entry['unit']}")
+
+    if output:
+        save_report(report, output)
+    if update_baseline:
+        save_report(report, baseline)
+        click.echo(f"Baseline updated: {baseline}")
+        return
+
+    stored = load_baseline(baseline)
+    if stored is None:
+        click.echo(f"No baseline at {baseline}; run with --update-baseline to create one.")
+        return
+    for caveat in baseline_caveats(report, stored):
+        click.echo(f"Note: {caveat}", err=True)
+    regressions = find_regressions(report, stored, threshold)
+    if regressions:
+        click.echo("\nRegressions detected:", err=True)
+        for line in regressions:
+            click.echo(f"  {line}", err=True)
+        sys.exit(1)
+    click.echo("\nNo regressions beyond threshold.")
+
+
+if __name__ == "__main__":
+    main()
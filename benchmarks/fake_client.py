@@ -0,0 +1,193 @@
+"""Deterministic in-process stand-in for ``google.genai.Client``.
+
+The fake client answers ``models.generate_content`` and ``models.generate_images``
+with real ``google.genai.types`` response objects carrying canned image bytes, so
+the library's own request building and response parsing code runs unchanged.
+Latency, error injection and payload size are configurable and seeded.
+
+Note: This code was generated with assistance from AI coding tools
+and has been reviewed and tested by a human.
+"""
+
+import random
+import struct
+import threading
+import time
+import zlib
+from collections.abc import Callable
+from typing import Any
+
+from google.genai import errors, types
+
+DEFAULT_PAYLOAD_SIZE = 256 * 1024
+DEFAULT_PROMPT_TEXT = (
+    "Photorealistic portrait of a fluffy grey cat wearing an ornate wizard hat, "
+    "soft golden hour lighting, shallow depth of field, highly detailed fur texture"
+)
+
+
+def make_png(payload_size: int = DEFAULT_PAYLOAD_SIZE, width: int = 1, height: int = 1) -> bytes:
+    """Build a valid PNG file padded to approximately ``payload_size`` bytes.
+
+    The image itself is a tiny grayscale bitmap; the size is reached with a
+    private ancillary chunk, which decoders are required to skip.
+
+    Args:
+        payload_size: Desired total file size in bytes
+        width: Image width in pixels
+        height: Image height in pixels
+
+    Returns:
+        PNG file contents
+    """
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return (
+            struct.pack(">I", len(data))
+            + kind
+            + data
+            + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+        )
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0)
+    raw = b"".join(b"\x00" + b"\x80" * width for _ in range(height))
+    parts = [
+        b"\x89PNG\r\n\x1a\n",
+        chunk(b"IHDR", header),
+        chunk(b"IDAT", zlib.compress(raw)),
+    ]
+    end = chunk(b"IEND", b"")
+    padding = payload_size - sum(len(p) for p in parts) - len(end) - 12
+    if padding > 0:
+        parts.append(chunk(b"nbPd", bytes(padding)))
+    parts.append(end)
+    return b"".join(parts)
+
+
+def server_error(code: int = 503) -> errors.APIError:
+    """Build an SDK error equivalent to an upstream HTTP failure.
+
+    Args:
+        code: HTTP status code (429 and 5xx are the interesting ones)
+
+    Returns:
+        ClientError for 4xx codes, ServerError otherwise
+    """
+    status = {429: "RESOURCE_EXHAUSTED", 503: "UNAVAILABLE"}.get(code, "INTERNAL")
+    body = {"error": {"code": code, "message": "Injected by fake client", "status": status}}
+    if 400 <= code < 500:
+        return errors.ClientError(code, body)
+    return errors.ServerError(code, body)
+
+
+class FakeClient:
+    """Drop-in replacement for ``genai.Client`` with canned responses.
+
+    Example:
+        >>> client = FakeClient(latency=0.05, error_rate=0.1, payload_size=4 << 20)
+        >>> generate_image(client, "a cat", "cat.png")  # type: ignore[arg-type]
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_factory: Callable[[], Exception] = server_error,
+        payload_size: int = DEFAULT_PAYLOAD_SIZE,
+        text: str = DEFAULT_PROMPT_TEXT,
+        total_token_count: int = 1290,
+        seed: int = 0,
+    ):
+        """Initialize the fake client.
+
+        Args:
+            latency: Fixed seconds to sleep per request
+            jitter: Additional uniformly distributed seconds (0..jitter) per request
+            error_rate: Probability (0-1) that a request raises instead of answering
+            error_factory: Builds the exception raised for injected errors
+            payload_size: Size in bytes of the returned image
+            text: Text returned for text-only (promptgen) requests
+            total_token_count: Token count reported in usage metadata
+            seed: Seed for the latency and error random generator
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_factory = error_factory
+        self.text = text
+        self.total_token_count = total_token_count
+        self.image_bytes = make_png(payload_size)
+        self.call_count = 0
+        self.error_count = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.models = FakeModels(self)
+
+    def simulate(self) -> None:
+        """Apply configured latency and error injection for one request."""
+        with self._lock:
+            self.call_count += 1
+            delay = self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0.0)
+            fail = self.error_rate > 0 and self._rng.random() < self.error_rate
+            if fail:
+                self.error_count += 1
+        if delay > 0:
+            time.sleep(delay)
+        if fail:
+            raise self.error_factory()
+
+
+class FakeModels:
+    """Implements the subset of ``client.models`` used by this tool."""
+
+    def __init__(self, client: FakeClient):
+        """Initialize with the owning fake client.
+
+        Args:
+            client: Fake client holding configuration and counters
+        """
+        self._client = client
+
+    def generate_content(
+        self,
+        model: str,
+        contents: Any,
+        config: types.GenerateContentConfig | None = None,
+    ) -> types.GenerateContentResponse:
+        """Return an image response, or a text response for text-only configs."""
+        self._client.simulate()
+        modalities = (config.response_modalities if config else None) or []
+        if "IMAGE" in modalities:
+            part = types.Part(
+                inline_data=types.Blob(mime_type="image/png", data=self._client.image_bytes)
+            )
+        else:
+            part = types.Part(text=self._client.text)
+        return types.GenerateContentResponse(
+            candidates=[
+                types.Candidate(
+                    content=types.Content(role="model", parts=[part]),
+                    finish_reason=types.FinishReason.STOP,
+                )
+            ],
+            usage_metadata=types.GenerateContentResponseUsageMetadata(
+                total_token_count=self._client.total_token_count,
+            ),
+        )
+
+    def generate_images(
+        self,
+        model: str,
+        prompt: str,
+        config: types.GenerateImagesConfig | None = None,
+    ) -> types.GenerateImagesResponse:
+        """Return an Imagen response with one generated image."""
+        self._client.simulate()
+        return types.GenerateImagesResponse(
+            generated_images=[
+                types.GeneratedImage(
+                    image=types.Image(image_bytes=self._client.image_bytes, mime_type="image/png")
+                )
+            ]
+        )
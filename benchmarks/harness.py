@@ -0,0 +1,166 @@
+"""Timing, baseline storage and regression detection for the benchmark suite.
+
+Note: This code was generated with assistance from AI coding tools
+and has been reviewed and tested by a human.
+"""
+
+import json
+import platform
+import statistics
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+DEFAULT_THRESHOLD = 0.25
+
+
+def measure(fn: Callable[[], object], iterations: int, warmup: int = 3) -> dict[str, float]:
+    """Time repeated calls of a zero-argument function.
+
+    Args:
+        fn: Function to time
+        iterations: Number of timed calls
+        warmup: Number of untimed calls before measuring
+
+    Returns:
+        dict with median_us, p95_us, mean_us and iterations
+    """
+    for _ in range(warmup):
+        fn()
+    samples: list[float] = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1_000_000)
+    samples.sort()
+    p95_index = min(len(samples) - 1, int(len(samples) * 0.95))
+    return {
+        "median_us": round(statistics.median(samples), 2),
+        "p95_us": round(samples[p95_index], 2),
+        "mean_us": round(statistics.fmean(samples), 2),
+        "iterations": iterations,
+    }
+
+
+def metric(value: float, unit: str, better: str = "lower") -> dict[str, Any]:
+    """Build a metric entry as stored in results and baselines.
+
+    Args:
+        value: Measured value
+        unit: Unit label (e.g. "us", "images/s")
+        better: "lower" or "higher", the direction that counts as an improvement
+
+    Returns:
+        Metric dictionary
+    """
+    return {"value": round(value, 2), "unit": unit, "better": better}
+
+
+def build_report(metrics: dict[str, dict[str, Any]]) -> dict[str, Any]:
+    """Wrap metrics with environment information.
+
+    Args:
+        metrics: Mapping of metric name to metric entry
+
+    Returns:
+        Report dictionary suitable for JSON serialization
+    """
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "metrics": metrics,
+    }
+
+
+def load_baseline(path: str) -> dict[str, Any] | None:
+    """Load a baseline report, or None if it doesn't exist.
+
+    Args:
+        path: Baseline JSON file path
+
+    Returns:
+        Baseline report or None
+    """
+    baseline_file = Path(path)
+    if not baseline_file.exists():
+        return None
+    with open(baseline_file, encoding="utf-8") as f:
+        data: dict[str, Any] = json.load(f)
+    return data
+
+
+def save_report(report: dict[str, Any], path: str) -> None:
+    """Write a report as pretty-printed JSON.
+
+    Args:
+        report: Report from build_report()
+        path: Destination file path
+    """
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def find_regressions(
+    current: dict[str, Any],
+    baseline: dict[str, Any],
+    threshold: float = DEFAULT_THRESHOLD,
+) -> list[str]:
+    """Compare a report against a baseline.
+
+    A metric regresses when it is worse than the baseline by more than
+    ``threshold`` (a fraction, 0.25 = 25%). Metrics missing on either side
+    are ignored so new benchmarks can be added without a baseline.
+
+    Args:
+        current: Report from this run
+        baseline: Stored baseline report
+        threshold: Allowed relative degradation
+
+    Returns:
+        Human-readable description of each regression (empty if none)
+    """
+    regressions: list[str] = []
+    for name, base in baseline.get("metrics", {}).items():
+        now = current.get("metrics", {}).get(name)
+        if now is None or not base["value"]:
+            continue
+        if base.get("better", "lower") == "lower":
+            change = (now["value"] - base["value"]) / base["value"]
+        else:
+            change = (base["value"] - now["value"]) / base["value"]
+        if change > threshold:
+            regressions.append(
+                f"{name}: {now['value']} {now['unit']} vs baseline {base['value']} "
+                f"{base['unit']} ({change:+.0%} worse, threshold {threshold:.0%})"
+            )
+    return regressions
+
+
+def baseline_caveats(current: dict[str, Any], baseline: dict[str, Any]) -> list[str]:
+    """Describe why a baseline may not be comparable with this run.
+
+    Timings shift between Python versions, and metrics missing from the
+    baseline are never checked for regressions.
+
+    Args:
+        current: Report from this run
+        baseline: Stored baseline report
+
+    Returns:
+        Human-readable description of each caveat (empty if none)
+    """
+    caveats: list[str] = []
+    now_python = current.get("python", "")
+    base_python = baseline.get("python", "")
+    if now_python.split(".")[:2] != base_python.split(".")[:2]:
+        caveats.append(
+            f"baseline was recorded on Python {base_python or 'unknown'}, "
+            f"this run uses Python {now_python}"
+        )
+    missing = sorted(set(current.get("metrics", {})) - set(baseline.get("metrics", {})))
+    if missing:
+        caveats.append(f"not in the baseline, so not checked: {', '.join(missing)}")
+    return caveats
@@ -0,0 +1,109 @@
+"""End-to-end load test of the real SDK code path against the stand-in server.
+
+Starts a StandInServer in-process, creates a real client with create_client()
+pointed at it, and drives generate_image() from a thread pool. Reports client
+latency percentiles, throughput, failures and the server-side view (requests
+received, connections opened), which exposes SDK retries and connection reuse.
+
+Usage:
+    python -m benchmarks.loadtest --requests 500 --concurrency 32 \\
+        --latency lognormal:-2.3,0.6 --rate-429 0.05 --retry-attempts 3
+
+Note: This code was generated with assistance from AI coding tools
+and has been reviewed and tested by a human.
+"""
+
+import json
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import click
+
+from benchmarks.fake_client import DEFAULT_PAYLOAD_SIZE
+from benchmarks.standin_server import StandInServer
+from gemini_nano_banana_tool.core.client import create_client
+from gemini_nano_banana_tool.core.generator import GenerationError, generate_image
+from gemini_nano_banana_tool.core.models import DEFAULT_MODEL
+
+
+def _percentile(sorted_values: list[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * fraction))
+    return sorted_values[index]
+
+
+@click.command()
+@click.option("--requests", "total", default=200, show_default=True, help="Requests to send")
+@click.option("--concurrency", default=16, show_default=True, help="Client worker threads")
+@click.option("--model", default=DEFAULT_MODEL, show_default=True, help="Model to request")
+@click.option("--latency", default="fixed:0.05", show_default=True, help="Server latency spec")
+@click.option("--rate-429", default=0.0, help="Server 429 injection rate")
+@click.option("--rate-503", default=0.0, help="Server 503 injection rate")
+@click.option("--payload-size", default=DEFAULT_PAYLOAD_SIZE, show_default=True)
+@click.option("--retry-attempts", type=int, help="SDK retry attempts (default: SDK default)")
+def main(
+    total: int,
+    concurrency: int,
+    model: str,
+    latency: str,
+    rate_429: float,
+    rate_503: float,
+    payload_size: int,
+    retry_attempts: int | None,
+) -> None:
+    """Load-test generate_image through the real SDK against a local stand-in."""
+    server = StandInServer(
+        latency=latency, rate_429=rate_429, rate_503=rate_503, payload_size=payload_size
+    )
+    latencies: list[float] = []
+    failures = 0
+
+    with server, tempfile.TemporaryDirectory(prefix="nano-banana-load-") as tmp:
+        client = create_client(
+            api_key="standin", base_url=server.base_url, retry_attempts=retry_attempts
+        )
+
+        def one(index: int) -> float | None:
+            start = time.perf_counter()
+            try:
+                generate_image(
+                    client, f"Load test {index}", str(Path(tmp) / f"{index}.png"), model=model
+                )
+            except GenerationError:
+                return None
+            return time.perf_counter() - start
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for elapsed in pool.map(one, range(total)):
+                if elapsed is None:
+                    failures += 1
+                else:
+                    latencies.append(elapsed)
+        wall = time.perf_counter() - start
+        server_stats = server.stats()
+
+    latencies.sort()
+    report = {
+        "requests": total,
+        "concurrency": concurrency,
+        "succeeded": len(latencies),
+        "failed": failures,
+        "wall_seconds": round(wall, 3),
+        "throughput_per_second": round(total / wall, 2),
+        "latency_ms": {
+            "p50": round(_percentile(latencies, 0.50) * 1000, 1),
+            "p95": round(_percentile(latencies, 0.95) * 1000, 1),
+            "p99": round(_percentile(latencies, 0.99) * 1000, 1),
+        },
+        "server": server_stats,
+    }
+    click.echo(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
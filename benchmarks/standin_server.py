@@ -0,0 +1,383 @@
+"""Local HTTP stand-in for the Gemini and Imagen REST endpoints.
+
+Implements the ``generateContent`` and Imagen ``predict`` shapes that the
+google-genai SDK calls, so the real SDK code path (HTTP client, connection
+pooling, retries) can be load-tested without network access. Latency follows
+a configurable distribution and 429/503 responses can be injected at fixed rates.
+
+``cachedContents`` create/get/delete are implemented with server-side TTL
+expiry, and ``generateContent`` rejects references to unknown or expired cache
+entries like the real API, so context cache lifecycles can be tested too.
+
+Point a client at it with ``create_client(api_key="standin", base_url=server.base_url)``
+or by exporting ``GOOGLE_GEMINI_BASE_URL``.
+
+Usage:
+    python -m benchmarks.standin_server --port 8765 --latency lognormal:-2.3,0.6 --rate-429 0.05
+
+Note: This code was generated with assistance from AI coding tools
+and has been reviewed and tested by a human.
+"""
+
+import base64
+import json
+import math
+import random
+import re
+import threading
+import time
+from collections import Counter
+from datetime import UTC, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+import click
+
+from benchmarks.fake_client import DEFAULT_PAYLOAD_SIZE, DEFAULT_PROMPT_TEXT, make_png
+
+# Matches both Developer API and Vertex AI model paths
+MODEL_PATH = re.compile(
+    r"^/(?P<version>v1\w*)/(?:projects/[^/]+/locations/[^/]+/publishers/google/)?"
+    r"models/(?P<model>[^:/]+):(?P<method>generateContent|predict)$"
+)
+
+# Matches cachedContents collection and entry paths
+CACHE_PATH = re.compile(r"^/(?P<version>v1\w*)/cachedContents(?:/(?P<id>[^/?]+))?$")
+
+# Token count reported for content served from a cache entry
+CACHED_TOKEN_COUNT = 250
+
+ERROR_STATUS = {
+    400: "INVALID_ARGUMENT",
+    403: "PERMISSION_DENIED",
+    429: "RESOURCE_EXHAUSTED",
+    503: "UNAVAILABLE",
+}
+
+
+class LatencyDistribution:
+    """Samples per-request latency in seconds from a named distribution.
+
+    Specs:
+        ``fixed:S``            always S seconds
+        ``uniform:LO,HI``      uniform between LO and HI seconds
+        ``lognormal:MU,SIGMA`` exp(normal(MU, SIGMA)) seconds, a realistic long tail
+    """
+
+    def __init__(self, spec: str = "fixed:0"):
+        """Parse a distribution spec.
+
+        Args:
+            spec: Distribution spec string (see class docstring)
+
+        Raises:
+            ValueError: If the spec is malformed
+        """
+        kind, _, args = spec.partition(":")
+        try:
+            self.params = [float(a) for a in args.split(",")] if args else []
+        except ValueError as e:
+            raise ValueError(f"Invalid latency spec: {spec}") from e
+        expected = {"fixed": 1, "uniform": 2, "lognormal": 2}
+        if kind not in expected or len(self.params) != expected[kind]:
+            raise ValueError(
+                f"Invalid latency spec: {spec}. Use fixed:S, uniform:LO,HI or lognormal:MU,SIGMA"
+            )
+        self.kind = kind
+        self.spec = spec
+
+    def sample(self, rng: random.Random) -> float:
+        """Draw one latency value in seconds."""
+        if self.kind == "fixed":
+            return self.params[0]
+        if self.kind == "uniform":
+            return rng.uniform(self.params[0], self.params[1])
+        return math.exp(rng.gauss(self.params[0], self.params[1]))
+
+
+class StandInServer:
+    """Threaded stand-in server, usable as a context manager.
+
+    Example:
+        >>> with StandInServer(latency="fixed:0.05", rate_429=0.1) as server:
+        ...     client = create_client(api_key="standin", base_url=server.base_url)
+        ...     generate_image(client, "a cat", "cat.png")
+        ...     print(server.stats())
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: str = "fixed:0",
+        rate_429: float = 0.0,
+        rate_503: float = 0.0,
+        payload_size: int = DEFAULT_PAYLOAD_SIZE,
+        seed: int = 0,
+        cache_support: bool = True,
+    ):
+        """Configure the server (it starts listening on start() or __enter__).
+
+        Args:
+            host: Interface to bind
+            port: Port to bind (0 picks a free port)
+            latency: Latency distribution spec (see LatencyDistribution)
+            rate_429: Fraction of requests answered with 429 RESOURCE_EXHAUSTED
+            rate_503: Fraction of requests answered with 503 UNAVAILABLE
+            payload_size: Size in bytes of returned images
+            seed: Random seed for latency and error injection
+            cache_support: Whether cachedContents.create succeeds (when False it
+                fails with 400, like models without context caching)
+        """
+        self.latency = LatencyDistribution(latency)
+        self.cache_support = cache_support
+        # Cache entry name -> expiry time (time.monotonic())
+        self.caches: dict[str, float] = {}
+        self.rate_429 = rate_429
+        self.rate_503 = rate_503
+        self.image_b64 = base64.b64encode(make_png(payload_size)).decode("ascii")
+        self.counters: Counter[str] = Counter()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self.httpd = ThreadingHTTPServer((host, port), _make_handler(self))
+        self.httpd.daemon_threads = True
+
+    @property
+    def base_url(self) -> str:
+        """Base URL to pass as ``http_options.base_url``."""
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host!s}:{port}/"
+
+    def start(self) -> StandInServer:
+        """Start serving on a background thread."""
+        self._thread = threading.Thread(
+            target=self.httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and close the socket."""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self) -> StandInServer:
+        return self.start()
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.stop()
+
+    def stats(self) -> dict[str, int]:
+        """Snapshot of request, status and connection counters."""
+        with self._lock:
+            return dict(self.counters)
+
+    def count(self, key: str) -> None:
+        """Increment a counter (thread-safe)."""
+        with self._lock:
+            self.counters[key] += 1
+
+    def plan_request(self) -> tuple[float, int]:
+        """Decide latency and status code for the next request."""
+        with self._lock:
+            delay = self.latency.sample(self._rng)
+            roll = self._rng.random()
+        if roll < self.rate_429:
+            return delay, 429
+        if roll < self.rate_429 + self.rate_503:
+            return delay, 503
+        return delay, 200
+
+    def create_cache(self, request: dict[str, Any]) -> tuple[int, dict[str, Any]]:
+        """Handle cachedContents.create, returning status and body."""
+        if not self.cache_support:
+            return 400, _error_body(400, "Context caching is not supported for this model")
+        ttl = float(str(request.get("ttl") or "3600s").rstrip("s"))
+        with self._lock:
+            self.counters["caches.created"] += 1
+            name = f"cachedContents/standin-{self.counters['caches.created']}"
+            self.caches[name] = time.monotonic() + ttl
+        expire_time = datetime.now(UTC) + timedelta(seconds=ttl)
+        return 200, {
+            "name": name,
+            "model": request.get("model"),
+            "displayName": request.get("displayName"),
+            "expireTime": expire_time.isoformat().replace("+00:00", "Z"),
+            "usageMetadata": {"totalTokenCount": CACHED_TOKEN_COUNT},
+        }
+
+    def cache_alive(self, name: str) -> bool:
+        """Whether a cache entry exists and has not expired."""
+        with self._lock:
+            expiry = self.caches.get(name)
+            if expiry is not None and expiry <= time.monotonic():
+                del self.caches[name]
+                expiry = None
+        return expiry is not None
+
+    def delete_cache(self, name: str) -> bool:
+        """Delete a cache entry, returning whether it existed."""
+        with self._lock:
+            if self.caches.pop(name, None) is None:
+                return False
+            self.counters["caches.deleted"] += 1
+            return True
+
+    def generate_content_body(self, request: dict[str, Any]) -> dict[str, Any]:
+        """Build a generateContent response for a request body."""
+        config = request.get("generationConfig") or {}
+        if "IMAGE" in (config.get("responseModalities") or []):
+            part: dict[str, Any] = {"inlineData": {"mimeType": "image/png", "data": self.image_b64}}
+        else:
+            part = {"text": DEFAULT_PROMPT_TEXT}
+        usage = {"promptTokenCount": 10, "candidatesTokenCount": 1280, "totalTokenCount": 1290}
+        if request.get("cachedContent"):
+            usage["cachedContentTokenCount"] = CACHED_TOKEN_COUNT
+            usage["promptTokenCount"] += CACHED_TOKEN_COUNT
+            usage["totalTokenCount"] += CACHED_TOKEN_COUNT
+        return {
+            "candidates": [{"content": {"role": "model", "parts": [part]}, "finishReason": "STOP"}],
+            "usageMetadata": usage,
+        }
+
+    def predict_body(self, request: dict[str, Any]) -> dict[str, Any]:
+        """Build an Imagen predict response for a request body."""
+        count = (request.get("parameters") or {}).get("sampleCount", 1)
+        return {
+            "predictions": [
+                {"bytesBase64Encoded": self.image_b64, "mimeType": "image/png"}
+                for _ in range(count)
+            ]
+        }
+
+
+def _make_handler(server: StandInServer) -> type[BaseHTTPRequestHandler]:
+    """Build a request handler class bound to a StandInServer."""
+
+    class Handler(BaseHTTPRequestHandler):
+        # HTTP/1.1 keep-alive so client connection pooling is exercised
+        protocol_version = "HTTP/1.1"
+
+        def setup(self) -> None:
+            super().setup()
+            server.count("connections")
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+        def _send_json(self, status: int, body: dict[str, Any]) -> None:
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _cache_name(self) -> str | None:
+            match = CACHE_PATH.match(self.path.split("?")[0])
+            return f"cachedContents/{match.group('id')}" if match and match.group("id") else None
+
+        def do_GET(self) -> None:  # noqa: N802
+            name = self._cache_name()
+            if self.path == "/stats":
+                self._send_json(200, server.stats())
+            elif name and server.cache_alive(name):
+                self._send_json(200, {"name": name})
+            else:
+                self._send_json(404, _error_body(404, f"Unknown path: {self.path}"))
+
+        def do_DELETE(self) -> None:  # noqa: N802
+            name = self._cache_name()
+            server.count("requests.cachedContents.delete")
+            if name and server.delete_cache(name):
+                self._send_json(200, {})
+            else:
+                self._send_json(404, _error_body(404, f"CachedContent not found: {name}"))
+
+        def do_POST(self) -> None:  # noqa: N802
+            length = int(self.headers.get("Content-Length", 0))
+            raw = self.rfile.read(length) if length else b"{}"
+            if CACHE_PATH.match(self.path.split("?")[0]):
+                server.count("requests.cachedContents.create")
+                self._send_json(*server.create_cache(json.loads(raw or b"{}")))
+                return
+            match = MODEL_PATH.match(self.path.split("?")[0])
+            if not match:
+                self._send_json(404, _error_body(404, f"Unknown path: {self.path}"))
+                return
+            method = match.group("method")
+            server.count(f"requests.{method}")
+
+            delay, status = server.plan_request()
+            if delay > 0:
+                time.sleep(delay)
+            request = json.loads(raw or b"{}")
+            cache_name = request.get("cachedContent")
+            if status == 200 and cache_name and not server.cache_alive(cache_name):
+                server.count("status.403")
+                self._send_json(403, _error_body(403, f"CachedContent not found: {cache_name}"))
+                return
+            server.count(f"status.{status}")
+            if status != 200:
+                self._send_json(status, _error_body(status, "Injected by stand-in server"))
+                return
+
+            if method == "generateContent":
+                self._send_json(200, server.generate_content_body(request))
+            else:
+                self._send_json(200, server.predict_body(request))
+
+    return Handler
+
+
+def _error_body(code: int, message: str) -> dict[str, Any]:
+    """Build a Google API style error body."""
+    status = ERROR_STATUS.get(code, "NOT_FOUND" if code == 404 else "INTERNAL")
+    return {"error": {"code": code, "message": message, "status": status}}
+
+
+@click.command()
+@click.option("--host", default="127.0.0.1", show_default=True, help="Interface to bind")
+@click.option("--port", default=8765, show_default=True, help="Port to listen on")
+@click.option(
+    "--latency",
+    default="fixed:0.05",
+    show_default=True,
+    help="Latency distribution: fixed:S, uniform:LO,HI or lognormal:MU,SIGMA",
+)
+@click.option("--rate-429", default=0.0, help="Fraction of requests answered with 429")
+@click.option("--rate-503", default=0.0, help="Fraction of requests answered with 503")
+@click.option(
+    "--payload-size",
+    default=DEFAULT_PAYLOAD_SIZE,
+    show_default=True,
+    help="Returned image size in bytes",
+)
+@click.option("--seed", default=0, help="Random seed")
+def main(
+    host: str,
+    port: int,
+    latency: str,
+    rate_429: float,
+    rate_503: float,
+    payload_size: int,
+    seed: int,
+) -> None:
+    """Serve Gemini/Imagen stand-in endpoints until interrupted."""
+    server = StandInServer(host, port, latency, rate_429, rate_503, payload_size, seed)
+    click.echo(f"Stand-in server listening on {server.base_url}", err=True)
+    click.echo(f"export GOOGLE_GEMINI_BASE_URL={server.base_url}", err=True)
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        click.echo(json.dumps(server.stats(), indent=2), err=True)
+
+
+if __name__ == "__main__":
+    main()
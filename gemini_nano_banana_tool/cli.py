@@ -7,11 +7,14 @@ and has been reviewed and tested by a human.
 import click
 
 from gemini_nano_banana_tool.commands import (
+    enqueue,
     generate,
+    generate_batch,
     generate_conversation,
     list_aspect_ratios,
     list_models,
     promptgen,
+    worker,
 )
 
 
@@ -73,6 +76,7 @@ def main(ctx: click.Context) -> None:
       gemini-nano-banana-tool promptgen --help
       gemini-nano-banana-tool generate --help
       gemini-nano-banana-tool generate-image --help
+      gemini-nano-banana-tool generate-batch --help
       gemini-nano-banana-tool list-models --help
       gemini-nano-banana-tool list-aspect-ratios --help
     """
@@ -129,7 +133,10 @@ def completion(shell: str) -> None:
 main.add_command(promptgen)
 main.add_command(generate)
 main.add_command(generate, name="generate-image")  # Alias for generate
+main.add_command(generate_batch)
 main.add_command(generate_conversation)
+main.add_command(enqueue)
+main.add_command(worker)
 main.add_command(list_models)
 main.add_command(list_aspect_ratios)
 
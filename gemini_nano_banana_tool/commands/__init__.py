@@ -4,17 +4,22 @@ Note: This code was generated with assistance from AI coding tools
 and has been reviewed and tested by a human.
 """
 
+from gemini_nano_banana_tool.commands.generate_batch_command import generate_batch
 from gemini_nano_banana_tool.commands.generate_command import generate
 from gemini_nano_banana_tool.commands.generate_conversation_command import (
     generate_conversation,
 )
 from gemini_nano_banana_tool.commands.list_commands import list_aspect_ratios, list_models
 from gemini_nano_banana_tool.commands.promptgen_command import promptgen
+from gemini_nano_banana_tool.commands.queue_commands import enqueue, worker
 
 __all__ = [
     "generate",
+    "generate_batch",
     "generate_conversation",
     "list_models",
     "list_aspect_ratios",
     "promptgen",
+    "enqueue",
+    "worker",
 ]
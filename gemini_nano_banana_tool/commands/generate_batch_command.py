@@ -0,0 +1,613 @@
+"""Generate-batch command for generating many images from a manifest.
+
+Note: This code was generated with assistance from AI coding tools
+and has been reviewed and tested by a human.
+"""
+
+import json
+import sys
+from contextlib import nullcontext
+from typing import Any, cast
+
+import click
+from google import genai
+
+from gemini_nano_banana_tool.core.batch import (
+    BatchError,
+    check_manifest,
+    load_manifest,
+    parse_shard,
+    resolve_request,
+    shard_lines,
+)
+from gemini_nano_banana_tool.core.batch_api import (
+    DEFAULT_DECODE_WORKERS,
+    DEFAULT_MAX_POLL_INTERVAL,
+    DEFAULT_POLL_INTERVAL,
+    run_batch_job,
+)
+from gemini_nano_banana_tool.core.client import (
+    AuthenticationError,
+    GeminiClientError,
+    create_client,
+)
+from gemini_nano_banana_tool.core.concurrency import AdaptiveClient, AdaptiveLimiter
+from gemini_nano_banana_tool.core.deadline import DEFAULT_REQUEST_TIMEOUT, Deadline
+from gemini_nano_banana_tool.core.fallback import ModelRouter
+from gemini_nano_banana_tool.core.generator import generate_image
+from gemini_nano_banana_tool.core.hedging import DEFAULT_MAX_HEDGE_RATIO, HedgedClient
+from gemini_nano_banana_tool.core.journal import Journal
+from gemini_nano_banana_tool.core.lock_registry import LockRegistry
+from gemini_nano_banana_tool.core.memory_budget import BudgetedGenerator, ByteBudget, parse_size
+from gemini_nano_banana_tool.core.models import DEFAULT_MODEL
+from gemini_nano_banana_tool.core.ndjson import run_ndjson_stream
+from gemini_nano_banana_tool.core.pool import ClientPool
+from gemini_nano_banana_tool.core.postprocess import PostProcessor
+from gemini_nano_banana_tool.core.progress import Progress
+from gemini_nano_banana_tool.core.scheduler import (
+    DEFAULT_PRIORITY,
+    PRIORITIES,
+    PriorityScheduler,
+    ScheduledClient,
+    request_priority,
+    request_schedule,
+)
+from gemini_nano_banana_tool.core.singleflight import SingleFlight
+from gemini_nano_banana_tool.core.writer import ImageWriter
+from gemini_nano_banana_tool.logging_config import get_logger, setup_logging
+from gemini_nano_banana_tool.utils import ValidationError
+
+logger = get_logger(__name__)
+
+
+@click.command("generate-batch")
+@click.argument("manifest", type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "-a",
+    "--aspect-ratio",
+    default="1:1",
+    help="Default aspect ratio for rows without one (default: 1:1)",
+)
+@click.option(
+    "-m",
+    "--model",
+    default=DEFAULT_MODEL,
+    help=f"Default model for rows without one (default: {DEFAULT_MODEL})",
+)
+@click.option(
+    "-r",
+    "--resolution",
+    type=click.Choice(["1K", "2K", "4K"], case_sensitive=True),
+    help="Default resolution for rows without one (Pro only)",
+)
+@click.option(
+    "--concurrency",
+    default=4,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="Images generated in parallel (interactive mode)",
+)
+@click.option(
+    "--shard",
+    "shard_spec",
+    metavar="I/N",
+    help="Process only shard I of N (e.g. 2/4): rows are split by a hash of their id or "
+    "output, so N machines can each run one shard",
+)
+@click.option(
+    "--journal",
+    "journal_path",
+    type=click.Path(dir_okay=False),
+    help="Checkpoint journal for resuming (default: MANIFEST.journal.jsonl, interactive mode)",
+)
+@click.option(
+    "--no-journal",
+    is_flag=True,
+    help="Don't skip completed requests or record progress (interactive mode)",
+)
+@click.option(
+    "--async-batch",
+    is_flag=True,
+    help="Submit the manifest to the Gemini Batch API (cheaper, completes within hours)",
+)
+@click.option(
+    "--state-file",
+    type=click.Path(dir_okay=False),
+    help="Batch API state file for resuming (default: MANIFEST.batch-state.json)",
+)
+@click.option(
+    "--poll-interval",
+    default=DEFAULT_POLL_INTERVAL,
+    show_default=True,
+    type=click.FloatRange(min=0),
+    help="Initial seconds between Batch API job polls (doubles up to --max-poll-interval)",
+)
+@click.option(
+    "--max-poll-interval",
+    default=DEFAULT_MAX_POLL_INTERVAL,
+    show_default=True,
+    type=click.FloatRange(min=0),
+    help="Maximum seconds between Batch API job polls",
+)
+@click.option(
+    "--decode-workers",
+    default=DEFAULT_DECODE_WORKERS,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="Batch API responses decoded and written in parallel",
+)
+@click.option(
+    "--fallback",
+    is_flag=True,
+    help="Fall back to the next model while a model is overloaded (interactive mode)",
+)
+@click.option(
+    "--coalesce",
+    is_flag=True,
+    help="One API call for identical rows in flight, image linked to every output "
+    "(interactive mode)",
+)
+@click.option(
+    "--coalesce-dir",
+    type=click.Path(file_okay=False),
+    help="Directory shared with other processes to coalesce identical requests across them "
+    "(implies --coalesce)",
+)
+@click.option(
+    "--hedge",
+    is_flag=True,
+    help="Duplicate calls running past the model's p95 latency (interactive mode)",
+)
+@click.option(
+    "--max-hedge-ratio",
+    default=DEFAULT_MAX_HEDGE_RATIO,
+    show_default=True,
+    type=click.FloatRange(min=0, max=1),
+    help="Spend cap for --hedge: duplicate requests allowed per request",
+)
+@click.option(
+    "--timeout",
+    default=DEFAULT_REQUEST_TIMEOUT,
+    show_default=True,
+    type=click.FloatRange(min=0, min_open=True),
+    help="Per-request timeout in seconds (interactive mode)",
+)
+@click.option(
+    "--deadline",
+    "deadline_seconds",
+    type=click.FloatRange(min=0, min_open=True),
+    help="Time limit in seconds for the whole run; later requests fail unsent",
+)
+@click.option(
+    "--progress",
+    "show_progress",
+    is_flag=True,
+    help="Show completed/failed/in-flight counts, images per minute, spend and ETA on stderr "
+    "(interactive mode)",
+)
+@click.option(
+    "--status-file",
+    type=click.Path(dir_okay=False),
+    help="Keep the progress counters in this JSON file for polling (interactive mode)",
+)
+@click.option(
+    "--adaptive-concurrency",
+    is_flag=True,
+    help="Adapt API calls in flight per model to 429s and latency, up to --concurrency "
+    "(interactive mode)",
+)
+@click.option(
+    "--priority",
+    type=click.Choice(PRIORITIES),
+    default=DEFAULT_PRIORITY,
+    show_default=True,
+    help='Priority class for rows without a "priority" field (interactive mode)',
+)
+@click.option(
+    "--max-in-flight",
+    type=click.IntRange(min=1),
+    help="API calls in flight at once, admitted by priority, deadline and age "
+    "(interactive mode; default: --concurrency, no scheduling)",
+)
+@click.option(
+    "--postprocess-workers",
+    type=click.IntRange(min=1),
+    help="Decode, convert and hash images in N worker processes",
+)
+@click.option(
+    "--max-memory",
+    metavar="SIZE",
+    help="Cap estimated bytes of images and reference payloads in flight, e.g. 2G "
+    "(interactive mode)",
+)
+@click.option(
+    "--write-queue",
+    type=click.IntRange(min=1),
+    help="Write images on a background I/O thread, with up to N waiting",
+)
+@click.option(
+    "--fsync",
+    is_flag=True,
+    help="Flush each image to disk before it counts as written (survives power loss)",
+)
+@click.option(
+    "--api-key",
+    type=str,
+    help="Override API key from environment",
+)
+@click.option(
+    "--use-vertex",
+    is_flag=True,
+    help="Use Vertex AI instead of Developer API (interactive mode only)",
+)
+@click.option(
+    "--project",
+    type=str,
+    help="Google Cloud project (for Vertex AI)",
+)
+@click.option(
+    "--location",
+    type=str,
+    help="Google Cloud location (for Vertex AI, default: us-central1)",
+)
+@click.option(
+    "--pool",
+    "pool_config",
+    type=click.Path(exists=True, dir_okay=False),
+    help="JSON file listing several API keys or Vertex AI regions to spread requests over",
+)
+@click.option(
+    "--pool-strategy",
+    type=click.Choice(["least-loaded", "weighted"]),
+    help="How --pool members are picked (default: from the file, else least-loaded)",
+)
+@click.option(
+    "-v",
+    "--verbose",
+    count=True,
+    help="Enable verbose output (use -v for INFO, -vv for DEBUG, -vvv for TRACE)",
+)
+def generate_batch(
+    manifest: str,
+    aspect_ratio: str,
+    model: str,
+    resolution: str | None,
+    concurrency: int,
+    shard_spec: str | None,
+    journal_path: str | None,
+    no_journal: bool,
+    async_batch: bool,
+    state_file: str | None,
+    poll_interval: float,
+    max_poll_interval: float,
+    decode_workers: int,
+    fallback: bool,
+    coalesce: bool,
+    coalesce_dir: str | None,
+    hedge: bool,
+    max_hedge_ratio: float,
+    timeout: float,
+    deadline_seconds: float | None,
+    show_progress: bool,
+    status_file: str | None,
+    adaptive_concurrency: bool,
+    priority: str,
+    max_in_flight: int | None,
+    postprocess_workers: int | None,
+    max_memory: str | None,
+    write_queue: int | None,
+    fsync: bool,
+    api_key: str | None,
+    use_vertex: bool,
+    project: str | None,
+    location: str | None,
+    pool_config: str | None,
+    pool_strategy: str | None,
+    verbose: int,
+) -> None:
+    """Generate all images listed in a JSONL manifest.
+
+    Each manifest line is a JSON object with "prompt" and "output", and
+    optionally "id", "images", "aspect_ratio", "model" and "resolution"
+    (command-line options are the defaults), and the scheduling tags
+    "priority" and "deadline". One JSON result line per
+    request is written to stdout, with "id" and "status" ("ok" or "error").
+
+    \b
+    Examples:
+      # Generate interactively, 8 images at a time
+      gemini-nano-banana-tool generate-batch manifest.jsonl --concurrency 8
+
+    \b
+      # Interrupted or crashed? Rerun to generate only what is missing
+      gemini-nano-banana-tool generate-batch manifest.jsonl --concurrency 8
+
+    \b
+      # Submit to the Batch API and wait for the results
+      gemini-nano-banana-tool generate-batch manifest.jsonl --async-batch
+
+    \b
+      # Resume after the poller was interrupted (same command, same state file)
+      gemini-nano-banana-tool generate-batch manifest.jsonl --async-batch
+
+    \b
+    Checkpoint Journal:
+      Interactive runs record every finished request in a journal
+      (MANIFEST.journal.jsonl by default) with its request hash, output path,
+      output SHA-256 and status. Rerunning the manifest skips requests that
+      completed with their output intact (result lines carry "skipped": true)
+      and retries failed, changed or missing ones. The first Ctrl-C lets
+      in-flight requests finish and be journaled; a second one cancels them.
+
+    \b
+    Sharding:
+      --shard I/N processes only the rows of shard I (1-based) out of N. A
+      row's shard is a hash of its "id" (or "output" without one), so N
+      machines running the same manifest with --shard 1/N ... N/N process
+      disjoint slices without a coordinator, and appending rows never moves
+      existing ones. Each shard keeps its own journal and state file
+      (MANIFEST.shard-I-of-N.journal.jsonl), so a failed node can be rerun
+      or replaced by running the same shard elsewhere.
+
+    \b
+    Batch API Mode:
+      Requests are built exactly like 'generate' requests and submitted as
+      one job per model (inline, or as an uploaded JSONL file for large jobs).
+      Jobs are polled with exponential backoff, then all images are decoded
+      and written in parallel to the manifest's output paths. Progress is
+      saved to the state file, so rerunning the command resumes polling and
+      skips images already written. Imagen models and Vertex AI are not
+      supported in this mode.
+
+    \b
+    Client Pool:
+      --pool FILE spreads interactive requests over several API keys or
+      Vertex AI regions (see 'generate --help'). Batch API jobs are submitted
+      with the pool's first member.
+
+    \b
+    Progress:
+      --progress shows completed, failed and in-flight counts, images per
+      minute, spend so far and ETA on stderr: one line redrawn in place on a
+      terminal, a plain line every 30 seconds otherwise. --status-file FILE
+      keeps the same counters in a JSON file for an orchestrator to poll.
+
+    \b
+    Adaptive Concurrency:
+      With --adaptive-concurrency, --concurrency is a ceiling: each model
+      starts at 2 calls in flight, gains one slot per round of healthy calls,
+      and halves its limit on a 429/503 or when latency exceeds twice its
+      baseline. Limits are logged at the end of the run (-v).
+
+    \b
+    Priority Scheduling:
+      --max-in-flight N caps the API calls in flight; waiting requests are
+      admitted by priority class ("interactive" > "batch" > "backfill", from
+      the row's "priority" field or --priority), then earliest "deadline"
+      (ISO 8601 or Unix time) first. A request moves up one class for every
+      30 seconds it waits, so backfill rows are never starved. Run it with
+      --concurrency above --max-in-flight so there is something to choose
+      from.
+
+    \b
+    Post-processing:
+      --postprocess-workers N decodes each image, converts it to the format
+      of its output extension (e.g. PNG from the API to .jpg or .webp) and
+      hashes it in N worker processes instead of on the request or decode
+      threads. The result gets a "postprocess" entry with sha256, size,
+      format, width and height, and the journal reuses the hash.
+
+    \b
+    Memory Budget:
+      --max-memory SIZE (e.g. 2G) caps, in interactive mode, the estimated
+      bytes held by requests in flight: reference images plus the response
+      and decoded image, sized by resolution (a 4K image counts for about
+      72 MiB). Requests wait for budget before they are built and return it
+      once their image is written. The budget's peak and the process's peak
+      RSS are logged at the end of the run (-v).
+
+    \b
+    Writing Images:
+      Images are written to a temporary file and renamed into place, so no
+      reader sees a partial file. --fsync also flushes each file and the
+      rename to disk, so a journaled image survives a power loss.
+      --write-queue N hands the writes to a background I/O thread, so
+      request and decode threads don't wait on a slow (network) filesystem;
+      up to N images wait to be written. A row can then be reported and
+      journaled before its file exists; every file is written before the
+      command exits, a failed write is logged and makes the exit status 1,
+      and a rerun regenerates it (its output is missing).
+
+    \b
+    Timeouts:
+      --timeout bounds every interactive request. --deadline bounds the run:
+      interactive requests not yet started fail with "deadline exceeded", and
+      in Batch API mode polling stops (rerun the command to resume).
+    """
+    setup_logging(verbose)
+    logger.info("Starting batch generation command")
+    defaults = {"aspect_ratio": aspect_ratio, "model": model, "resolution": resolution}
+
+    if async_batch and use_vertex:
+        raise click.UsageError("--async-batch is only supported with the Gemini Developer API")
+    if write_queue and postprocess_workers:
+        raise click.UsageError(
+            "--write-queue can't be combined with --postprocess-workers "
+            "(worker processes write their own images)"
+        )
+    if write_queue and coalesce_dir:
+        raise click.UsageError("--write-queue can't be combined with --coalesce-dir")
+
+    budget = None
+    if max_memory:
+        try:
+            budget = ByteBudget(parse_size(max_memory))
+        except ValidationError as e:
+            raise click.BadParameter(str(e), param_hint="--max-memory") from e
+
+    shard = None
+    run_name = manifest
+    if shard_spec:
+        try:
+            shard = parse_shard(shard_spec)
+        except ValidationError as e:
+            raise click.BadParameter(str(e), param_hint="--shard") from e
+        run_name = f"{manifest}.shard-{shard[0]}-of-{shard[1]}"
+        logger.info(f"Processing shard {shard[0]} of {shard[1]}")
+
+    deadline = Deadline(deadline_seconds)
+    try:
+        client = create_client(
+            api_key=api_key,
+            use_vertex=use_vertex,
+            project=project,
+            location=location,
+            pool_config=pool_config,
+            pool_strategy=pool_strategy,
+        )
+        postprocessor: PostProcessor | ImageWriter | None = None
+        if postprocess_workers:
+            postprocessor = PostProcessor(postprocess_workers, fsync=fsync)
+        elif write_queue or fsync:
+            postprocessor = ImageWriter(write_queue or 0, fsync=fsync)
+
+        if not async_batch:
+            # Rows are streamed, so check for duplicates up front as load_manifest() does
+            check_manifest(manifest, shard)
+            if hedge:
+                client = cast(genai.Client, HedgedClient(client, max_hedge_ratio=max_hedge_ratio))
+            limiter = None
+            if adaptive_concurrency:
+                limiter = AdaptiveLimiter(max_limit=concurrency)
+                client = cast(genai.Client, AdaptiveClient(client, limiter))
+            scheduler = None
+            if max_in_flight:
+                scheduler = PriorityScheduler(max_in_flight)
+                client = cast(genai.Client, ScheduledClient(client, scheduler))
+            generate_fn = ModelRouter().generate_image if fallback else generate_image
+            if budget:
+                generate_fn = BudgetedGenerator(budget, generate_fn).generate_image
+            if coalesce or coalesce_dir:
+                registry = LockRegistry(coalesce_dir) if coalesce_dir else None
+                generate_fn = SingleFlight(generate_fn, registry).generate_image
+            journal = None if no_journal else Journal(journal_path or f"{run_name}.journal.jsonl")
+
+            def generate_resolved(resolved: dict[str, Any]) -> dict[str, Any]:
+                return generate_fn(
+                    client=client,
+                    prompt=resolved["prompt"],
+                    output_path=resolved["output"],
+                    reference_images=resolved["images"] or None,
+                    aspect_ratio=resolved["aspect_ratio"],
+                    model=resolved["model"],
+                    resolution=resolved["resolution"],
+                    timeout=timeout,
+                    deadline=deadline,
+                    postprocessor=postprocessor,
+                )
+
+            def handle(request: dict[str, Any]) -> dict[str, Any]:
+                resolved = resolve_request(request, defaults)
+                with request_priority(*request_schedule(request, priority)):
+                    if journal is None:
+                        return generate_resolved(resolved)
+                    return journal.run(resolved, generate_resolved)
+
+            progress = None
+            if show_progress or status_file:
+                progress = Progress(
+                    _count_requests(manifest, shard), display=show_progress, status_path=status_file
+                )
+            try:
+                with (
+                    open(manifest, encoding="utf-8") as lines,
+                    progress or nullcontext(),
+                    postprocessor or nullcontext(),
+                ):
+                    counts = run_ndjson_stream(
+                        shard_lines(lines, shard),
+                        handle,
+                        click.echo,
+                        concurrency,
+                        deadline=deadline,
+                        progress=progress,
+                    )
+            finally:
+                if journal:
+                    journal.close()
+                    logger.info(
+                        f"Journal {journal.path}: {journal.skipped} skipped, "
+                        f"{journal.recorded} recorded"
+                    )
+            if budget:
+                logger.info(f"Memory budget metrics: {budget.report()}")
+            if scheduler:
+                logger.info(f"Scheduler metrics: {scheduler.metrics.snapshot()}")
+                client = cast(ScheduledClient, client).client
+            if limiter:
+                logger.info(f"Adaptive concurrency metrics: {limiter.metrics.snapshot()}")
+                client = cast(AdaptiveClient, client).client
+            if isinstance(client, HedgedClient):
+                logger.info(f"Hedging metrics: {client.metrics.snapshot()}")
+                client = client.client
+            if isinstance(client, ClientPool):
+                for member in client.stats():
+                    logger.info(f"Pool member stats: {member}")
+            write_failed = False
+            if isinstance(postprocessor, ImageWriter):
+                logger.info(f"Writer metrics: {postprocessor.metrics.snapshot()}")
+                write_failed = bool(postprocessor.failed)
+            sys.exit(1 if counts["failed"] or write_failed else 0)
+
+        records: dict[str, dict[str, Any]] = {}
+        resolved_requests: list[dict[str, Any]] = []
+        rows = load_manifest(manifest, shard)
+        for row in rows:
+            try:
+                resolved_requests.append({"id": row["id"], **resolve_request(row, defaults)})
+            except ValidationError as e:
+                records[str(row["id"])] = {"id": row["id"], "status": "error", "error": str(e)}
+
+        with postprocessor or nullcontext():
+            results = run_batch_job(
+                client,
+                resolved_requests,
+                state_path=state_file or f"{run_name}.batch-state.json",
+                poll_interval=poll_interval,
+                max_poll_interval=max_poll_interval,
+                decode_workers=decode_workers,
+                deadline=deadline,
+                postprocessor=postprocessor,
+            )
+        records.update({str(record["id"]): record for record in results})
+
+        failed = 0
+        for row in rows:
+            record = records[str(row["id"])]
+            failed += record["status"] != "ok"
+            click.echo(json.dumps(record, ensure_ascii=False, default=str))
+        logger.info(f"Batch finished: {len(rows) - failed} succeeded, {failed} failed")
+        write_failed = isinstance(postprocessor, ImageWriter) and bool(postprocessor.failed)
+        sys.exit(1 if failed or write_failed else 0)
+
+    except AuthenticationError as e:
+        logger.error(f"Authentication failed: {e}")
+        click.echo(f"Authentication Error: {e}", err=True)
+        sys.exit(1)
+    except GeminiClientError as e:
+        logger.error(f"Client error: {e}")
+        click.echo(f"Client Error: {e}", err=True)
+        sys.exit(1)
+    except BatchError as e:
+        logger.error(f"Batch error: {e}")
+        click.echo(f"Batch Error: {e}", err=True)
+        sys.exit(1)
+    except KeyboardInterrupt:
+        logger.warning("Operation interrupted by user")
+        sys.exit(130)
+
+
+def _count_requests(manifest: str, shard: tuple[int, int] | None) -> int:
+    """Count the requests of a manifest shard (the run's total, for the ETA)."""
+    with open(manifest, encoding="utf-8") as lines:
+        return sum(1 for line in shard_lines(lines, shard) if line.strip())
@@ -6,13 +6,43 @@ and has been reviewed and tested by a human.
 
 import json
 import sys
+from collections.abc import Callable
+from contextlib import nullcontext
+from functools import partial
+from typing import Any, cast
 
 import click
+from google import genai
 
+from gemini_nano_banana_tool.core.batch import resolve_request
 from gemini_nano_banana_tool.core.client import AuthenticationError, create_client
+from gemini_nano_banana_tool.core.concurrency import AdaptiveClient, AdaptiveLimiter
+from gemini_nano_banana_tool.core.deadline import DEFAULT_REQUEST_TIMEOUT, Deadline
+from gemini_nano_banana_tool.core.fallback import ModelRouter
 from gemini_nano_banana_tool.core.generator import GenerationError, generate_image
+from gemini_nano_banana_tool.core.hedging import DEFAULT_MAX_HEDGE_RATIO, HedgedClient
+from gemini_nano_banana_tool.core.lock_registry import LockRegistry
+from gemini_nano_banana_tool.core.memory_budget import BudgetedGenerator, ByteBudget, parse_size
 from gemini_nano_banana_tool.core.models import DEFAULT_MODEL
+from gemini_nano_banana_tool.core.ndjson import run_ndjson_stream, upstream_error
+from gemini_nano_banana_tool.core.postprocess import PostProcessor
+from gemini_nano_banana_tool.core.progress import Progress
+from gemini_nano_banana_tool.core.prompt_cache import (
+    DEFAULT_CACHE_TTL,
+    REFRESH_MARGIN,
+    PromptCacheManager,
+)
 from gemini_nano_banana_tool.core.promptgen import PromptGenerationError, generate_prompt
+from gemini_nano_banana_tool.core.scheduler import (
+    DEFAULT_PRIORITY,
+    PRIORITIES,
+    PriorityScheduler,
+    ScheduledClient,
+    request_priority,
+    request_schedule,
+)
+from gemini_nano_banana_tool.core.singleflight import SingleFlight
+from gemini_nano_banana_tool.core.writer import ImageWriter
 from gemini_nano_banana_tool.logging_config import get_logger, setup_logging
 from gemini_nano_banana_tool.utils import (
     ValidationError,
@@ -32,9 +62,8 @@ logger = get_logger(__name__)
 @click.option(
     "-o",
     "--output",
-    required=True,
     type=click.Path(),
-    help="Output image file path (required)",
+    help="Output image file path (required unless --ndjson)",
 )
 @click.option(
     "-f",
@@ -94,6 +123,17 @@ logger = get_logger(__name__)
     type=str,
     help="Google Cloud location (for Vertex AI, default: us-central1)",
 )
+@click.option(
+    "--pool",
+    "pool_config",
+    type=click.Path(exists=True, dir_okay=False),
+    help="JSON file listing several API keys or Vertex AI regions to spread requests over",
+)
+@click.option(
+    "--pool-strategy",
+    type=click.Choice(["least-loaded", "weighted"]),
+    help="How --pool members are picked (default: from the file, else least-loaded)",
+)
 @click.option(
     "-v",
     "--verbose",
@@ -113,9 +153,145 @@ logger = get_logger(__name__)
     ),
     help="Template for prompt enhancement (requires --promptgen)",
 )
+@click.option(
+    "--record",
+    "record_dir",
+    type=click.Path(file_okay=False),
+    help="Record API responses to a cassette directory for later --replay",
+)
+@click.option(
+    "--replay",
+    "replay_dir",
+    type=click.Path(exists=True, file_okay=False),
+    help="Answer API requests from a recorded cassette directory (no API calls)",
+)
+@click.option(
+    "--ndjson",
+    is_flag=True,
+    help="Stream mode: read one JSON request per line from stdin, write one result per line",
+)
+@click.option(
+    "--concurrency",
+    default=4,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="Images generated in parallel in --ndjson mode",
+)
+@click.option(
+    "--promptgen-concurrency",
+    default=4,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="Prompts enhanced in parallel in --ndjson --promptgen mode",
+)
+@click.option(
+    "--context-cache",
+    is_flag=True,
+    help="Cache the system prompt per model and template via the Gemini context cache "
+    "(--ndjson --promptgen mode; falls back to inline text when caching is unavailable)",
+)
+@click.option(
+    "--cache-ttl",
+    default=DEFAULT_CACHE_TTL,
+    show_default=True,
+    type=click.IntRange(min=REFRESH_MARGIN + 1),
+    help="Lifetime in seconds of context cache entries",
+)
+@click.option(
+    "--fallback",
+    is_flag=True,
+    help="Fall back to the next model (Pro → Flash → Imagen fast) while a model is overloaded",
+)
+@click.option(
+    "--coalesce",
+    is_flag=True,
+    help="Make one API call for identical requests in flight and link its image to every output "
+    "(--ndjson mode)",
+)
+@click.option(
+    "--coalesce-dir",
+    type=click.Path(file_okay=False),
+    help="Directory shared with other processes: identical requests in flight in any of "
+    "them share one API call (implies --coalesce)",
+)
+@click.option(
+    "--hedge",
+    is_flag=True,
+    help="Send a duplicate request when a call runs past the model's p95 latency (--ndjson mode)",
+)
+@click.option(
+    "--max-hedge-ratio",
+    default=DEFAULT_MAX_HEDGE_RATIO,
+    show_default=True,
+    type=click.FloatRange(min=0, max=1),
+    help="Spend cap for --hedge: duplicate requests allowed per request",
+)
+@click.option(
+    "--timeout",
+    default=DEFAULT_REQUEST_TIMEOUT,
+    show_default=True,
+    type=click.FloatRange(min=0, min_open=True),
+    help="Per-request timeout in seconds",
+)
+@click.option(
+    "--deadline",
+    "deadline_seconds",
+    type=click.FloatRange(min=0, min_open=True),
+    help="Time limit in seconds for the whole --ndjson run; later requests fail unsent",
+)
+@click.option(
+    "--progress",
+    "show_progress",
+    is_flag=True,
+    help="Show completed/failed/in-flight counts, images per minute, spend and ETA on stderr "
+    "(--ndjson mode)",
+)
+@click.option(
+    "--status-file",
+    type=click.Path(dir_okay=False),
+    help="Keep the progress counters in this JSON file for polling (--ndjson mode)",
+)
+@click.option(
+    "--adaptive-concurrency",
+    is_flag=True,
+    help="Adapt API calls in flight per model to 429s and latency, up to --concurrency "
+    "(--ndjson mode)",
+)
+@click.option(
+    "--priority",
+    type=click.Choice(PRIORITIES),
+    default=DEFAULT_PRIORITY,
+    show_default=True,
+    help='Priority class for requests without a "priority" field (--ndjson mode)',
+)
+@click.option(
+    "--max-in-flight",
+    type=click.IntRange(min=1),
+    help="API calls in flight at once, admitted by priority, deadline and age (--ndjson mode)",
+)
+@click.option(
+    "--postprocess-workers",
+    type=click.IntRange(min=1),
+    help="Decode, convert and hash images in N worker processes (--ndjson mode)",
+)
+@click.option(
+    "--max-memory",
+    metavar="SIZE",
+    help="Cap estimated bytes of images and reference payloads in flight, e.g. 2G (--ndjson mode)",
+)
+@click.option(
+    "--write-queue",
+    type=click.IntRange(min=1),
+    help="Write images on a background I/O thread, with up to N waiting (--ndjson mode)",
+)
+@click.option(
+    "--fsync",
+    is_flag=True,
+    help="Flush each image to disk before it counts as written (survives power loss)",
+)
 def generate(
     prompt: str | None,
-    output: str,
+    output: str | None,
     prompt_file: str | None,
     stdin: bool,
     images: tuple[str, ...],
@@ -126,9 +302,34 @@ def generate(
     use_vertex: bool,
     project: str | None,
     location: str | None,
+    pool_config: str | None,
+    pool_strategy: str | None,
     verbose: int,
     promptgen: bool,
     promptgen_template: str | None,
+    record_dir: str | None,
+    replay_dir: str | None,
+    ndjson: bool,
+    concurrency: int,
+    promptgen_concurrency: int,
+    context_cache: bool,
+    cache_ttl: int,
+    fallback: bool,
+    coalesce: bool,
+    coalesce_dir: str | None,
+    hedge: bool,
+    max_hedge_ratio: float,
+    timeout: float,
+    deadline_seconds: float | None,
+    show_progress: bool,
+    status_file: str | None,
+    adaptive_concurrency: bool,
+    priority: str,
+    max_in_flight: int | None,
+    postprocess_workers: int | None,
+    max_memory: str | None,
+    write_queue: int | None,
+    fsync: bool,
 ) -> None:
     """Generate images from text prompts with optional reference images.
 
@@ -173,6 +374,117 @@ def generate(
       gemini-nano-banana-tool generate "portrait photo" -o portrait.png \\
         --promptgen --promptgen-template photography
 
+      # Record API responses, then replay them offline (no API cost)
+      gemini-nano-banana-tool generate "sunset" -o sunset.png --record cassette/
+      gemini-nano-banana-tool generate "sunset" -o sunset.png --replay cassette/
+
+      # Stream many requests through one process (results in completion order)
+      cat requests.ndjson | gemini-nano-banana-tool generate --ndjson --concurrency 8
+
+      # Bulk pipeline: enhance descriptions, then generate images
+      cat descriptions.ndjson | gemini-nano-banana-tool promptgen --ndjson | \\
+        gemini-nano-banana-tool generate --ndjson
+
+      # Same in one process: enhancement overlaps with image generation
+      cat requests.ndjson | gemini-nano-banana-tool generate --ndjson --promptgen \\
+        --promptgen-concurrency 8 --concurrency 2
+
+    \b
+    NDJSON Mode:
+      Each input line is a JSON object with "prompt" and "output", and optionally
+      "id", "images", "aspect_ratio", "model" and "resolution" (command-line
+      options are the defaults). Each output line is the result JSON plus "id"
+      and "status" ("ok" or "error" with an "error" message).
+
+    \b
+    Client Pool:
+      --pool FILE spreads requests over several credentials with separate
+      quotas, e.g. {"members": [{"name": "key-a", "api_key_env": "KEY_A"},
+      {"name": "eu", "use_vertex": true, "project": "p",
+      "location": "europe-west4", "weight": 2}]}. Members are picked
+      least-loaded (default) or by weighted round robin; members with a high
+      429 rate are quarantined and throttled calls retry on another member.
+
+    \b
+    Model Fallback:
+      With --fallback, each model has a circuit breaker that opens when most
+      recent requests failed with 429/5xx/timeouts. While it is open, requests
+      go to the next model of the chain (Pro → Flash → Imagen fast), with
+      unsupported parameters (resolution, extra reference images) rewritten.
+      "served_by_model" in the result names the model actually used.
+
+    \b
+    Coalescing:
+      With --coalesce, identical requests in flight at the same time (same
+      model, prompt, reference image contents, aspect ratio and resolution)
+      share one API call; its image is hardlinked (or copied) to every
+      request's output and the extra results carry "coalesced": true.
+      --coalesce-dir DIR extends this to every process using the same
+      directory (e.g. cron jobs): a process that finds an identical request
+      in flight elsewhere waits for its image instead of calling the API.
+      Locks of crashed processes are recovered.
+
+    \b
+    Progress:
+      --progress shows completed, failed and in-flight counts, images per
+      minute and spend so far on stderr: one line redrawn in place on a
+      terminal, a plain line every 30 seconds otherwise. --status-file FILE
+      keeps the same counters in a JSON file for an orchestrator to poll.
+
+    \b
+    Adaptive Concurrency:
+      With --adaptive-concurrency, --concurrency is a ceiling: each model
+      starts at 2 calls in flight, gains one slot per round of healthy calls,
+      and halves its limit on a 429/503 or when latency exceeds twice its
+      baseline. Limits are logged at the end of the run (-v).
+
+    \b
+    Priority Scheduling:
+      --max-in-flight N caps the API calls in flight in --ndjson mode; waiting
+      requests are admitted by priority class ("interactive" > "batch" >
+      "backfill", from the request's "priority" field or --priority), then
+      earliest "deadline" (ISO 8601 or Unix time) first. A request moves up
+      one class for every 30 seconds it waits, so backfill work is never
+      starved. Use a --concurrency above --max-in-flight so requests queue
+      in the scheduler rather than in stdin.
+
+    \b
+    Post-processing:
+      --postprocess-workers N decodes each image, converts it to the format
+      of its output extension (e.g. PNG from the API to .jpg or .webp) and
+      hashes it in N worker processes, so this CPU work runs in parallel
+      instead of on the request threads. The result gets a "postprocess"
+      entry with sha256, size, format, width and height.
+
+    \b
+    Memory Budget:
+      --max-memory SIZE (e.g. 2G) caps the estimated bytes held by requests
+      in flight: reference images plus the response and decoded image, sized
+      by resolution (a 4K image counts for about 72 MiB). Requests wait for
+      budget before they are built and return it once their image is
+      written. The budget's peak and the process's peak RSS are logged at
+      the end of the run (-v).
+
+    \b
+    Writing Images:
+      Images are written to a temporary file and renamed into place, so no
+      reader sees a partial file. --fsync also flushes each file and the
+      rename to disk, so an image reported as written survives a power
+      loss. --write-queue N hands the writes to a background I/O thread, so
+      request threads don't wait on a slow (network) filesystem; up to N
+      images wait to be written. A result can then be printed before its
+      file exists; every file is written before the command exits, and a
+      failed write is logged and makes the exit status 1.
+
+    \b
+    Timeouts:
+      --timeout bounds every API request, so a stuck connection can't hold a
+      worker forever. --deadline bounds a whole --ndjson run: requests still
+      queued when it passes fail with "deadline exceeded" without being sent,
+      and in-flight ones are cut short. The first Ctrl-C lets in-flight
+      requests finish, a second one cancels them. Output files are written
+      atomically, so no partial images are left behind.
+
     \b
     Output Format:
       Returns JSON to stdout with structure:
@@ -209,7 +521,161 @@ def generate(
     setup_logging(verbose)
     logger.info("Starting image generation command")
 
+    if ndjson:
+        if prompt or prompt_file or stdin or output or images:
+            raise click.UsageError(
+                "--ndjson reads prompts, outputs and images from stdin request objects; "
+                "don't combine it with PROMPT, --prompt-file, --stdin, --output or --image"
+            )
+    elif not output:
+        raise click.UsageError("Missing option '-o' / '--output'.")
+    if context_cache and not (ndjson and promptgen):
+        raise click.UsageError("--context-cache requires --ndjson and --promptgen")
+    if hedge and not ndjson:
+        raise click.UsageError("--hedge requires --ndjson")
+    if coalesce and not ndjson:
+        raise click.UsageError("--coalesce requires --ndjson")
+    if deadline_seconds is not None and not ndjson:
+        raise click.UsageError("--deadline requires --ndjson")
+    if (show_progress or status_file) and not ndjson:
+        raise click.UsageError("--progress and --status-file require --ndjson")
+    if adaptive_concurrency and not ndjson:
+        raise click.UsageError("--adaptive-concurrency requires --ndjson")
+    if max_in_flight and not ndjson:
+        raise click.UsageError("--max-in-flight requires --ndjson")
+    if postprocess_workers and not ndjson:
+        raise click.UsageError("--postprocess-workers requires --ndjson")
+    if max_memory and not ndjson:
+        raise click.UsageError("--max-memory requires --ndjson")
+    if write_queue and not ndjson:
+        raise click.UsageError("--write-queue requires --ndjson")
+    if write_queue and postprocess_workers:
+        raise click.UsageError(
+            "--write-queue can't be combined with --postprocess-workers "
+            "(worker processes write their own images)"
+        )
+    if write_queue and coalesce_dir:
+        raise click.UsageError("--write-queue can't be combined with --coalesce-dir")
+    budget = None
+    if max_memory:
+        try:
+            budget = ByteBudget(parse_size(max_memory))
+        except ValidationError as e:
+            raise click.BadParameter(str(e), param_hint="--max-memory") from e
+
     try:
+        if ndjson:
+            if promptgen_template and not promptgen:
+                click.echo("Error: --promptgen-template requires --promptgen flag", err=True)
+                sys.exit(1)
+            client = create_client(
+                api_key=api_key,
+                use_vertex=use_vertex,
+                project=project,
+                location=location,
+                pool_config=pool_config,
+                pool_strategy=pool_strategy,
+                record_dir=record_dir,
+                replay_dir=replay_dir,
+            )
+            if hedge:
+                client = cast(genai.Client, HedgedClient(client, max_hedge_ratio=max_hedge_ratio))
+            limiter = None
+            if adaptive_concurrency:
+                limiter = AdaptiveLimiter(max_limit=concurrency)
+                client = cast(genai.Client, AdaptiveClient(client, limiter))
+            scheduler = None
+            if max_in_flight:
+                scheduler = PriorityScheduler(max_in_flight)
+                client = cast(genai.Client, ScheduledClient(client, scheduler))
+            defaults = {"aspect_ratio": aspect_ratio, "model": model, "resolution": resolution}
+            cache = PromptCacheManager(client, ttl_seconds=cache_ttl) if context_cache else None
+            generate_fn = ModelRouter().generate_image if fallback else generate_image
+            if budget:
+                generate_fn = BudgetedGenerator(budget, generate_fn).generate_image
+            if coalesce or coalesce_dir:
+                generate_fn = _coalescing(generate_fn, coalesce_dir)
+            postprocessor: PostProcessor | ImageWriter | None = None
+            if postprocess_workers:
+                postprocessor = PostProcessor(postprocess_workers, fsync=fsync)
+            elif write_queue or fsync:
+                postprocessor = ImageWriter(write_queue or 0, fsync=fsync)
+            if postprocessor:
+                generate_fn = partial(generate_fn, postprocessor=postprocessor)
+            deadline = Deadline(deadline_seconds)
+
+            def handle(request: dict[str, Any]) -> dict[str, Any]:
+                with request_priority(*request_schedule(request, priority)):
+                    return _generate_from_request(
+                        client,
+                        request,
+                        defaults,
+                        promptgen,
+                        promptgen_template,
+                        generate_fn,
+                        timeout,
+                        deadline,
+                    )
+
+            def prepare(request: dict[str, Any]) -> dict[str, Any]:
+                schedule = request_schedule(request, priority)
+                with request_priority(*schedule):
+                    prepared = _prepare_request(
+                        client, request, defaults, promptgen, promptgen_template, cache
+                    )
+                return {**prepared, "schedule": schedule}
+
+            def generate_stage(prepared: dict[str, Any]) -> dict[str, Any]:
+                with request_priority(*prepared["schedule"]):
+                    return _generate_prepared(client, prepared, generate_fn, timeout, deadline)
+
+            progress = None
+            if show_progress or status_file:
+                progress = Progress(display=show_progress, status_path=status_file)
+            with progress or nullcontext(), postprocessor or nullcontext():
+                if promptgen:
+                    # Enhance and generate in separate stages so the LLM call for
+                    # the next request overlaps with the image call for this one
+                    try:
+                        counts = run_ndjson_stream(
+                            sys.stdin,
+                            generate_stage,
+                            click.echo,
+                            concurrency,
+                            prepare=prepare,
+                            prepare_concurrency=promptgen_concurrency,
+                            deadline=deadline,
+                            progress=progress,
+                        )
+                    finally:
+                        if cache:
+                            cache.close()
+                else:
+                    counts = run_ndjson_stream(
+                        sys.stdin,
+                        handle,
+                        click.echo,
+                        concurrency,
+                        deadline=deadline,
+                        progress=progress,
+                    )
+            if budget:
+                logger.info(f"Memory budget metrics: {budget.report()}")
+            if scheduler:
+                logger.info(f"Scheduler metrics: {scheduler.metrics.snapshot()}")
+                client = cast(ScheduledClient, client).client
+            if limiter:
+                logger.info(f"Adaptive concurrency metrics: {limiter.metrics.snapshot()}")
+                client = cast(AdaptiveClient, client).client
+            if isinstance(client, HedgedClient):
+                logger.info(f"Hedging metrics: {client.metrics.snapshot()}")
+            write_failed = False
+            if isinstance(postprocessor, ImageWriter):
+                logger.info(f"Writer metrics: {postprocessor.metrics.snapshot()}")
+                write_failed = bool(postprocessor.failed)
+            sys.exit(1 if counts["failed"] or write_failed else 0)
+
+        assert output is not None
         # Log command configuration
         logger.info(f"Output file: {output}")
         logger.debug(f"Aspect ratio: {aspect_ratio}")
@@ -262,6 +728,10 @@ def generate(
                 use_vertex=use_vertex,
                 project=project,
                 location=location,
+                pool_config=pool_config,
+                pool_strategy=pool_strategy,
+                record_dir=record_dir,
+                replay_dir=replay_dir,
             )
             logger.debug("Client created successfully")
         except AuthenticationError as e:
@@ -309,7 +779,10 @@ def generate(
                 f"reference_images={len(images) if images else 0}"
             )
 
-            result = generate_image(
+            generate_fn = ModelRouter().generate_image if fallback else generate_image
+            if coalesce_dir:
+                generate_fn = _coalescing(generate_fn, coalesce_dir)
+            result = generate_fn(
                 client=client,
                 prompt=prompt_text,
                 output_path=output,
@@ -317,20 +790,12 @@ def generate(
                 aspect_ratio=aspect_ratio,
                 model=model,
                 resolution=resolution,
+                timeout=timeout,
+                postprocessor=ImageWriter(fsync=True) if fsync else None,
             )
 
             # Add promptgen metadata to result if used
-            if promptgen and promptgen_result:
-                result["promptgen"] = {
-                    "enabled": True,
-                    "original_prompt": original_prompt,
-                    "enhanced_prompt": prompt_text,
-                    "template_used": promptgen_result.get("template_used"),
-                    "tokens_used": promptgen_result["tokens_used"],
-                    "estimated_cost_usd": promptgen_result["estimated_cost_usd"],
-                }
-            else:
-                result["promptgen"] = {"enabled": False}
+            result["promptgen"] = _promptgen_metadata(original_prompt, promptgen_result)
 
             # Output JSON result to stdout
             click.echo(json.dumps(result, indent=2))
@@ -354,3 +819,139 @@ def generate(
         logger.error(f"Unexpected error: {type(e).__name__}: {e}")
         logger.debug("Full traceback:", exc_info=True)
         sys.exit(1)
+
+
+def _coalescing(
+    generate_fn: Callable[..., dict[str, Any]], coalesce_dir: str | None
+) -> Callable[..., dict[str, Any]]:
+    """Put a single-flight layer (cross-process with a directory) in front of generate_fn."""
+    registry = LockRegistry(coalesce_dir) if coalesce_dir else None
+    return SingleFlight(generate_fn, registry).generate_image
+
+
+def _promptgen_metadata(
+    original_prompt: str, promptgen_result: dict[str, Any] | None
+) -> dict[str, Any]:
+    """Build the "promptgen" section of a generate result."""
+    if not promptgen_result:
+        return {"enabled": False}
+    return {
+        "enabled": True,
+        "original_prompt": original_prompt,
+        "enhanced_prompt": promptgen_result["prompt"],
+        "template_used": promptgen_result.get("template_used"),
+        "tokens_used": promptgen_result["tokens_used"],
+        "estimated_cost_usd": promptgen_result["estimated_cost_usd"],
+    }
+
+
+def _generate_from_request(
+    client: genai.Client,
+    request: dict[str, Any],
+    defaults: dict[str, Any],
+    promptgen: bool,
+    promptgen_template: str | None,
+    generate_fn: Callable[..., dict[str, Any]] = generate_image,
+    timeout: float | None = None,
+    deadline: Deadline | None = None,
+) -> dict[str, Any]:
+    """Validate and run one --ndjson request.
+
+    Args:
+        client: Shared client
+        request: Request object ("prompt", "output", optional overrides)
+        defaults: Command-line defaults for aspect_ratio, model and resolution
+        promptgen: Whether to enhance the prompt first
+        promptgen_template: Template for prompt enhancement
+        generate_fn: generate_image() or a layer in front of it (--fallback, --coalesce)
+        timeout: Per-request timeout in seconds
+        deadline: Deadline shared by the whole run
+
+    Returns:
+        Generation result (same shape as single-image mode)
+
+    Raises:
+        ValidationError: If the request is incomplete or invalid
+        GenerationError: If the upstream request failed or generation fails
+        PromptGenerationError: If prompt enhancement fails
+    """
+    prepared = _prepare_request(client, request, defaults, promptgen, promptgen_template)
+    return _generate_prepared(client, prepared, generate_fn, timeout, deadline)
+
+
+def _prepare_request(
+    client: genai.Client,
+    request: dict[str, Any],
+    defaults: dict[str, Any],
+    promptgen: bool,
+    promptgen_template: str | None,
+    cache: PromptCacheManager | None = None,
+) -> dict[str, Any]:
+    """Validate a --ndjson request and run its prompt enhancement stage.
+
+    Args:
+        client: Shared client
+        request: Request object ("prompt", "output", optional overrides)
+        defaults: Command-line defaults for aspect_ratio, model and resolution
+        promptgen: Whether to enhance the prompt
+        promptgen_template: Template for prompt enhancement
+        cache: Shared context cache for promptgen system prompts
+
+    Returns:
+        Resolved generation parameters plus "promptgen_result" (or None)
+
+    Raises:
+        ValidationError: If the request is incomplete or invalid
+        GenerationError: If the upstream request failed
+        PromptGenerationError: If prompt enhancement fails
+    """
+    error = upstream_error(request)
+    if error:
+        raise GenerationError(f"Upstream request failed: {error}")
+
+    resolved = resolve_request(request, defaults)
+
+    promptgen_result = None
+    if promptgen:
+        promptgen_result = generate_prompt(
+            client=client, description=resolved["prompt"], template=promptgen_template, cache=cache
+        )
+    return {**resolved, "promptgen_result": promptgen_result}
+
+
+def _generate_prepared(
+    client: genai.Client,
+    prepared: dict[str, Any],
+    generate_fn: Callable[..., dict[str, Any]] = generate_image,
+    timeout: float | None = None,
+    deadline: Deadline | None = None,
+) -> dict[str, Any]:
+    """Run the image generation stage of a prepared --ndjson request.
+
+    Args:
+        client: Shared client
+        prepared: Output of _prepare_request()
+        generate_fn: generate_image() or a layer in front of it (--fallback, --coalesce)
+        timeout: Per-request timeout in seconds
+        deadline: Deadline shared by the whole run
+
+    Returns:
+        Generation result (same shape as single-image mode)
+
+    Raises:
+        GenerationError: If generation fails
+    """
+    promptgen_result = prepared["promptgen_result"]
+    result = generate_fn(
+        client=client,
+        prompt=promptgen_result["prompt"] if promptgen_result else prepared["prompt"],
+        output_path=prepared["output"],
+        reference_images=prepared["images"] or None,
+        aspect_ratio=prepared["aspect_ratio"],
+        model=prepared["model"],
+        resolution=prepared["resolution"],
+        timeout=timeout,
+        deadline=deadline,
+    )
+    result["promptgen"] = _promptgen_metadata(prepared["prompt"], promptgen_result)
+    return result
@@ -78,6 +78,18 @@ logger = get_logger(__name__)
     count=True,
     help="Multi-level verbosity (-v INFO, -vv DEBUG, -vvv TRACE)",
 )
+@click.option(
+    "--record",
+    "record_dir",
+    type=click.Path(file_okay=False),
+    help="Record API responses to a cassette directory for later --replay",
+)
+@click.option(
+    "--replay",
+    "replay_dir",
+    type=click.Path(exists=True, file_okay=False),
+    help="Answer API requests from a recorded cassette directory (no API calls)",
+)
 def generate_conversation(
     prompt: str,
     output: str,
@@ -89,6 +101,8 @@ def generate_conversation(
     project: str | None,
     location: str | None,
     verbose: int,
+    record_dir: str | None,
+    replay_dir: str | None,
 ) -> None:
     """Generate images with multi-turn conversation refinement.
 
@@ -188,6 +202,8 @@ def generate_conversation(
                 use_vertex=use_vertex,
                 project=project,
                 location=location,
+                record_dir=record_dir,
+                replay_dir=replay_dir,
             )
             logger.debug("Client created successfully")
         except AuthenticationError as e:
@@ -6,15 +6,24 @@ and has been reviewed and tested by a human.
 
 import json
 import sys
+from typing import Any
 
 import click
+from google import genai
 
 from gemini_nano_banana_tool.core.client import AuthenticationError, create_client
+from gemini_nano_banana_tool.core.ndjson import run_ndjson_stream, upstream_error
+from gemini_nano_banana_tool.core.prompt_cache import (
+    DEFAULT_CACHE_TTL,
+    REFRESH_MARGIN,
+    PromptCacheManager,
+)
 from gemini_nano_banana_tool.core.prompt_templates import TEMPLATE_DESCRIPTIONS
 from gemini_nano_banana_tool.core.promptgen import (
     PromptGenerationError,
     format_verbose_output,
     generate_prompt,
+    generate_prompts_packed,
 )
 from gemini_nano_banana_tool.logging_config import get_logger, setup_logging
 
@@ -110,6 +119,50 @@ logger = get_logger(__name__)
     type=str,
     help="Google Cloud location (for Vertex AI, default: us-central1)",
 )
+@click.option(
+    "--record",
+    "record_dir",
+    type=click.Path(file_okay=False),
+    help="Record API responses to a cassette directory for later --replay",
+)
+@click.option(
+    "--replay",
+    "replay_dir",
+    type=click.Path(exists=True, file_okay=False),
+    help="Answer API requests from a recorded cassette directory (no API calls)",
+)
+@click.option(
+    "--ndjson",
+    is_flag=True,
+    help="Stream mode: read one JSON request per line from stdin, write one result per line",
+)
+@click.option(
+    "--concurrency",
+    default=4,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="Requests processed in parallel in --ndjson mode",
+)
+@click.option(
+    "--pack",
+    default=1,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="Descriptions packed into one LLM request in --ndjson mode",
+)
+@click.option(
+    "--context-cache",
+    is_flag=True,
+    help="Cache the system prompt per model and template via the Gemini context cache "
+    "(--ndjson mode; falls back to inline text when caching is unavailable)",
+)
+@click.option(
+    "--cache-ttl",
+    default=DEFAULT_CACHE_TTL,
+    show_default=True,
+    type=click.IntRange(min=REFRESH_MARGIN + 1),
+    help="Lifetime in seconds of context cache entries",
+)
 def promptgen(
     description: str | None,
     description_opt: str | None,
@@ -127,6 +180,13 @@ def promptgen(
     use_vertex: bool,
     project: str | None,
     location: str | None,
+    record_dir: str | None,
+    replay_dir: str | None,
+    ndjson: bool,
+    concurrency: int,
+    pack: int,
+    context_cache: bool,
+    cache_ttl: int,
 ) -> None:
     """Generate detailed image prompts from simple descriptions.
 
@@ -173,6 +233,32 @@ def promptgen(
       # Enable debug logging
       gemini-nano-banana-tool promptgen "sunset" -vv
 
+    \b
+      # Record responses once, replay them offline later
+      gemini-nano-banana-tool promptgen "sunset" --record cassette/
+      gemini-nano-banana-tool promptgen "sunset" --replay cassette/
+
+    \b
+      # Stream many descriptions through one process
+      cat descriptions.ndjson | gemini-nano-banana-tool promptgen --ndjson
+
+    \b
+      # Pack 10 descriptions per LLM request (shared system prompt)
+      cat descriptions.ndjson | gemini-nano-banana-tool promptgen --ndjson --pack 10
+
+    \b
+      # Send the system prompt once per template via the context cache
+      cat descriptions.ndjson | gemini-nano-banana-tool promptgen --ndjson --context-cache
+
+    \b
+    NDJSON Mode:
+      Each input line is a JSON object with "description" and optionally "id",
+      "template", "category" and "style". Each output line is the result JSON
+      plus "id" and "status"; other input fields (e.g. "output") are passed
+      through, so the stream can be piped into 'generate --ndjson'.
+      With --pack N, up to N descriptions share one request; each result
+      reports its share of the tokens plus a "packed" section.
+
     \b
     Output Format:
       Default: Plain text prompt to stdout (pipeable)
@@ -203,6 +289,49 @@ def promptgen(
                 click.echo(f"  {name:12} - {description_text}")
             return
 
+        if ndjson:
+            if description or description_opt or stdin or output:
+                click.echo(
+                    "Error: --ndjson reads descriptions from stdin request objects; "
+                    "don't combine it with DESCRIPTION, --description, --stdin or --output",
+                    err=True,
+                )
+                sys.exit(1)
+            client = create_client(
+                api_key=api_key,
+                use_vertex=use_vertex,
+                project=project,
+                location=location,
+                record_dir=record_dir,
+                replay_dir=replay_dir,
+            )
+            defaults = {"template": template, "category": category, "style": style}
+            cache = PromptCacheManager(client, ttl_seconds=cache_ttl) if context_cache else None
+
+            def handle(request: dict[str, Any]) -> dict[str, Any]:
+                return _promptgen_from_request(client, request, defaults, model, cache)
+
+            def handle_pack(requests: list[dict[str, Any]]) -> list[dict[str, Any] | Exception]:
+                return _promptgen_packed_from_requests(client, requests, defaults, model, cache)
+
+            try:
+                counts = run_ndjson_stream(
+                    sys.stdin,
+                    handle,
+                    click.echo,
+                    concurrency,
+                    batch_size=pack,
+                    batch_handler=handle_pack if pack > 1 else None,
+                )
+            finally:
+                if cache:
+                    cache.close()
+            sys.exit(1 if counts["failed"] else 0)
+
+        if context_cache:
+            click.echo("Error: --context-cache requires --ndjson", err=True)
+            sys.exit(1)
+
         # Get description from argument, option, or stdin
         desc: str
         desc_input = description or description_opt
@@ -243,6 +372,8 @@ def promptgen(
             use_vertex=use_vertex,
             project=project,
             location=location,
+            record_dir=record_dir,
+            replay_dir=replay_dir,
         )
         logger.info("Client created successfully")
 
@@ -311,3 +442,105 @@ def promptgen(
         logger.error(f"Unexpected error: {e}", exc_info=True)
         click.echo(f"Unexpected Error: {e}", err=True)
         sys.exit(1)
+
+
+def _promptgen_from_request(
+    client: genai.Client,
+    request: dict[str, Any],
+    defaults: dict[str, Any],
+    model: str,
+    cache: PromptCacheManager | None = None,
+) -> dict[str, Any]:
+    """Run one --ndjson request, passing unrelated request fields through.
+
+    Args:
+        client: Shared client
+        request: Request object ("description", optional "template"/"category"/"style")
+        defaults: Command-line defaults for template, category and style
+        model: LLM model for generation
+        cache: Shared context cache for system prompts
+
+    Returns:
+        Request pass-through fields merged with the generate_prompt() result
+
+    Raises:
+        PromptGenerationError: If the request is invalid or generation fails
+    """
+    item = _request_item(request, defaults)
+    result = generate_prompt(
+        client=client,
+        description=item["description"],
+        template=item["template"],
+        category=item["category"],
+        style=item["style"],
+        model=model,
+        cache=cache,
+    )
+    return {**_passthrough(request), **result}
+
+
+def _promptgen_packed_from_requests(
+    client: genai.Client,
+    requests: list[dict[str, Any]],
+    defaults: dict[str, Any],
+    model: str,
+    cache: PromptCacheManager | None = None,
+) -> list[dict[str, Any] | Exception]:
+    """Run a group of --ndjson requests as packed promptgen requests.
+
+    Invalid requests fail individually; the valid ones are packed together.
+
+    Args:
+        client: Shared client
+        requests: Request objects (see _promptgen_from_request)
+        defaults: Command-line defaults for template, category and style
+        model: LLM model for generation
+        cache: Shared context cache for system prompts
+
+    Returns:
+        One merged result or exception per request, in order
+    """
+    results: list[dict[str, Any] | Exception] = []
+    valid: list[int] = []
+    items: list[dict[str, Any]] = []
+    for request in requests:
+        try:
+            items.append(_request_item(request, defaults))
+            valid.append(len(results))
+            results.append({})
+        except PromptGenerationError as e:
+            results.append(e)
+
+    if items:
+        packed = generate_prompts_packed(
+            client, items, model=model, pack_size=len(items), cache=cache
+        )
+        for index, result in zip(valid, packed, strict=True):
+            results[index] = {**_passthrough(requests[index]), **result}
+    return results
+
+
+def _request_item(request: dict[str, Any], defaults: dict[str, Any]) -> dict[str, Any]:
+    """Validate a --ndjson request and resolve its generation parameters.
+
+    Raises:
+        PromptGenerationError: If the request is a failed upstream result or has
+            no description
+    """
+    error = upstream_error(request)
+    if error:
+        raise PromptGenerationError(f"Upstream request failed: {error}")
+    description = request.get("description") or request.get("prompt")
+    if not description or not str(description).strip():
+        raise PromptGenerationError("Each request needs a non-empty 'description' field")
+    return {
+        "description": str(description).strip(),
+        "template": request.get("template") or defaults["template"],
+        "category": request.get("category") or defaults["category"],
+        "style": request.get("style") or defaults["style"],
+    }
+
+
+def _passthrough(request: dict[str, Any]) -> dict[str, Any]:
+    """Return the request fields that are copied to the result unchanged."""
+    return {k: v for k, v in request.items() if k not in ("description", "error")}
@@ -0,0 +1,363 @@
+"""Enqueue and worker commands for the SQLite work queue.
+
+Note: This code was generated with assistance from AI coding tools
+and has been reviewed and tested by a human.
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import sys
+import threading
+from typing import Any
+
+import click
+from google import genai
+
+from gemini_nano_banana_tool.core.batch import BatchError, load_manifest, resolve_request
+from gemini_nano_banana_tool.core.client import (
+    AuthenticationError,
+    GeminiClientError,
+    create_client,
+)
+from gemini_nano_banana_tool.core.deadline import DEFAULT_REQUEST_TIMEOUT
+from gemini_nano_banana_tool.core.generator import generate_image
+from gemini_nano_banana_tool.core.models import DEFAULT_MODEL
+from gemini_nano_banana_tool.core.work_queue import (
+    DEFAULT_MAX_ATTEMPTS,
+    DEFAULT_VISIBILITY_TIMEOUT,
+    Job,
+    WorkQueue,
+)
+from gemini_nano_banana_tool.logging_config import get_logger, setup_logging
+from gemini_nano_banana_tool.utils import ValidationError
+
+logger = get_logger(__name__)
+
+
+@click.command("enqueue")
+@click.argument("queue_path", metavar="QUEUE", type=click.Path(dir_okay=False))
+@click.argument("manifests", nargs=-1, type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "-v",
+    "--verbose",
+    count=True,
+    help="Enable verbose output (use -v for INFO, -vv for DEBUG, -vvv for TRACE)",
+)
+def enqueue(queue_path: str, manifests: tuple[str, ...], verbose: int) -> None:
+    """Add the rows of JSONL manifests to a work queue for 'worker' processes.
+
+    QUEUE is a SQLite file, created if missing. Manifests use the
+    generate-batch format. Prints the number of jobs added and the queue's
+    job counts per state as JSON; without manifests it only prints the counts.
+
+    \b
+    Examples:
+      # Queue a manifest, then start workers (in as many processes as you like)
+      gemini-nano-banana-tool enqueue jobs.db manifest.jsonl
+      gemini-nano-banana-tool worker jobs.db --concurrency 4 > results-1.jsonl &
+      gemini-nano-banana-tool worker jobs.db --concurrency 4 > results-2.jsonl &
+
+    \b
+      # Check progress
+      gemini-nano-banana-tool enqueue jobs.db
+    """
+    setup_logging(verbose)
+    try:
+        queue = WorkQueue(queue_path)
+        enqueued = 0
+        for manifest in manifests:
+            enqueued += queue.enqueue(load_manifest(manifest))
+            logger.info(f"Enqueued {manifest}")
+        click.echo(json.dumps({"enqueued": enqueued, **queue.counts()}))
+    except BatchError as e:
+        logger.error(f"Batch error: {e}")
+        click.echo(f"Batch Error: {e}", err=True)
+        sys.exit(1)
+    except sqlite3.Error as e:
+        logger.error(f"Queue error: {e}")
+        click.echo(f"Queue Error: {e}", err=True)
+        sys.exit(1)
+
+
+@click.command("worker")
+@click.argument("queue_path", metavar="QUEUE", type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "-a",
+    "--aspect-ratio",
+    default="1:1",
+    help="Default aspect ratio for jobs without one (default: 1:1)",
+)
+@click.option(
+    "-m",
+    "--model",
+    default=DEFAULT_MODEL,
+    help=f"Default model for jobs without one (default: {DEFAULT_MODEL})",
+)
+@click.option(
+    "-r",
+    "--resolution",
+    type=click.Choice(["1K", "2K", "4K"], case_sensitive=True),
+    help="Default resolution for jobs without one (Pro only)",
+)
+@click.option(
+    "--concurrency",
+    default=4,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="Jobs processed in parallel by this worker",
+)
+@click.option(
+    "--timeout",
+    default=DEFAULT_REQUEST_TIMEOUT,
+    show_default=True,
+    type=click.FloatRange(min=0, min_open=True),
+    help="Per-request timeout in seconds",
+)
+@click.option(
+    "--visibility-timeout",
+    default=DEFAULT_VISIBILITY_TIMEOUT,
+    show_default=True,
+    type=click.FloatRange(min=0, min_open=True),
+    help="Seconds a leased job is hidden from other workers (must exceed --timeout)",
+)
+@click.option(
+    "--max-attempts",
+    default=DEFAULT_MAX_ATTEMPTS,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="Attempts before a failing job is given up",
+)
+@click.option(
+    "--poll-interval",
+    default=0.0,
+    type=click.FloatRange(min=0),
+    help="Seconds between checks for new jobs when the queue is empty "
+    "(default: 0, exit when the queue is empty)",
+)
+@click.option(
+    "--api-key",
+    type=str,
+    help="Override API key from environment",
+)
+@click.option(
+    "--use-vertex",
+    is_flag=True,
+    help="Use Vertex AI instead of Developer API",
+)
+@click.option(
+    "--project",
+    type=str,
+    help="Google Cloud project (for Vertex AI)",
+)
+@click.option(
+    "--location",
+    type=str,
+    help="Google Cloud location (for Vertex AI, default: us-central1)",
+)
+@click.option(
+    "--pool",
+    "pool_config",
+    type=click.Path(exists=True, dir_okay=False),
+    help="JSON file listing several API keys or Vertex AI regions to spread requests over",
+)
+@click.option(
+    "--pool-strategy",
+    type=click.Choice(["least-loaded", "weighted"]),
+    help="How --pool members are picked (default: from the file, else least-loaded)",
+)
+@click.option(
+    "-v",
+    "--verbose",
+    count=True,
+    help="Enable verbose output (use -v for INFO, -vv for DEBUG, -vvv for TRACE)",
+)
+def worker(
+    queue_path: str,
+    aspect_ratio: str,
+    model: str,
+    resolution: str | None,
+    concurrency: int,
+    timeout: float,
+    visibility_timeout: float,
+    max_attempts: int,
+    poll_interval: float,
+    api_key: str | None,
+    use_vertex: bool,
+    project: str | None,
+    location: str | None,
+    pool_config: str | None,
+    pool_strategy: str | None,
+    verbose: int,
+) -> None:
+    """Generate images for jobs leased from a work queue.
+
+    Run as many worker processes as the host (or quota) allows, each with its
+    own client; together they get past the limits of one generate-batch
+    process. Each job is leased for --visibility-timeout seconds: if the
+    worker dies, the job is handed to another worker when the lease expires.
+    The lease is renewed while the job runs. Failed jobs are retried up to
+    --max-attempts times (invalid requests are not retried). Results are
+    recorded in the queue file and written to stdout as JSON lines, one per
+    attempt, with "id", "job", "status" and "attempt".
+
+    \b
+    Examples:
+      # Work until the queue is empty
+      gemini-nano-banana-tool worker jobs.db --concurrency 8
+
+    \b
+      # Keep serving: look for new jobs every 5 seconds
+      gemini-nano-banana-tool worker jobs.db --poll-interval 5
+
+    \b
+    Stopping:
+      Ctrl-C stops leasing new jobs and lets jobs in progress finish.
+
+    \b
+    Queue File:
+      SQLite needs working file locks: keep QUEUE on a local disk, or on NFS
+      only where the mount supports locking reliably.
+    """
+    setup_logging(verbose)
+    if visibility_timeout <= timeout:
+        raise click.UsageError("--visibility-timeout must be longer than --timeout")
+
+    defaults = {"aspect_ratio": aspect_ratio, "model": model, "resolution": resolution}
+    try:
+        client = create_client(
+            api_key=api_key,
+            use_vertex=use_vertex,
+            project=project,
+            location=location,
+            pool_config=pool_config,
+            pool_strategy=pool_strategy,
+        )
+    except AuthenticationError as e:
+        logger.error(f"Authentication failed: {e}")
+        click.echo(f"Authentication Error: {e}", err=True)
+        sys.exit(1)
+    except GeminiClientError as e:
+        logger.error(f"Client error: {e}")
+        click.echo(f"Client Error: {e}", err=True)
+        sys.exit(1)
+
+    try:
+        queue = WorkQueue(
+            queue_path, visibility_timeout=visibility_timeout, max_attempts=max_attempts
+        )
+    except sqlite3.Error as e:
+        logger.error(f"Queue error: {e}")
+        click.echo(f"Queue Error: {e}", err=True)
+        sys.exit(1)
+    owner = f"{socket.gethostname()}:{os.getpid()}"
+    stop = threading.Event()
+    write_lock = threading.Lock()
+    failed = 0
+    queue_errors: list[sqlite3.Error] = []
+
+    def emit(record: dict[str, Any]) -> None:
+        nonlocal failed
+        with write_lock:
+            click.echo(json.dumps(record, ensure_ascii=False, default=str))
+            failed += record["status"] == "error" and not record.get("will_retry")
+
+    def work(name: str) -> None:
+        try:
+            while not stop.is_set():
+                jobs = queue.lease(name)
+                if not jobs:
+                    if not poll_interval:
+                        return
+                    stop.wait(poll_interval)
+                    continue
+                emit(_run_job(client, queue, name, jobs[0], defaults, timeout))
+        except sqlite3.Error as e:
+            # The queue file is unusable (e.g. locked for too long, or corrupt): stop all threads
+            logger.error(f"Queue error: {e}")
+            queue_errors.append(e)
+            stop.set()
+        finally:
+            queue.close()
+
+    logger.info(f"Worker {owner} started on {queue_path}")
+    threads = [
+        threading.Thread(target=work, args=(f"{owner}:{i}",), name=f"worker-{i}", daemon=True)
+        for i in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    try:
+        for thread in threads:
+            while thread.is_alive():
+                thread.join(0.5)
+    except KeyboardInterrupt:
+        logger.warning("Interrupted: finishing jobs in progress")
+        stop.set()
+        for thread in threads:
+            thread.join()
+        sys.exit(130)
+
+    if queue_errors:
+        click.echo(f"Queue Error: {queue_errors[0]}", err=True)
+        sys.exit(1)
+    logger.info(f"Worker {owner} finished; queue: {queue.counts()}")
+    sys.exit(1 if failed else 0)
+
+
+def _run_job(
+    client: genai.Client,
+    queue: WorkQueue,
+    owner: str,
+    job: Job,
+    defaults: dict[str, Any],
+    timeout: float,
+) -> dict[str, Any]:
+    """Run one leased job and record its outcome in the queue.
+
+    Args:
+        client: The worker's client
+        queue: Queue the job was leased from
+        owner: Lease owner
+        job: Leased job
+        defaults: Defaults for aspect_ratio, model and resolution
+        timeout: Per-request timeout in seconds
+
+    Returns:
+        Result line for stdout
+    """
+    record: dict[str, Any] = {"id": job.request.get("id", job.id), "job": job.id}
+    try:
+        resolved = resolve_request(job.request, defaults)
+    except ValidationError as e:
+        queue.fail(job.id, owner, str(e), retry=False)
+        return {**record, "status": "error", "error": str(e), "attempt": job.attempts}
+
+    try:
+        with queue.renewing(job.id, owner):
+            result = generate_image(
+                client=client,
+                prompt=resolved["prompt"],
+                output_path=resolved["output"],
+                reference_images=resolved["images"] or None,
+                aspect_ratio=resolved["aspect_ratio"],
+                model=resolved["model"],
+                resolution=resolved["resolution"],
+                timeout=timeout,
+            )
+    except Exception as e:
+        logger.debug(f"Job {job.id} failed", exc_info=True)
+        queue.fail(job.id, owner, str(e))
+        will_retry = job.attempts < queue.max_attempts
+        return {
+            **record,
+            "status": "error",
+            "error": str(e),
+            "attempt": job.attempts,
+            "will_retry": will_retry,
+        }
+
+    queue.complete(job.id, owner, result)
+    fields = {k: v for k, v in result.items() if k not in ("id", "status")}
+    return {**record, "status": "ok", "attempt": job.attempts, **fields}
@@ -4,13 +4,27 @@ Note: This code was generated with assistance from AI coding tools
 and has been reviewed and tested by a human.
 """
 
+from gemini_nano_banana_tool.core.circuit_breaker import CircuitBreaker
 from gemini_nano_banana_tool.core.client import (
     AuthenticationError,
     GeminiClientError,
     create_client,
     validate_client,
 )
-from gemini_nano_banana_tool.core.generator import GenerationError, generate_image
+from gemini_nano_banana_tool.core.concurrency import AdaptiveClient, AdaptiveLimiter
+from gemini_nano_banana_tool.core.deadline import Deadline
+from gemini_nano_banana_tool.core.fallback import ModelRouter
+from gemini_nano_banana_tool.core.generator import (
+    DeadlineExceededError,
+    GenerationError,
+    generate_image,
+    generate_image_async,
+)
+from gemini_nano_banana_tool.core.hedging import HedgedClient
+from gemini_nano_banana_tool.core.journal import Journal
+from gemini_nano_banana_tool.core.lock_registry import LockRegistry
+from gemini_nano_banana_tool.core.memory_budget import BudgetedGenerator, ByteBudget
+from gemini_nano_banana_tool.core.metrics import Metrics
 from gemini_nano_banana_tool.core.models import (
     ASPECT_RATIO_DESCRIPTIONS,
     ASPECT_RATIO_RESOLUTIONS,
@@ -19,6 +33,10 @@ from gemini_nano_banana_tool.core.models import (
     SUPPORTED_MODELS,
     AspectRatio,
 )
+from gemini_nano_banana_tool.core.pool import ClientPool, PoolMember, create_client_pool
+from gemini_nano_banana_tool.core.postprocess import PostProcessor
+from gemini_nano_banana_tool.core.progress import Progress
+from gemini_nano_banana_tool.core.prompt_cache import PromptCacheManager
 from gemini_nano_banana_tool.core.prompt_templates import (
     TEMPLATE_DESCRIPTIONS,
     detect_category,
@@ -29,7 +47,16 @@ from gemini_nano_banana_tool.core.promptgen import (
     PromptGenerationError,
     format_verbose_output,
     generate_prompt,
+    generate_prompts_packed,
+)
+from gemini_nano_banana_tool.core.scheduler import (
+    PriorityScheduler,
+    ScheduledClient,
+    request_priority,
 )
+from gemini_nano_banana_tool.core.singleflight import SingleFlight
+from gemini_nano_banana_tool.core.work_queue import WorkQueue
+from gemini_nano_banana_tool.core.writer import ImageWriter
 
 __all__ = [
     # Client
@@ -37,13 +64,39 @@ __all__ = [
     "validate_client",
     "GeminiClientError",
     "AuthenticationError",
+    "ClientPool",
+    "PoolMember",
+    "create_client_pool",
+    "HedgedClient",
+    "AdaptiveClient",
+    "AdaptiveLimiter",
+    "Metrics",
     # Generator
     "generate_image",
+    "generate_image_async",
     "GenerationError",
+    "DeadlineExceededError",
+    "Deadline",
+    "Journal",
+    "Progress",
+    "PostProcessor",
+    "ImageWriter",
+    "SingleFlight",
+    "LockRegistry",
+    "ByteBudget",
+    "BudgetedGenerator",
+    "WorkQueue",
+    "PriorityScheduler",
+    "ScheduledClient",
+    "request_priority",
+    "ModelRouter",
+    "CircuitBreaker",
     # Promptgen
     "generate_prompt",
+    "generate_prompts_packed",
     "PromptGenerationError",
     "format_verbose_output",
+    "PromptCacheManager",
     # Templates
     "get_template",
     "detect_category",
@@ -0,0 +1,224 @@
+"""Batch manifests for generating many images in one run.
+
+A manifest is a JSONL file with one image request per line, in the same format
+as ``generate --ndjson`` requests: "prompt" and "output", plus optional "id",
+"images", "aspect_ratio", "model" and "resolution". Rows without an "id" are
+identified by their line number.
+
+A manifest can be split into n shards for n machines with no coordinator.
+Each row goes to the shard given by a hash of its key: its "id" if it has
+one, else its "output". The assignment doesn't depend on row order or on the
+other rows, so appending rows never moves existing rows to another shard.
+
+Note: This code was generated with assistance from AI coding tools
+and has been reviewed and tested by a human.
+"""
+
+import hashlib
+import json
+import logging
+from collections.abc import Iterable, Iterator
+from typing import Any
+
+from gemini_nano_banana_tool.utils import (
+    ValidationError,
+    validate_aspect_ratio,
+    validate_model,
+    validate_reference_images,
+    validate_resolution,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class BatchError(Exception):
+    """Raised when a batch manifest or batch job is invalid."""
+
+    pass
+
+
+def parse_shard(spec: str) -> tuple[int, int]:
+    """Parse a shard spec "i/n" (1 <= i <= n).
+
+    Args:
+        spec: Shard spec, e.g. "2/4" for the second of four shards
+
+    Returns:
+        (index, count) tuple
+
+    Raises:
+        ValidationError: If the spec is malformed or out of range
+    """
+    try:
+        index_text, count_text = spec.split("/")
+        index, count = int(index_text), int(count_text)
+    except ValueError as e:
+        raise ValidationError(f"Invalid shard '{spec}': use i/n, e.g. 1/4") from e
+    if not 1 <= index <= count:
+        raise ValidationError(f"Invalid shard '{spec}': i must be between 1 and n")
+    return index, count
+
+
+def shard_key(row: dict[str, Any]) -> str:
+    """Return the key a row is sharded by: its "id", else its "output"."""
+    for field in ("id", "output"):
+        if row.get(field) is not None:
+            return f"{field}:{row[field]}"
+    return json.dumps(row, sort_keys=True, ensure_ascii=False, default=str)
+
+
+def in_shard(key: str, shard: tuple[int, int] | None) -> bool:
+    """Return whether a key belongs to a shard (always True without sharding)."""
+    if shard is None:
+        return True
+    index, count = shard
+    digest = hashlib.sha256(key.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % count == index - 1
+
+
+def shard_lines(lines: Iterable[str], shard: tuple[int, int] | None) -> Iterator[str]:
+    """Yield the manifest lines of one shard.
+
+    Lines of other shards are replaced by blank lines, so line numbers (the ids
+    of rows without an "id") stay those of the manifest. Lines that aren't
+    JSON objects are sharded by their text, so exactly one shard reports them.
+
+    Args:
+        lines: Manifest lines
+        shard: (index, count) from parse_shard(), or None for all lines
+    """
+    for line in lines:
+        if shard is None or not line.strip():
+            yield line
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        key = shard_key(row) if isinstance(row, dict) else line.strip()
+        yield line if in_shard(key, shard) else "\n"
+
+
+def load_manifest(path: str, shard: tuple[int, int] | None = None) -> list[dict[str, Any]]:
+    """Load a JSONL batch manifest.
+
+    Args:
+        path: Manifest file path
+        shard: Optional (index, count) to load only one shard's rows
+
+    Returns:
+        List of request dicts, each with an "id" (line number if not given)
+
+    Raises:
+        BatchError: If the file can't be read, a line isn't a JSON object, or
+            ids or outputs are duplicated
+    """
+    rows = list(_read_rows(path, shard, strict=True))
+    check_unique(rows, path)
+    logger.info(f"Loaded manifest {path} ({len(rows)} request(s))")
+    return rows
+
+
+def check_manifest(path: str, shard: tuple[int, int] | None = None) -> None:
+    """Check a manifest that is streamed rather than loaded for duplicate ids and outputs.
+
+    Lines that aren't JSON objects are skipped: streaming reports them as
+    failed requests instead.
+
+    Args:
+        path: Manifest file path
+        shard: Optional (index, count) to check only one shard's rows
+
+    Raises:
+        BatchError: If the file can't be read, or ids or outputs are duplicated
+    """
+    check_unique(_read_rows(path, shard, strict=False), path)
+
+
+def check_unique(rows: Iterable[dict[str, Any]], path: str) -> None:
+    """Check that no two manifest rows share an "id" or an "output".
+
+    Raises:
+        BatchError: On the first duplicate
+    """
+    seen: dict[str, set[str]] = {"id": set(), "output": set()}
+    for row in rows:
+        for field, values in seen.items():
+            value = row.get(field)
+            if value is None:
+                continue
+            if str(value) in values:
+                raise BatchError(f"Duplicate {field} in manifest {path}: {value}")
+            values.add(str(value))
+
+
+def _read_rows(path: str, shard: tuple[int, int] | None, strict: bool) -> Iterator[dict[str, Any]]:
+    """Yield a manifest's rows of one shard, each with an "id" (line number if not given).
+
+    Args:
+        path: Manifest file path
+        shard: (index, count), or None for all rows
+        strict: Raise on lines that aren't JSON objects instead of skipping them
+
+    Raises:
+        BatchError: If the file can't be read, or (strict) a line is invalid
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            for line_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError as e:
+                    if not strict:
+                        continue
+                    raise BatchError(f"{path}:{line_number}: invalid JSON: {e}") from e
+                if not isinstance(row, dict):
+                    if not strict:
+                        continue
+                    raise BatchError(f"{path}:{line_number}: request must be a JSON object")
+                if not in_shard(shard_key(row), shard):
+                    continue
+                row.setdefault("id", line_number)
+                yield row
+    except OSError as e:
+        raise BatchError(f"Cannot read manifest {path}: {e}") from e
+
+
+def resolve_request(request: dict[str, Any], defaults: dict[str, Any]) -> dict[str, Any]:
+    """Validate an image request and fill in command-line defaults.
+
+    Args:
+        request: Request object ("prompt", "output", optional overrides)
+        defaults: Defaults for aspect_ratio, model and resolution
+
+    Returns:
+        dict with prompt, output, images, aspect_ratio, model and resolution
+
+    Raises:
+        ValidationError: If the request is incomplete or invalid
+    """
+    prompt_text = request.get("prompt")
+    output = request.get("output")
+    if not prompt_text or not output:
+        raise ValidationError("Each request needs non-empty 'prompt' and 'output' fields")
+    model = request.get("model") or defaults["model"]
+    aspect_ratio = request.get("aspect_ratio") or defaults["aspect_ratio"]
+    resolution = request.get("resolution") or defaults["resolution"]
+    images = list(request.get("images") or [])
+
+    validate_model(model)
+    if images:
+        validate_reference_images(images, model)
+    validate_aspect_ratio(aspect_ratio)
+    validate_resolution(resolution, model)
+
+    return {
+        "prompt": prompt_text,
+        "output": output,
+        "images": images,
+        "aspect_ratio": aspect_ratio,
+        "model": model,
+        "resolution": resolution,
+    }
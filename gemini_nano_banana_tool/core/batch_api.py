@@ -0,0 +1,462 @@
+"""Gemini Batch API mode for large offline image jobs.
+
+Batch jobs are processed asynchronously (typically within hours) at a lower
+price than interactive requests and don't consume the interactive quota. Each
+manifest request is converted with the same contents and config construction
+as generate_image(), one batch job is submitted per model, jobs are polled
+with exponential backoff, and finished responses are decoded and written to
+the manifest's output paths in parallel.
+
+Progress is persisted in a JSON state file after every step (job submitted,
+job state changed, image written), so a run whose poller died resumes where
+it stopped: submitted jobs are not resubmitted and written images are not
+decoded again. A deadline stops the poller (the jobs keep running server side)
+so the same command can be rerun later to pick up the results. Requests of
+a job that failed or expired are reported as errors but not recorded, so a
+rerun submits them again in a new job.
+
+Note: This code was generated with assistance from AI coding tools
+and has been reviewed and tested by a human.
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from google import genai
+from google.genai import types
+
+from gemini_nano_banana_tool.core.batch import BatchError
+from gemini_nano_banana_tool.core.deadline import Deadline
+from gemini_nano_banana_tool.core.generator import build_content_request, save_content_response
+from gemini_nano_banana_tool.core.models import MODELS_WITH_RESOLUTION_SUPPORT, is_imagen_model
+from gemini_nano_banana_tool.core.writer import ImageSink
+
+logger = logging.getLogger(__name__)
+
+# Inline requests are limited to 20MB per job; larger jobs go through a JSONL file
+INLINE_LIMIT_BYTES = 20 * 1024 * 1024
+
+# Default poll interval bounds in seconds
+DEFAULT_POLL_INTERVAL = 30.0
+DEFAULT_MAX_POLL_INTERVAL = 600.0
+
+# Default number of responses decoded and written in parallel
+DEFAULT_DECODE_WORKERS = 8
+
+SUCCEEDED = "JOB_STATE_SUCCEEDED"
+TERMINAL_STATES = frozenset(
+    {SUCCEEDED, "JOB_STATE_FAILED", "JOB_STATE_CANCELLED", "JOB_STATE_EXPIRED"}
+)
+
+# Jobs whose requests are submitted again when the run is resumed
+RESUBMIT_STATES = frozenset({"JOB_STATE_FAILED", "JOB_STATE_EXPIRED"})
+
+
+class BatchJobState:
+    """Persistent state of an async batch run, stored as a JSON file.
+
+    Holds the submitted jobs (name, model, request keys, last known state) and
+    the per-request results already written, keyed by request id.
+    """
+
+    def __init__(self, path: str):
+        """Load the state file if it exists, otherwise start empty.
+
+        Args:
+            path: State file path
+
+        Raises:
+            BatchError: If the state file exists but can't be parsed
+        """
+        self.path = Path(path)
+        self.keys: list[str] = []
+        self.jobs: list[dict[str, Any]] = []
+        self.results: dict[str, dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        if self.path.exists():
+            try:
+                data = json.loads(self.path.read_text(encoding="utf-8"))
+                self.keys = data["keys"]
+                self.jobs = data["jobs"]
+                self.results = data["results"]
+            except (OSError, ValueError, KeyError) as e:
+                raise BatchError(f"Invalid batch state file {self.path}: {e}") from e
+            logger.info(f"Resuming batch state {self.path} ({len(self.jobs)} job(s))")
+
+    def save(self) -> None:
+        """Write the state atomically (temp file + rename)."""
+        with self._lock:
+            data = json.dumps(
+                {"keys": self.keys, "jobs": self.jobs, "results": self.results},
+                indent=2,
+                default=str,
+            )
+            tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+            tmp_path.write_text(data, encoding="utf-8")
+            os.replace(tmp_path, self.path)
+
+    def record_result(self, key: str, record: dict[str, Any]) -> None:
+        """Store a request's result and persist the state."""
+        with self._lock:
+            self.results[key] = record
+        self.save()
+
+
+def run_batch_job(
+    client: genai.Client,
+    requests: list[dict[str, Any]],
+    state_path: str,
+    display_name: str = "gemini-nano-banana-tool",
+    poll_interval: float = DEFAULT_POLL_INTERVAL,
+    max_poll_interval: float = DEFAULT_MAX_POLL_INTERVAL,
+    decode_workers: int = DEFAULT_DECODE_WORKERS,
+    sleep: Callable[[float], None] = time.sleep,
+    deadline: Deadline | None = None,
+    postprocessor: ImageSink | None = None,
+) -> list[dict[str, Any]]:
+    """Run resolved image requests through the Batch API, resuming from state.
+
+    Args:
+        client: Gemini Developer API client
+        requests: Resolved requests (see batch.resolve_request) with an "id"
+        state_path: State file used to resume an interrupted run
+        display_name: Display name prefix for submitted jobs
+        poll_interval: Initial seconds between job status polls
+        max_poll_interval: Upper bound for the poll interval backoff
+        decode_workers: Responses decoded and written in parallel
+        sleep: Sleep function (injectable for tests)
+        deadline: Stop polling when it expires (the run can be resumed)
+        postprocessor: Optional PostProcessor or ImageWriter to write images with
+
+    Returns:
+        One record per request, in request order: {"id", "status": "ok", ...result}
+        or {"id", "status": "error", "error"}
+
+    Raises:
+        BatchError: If a request uses an Imagen model, the state file belongs
+            to a different manifest, or the deadline expired while polling
+    """
+    for request in requests:
+        if is_imagen_model(request["model"]):
+            raise BatchError(
+                f"Request {request['id']}: Imagen models are not supported by the Batch API"
+            )
+
+    keys = [str(request["id"]) for request in requests]
+    state = BatchJobState(state_path)
+    if state.keys and state.keys != keys:
+        raise BatchError(
+            f"State file {state_path} belongs to a different manifest; "
+            "remove it or use another --state-file"
+        )
+    state.keys = keys
+
+    submit_jobs(client, requests, state, display_name)
+    wait_for_jobs(client, state, poll_interval, max_poll_interval, sleep, deadline)
+    failed = collect_results(client, requests, state, decode_workers, postprocessor)
+    return [state.results[key] if key in state.results else failed[key] for key in keys]
+
+
+def submit_jobs(
+    client: genai.Client,
+    requests: list[dict[str, Any]],
+    state: BatchJobState,
+    display_name: str,
+) -> None:
+    """Submit one batch job per model, skipping models already submitted.
+
+    Jobs that failed or expired are dropped from the state first, so their
+    models are submitted again.
+
+    Args:
+        client: Gemini Developer API client
+        requests: Resolved requests with an "id"
+        state: Batch state (updated and saved after each submission)
+        display_name: Display name prefix for submitted jobs
+    """
+    for ended in state.jobs:
+        if ended["state"] in RESUBMIT_STATES:
+            logger.info(f"Batch job {ended['name']} ended with {ended['state']}, resubmitting")
+    state.jobs = [ended for ended in state.jobs if ended["state"] not in RESUBMIT_STATES]
+    submitted = {job["model"] for job in state.jobs}
+    by_model: dict[str, list[dict[str, Any]]] = {}
+    for request in requests:
+        by_model.setdefault(request["model"], []).append(request)
+
+    for model, model_requests in by_model.items():
+        if model in submitted:
+            logger.info(f"Batch job for model={model} already submitted, resuming")
+            continue
+        built = [_request_parts(request)[:2] for request in model_requests]
+        size = sum(_request_size(contents) for contents, _ in built)
+        src: Any
+        if size <= INLINE_LIMIT_BYTES:
+            src = [
+                types.InlinedRequest(
+                    contents=types.Content(role="user", parts=contents),
+                    config=config,
+                    metadata={"key": str(request["id"])},
+                )
+                for request, (contents, config) in zip(model_requests, built, strict=True)
+            ]
+        else:
+            src = _upload_jsonl(client, model_requests, built)
+        job = client.batches.create(
+            model=model,
+            src=src,
+            config=types.CreateBatchJobConfig(display_name=f"{display_name}-{model}"),
+        )
+        state.jobs.append(
+            {
+                "name": job.name,
+                "model": model,
+                "keys": [str(request["id"]) for request in model_requests],
+                "state": _state_name(job),
+                "submitted_at": datetime.now().isoformat(),
+            }
+        )
+        state.save()
+        logger.info(f"Submitted batch job {job.name} ({len(model_requests)} request(s))")
+
+
+def wait_for_jobs(
+    client: genai.Client,
+    state: BatchJobState,
+    poll_interval: float = DEFAULT_POLL_INTERVAL,
+    max_poll_interval: float = DEFAULT_MAX_POLL_INTERVAL,
+    sleep: Callable[[float], None] = time.sleep,
+    deadline: Deadline | None = None,
+) -> None:
+    """Poll all unfinished jobs until they reach a terminal state.
+
+    The interval doubles after every poll that finds a job still running, up
+    to max_poll_interval.
+
+    Args:
+        client: Gemini Developer API client
+        state: Batch state (job states are updated and saved)
+        poll_interval: Initial seconds between polls
+        max_poll_interval: Upper bound for the interval
+        sleep: Sleep function (injectable for tests)
+        deadline: Stop polling when it expires
+
+    Raises:
+        BatchError: If the deadline expired before all jobs finished
+    """
+    interval = poll_interval
+    while True:
+        pending = [job for job in state.jobs if job["state"] not in TERMINAL_STATES]
+        if not pending:
+            return
+        for job in pending:
+            job["state"] = _state_name(client.batches.get(name=job["name"]))
+            logger.debug(f"Batch job {job['name']}: {job['state']}")
+        state.save()
+        if all(job["state"] in TERMINAL_STATES for job in pending):
+            return
+        if deadline and deadline.expired:
+            raise BatchError(
+                f"Batch jobs still running ({deadline.reason}); "
+                "rerun the same command to resume polling"
+            )
+        remaining = deadline.remaining() if deadline else None
+        wait = interval if remaining is None else min(interval, remaining)
+        logger.info(f"Batch jobs running, next poll in {wait:.0f}s")
+        sleep(wait)
+        interval = min(interval * 2, max_poll_interval)
+
+
+def collect_results(
+    client: genai.Client,
+    requests: list[dict[str, Any]],
+    state: BatchJobState,
+    decode_workers: int = DEFAULT_DECODE_WORKERS,
+    postprocessor: ImageSink | None = None,
+) -> dict[str, dict[str, Any]]:
+    """Download finished jobs and write their images in parallel.
+
+    Requests with a result in the state are skipped. Requests with an error
+    response, and requests of cancelled jobs, get an error record. Requests of
+    jobs that failed or expired get one too, but it isn't saved in the state,
+    so a rerun submits them again.
+
+    Args:
+        client: Gemini Developer API client
+        requests: Resolved requests with an "id"
+        state: Batch state (results are recorded and saved)
+        decode_workers: Responses decoded and written in parallel
+        postprocessor: Optional PostProcessor or ImageWriter to write images with
+
+    Returns:
+        Error records of the requests of failed or expired jobs, by request id
+    """
+    by_key = {str(request["id"]): request for request in requests}
+    failed: dict[str, dict[str, Any]] = {}
+    with ThreadPoolExecutor(max_workers=max(1, decode_workers)) as pool:
+        for job in state.jobs:
+            todo = [key for key in job["keys"] if key not in state.results]
+            if not todo:
+                continue
+            if job["state"] in RESUBMIT_STATES:
+                message = f"Batch job {job['name']} ended with {job['state']}; rerun to resubmit"
+                failed.update({key: _error_record(by_key[key], message) for key in todo})
+                continue
+            if job["state"] != SUCCEEDED:
+                for key in todo:
+                    state.results[key] = _error_record(
+                        by_key[key], f"Batch job {job['name']} ended with {job['state']}"
+                    )
+                state.save()
+                continue
+
+            responses = _job_responses(client, job)
+            futures = [
+                pool.submit(_save_response, by_key[key], responses.get(key), state, postprocessor)
+                for key in todo
+            ]
+            for future in futures:
+                future.result()
+    return failed
+
+
+def _save_response(
+    request: dict[str, Any],
+    response: types.GenerateContentResponse | str | None,
+    state: BatchJobState,
+    postprocessor: ImageSink | None = None,
+) -> None:
+    """Decode and write one batch response, recording the outcome in the state."""
+    key = str(request["id"])
+    if response is None:
+        record = _error_record(request, "No response for request in batch output")
+    elif isinstance(response, str):
+        record = _error_record(request, response)
+    else:
+        effective_resolution = (
+            request["resolution"] if request["model"] in MODELS_WITH_RESOLUTION_SUPPORT else None
+        )
+        try:
+            result = save_content_response(
+                response,
+                request["output"],
+                model=request["model"],
+                aspect_ratio=request["aspect_ratio"],
+                effective_resolution=effective_resolution,
+                reference_image_count=len(request["images"]),
+                postprocessor=postprocessor,
+            )
+            result["metadata"]["batch"] = True
+            record = {"id": request["id"], "status": "ok", **result}
+        except Exception as e:
+            record = _error_record(request, str(e))
+    state.record_result(key, record)
+
+
+def _job_responses(
+    client: genai.Client, job: dict[str, Any]
+) -> dict[str, types.GenerateContentResponse | str]:
+    """Fetch a finished job's responses (or error messages) keyed by request id."""
+    batch_job = client.batches.get(name=job["name"])
+    dest = batch_job.dest
+    responses: dict[str, types.GenerateContentResponse | str] = {}
+    if dest and dest.inlined_responses is not None:
+        # Inline responses come back in request order
+        for key, inlined in zip(job["keys"], dest.inlined_responses, strict=False):
+            if inlined.response is not None:
+                responses[key] = inlined.response
+            else:
+                responses[key] = _job_error_message(inlined.error)
+    elif dest and dest.file_name:
+        content = client.files.download(file=dest.file_name)
+        for line in content.decode("utf-8").splitlines():
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            key = str(entry.get("key"))
+            if "response" in entry:
+                responses[key] = types.GenerateContentResponse.model_validate_json(
+                    json.dumps(entry["response"])
+                )
+            else:
+                responses[key] = str(entry.get("error") or "Request failed in batch job")
+    return responses
+
+
+def _request_parts(
+    request: dict[str, Any],
+) -> tuple[list[types.Part], types.GenerateContentConfig, str | None]:
+    """Build a request's contents and config exactly like generate_image()."""
+    return build_content_request(
+        request["prompt"],
+        request["images"] or None,
+        request["aspect_ratio"],
+        request["model"],
+        request["resolution"],
+    )
+
+
+def _request_size(contents: list[types.Part]) -> int:
+    """Approximate serialized size of a request's contents in bytes."""
+    size = 0
+    for part in contents:
+        if part.inline_data and part.inline_data.data:
+            # Base64 adds a third
+            size += len(part.inline_data.data) * 4 // 3
+        if part.text:
+            size += len(part.text.encode("utf-8"))
+    return size
+
+
+def _upload_jsonl(
+    client: genai.Client,
+    requests: list[dict[str, Any]],
+    built: list[tuple[list[types.Part], types.GenerateContentConfig]],
+) -> str:
+    """Write requests as a Batch API JSONL file, upload it and return its name."""
+    with tempfile.NamedTemporaryFile("w", suffix=".jsonl", delete=False, encoding="utf-8") as f:
+        for request, (contents, config) in zip(requests, built, strict=True):
+            content = types.Content(role="user", parts=contents)
+            line = {
+                "key": str(request["id"]),
+                "request": {
+                    "contents": [content.model_dump(mode="json", by_alias=True, exclude_none=True)],
+                    "generationConfig": config.model_dump(
+                        mode="json", by_alias=True, exclude_none=True
+                    ),
+                },
+            }
+            f.write(json.dumps(line) + "\n")
+        path = f.name
+    try:
+        uploaded = client.files.upload(file=path, config=types.UploadFileConfig(mime_type="jsonl"))
+    finally:
+        os.unlink(path)
+    logger.info(f"Uploaded batch input file {uploaded.name}")
+    return str(uploaded.name)
+
+
+def _state_name(job: types.BatchJob) -> str:
+    """Return a job's state as a plain string."""
+    state = job.state
+    return str(state.value if state is not None else "JOB_STATE_UNSPECIFIED")
+
+
+def _job_error_message(error: types.JobError | None) -> str:
+    """Format a per-request batch error."""
+    if error is None:
+        return "Request failed in batch job"
+    return f"{error.message or 'Request failed in batch job'} (code {error.code})"
+
+
+def _error_record(request: dict[str, Any], message: str) -> dict[str, Any]:
+    """Build an error record for a request."""
+    return {"id": request["id"], "status": "error", "error": message}
@@ -0,0 +1,291 @@
+"""Record/replay cassettes for Gemini API interactions.
+
+A cassette directory holds an append-only ``index.jsonl`` with one entry per
+recorded response, keyed by a fingerprint of the request (method, model,
+contents and config). Binary payloads such as image bytes are stored once in
+``blobs/<sha256>`` and referenced from the index, so identical images are
+deduplicated and the index stays small.
+
+In record mode, requests go to the real client and every successful response is
+written to the cassette. In replay mode, no network or credentials are needed:
+the index is loaded into memory and responses are answered from it.
+
+Note: This code was generated with assistance from AI coding tools
+and has been reviewed and tested by a human.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from enum import Enum
+from pathlib import Path
+from typing import Any
+
+from google import genai
+from google.genai import types
+from pydantic import BaseModel
+
+from gemini_nano_banana_tool.core.client import GeminiClientError
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = "index.jsonl"
+BLOB_DIR = "blobs"
+
+# Config fields that don't influence the response and must not change the fingerprint
+_IGNORED_CONFIG_FIELDS = frozenset({"http_options"})
+# Response fields that only describe the transport
+_IGNORED_RESPONSE_FIELDS = frozenset({"sdk_http_response"})
+
+_RESPONSE_TYPES: dict[str, type[BaseModel]] = {
+    "generate_content": types.GenerateContentResponse,
+    "generate_images": types.GenerateImagesResponse,
+}
+
+
+class CassetteError(GeminiClientError):
+    """Raised when a cassette can't be read or has no matching recording."""
+
+    pass
+
+
+def request_fingerprint(method: str, model: str, contents: Any, config: Any) -> str:
+    """Compute a stable fingerprint for an API request.
+
+    Inline binary data is represented by its SHA-256, so requests with identical
+    reference images produce the same fingerprint regardless of object identity.
+
+    Args:
+        method: SDK method name (generate_content, generate_images)
+        model: Model name
+        contents: Request contents (or prompt for generate_images)
+        config: Request config object or None
+
+    Returns:
+        Hex SHA-256 fingerprint
+    """
+    config_data = _canonical(config)
+    if isinstance(config_data, dict):
+        config_data = {k: v for k, v in config_data.items() if k not in _IGNORED_CONFIG_FIELDS}
+    payload = {
+        "method": method,
+        "model": model,
+        "contents": _canonical(contents),
+        "config": config_data,
+    }
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def _canonical(value: Any) -> Any:
+    """Convert request objects to JSON-compatible data, hashing binary payloads."""
+    if isinstance(value, BaseModel):
+        return _canonical(value.model_dump(exclude_none=True))
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in value.items()}
+    if isinstance(value, list | tuple):
+        return [_canonical(v) for v in value]
+    if isinstance(value, bytes):
+        return {"$sha256": hashlib.sha256(value).hexdigest()}
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+class Cassette:
+    """On-disk store of recorded responses, safe to share between threads."""
+
+    def __init__(self, directory: str, mode: str):
+        """Open (and for record mode, create) a cassette directory.
+
+        Args:
+            directory: Cassette directory path
+            mode: "record" or "replay"
+
+        Raises:
+            CassetteError: If the mode is invalid or a replay cassette is missing/corrupt
+        """
+        if mode not in ("record", "replay"):
+            raise CassetteError(f"Invalid cassette mode: {mode}. Use 'record' or 'replay'.")
+        self.directory = Path(directory)
+        self.mode = mode
+        self._blob_dir = self.directory / BLOB_DIR
+        self._index_path = self.directory / INDEX_FILE
+        self._entries: dict[str, list[dict[str, Any]]] = {}
+        self._replay_positions: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+        if mode == "record":
+            self._blob_dir.mkdir(parents=True, exist_ok=True)
+        elif not self._index_path.exists():
+            raise CassetteError(
+                f"Cassette not found: {self._index_path}. Record one first with --record."
+            )
+        if self._index_path.exists():
+            self._load_index()
+
+    def _load_index(self) -> None:
+        """Load all index entries into memory, grouped by fingerprint."""
+        try:
+            with open(self._index_path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._entries.setdefault(entry["fingerprint"], []).append(entry)
+        except (OSError, json.JSONDecodeError, KeyError) as e:
+            raise CassetteError(f"Invalid cassette index {self._index_path}: {e}") from e
+        logger.info(
+            f"Cassette loaded: {self.directory} "
+            f"({sum(len(v) for v in self._entries.values())} recording(s))"
+        )
+
+    def __len__(self) -> int:
+        return sum(len(v) for v in self._entries.values())
+
+    def record(self, fingerprint: str, method: str, model: str, response: BaseModel) -> None:
+        """Store a response under a request fingerprint.
+
+        Args:
+            fingerprint: Request fingerprint from request_fingerprint()
+            method: SDK method name
+            model: Model name
+            response: SDK response object
+        """
+        data = {
+            k: v
+            for k, v in response.model_dump(exclude_none=True).items()
+            if k not in _IGNORED_RESPONSE_FIELDS
+        }
+        entry = {
+            "fingerprint": fingerprint,
+            "method": method,
+            "model": model,
+            "recorded_at": datetime.now().isoformat(),
+            "response": self._externalize(data),
+        }
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._lock:
+            with open(self._index_path, "a", encoding="utf-8") as f:
+                f.write(line)
+            self._entries.setdefault(fingerprint, []).append(entry)
+        logger.debug(f"Recorded {method} response {fingerprint[:12]} for model={model}")
+
+    def replay(self, fingerprint: str, method: str, model: str) -> BaseModel:
+        """Return the recorded response for a fingerprint.
+
+        When the same request was recorded several times, successive calls cycle
+        through the recordings in order.
+
+        Args:
+            fingerprint: Request fingerprint from request_fingerprint()
+            method: SDK method name
+            model: Model name (for error messages)
+
+        Returns:
+            Reconstructed SDK response object
+
+        Raises:
+            CassetteError: If nothing was recorded for this request
+        """
+        with self._lock:
+            entries = self._entries.get(fingerprint)
+            if not entries:
+                raise CassetteError(
+                    f"No recorded response for {method} request {fingerprint[:12]} "
+                    f"(model={model}) in cassette {self.directory}"
+                )
+            position = self._replay_positions.get(fingerprint, 0)
+            self._replay_positions[fingerprint] = position + 1
+            entry = entries[position % len(entries)]
+        logger.debug(f"Replaying {method} response {fingerprint[:12]} for model={model}")
+        response_type = _RESPONSE_TYPES[method]
+        return response_type.model_validate(self._internalize(entry["response"]))
+
+    def _externalize(self, value: Any) -> Any:
+        """Replace bytes with content-addressed blob references, writing new blobs."""
+        if isinstance(value, dict):
+            return {k: self._externalize(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [self._externalize(v) for v in value]
+        if isinstance(value, bytes):
+            digest = hashlib.sha256(value).hexdigest()
+            blob_path = self._blob_dir / digest
+            if not blob_path.exists():
+                tmp_path = blob_path.with_name(f"{digest}.{os.getpid()}.{threading.get_ident()}")
+                tmp_path.write_bytes(value)
+                os.replace(tmp_path, blob_path)
+            return {"$blob": digest}
+        if isinstance(value, Enum):
+            return value.value
+        if isinstance(value, datetime):
+            return value.isoformat()
+        return value
+
+    def _internalize(self, value: Any) -> Any:
+        """Resolve blob references back into bytes."""
+        if isinstance(value, dict):
+            if set(value) == {"$blob"}:
+                blob_path = self._blob_dir / value["$blob"]
+                try:
+                    return blob_path.read_bytes()
+                except OSError as e:
+                    raise CassetteError(f"Missing cassette blob: {blob_path}") from e
+            return {k: self._internalize(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [self._internalize(v) for v in value]
+        return value
+
+
+class CassetteClient:
+    """Client wrapper that records to or replays from a cassette.
+
+    Exposes the same ``models.generate_content`` / ``models.generate_images``
+    surface as ``genai.Client``, so it can be passed to generate_image() and
+    generate_prompt() unchanged.
+    """
+
+    def __init__(self, cassette: Cassette, client: genai.Client | None = None):
+        """Wrap a client with a cassette.
+
+        Args:
+            cassette: Open cassette
+            client: Upstream client (required in record mode, unused in replay mode)
+
+        Raises:
+            CassetteError: If record mode is used without an upstream client
+        """
+        if cassette.mode == "record" and client is None:
+            raise CassetteError("Record mode requires an upstream client")
+        self.cassette = cassette
+        self.client = client
+        self.models = _CassetteModels(self)
+
+
+class _CassetteModels:
+    """The ``models`` namespace of a CassetteClient."""
+
+    def __init__(self, owner: CassetteClient):
+        self._owner = owner
+
+    def _call(self, method: str, model: str, payload: Any, config: Any, **kwargs: Any) -> Any:
+        cassette = self._owner.cassette
+        fingerprint = request_fingerprint(method, model, payload, config)
+        if cassette.mode == "replay":
+            return cassette.replay(fingerprint, method, model)
+        upstream = getattr(self._owner.client.models, method)  # type: ignore[union-attr]
+        response = upstream(model=model, config=config, **kwargs)
+        cassette.record(fingerprint, method, model, response)
+        return response
+
+    def generate_content(self, model: str, contents: Any, config: Any = None) -> Any:
+        """Record or replay a generate_content call."""
+        return self._call("generate_content", model, contents, config, contents=contents)
+
+    def generate_images(self, model: str, prompt: str, config: Any = None) -> Any:
+        """Record or replay a generate_images call."""
+        return self._call("generate_images", model, prompt, config, prompt=prompt)
@@ -0,0 +1,157 @@
+"""Circuit breaker for overloaded models.
+
+A breaker is closed while a model answers normally. When the share of
+overload failures (429, 5xx, timeouts) over a rolling window reaches the
+threshold, it opens and callers skip the model instead of waiting for another
+timeout. After a cool-down it is half-open: a single probe request is let
+through, which closes the breaker on success or opens it again on failure.
+
+Note: This code was generated with assistance from AI coding tools
+and has been reviewed and tested by a human.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+
+import httpx
+from google.genai import errors
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+# API status codes that mean the model is overloaded rather than the request bad
+OVERLOAD_STATUS_CODES = frozenset({429, 500, 503, 504})
+
+# Default breaker tuning
+DEFAULT_WINDOW_SECONDS = 60.0
+DEFAULT_FAILURE_THRESHOLD = 0.5
+DEFAULT_MIN_REQUESTS = 5
+DEFAULT_OPEN_SECONDS = 30.0
+
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker over a rolling error-rate window, thread safe."""
+
+    def __init__(
+        self,
+        name: str,
+        window_seconds: float = DEFAULT_WINDOW_SECONDS,
+        failure_threshold: float = DEFAULT_FAILURE_THRESHOLD,
+        min_requests: int = DEFAULT_MIN_REQUESTS,
+        open_seconds: float = DEFAULT_OPEN_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Create a closed breaker.
+
+        Args:
+            name: Name used in logs (the model name)
+            window_seconds: Rolling window for the error rate
+            failure_threshold: Failure share at which the breaker opens
+            min_requests: Outcomes in the window needed before it can open
+            open_seconds: How long the breaker stays open before a probe
+            clock: Monotonic clock (injectable for tests)
+        """
+        self.name = name
+        self.window_seconds = window_seconds
+        self.failure_threshold = failure_threshold
+        self.min_requests = min_requests
+        self.open_seconds = open_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._outcomes: deque[tuple[float, bool]] = deque()
+
+    @property
+    def state(self) -> str:
+        """Current state, moving from open to half-open once the cool-down is over."""
+        with self._lock:
+            return self._current_state()
+
+    def allow_request(self) -> bool:
+        """Return whether a request may be sent (claims the probe when half-open)."""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        """Record a successful call; a successful probe closes the breaker."""
+        with self._lock:
+            if self._current_state() == HALF_OPEN:
+                self._close()
+                return
+            self._record(False)
+
+    def record_failure(self) -> None:
+        """Record an overload failure; may open the breaker."""
+        with self._lock:
+            if self._current_state() == HALF_OPEN:
+                self._open("probe failed")
+                return
+            self._record(True)
+            if len(self._outcomes) < self.min_requests:
+                return
+            rate = sum(failed for _, failed in self._outcomes) / len(self._outcomes)
+            if rate >= self.failure_threshold:
+                self._open(f"{rate:.0%} of recent requests failed")
+
+    def release(self) -> None:
+        """Give back a half-open probe whose call ended without a verdict."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def _current_state(self) -> str:
+        if self._state == OPEN and self._clock() - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._probe_in_flight = False
+        return self._state
+
+    def _record(self, failed: bool) -> None:
+        now = self._clock()
+        self._outcomes.append((now, failed))
+        while self._outcomes and self._outcomes[0][0] < now - self.window_seconds:
+            self._outcomes.popleft()
+
+    def _open(self, reason: str) -> None:
+        self._state = OPEN
+        self._opened_at = self._clock()
+        self._probe_in_flight = False
+        self._outcomes.clear()
+        logger.warning(f"Circuit for {self.name} opened ({reason})")
+
+    def _close(self) -> None:
+        self._state = CLOSED
+        self._probe_in_flight = False
+        self._outcomes.clear()
+        logger.info(f"Circuit for {self.name} closed")
+
+
+def is_overload_error(error: BaseException) -> bool:
+    """Check whether an error (or its cause) means the model is overloaded.
+
+    Args:
+        error: Exception raised by a generation call
+
+    Returns:
+        True for 429/5xx API errors and network timeouts, False otherwise
+    """
+    current: BaseException | None = error
+    while current is not None:
+        if isinstance(current, errors.APIError):
+            return current.code in OVERLOAD_STATUS_CODES
+        if isinstance(current, (httpx.TimeoutException, TimeoutError)):
+            return True
+        current = current.__cause__
+    return False
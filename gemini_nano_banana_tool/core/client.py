@@ -6,8 +6,10 @@ and has been reviewed and tested by a human.
 
 import logging
 import os
+from typing import cast
 
 from google import genai
+from google.genai import types
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +31,12 @@ def create_client(
     use_vertex: bool = False,
     project: str | None = None,
     location: str | None = None,
+    base_url: str | None = None,
+    retry_attempts: int | None = None,
+    record_dir: str | None = None,
+    replay_dir: str | None = None,
+    pool_config: str | None = None,
+    pool_strategy: str | None = None,
 ) -> genai.Client:
     """Create and configure a Gemini client for image generation operations.
 
@@ -39,12 +47,25 @@ def create_client(
         use_vertex: Whether to use Vertex AI instead of Developer API
         project: Google Cloud project ID (required for Vertex AI)
         location: Google Cloud location (required for Vertex AI)
+        base_url: Override the API endpoint, e.g. a local stand-in server
+            (the SDK also honours GOOGLE_GEMINI_BASE_URL)
+        retry_attempts: Total attempts per request, including the first, for the
+            SDK's retry on 429/5xx responses (default: SDK behaviour)
+        record_dir: Record every API response to this cassette directory
+        replay_dir: Answer requests from this cassette directory instead of the API
+            (no credentials needed)
+        pool_config: Spread requests over the clients listed in this JSON file
+            (see pool.create_client_pool); the other credential arguments are ignored
+        pool_strategy: Override the pool file's strategy ("least-loaded" or "weighted")
 
     Returns:
         Configured Gemini client
 
     Raises:
         AuthenticationError: If authentication configuration is invalid
+        GeminiClientError: If both record_dir and replay_dir are given, pool_config
+            is combined with replay_dir, or the replay cassette or pool config
+            can't be opened
 
     Example:
         >>> # Gemini Developer API
@@ -57,7 +78,55 @@ def create_client(
         ...     project="my-project",
         ...     location="us-central1"
         ... )
+        >>>
+        >>> # Local stand-in server (see benchmarks/standin_server.py)
+        >>> client = create_client(api_key="standin", base_url="http://127.0.0.1:8765/")
+        >>>
+        >>> # Record once, then replay offline
+        >>> client = create_client(record_dir="cassettes/batch-1")
+        >>> client = create_client(replay_dir="cassettes/batch-1")
+        >>>
+        >>> # Several API keys or Vertex AI regions with separate quotas
+        >>> client = create_client(pool_config="pool.json")
     """
+    if record_dir and replay_dir:
+        raise GeminiClientError("Use either record_dir or replay_dir, not both")
+    if pool_config and replay_dir:
+        raise GeminiClientError("Use either pool_config or replay_dir, not both")
+    if replay_dir:
+        from gemini_nano_banana_tool.core.cassette import Cassette, CassetteClient
+
+        logger.info(f"Replaying API responses from cassette: {replay_dir}")
+        return cast(genai.Client, CassetteClient(Cassette(replay_dir, "replay")))
+
+    if pool_config:
+        from gemini_nano_banana_tool.core.pool import create_client_pool
+
+        client = cast(
+            genai.Client,
+            create_client_pool(pool_config, pool_strategy, base_url, retry_attempts),
+        )
+    else:
+        client = _create_api_client(
+            api_key, use_vertex, project, location, _build_http_options(base_url, retry_attempts)
+        )
+    if record_dir:
+        from gemini_nano_banana_tool.core.cassette import Cassette, CassetteClient
+
+        logger.info(f"Recording API responses to cassette: {record_dir}")
+        return cast(genai.Client, CassetteClient(Cassette(record_dir, "record"), client))
+    return client
+
+
+def _create_api_client(
+    api_key: str | None,
+    use_vertex: bool,
+    project: str | None,
+    location: str | None,
+    http_options: types.HttpOptions | None,
+) -> genai.Client:
+    """Create the underlying SDK client (see create_client for arguments)."""
+
     # Vertex AI configuration
     # Check if Vertex AI is enabled via environment or parameter
     logger.debug("Checking authentication method...")
@@ -90,7 +159,12 @@ def create_client(
             )
         try:
             logger.info(f"Creating Vertex AI client for project={project}, location={location}")
-            client = genai.Client(vertexai=True, project=project, location=location)
+            client = genai.Client(
+                vertexai=True,
+                project=project,
+                location=location,
+                http_options=http_options,
+            )
             logger.debug("Vertex AI client created successfully")
             return client
         except Exception as e:
@@ -119,7 +193,7 @@ def create_client(
     try:
         logger.info("Creating Gemini Developer API client")
         logger.debug(f"API key length: {len(api_key)} characters")
-        client = genai.Client(api_key=api_key)
+        client = genai.Client(api_key=api_key, http_options=http_options)
         logger.debug("Gemini client created successfully")
         return client
     except Exception as e:
@@ -128,6 +202,31 @@ def create_client(
         raise AuthenticationError(f"Failed to create Gemini client: {e}") from e
 
 
+def _build_http_options(
+    base_url: str | None,
+    retry_attempts: int | None,
+) -> types.HttpOptions | None:
+    """Build SDK HTTP options, or None to keep the SDK defaults.
+
+    Args:
+        base_url: Endpoint override
+        retry_attempts: Total attempts per request for retryable status codes
+
+    Returns:
+        HttpOptions or None
+    """
+    if base_url is None and retry_attempts is None:
+        return None
+    options = types.HttpOptions()
+    if base_url:
+        logger.debug(f"Using API base URL override: {base_url}")
+        options.base_url = base_url
+    if retry_attempts is not None:
+        logger.debug(f"Configuring SDK retries: attempts={retry_attempts}")
+        options.retry_options = types.HttpRetryOptions(attempts=retry_attempts)
+    return options
+
+
 def validate_client(client: genai.Client) -> None:
     """Validate that the client is properly configured.
 
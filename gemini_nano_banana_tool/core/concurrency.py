@@ -0,0 +1,366 @@
+"""Adaptive concurrency control (AIMD) per model.
+
+A fixed --concurrency is either too timid or triggers throttling storms.
+AdaptiveLimiter keeps a concurrency limit per model and adjusts it from the
+outcome of every call, like TCP congestion control:
+
+- A healthy call (no error, latency within ``latency_spike`` times the
+  model's baseline latency) grows the limit additively, by one slot per
+  limit's worth of healthy calls.
+- A 429/503 or a latency spike cuts the limit multiplicatively
+  (``decrease_factor``). Calls that started before the last cut don't cut
+  it again, so one burst of throttling halves the limit once, not once per
+  failed call.
+
+AdaptiveClient wraps a client and passes every ``models`` call through the
+limiter; its ``aio`` surface does the same for generate_image_async(), with
+tasks waiting without blocking the event loop. A waiting call stops waiting
+when its request's deadline passes, and its SDK timeout is recomputed once
+it gets a slot (see deadline.request_limits()). The current limit of each
+model is the ``concurrency.limit.<model>`` gauge in the limiter's metrics.
+
+Note: This code was generated with assistance from AI coding tools
+and has been reviewed and tested by a human.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections.abc import Callable
+from typing import Any
+
+from google import genai
+from google.genai import errors
+
+from gemini_nano_banana_tool.core.deadline import (
+    Deadline,
+    current_limits,
+    refresh_timeout,
+    wait_slice,
+)
+from gemini_nano_banana_tool.core.generator import DeadlineExceededError
+from gemini_nano_banana_tool.core.metrics import Metrics
+
+logger = logging.getLogger(__name__)
+
+# API status codes that mean "slow down"
+THROTTLE_STATUS_CODES = frozenset({429, 503})
+
+# Default AIMD tuning
+DEFAULT_INITIAL_LIMIT = 2
+DEFAULT_MIN_LIMIT = 1
+DEFAULT_MAX_LIMIT = 32
+DEFAULT_DECREASE_FACTOR = 0.5
+
+# A call slower than this multiple of the model's baseline latency is a spike
+DEFAULT_LATENCY_SPIKE = 2.0
+
+# Weight of each new latency sample in the baseline (exponential moving average)
+BASELINE_WEIGHT = 0.1
+
+
+def is_throttle_error(error: BaseException) -> bool:
+    """Check whether an error (or its cause) is a 429/503 API response."""
+    current: BaseException | None = error
+    while current is not None:
+        if isinstance(current, errors.APIError):
+            return current.code in THROTTLE_STATUS_CODES
+        current = current.__cause__
+    return False
+
+
+class _ModelLimit:
+    """AIMD state of one model."""
+
+    def __init__(self, limit: float):
+        self.limit = limit
+        self.in_flight = 0
+        self.baseline: float | None = None
+        self.last_decrease = float("-inf")
+
+
+class AdaptiveLimiter:
+    """Per-model AIMD concurrency limits, shared by threads and asyncio tasks.
+
+    Example:
+        >>> limiter = AdaptiveLimiter(max_limit=16)
+        >>> started = limiter.acquire("gemini-2.5-flash-image")
+        >>> try:
+        ...     response = client.models.generate_content(...)
+        ... except Exception as e:
+        ...     limiter.release("gemini-2.5-flash-image", started, e)
+        ...     raise
+        >>> limiter.release("gemini-2.5-flash-image", started)
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = DEFAULT_INITIAL_LIMIT,
+        min_limit: int = DEFAULT_MIN_LIMIT,
+        max_limit: int = DEFAULT_MAX_LIMIT,
+        decrease_factor: float = DEFAULT_DECREASE_FACTOR,
+        latency_spike: float = DEFAULT_LATENCY_SPIKE,
+        metrics: Metrics | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Create a limiter.
+
+        Args:
+            initial_limit: Starting limit of every model
+            min_limit: The limit never drops below this
+            max_limit: The limit never grows above this (e.g. the worker count)
+            decrease_factor: Multiplier applied to the limit on congestion
+            latency_spike: Latency multiple of the baseline that counts as congestion
+            metrics: Metrics to record limits and congestion signals in
+            clock: Monotonic clock (injectable for tests)
+        """
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.initial_limit = min(max(initial_limit, self.min_limit), self.max_limit)
+        self.decrease_factor = decrease_factor
+        self.latency_spike = latency_spike
+        self.metrics = metrics or Metrics()
+        self._clock = clock
+        self._cond = threading.Condition()
+        self._models: dict[str, _ModelLimit] = {}
+        self._async_waiters: list[tuple[asyncio.AbstractEventLoop, asyncio.Future[None]]] = []
+
+    def limit(self, model: str) -> int:
+        """Current concurrency limit of a model."""
+        with self._cond:
+            return int(self._state(model).limit)
+
+    def _state(self, model: str) -> _ModelLimit:
+        """Return a model's state, creating it on first use (lock held)."""
+        if model not in self._models:
+            self._models[model] = _ModelLimit(self.initial_limit)
+            self.metrics.set_gauge(f"concurrency.limit.{model}", self.initial_limit)
+        return self._models[model]
+
+    def _try_acquire(self, model: str, deadline: Deadline | None) -> float | None:
+        """Take a slot if the model is under its limit (lock held); return the start time.
+
+        Raises:
+            DeadlineExceededError: If the deadline passed (checked before taking a slot)
+        """
+        if deadline is not None and deadline.expired:
+            self.metrics.count(f"concurrency.expired.{model}")
+            raise DeadlineExceededError(f"Request not sent: {deadline.reason}")
+        state = self._state(model)
+        if state.in_flight >= int(state.limit):
+            return None
+        state.in_flight += 1
+        return self._clock()
+
+    def acquire(self, model: str, deadline: Deadline | None = None) -> float:
+        """Wait for a slot for a call to the model.
+
+        Args:
+            model: Model to call
+            deadline: Stop waiting when it passes or is cancelled
+
+        Returns:
+            Start time of the call, to pass to release()
+
+        Raises:
+            DeadlineExceededError: If the deadline passed while waiting
+        """
+        with self._cond:
+            while True:
+                started = self._try_acquire(model, deadline)
+                if started is not None:
+                    return started
+                self._cond.wait(wait_slice(deadline))
+
+    async def acquire_async(self, model: str, deadline: Deadline | None = None) -> float:
+        """Wait for a slot without blocking the event loop (see acquire())."""
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._cond:
+                started = self._try_acquire(model, deadline)
+                if started is not None:
+                    return started
+                wakeup: asyncio.Future[None] = loop.create_future()
+                self._async_waiters.append((loop, wakeup))
+            try:
+                # shield: a slice running out must not cancel the future release() wakes
+                await asyncio.wait_for(asyncio.shield(wakeup), wait_slice(deadline))
+            except TimeoutError:
+                pass
+            finally:
+                with self._cond:
+                    if (loop, wakeup) in self._async_waiters:
+                        self._async_waiters.remove((loop, wakeup))
+
+    def release(self, model: str, started: float, error: BaseException | None = None) -> None:
+        """Free a slot and adjust the model's limit from the call's outcome.
+
+        Args:
+            model: Model called
+            started: Value returned by acquire()
+            error: The call's exception, or None if it succeeded
+        """
+        now = self._clock()
+        with self._cond:
+            state = self._state(model)
+            state.in_flight -= 1
+            if error is None:
+                self._on_success(model, state, started, now - started)
+            elif is_throttle_error(error):
+                self.metrics.count(f"concurrency.throttled.{model}")
+                self._decrease(model, state, started, now, "throttled")
+            self.metrics.set_gauge(f"concurrency.limit.{model}", round(state.limit, 2))
+            self._cond.notify_all()
+            waiters, self._async_waiters = self._async_waiters, []
+        for loop, wakeup in waiters:
+            loop.call_soon_threadsafe(_wake, wakeup)
+
+    def _on_success(self, model: str, state: _ModelLimit, started: float, latency: float) -> None:
+        """Grow the limit after a healthy call, or cut it on a latency spike (lock held)."""
+        baseline = state.baseline
+        state.baseline = (
+            latency
+            if baseline is None
+            else (1 - BASELINE_WEIGHT) * baseline + BASELINE_WEIGHT * latency
+        )
+        if baseline is not None and latency > self.latency_spike * baseline:
+            self.metrics.count(f"concurrency.latency_spikes.{model}")
+            self._decrease(model, state, started, started + latency, "latency spike")
+            return
+        state.limit = min(float(self.max_limit), state.limit + 1 / state.limit)
+
+    def _decrease(
+        self, model: str, state: _ModelLimit, started: float, now: float, reason: str
+    ) -> None:
+        """Cut the limit once per congestion event (lock held)."""
+        if started < state.last_decrease:
+            # Started under the old limit: this event already cut it
+            return
+        previous = state.limit
+        state.limit = max(float(self.min_limit), state.limit * self.decrease_factor)
+        state.last_decrease = now
+        logger.info(f"{model}: {reason}, concurrency limit {previous:.1f} -> {state.limit:.1f}")
+
+
+def _wake(wakeup: asyncio.Future[None]) -> None:
+    """Resolve an async waiter's future unless it was cancelled."""
+    if not wakeup.done():
+        wakeup.set_result(None)
+
+
+class AdaptiveClient:
+    """Client wrapper that runs every ``models`` call under an AdaptiveLimiter.
+
+    Example:
+        >>> client = AdaptiveClient(create_client(), AdaptiveLimiter(max_limit=16))
+        >>> generate_image(client, "A cat", "cat.png")
+        >>> client.limiter.metrics.snapshot()
+        {'concurrency.limit.gemini-2.5-flash-image': 2.5}
+    """
+
+    def __init__(self, client: genai.Client, limiter: AdaptiveLimiter):
+        """Wrap a client.
+
+        Args:
+            client: Client (or ClientPool, HedgedClient) making the calls
+            limiter: Limiter shared by everything calling through this client
+        """
+        self.client = client
+        self.limiter = limiter
+        self.models = _AdaptiveModels(self)
+
+    @property
+    def aio(self) -> Any:
+        """Async surface, present only if the wrapped client has one."""
+        aio = getattr(self.client, "aio", None)
+        if aio is None:
+            raise AttributeError("aio")
+        return _AsyncAdaptiveClient(self, aio)
+
+    @property
+    def batches(self) -> Any:
+        """Batch jobs aren't limited: use the wrapped client's."""
+        return self.client.batches
+
+    @property
+    def files(self) -> Any:
+        """Files aren't limited: use the wrapped client's."""
+        return self.client.files
+
+    @property
+    def caches(self) -> Any:
+        """Caches aren't limited: use the wrapped client's."""
+        return self.client.caches
+
+    def call(self, method: str, model: str, **kwargs: Any) -> Any:
+        """Call a ``models`` method once the model is under its limit.
+
+        The request's deadline bounds the wait; once a slot is free, the
+        call's SDK timeout is recomputed from the time left.
+        """
+        _, deadline = current_limits()
+        started = self.limiter.acquire(model, deadline)
+        try:
+            kwargs["config"] = refresh_timeout(kwargs.get("config"))
+            response = getattr(self.client.models, method)(model=model, **kwargs)
+        except BaseException as e:
+            self.limiter.release(model, started, e)
+            raise
+        self.limiter.release(model, started)
+        return response
+
+    async def call_async(self, aio: Any, method: str, model: str, **kwargs: Any) -> Any:
+        """Async variant of call() on the wrapped client's ``aio`` surface."""
+        _, deadline = current_limits()
+        started = await self.limiter.acquire_async(model, deadline)
+        try:
+            kwargs["config"] = refresh_timeout(kwargs.get("config"))
+            response = await getattr(aio.models, method)(model=model, **kwargs)
+        except BaseException as e:
+            self.limiter.release(model, started, e)
+            raise
+        self.limiter.release(model, started)
+        return response
+
+
+class _AdaptiveModels:
+    """The ``models`` namespace of an AdaptiveClient."""
+
+    def __init__(self, owner: AdaptiveClient):
+        self._owner = owner
+
+    def generate_content(self, model: str, contents: Any, config: Any = None) -> Any:
+        """Run a generate_content call under the model's limit."""
+        return self._owner.call("generate_content", model, contents=contents, config=config)
+
+    def generate_images(self, model: str, prompt: str, config: Any = None) -> Any:
+        """Run a generate_images call under the model's limit."""
+        return self._owner.call("generate_images", model, prompt=prompt, config=config)
+
+
+class _AsyncAdaptiveClient:
+    """The ``aio`` surface of an AdaptiveClient."""
+
+    def __init__(self, owner: AdaptiveClient, aio: Any):
+        self.models = _AsyncAdaptiveModels(owner, aio)
+
+
+class _AsyncAdaptiveModels:
+    """The ``aio.models`` namespace of an AdaptiveClient."""
+
+    def __init__(self, owner: AdaptiveClient, aio: Any):
+        self._owner = owner
+        self._aio = aio
+
+    async def generate_content(self, model: str, contents: Any, config: Any = None) -> Any:
+        """Run an async generate_content call under the model's limit."""
+        return await self._owner.call_async(
+            self._aio, "generate_content", model, contents=contents, config=config
+        )
+
+    async def generate_images(self, model: str, prompt: str, config: Any = None) -> Any:
+        """Run an async generate_images call under the model's limit."""
+        return await self._owner.call_async(
+            self._aio, "generate_images", model, prompt=prompt, config=config
+        )
@@ -0,0 +1,159 @@
+"""Deadlines and cooperative cancellation for API requests.
+
+A Deadline is shared by every request of a run: it expires at a fixed
+monotonic time (or never) and can be cancelled, e.g. on Ctrl-C. Workers check
+it before sending a request and before writing a result, and derive each
+request's SDK timeout from it, so a stuck connection ends at the per-request
+timeout or the run's deadline, whichever comes first.
+
+Client wrappers that queue calls (PriorityScheduler, AdaptiveLimiter) find
+the request's timeout and deadline through request_limits(), set around the
+API call by generate_image(). They stop waiting when the deadline passes and
+recompute the SDK timeout once the call is admitted, so time spent queued
+isn't sent as part of the timeout.
+
+Note: This code was generated with assistance from AI coding tools
+and has been reviewed and tested by a human.
+"""
+
+import contextvars
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from typing import Any
+
+from google.genai import types
+
+# Default per-request timeout for CLI commands in seconds
+DEFAULT_REQUEST_TIMEOUT = 300.0
+
+# Longest wait between deadline checks while queued (cancellation isn't timed)
+DEFAULT_WAIT_SLICE = 1.0
+
+
+class Deadline:
+    """Expiry time plus cancellation flag, safe to share between threads and tasks.
+
+    Example:
+        >>> deadline = Deadline(3600)  # whole run must finish within an hour
+        >>> deadline.timeout(300)  # per-request timeout, capped by the deadline
+        300
+        >>> deadline.cancel()
+        >>> deadline.expired
+        True
+    """
+
+    def __init__(self, seconds: float | None = None, clock: Callable[[], float] = time.monotonic):
+        """Create a deadline.
+
+        Args:
+            seconds: Seconds from now until expiry, or None to only allow cancellation
+            clock: Monotonic clock (injectable for tests)
+        """
+        self._clock = clock
+        self.expires_at = None if seconds is None else clock() + seconds
+        self._cancelled = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether cancel() was called."""
+        return self._cancelled.is_set()
+
+    @property
+    def expired(self) -> bool:
+        """Whether the deadline has passed or was cancelled."""
+        return self.cancelled or self.remaining() == 0
+
+    @property
+    def reason(self) -> str:
+        """Human-readable reason for expiry."""
+        return "cancelled" if self.cancelled else "deadline exceeded"
+
+    def remaining(self) -> float | None:
+        """Seconds left, 0 once passed, or None without an expiry time."""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - self._clock())
+
+    def cancel(self) -> None:
+        """Cancel all work sharing this deadline."""
+        self._cancelled.set()
+
+    def timeout(self, per_request: float | None) -> float | None:
+        """Timeout for the next request: the per-request timeout capped by the time left.
+
+        Args:
+            per_request: Per-request timeout in seconds, or None
+
+        Returns:
+            Seconds, or None for no timeout
+        """
+        remaining = self.remaining()
+        if remaining is None:
+            return per_request
+        if per_request is None:
+            return remaining
+        return min(per_request, remaining)
+
+
+def request_timeout(timeout: float | None, deadline: Deadline | None) -> float | None:
+    """Combine a per-request timeout with an optional deadline (see Deadline.timeout)."""
+    return deadline.timeout(timeout) if deadline else timeout
+
+
+def timeout_http_options(timeout: float | None) -> types.HttpOptions | None:
+    """Build per-request SDK HTTP options for a timeout in seconds, or None."""
+    if timeout is None:
+        return None
+    # The SDK takes milliseconds; never send 0, which would mean "no timeout"
+    return types.HttpOptions(timeout=max(1, int(timeout * 1000)))
+
+
+_limits: contextvars.ContextVar[tuple[float | None, Deadline | None]] = contextvars.ContextVar(
+    "request_limits", default=(None, None)
+)
+
+
+def wait_slice(deadline: Deadline | None) -> float | None:
+    """Seconds a queued call may wait before checking its deadline again, or None."""
+    if deadline is None:
+        return None
+    remaining = deadline.remaining()
+    return DEFAULT_WAIT_SLICE if remaining is None else min(DEFAULT_WAIT_SLICE, remaining)
+
+
+@contextmanager
+def request_limits(timeout: float | None, deadline: Deadline | None) -> Iterator[None]:
+    """Make a request's timeout and deadline visible to the client wrappers it passes.
+
+    Args:
+        timeout: Per-request timeout in seconds, or None
+        deadline: Deadline of the run, or None
+    """
+    token = _limits.set((timeout, deadline))
+    try:
+        yield
+    finally:
+        _limits.reset(token)
+
+
+def current_limits() -> tuple[float | None, Deadline | None]:
+    """Return the (timeout, deadline) of the enclosing request_limits() block."""
+    return _limits.get()
+
+
+def refresh_timeout(config: Any) -> Any:
+    """Return a request config with its SDK timeout recomputed for the time left now.
+
+    Args:
+        config: GenerateContentConfig or GenerateImagesConfig, or None
+
+    Returns:
+        The config, updated if the enclosing request has a timeout or deadline
+    """
+    timeout, deadline = current_limits()
+    http_options = timeout_http_options(request_timeout(timeout, deadline))
+    if config is None or http_options is None:
+        return config
+    return config.model_copy(update={"http_options": http_options})
@@ -0,0 +1,196 @@
+"""Automatic model fallback behind per-model circuit breakers.
+
+ModelRouter.generate_image() has the same signature as generate_image(). It
+tries the requested model and then its fallback chain (MODEL_FALLBACK_CHAINS,
+e.g. Pro → Flash → Imagen fast), skipping models whose circuit breaker is open
+and moving on when a model fails with an overload error. Parameters a fallback
+model doesn't support are rewritten: the resolution is dropped, surplus
+reference images are trimmed, and Imagen is skipped for requests with
+reference images or an aspect ratio it doesn't offer. The result records the
+requested model and the model that actually served the request.
+
+Note: This code was generated with assistance from AI coding tools
+and has been reviewed and tested by a human.
+"""
+
+import logging
+import threading
+from typing import Any
+
+from google import genai
+
+from gemini_nano_banana_tool.core.circuit_breaker import CircuitBreaker, is_overload_error
+from gemini_nano_banana_tool.core.deadline import Deadline
+from gemini_nano_banana_tool.core.generator import GenerationError, generate_image
+from gemini_nano_banana_tool.core.models import (
+    DEFAULT_MODEL,
+    IMAGEN_ASPECT_RATIOS,
+    MAX_REFERENCE_IMAGES_PER_MODEL,
+    MODEL_FALLBACK_CHAINS,
+    MODELS_WITH_RESOLUTION_SUPPORT,
+    is_imagen_model,
+)
+from gemini_nano_banana_tool.core.writer import ImageSink
+
+logger = logging.getLogger(__name__)
+
+
+def adapt_request(
+    model: str,
+    reference_images: list[str] | None,
+    aspect_ratio: str,
+    resolution: str | None,
+) -> tuple[list[str] | None, str | None, list[str]] | None:
+    """Rewrite request parameters for a (fallback) model.
+
+    Args:
+        model: Model that will serve the request
+        reference_images: Requested reference image paths
+        aspect_ratio: Requested aspect ratio
+        resolution: Requested resolution quality
+
+    Returns:
+        (reference_images, resolution, notes on what was rewritten), or None if
+        the model can't serve the request at all
+    """
+    notes: list[str] = []
+    if is_imagen_model(model):
+        if reference_images or aspect_ratio not in IMAGEN_ASPECT_RATIOS:
+            return None
+    elif reference_images:
+        limit = MAX_REFERENCE_IMAGES_PER_MODEL.get(model)
+        if limit is not None and len(reference_images) > limit:
+            notes.append(f"reference images trimmed from {len(reference_images)} to {limit}")
+            reference_images = reference_images[:limit]
+    if resolution and model not in MODELS_WITH_RESOLUTION_SUPPORT:
+        notes.append(f"resolution {resolution} dropped")
+        resolution = None
+    return reference_images, resolution, notes
+
+
+class ModelRouter:
+    """Routes generate_image() calls around overloaded models, safe to share between threads.
+
+    Example:
+        >>> router = ModelRouter()
+        >>> result = router.generate_image(client, "A cat", "cat.png",
+        ...                                model="gemini-3-pro-image-preview")
+        >>> result["served_by_model"]
+        'gemini-2.5-flash-image'
+    """
+
+    def __init__(
+        self,
+        chains: dict[str, list[str]] | None = None,
+        **breaker_options: Any,
+    ):
+        """Create a router with one circuit breaker per model.
+
+        Args:
+            chains: Fallback chain per model (default: MODEL_FALLBACK_CHAINS)
+            **breaker_options: CircuitBreaker tuning (window_seconds,
+                failure_threshold, min_requests, open_seconds, clock)
+        """
+        self.chains = MODEL_FALLBACK_CHAINS if chains is None else chains
+        self._breaker_options = breaker_options
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, model: str) -> CircuitBreaker:
+        """Return the model's circuit breaker, creating it on first use."""
+        with self._lock:
+            if model not in self._breakers:
+                self._breakers[model] = CircuitBreaker(model, **self._breaker_options)
+            return self._breakers[model]
+
+    def chain(self, model: str) -> list[str]:
+        """Return the models to try for a request, requested model first."""
+        return [model] + [m for m in self.chains.get(model, []) if m != model]
+
+    def generate_image(
+        self,
+        client: genai.Client,
+        prompt: str,
+        output_path: str,
+        reference_images: list[str] | None = None,
+        aspect_ratio: str = "1:1",
+        model: str = DEFAULT_MODEL,
+        resolution: str | None = None,
+        timeout: float | None = None,
+        deadline: Deadline | None = None,
+        postprocessor: ImageSink | None = None,
+    ) -> dict[str, Any]:
+        """Generate an image with the first available model of the fallback chain.
+
+        Args:
+            client: Configured Gemini/Imagen client
+            prompt: Text prompt for image generation
+            output_path: Path to save generated image
+            reference_images: Optional reference image paths
+            aspect_ratio: Aspect ratio (e.g., "16:9")
+            model: Requested model
+            resolution: Resolution quality for Pro model (1K/2K/4K)
+            timeout: Per-attempt timeout in seconds; a timed-out attempt counts
+                as an overload and moves on to the next model
+            deadline: Deadline shared by all attempts
+            postprocessor: Optional PostProcessor or ImageWriter to write the image with
+
+        Returns:
+            generate_image() result plus "requested_model", "served_by_model"
+            and, when parameters were rewritten, "fallback_rewrites"
+
+        Raises:
+            GenerationError: If a model fails with a non-overload error, or no
+                model of the chain is available
+        """
+        last_error: GenerationError | None = None
+        for candidate in self.chain(model):
+            adapted = adapt_request(candidate, reference_images, aspect_ratio, resolution)
+            if adapted is None:
+                logger.debug(f"Skipping fallback {candidate}: request not supported")
+                continue
+            breaker = self.breaker(candidate)
+            if not breaker.allow_request():
+                logger.info(f"Circuit for {candidate} is {breaker.state}, trying next model")
+                continue
+
+            images, candidate_resolution, notes = adapted
+            if candidate != model:
+                logger.warning(f"Falling back from {model} to {candidate}")
+            try:
+                result = generate_image(
+                    client=client,
+                    prompt=prompt,
+                    output_path=output_path,
+                    reference_images=images,
+                    aspect_ratio=aspect_ratio,
+                    model=candidate,
+                    resolution=candidate_resolution,
+                    timeout=timeout,
+                    deadline=deadline,
+                    postprocessor=postprocessor,
+                )
+            except GenerationError as e:
+                if not is_overload_error(e):
+                    breaker.release()
+                    raise
+                breaker.record_failure()
+                last_error = e
+                logger.warning(f"{candidate} overloaded: {e}")
+                continue
+            except BaseException:
+                breaker.release()
+                raise
+
+            breaker.record_success()
+            result["requested_model"] = model
+            result["served_by_model"] = candidate
+            if notes:
+                result["fallback_rewrites"] = notes
+            return result
+
+        if last_error is not None:
+            raise last_error
+        raise GenerationError(
+            f"No model available for {model}: circuits open for {', '.join(self.chain(model))}"
+        )
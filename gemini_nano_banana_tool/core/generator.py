@@ -4,13 +4,21 @@ Note: This code was generated with assistance from AI coding tools
 and has been reviewed and tested by a human.
 """
 
-import base64
+import asyncio
+import binascii
 import logging
 from typing import Any
 
+import httpx
 from google import genai
 from google.genai import types
 
+from gemini_nano_banana_tool.core.deadline import (
+    Deadline,
+    request_limits,
+    request_timeout,
+    timeout_http_options,
+)
 from gemini_nano_banana_tool.core.models import (
     ASPECT_RATIO_RESOLUTIONS,
     COST_PER_IMAGE,
@@ -20,6 +28,7 @@ from gemini_nano_banana_tool.core.models import (
     MODELS_WITH_RESOLUTION_SUPPORT,
     is_imagen_model,
 )
+from gemini_nano_banana_tool.core.writer import ImageSink
 from gemini_nano_banana_tool.utils import save_image
 
 logger = logging.getLogger(__name__)
@@ -31,6 +40,12 @@ class GenerationError(Exception):
     pass
 
 
+class DeadlineExceededError(GenerationError):
+    """Raised when a request times out, its deadline passes or it is cancelled."""
+
+    pass
+
+
 def generate_image(
     client: genai.Client,
     prompt: str,
@@ -39,12 +54,19 @@ def generate_image(
     aspect_ratio: str = "1:1",
     model: str = DEFAULT_MODEL,
     resolution: str | None = None,
+    timeout: float | None = None,
+    deadline: Deadline | None = None,
+    postprocessor: ImageSink | None = None,
 ) -> dict[str, Any]:
     """Generate image from prompt and optional reference images.
 
     Supports both Gemini models (with reference images) and Imagen 4 models
     (text-only generation).
 
+    The request is sent with an SDK timeout of ``timeout`` seconds, capped by
+    the time left until ``deadline``. The deadline is checked again before the
+    image is written, so a cancelled or expired request never writes output.
+
     Args:
         client: Configured Gemini/Imagen client
         prompt: Text prompt for image generation
@@ -53,6 +75,12 @@ def generate_image(
         aspect_ratio: Aspect ratio (e.g., "16:9")
         model: Model to use (Gemini or Imagen 4)
         resolution: Resolution quality for Pro model (1K/2K/4K), ignored for Flash/Imagen
+        timeout: Per-request timeout in seconds (default: SDK default)
+        deadline: Shared deadline/cancellation for the run this request belongs to
+        postprocessor: Optional PostProcessor (a process pool that decodes,
+            converts, hashes and writes the image) or ImageWriter (atomic,
+            optionally fsync'd writes on a background thread); adds a
+            "postprocess" entry to the result
 
     Returns:
         dict with keys:
@@ -69,6 +97,8 @@ def generate_image(
 
     Raises:
         GenerationError: If image generation fails
+        DeadlineExceededError: If the request timed out, or the deadline passed
+            or was cancelled
         FileNotFoundError: If reference images don't exist
 
     Example:
@@ -96,208 +126,414 @@ def generate_image(
             f"reference_images={len(reference_images) if reference_images else 0}"
         )
         logger.debug(f"Prompt length: {len(prompt)} characters")
+        _check_deadline(deadline)
+        limit = request_timeout(timeout, deadline)
+        http_options = timeout_http_options(limit)
 
         # Check if using Imagen model
         if is_imagen_model(model):
             logger.info(f"Using Imagen 4 API: model={model}")
-            return _generate_with_imagen(
-                client=client,
-                prompt=prompt,
-                output_path=output_path,
-                aspect_ratio=aspect_ratio,
-                model=model,
-                resolution=resolution,
-            )
+            with request_limits(timeout, deadline):
+                return _generate_with_imagen(
+                    client=client,
+                    prompt=prompt,
+                    output_path=output_path,
+                    aspect_ratio=aspect_ratio,
+                    model=model,
+                    resolution=resolution,
+                    http_options=http_options,
+                    deadline=deadline,
+                    postprocessor=postprocessor,
+                )
 
         # Gemini model generation logic
         logger.info(f"Using Gemini API: model={model}")
 
-        # Warn if reference images provided for Imagen (already handled above)
-        if reference_images:
-            logger.debug(f"Using {len(reference_images)} reference image(s) with Gemini model")
-
-        # Build contents for the generation request
-        contents: list[types.Part] = []
-
-        # Add reference images if provided
-        if reference_images:
-            logger.info(f"Loading {len(reference_images)} reference image(s)")
-            for img_path in reference_images:
-                try:
-                    logger.debug(f"Loading reference image: {img_path}")
-                    with open(img_path, "rb") as f:
-                        image_data = f.read()
-                    mime_type = _get_mime_type(img_path)
-                    logger.debug(
-                        f"Reference image loaded: {img_path}, "
-                        f"size={len(image_data)} bytes, mime_type={mime_type}"
-                    )
-                    # Create Part with inline data
-                    contents.append(
-                        types.Part(
-                            inline_data=types.Blob(
-                                mime_type=mime_type,
-                                data=image_data,
-                            )
-                        )
-                    )
-                except FileNotFoundError:
-                    logger.error(f"Reference image not found: {img_path}")
-                    raise GenerationError(
-                        f"Reference image not found: {img_path}. "
-                        f"Ensure the file exists and the path is correct."
-                    )
-                except PermissionError:
-                    logger.error(f"Permission denied reading reference image: {img_path}")
-                    raise GenerationError(f"Permission denied reading reference image: {img_path}")
-                except Exception as e:
-                    logger.error(f"Failed to load reference image {img_path}: {e}")
-                    logger.debug("Reference image load error details:", exc_info=True)
-                    raise GenerationError(f"Failed to load reference image {img_path}: {e}")
-
-        # Add text prompt
-        logger.debug("Adding text prompt to request")
-        contents.append(types.Part(text=prompt))
-
-        # Configure generation with aspect ratio and resolution
-        # Determine effective resolution to use
-        effective_resolution = None
-        if resolution and model in MODELS_WITH_RESOLUTION_SUPPORT:
-            effective_resolution = resolution
-            logger.debug(
-                f"Configuring generation: aspect_ratio={aspect_ratio}, resolution={resolution}"
-            )
-        else:
-            if resolution and model not in MODELS_WITH_RESOLUTION_SUPPORT:
-                logger.warning(
-                    f"Resolution '{resolution}' ignored for model '{model}' "
-                    f"(only Pro model supports variable resolution)"
-                )
-            logger.debug(
-                f"Configuring generation: aspect_ratio={aspect_ratio}, resolution=default (~1024p)"
-            )
-
-        # Build image config
-        image_config_params: dict[str, Any] = {"aspect_ratio": aspect_ratio}
-        if effective_resolution:
-            # Pro model: add image_size parameter
-            image_config_params["image_size"] = effective_resolution
-            logger.debug(f"Using image_size={effective_resolution} for Pro model")
-
-        config = types.GenerateContentConfig(
-            response_modalities=["IMAGE"],
-            image_config=types.ImageConfig(**image_config_params),
+        contents, config, effective_resolution = build_content_request(
+            prompt, reference_images, aspect_ratio, model, resolution
         )
+        if http_options:
+            config = config.model_copy(update={"http_options": http_options})
 
         # Generate content
         logger.info(f"Calling Gemini API: model={model}")
         logger.debug(f"Request config: {config}")
-        response = client.models.generate_content(
+        with request_limits(timeout, deadline):
+            response = client.models.generate_content(
+                model=model,
+                contents=contents,  # type: ignore[arg-type]
+                config=config,
+            )
+        logger.debug("API call completed")
+
+        _check_deadline(deadline)
+        return save_content_response(
+            response,
+            output_path,
             model=model,
-            contents=contents,  # type: ignore[arg-type]
-            config=config,
+            aspect_ratio=aspect_ratio,
+            effective_resolution=effective_resolution,
+            reference_image_count=len(reference_images) if reference_images else 0,
+            postprocessor=postprocessor,
         )
-        logger.debug("API call completed")
 
-        # Extract image from response
-        if not response.candidates:
-            logger.error("No candidates returned from API")
-            raise GenerationError("No candidates returned from API. Request may have been blocked.")
-
-        candidate = response.candidates[0]
-        logger.debug(f"Response has {len(response.candidates)} candidate(s)")
-
-        # Check for content filtering
-        if not candidate.content or not candidate.content.parts:
-            finish_reason = getattr(candidate, "finish_reason", "UNKNOWN")
-            logger.error(f"No content generated, finish_reason={finish_reason}")
-            raise GenerationError(
-                f"No content generated. Finish reason: {finish_reason}. "
-                f"The prompt may have been blocked by safety filters."
-            )
+    except GenerationError:
+        raise
+    except httpx.TimeoutException as e:
+        logger.error(_timeout_message(limit))
+        raise DeadlineExceededError(_timeout_message(limit)) from e
+    except Exception as e:
+        logger.error(f"Image generation failed: {type(e).__name__}: {e}")
+        logger.debug("Generation error details:", exc_info=True)
+        raise GenerationError(
+            f"Image generation failed: {e}. "
+            f"Check your API key, network connection, and input parameters."
+        ) from e
 
-        # Find the image part
-        logger.debug(f"Extracting image from {len(candidate.content.parts)} part(s)")
-        image_part = None
-        for part in candidate.content.parts:
-            if hasattr(part, "inline_data") and part.inline_data:
-                image_part = part
-                break
-
-        if not image_part:
-            logger.error("No image data found in response")
-            raise GenerationError(
-                "No image data found in response. The model may have returned text only."
-            )
 
-        # Decode and save image
-        try:
-            logger.debug("Decoding and saving image...")
-            # Handle both bytes and base64-encoded string
-            if image_part.inline_data and image_part.inline_data.data:
-                image_bytes = (
-                    base64.b64decode(image_part.inline_data.data)
-                    if isinstance(image_part.inline_data.data, str)
-                    else image_part.inline_data.data
-                )
-                logger.debug(f"Image size: {len(image_bytes)} bytes")
-                save_image(image_bytes, output_path)
-                logger.info(f"Image saved successfully to: {output_path}")
-            else:
-                logger.error("No image data available in response")
-                raise GenerationError("No image data available in response")
-        except Exception as e:
-            logger.error(f"Failed to save generated image: {e}")
-            logger.debug("Image save error details:", exc_info=True)
-            raise GenerationError(f"Failed to save generated image: {e}")
-
-        # Extract token usage
-        token_count = 0
-        if hasattr(response, "usage_metadata") and response.usage_metadata:
-            token_count = getattr(response.usage_metadata, "total_token_count", 0)
-        logger.debug(f"Token usage: {token_count}")
-
-        # Calculate cost based on token usage
-        cost_per_token = COST_PER_TOKEN.get(model, 0.0)
-        estimated_cost = token_count * cost_per_token if token_count > 0 else 0.0
-        logger.debug(
-            f"Cost calculation: {token_count} tokens × ${cost_per_token} = ${estimated_cost:.4f}"
-        )
+async def generate_image_async(
+    client: genai.Client,
+    prompt: str,
+    output_path: str,
+    reference_images: list[str] | None = None,
+    aspect_ratio: str = "1:1",
+    model: str = DEFAULT_MODEL,
+    resolution: str | None = None,
+    timeout: float | None = None,
+    deadline: Deadline | None = None,
+    postprocessor: ImageSink | None = None,
+) -> dict[str, Any]:
+    """Generate an image without blocking the event loop.
+
+    Same arguments, result and errors as generate_image(). The API call runs on
+    the client's async (``client.aio``) surface inside ``asyncio.timeout``, so
+    a timeout or a cancelled task abandons the request cleanly; the image is
+    decoded and written in a worker thread only after the deadline is checked
+    again. Wrapper clients without ``aio`` (pool, hedging, cassettes) run
+    generate_image() in a worker thread instead.
 
-        # Format resolution
-        width, height = ASPECT_RATIO_RESOLUTIONS.get(aspect_ratio, (0, 0))
-        resolution_str = f"{width}x{height}"
-        logger.debug(f"Image resolution: {resolution_str}")
-
-        # Build result
-        result = {
-            "output_path": output_path,
-            "model": model,
-            "aspect_ratio": aspect_ratio,
-            "resolution": resolution_str,
-            "resolution_quality": effective_resolution or DEFAULT_RESOLUTION,
-            "reference_image_count": len(reference_images) if reference_images else 0,
-            "token_count": token_count,
-            "estimated_cost_usd": round(estimated_cost, 4),
-            "estimated_cost_per_image_usd": None,  # Gemini uses token-based pricing
-            "metadata": {
-                "model_type": "gemini",
-                "finish_reason": getattr(candidate, "finish_reason", "UNKNOWN"),
-                "safety_ratings": getattr(candidate, "safety_ratings", None),
-            },
-        }
-        logger.debug(f"Generation completed successfully: {result}")
-        return result
+    Example:
+        >>> result = await generate_image_async(client, "A cat", "cat.png", timeout=120)
+    """
+    aio = getattr(client, "aio", None)
+    if aio is None:
+        return await asyncio.to_thread(
+            generate_image,
+            client,
+            prompt,
+            output_path,
+            reference_images,
+            aspect_ratio,
+            model,
+            resolution,
+            timeout,
+            deadline,
+            postprocessor,
+        )
 
+    _check_deadline(deadline)
+    limit = request_timeout(timeout, deadline)
+    http_options = timeout_http_options(limit)
+    response: Any
+    try:
+        with request_limits(timeout, deadline):
+            async with asyncio.timeout(limit):
+                if is_imagen_model(model):
+                    logger.info(f"Calling Imagen API (async): model={model}")
+                    imagen_config = build_imagen_config(aspect_ratio, resolution)
+                    if http_options:
+                        imagen_config = imagen_config.model_copy(
+                            update={"http_options": http_options}
+                        )
+                    response = await aio.models.generate_images(
+                        model=model, prompt=prompt, config=imagen_config
+                    )
+                else:
+                    logger.info(f"Calling Gemini API (async): model={model}")
+                    contents, config, effective_resolution = build_content_request(
+                        prompt, reference_images, aspect_ratio, model, resolution
+                    )
+                    if http_options:
+                        config = config.model_copy(update={"http_options": http_options})
+                    response = await aio.models.generate_content(
+                        model=model, contents=contents, config=config
+                    )
     except GenerationError:
         raise
+    except (TimeoutError, httpx.TimeoutException) as e:
+        logger.error(_timeout_message(limit))
+        raise DeadlineExceededError(_timeout_message(limit)) from e
     except Exception as e:
         logger.error(f"Image generation failed: {type(e).__name__}: {e}")
         logger.debug("Generation error details:", exc_info=True)
         raise GenerationError(
             f"Image generation failed: {e}. "
             f"Check your API key, network connection, and input parameters."
+        ) from e
+
+    _check_deadline(deadline)
+    if is_imagen_model(model):
+        return await asyncio.to_thread(
+            save_imagen_response,
+            response,
+            output_path,
+            model,
+            aspect_ratio,
+            resolution,
+            postprocessor,
+        )
+    return await asyncio.to_thread(
+        save_content_response,
+        response,
+        output_path,
+        model,
+        aspect_ratio,
+        effective_resolution,
+        len(reference_images) if reference_images else 0,
+        postprocessor,
+    )
+
+
+def _timeout_message(limit: float | None) -> str:
+    """Describe a request timeout."""
+    if limit is None:
+        return "Image generation timed out"
+    return f"Image generation timed out after {limit:.0f}s"
+
+
+def _check_deadline(deadline: Deadline | None) -> None:
+    """Raise DeadlineExceededError if the deadline passed or was cancelled."""
+    if deadline is not None and deadline.expired:
+        raise DeadlineExceededError(f"Request not completed: {deadline.reason}")
+
+
+def build_content_request(
+    prompt: str,
+    reference_images: list[str] | None = None,
+    aspect_ratio: str = "1:1",
+    model: str = DEFAULT_MODEL,
+    resolution: str | None = None,
+) -> tuple[list[types.Part], types.GenerateContentConfig, str | None]:
+    """Build the contents and config of a Gemini image generation request.
+
+    Shared by generate_image() and the Batch API mode, so both send identical
+    requests.
+
+    Args:
+        prompt: Text prompt for image generation
+        reference_images: Optional reference image paths
+        aspect_ratio: Aspect ratio (e.g., "16:9")
+        model: Gemini model to use
+        resolution: Resolution quality for Pro model (1K/2K/4K), ignored otherwise
+
+    Returns:
+        Tuple of (contents, config, effective resolution or None)
+
+    Raises:
+        GenerationError: If a reference image can't be read
+    """
+    if reference_images:
+        logger.debug(f"Using {len(reference_images)} reference image(s) with Gemini model")
+
+    # Build contents for the generation request
+    contents: list[types.Part] = []
+
+    # Add reference images if provided
+    if reference_images:
+        logger.info(f"Loading {len(reference_images)} reference image(s)")
+        for img_path in reference_images:
+            try:
+                logger.debug(f"Loading reference image: {img_path}")
+                with open(img_path, "rb") as f:
+                    image_data = f.read()
+                mime_type = _get_mime_type(img_path)
+                logger.debug(
+                    f"Reference image loaded: {img_path}, "
+                    f"size={len(image_data)} bytes, mime_type={mime_type}"
+                )
+                # Create Part with inline data
+                contents.append(
+                    types.Part(
+                        inline_data=types.Blob(
+                            mime_type=mime_type,
+                            data=image_data,
+                        )
+                    )
+                )
+            except FileNotFoundError:
+                logger.error(f"Reference image not found: {img_path}")
+                raise GenerationError(
+                    f"Reference image not found: {img_path}. "
+                    f"Ensure the file exists and the path is correct."
+                )
+            except PermissionError:
+                logger.error(f"Permission denied reading reference image: {img_path}")
+                raise GenerationError(f"Permission denied reading reference image: {img_path}")
+            except Exception as e:
+                logger.error(f"Failed to load reference image {img_path}: {e}")
+                logger.debug("Reference image load error details:", exc_info=True)
+                raise GenerationError(f"Failed to load reference image {img_path}: {e}")
+
+    # Add text prompt
+    logger.debug("Adding text prompt to request")
+    contents.append(types.Part(text=prompt))
+
+    # Configure generation with aspect ratio and resolution
+    # Determine effective resolution to use
+    effective_resolution = None
+    if resolution and model in MODELS_WITH_RESOLUTION_SUPPORT:
+        effective_resolution = resolution
+        logger.debug(
+            f"Configuring generation: aspect_ratio={aspect_ratio}, resolution={resolution}"
         )
+    else:
+        if resolution and model not in MODELS_WITH_RESOLUTION_SUPPORT:
+            logger.warning(
+                f"Resolution '{resolution}' ignored for model '{model}' "
+                f"(only Pro model supports variable resolution)"
+            )
+        logger.debug(
+            f"Configuring generation: aspect_ratio={aspect_ratio}, resolution=default (~1024p)"
+        )
+
+    # Build image config
+    image_config_params: dict[str, Any] = {"aspect_ratio": aspect_ratio}
+    if effective_resolution:
+        # Pro model: add image_size parameter
+        image_config_params["image_size"] = effective_resolution
+        logger.debug(f"Using image_size={effective_resolution} for Pro model")
+
+    config = types.GenerateContentConfig(
+        response_modalities=["IMAGE"],
+        image_config=types.ImageConfig(**image_config_params),
+    )
+
+    return contents, config, effective_resolution
+
+
+def save_content_response(
+    response: types.GenerateContentResponse,
+    output_path: str,
+    model: str,
+    aspect_ratio: str,
+    effective_resolution: str | None,
+    reference_image_count: int,
+    postprocessor: ImageSink | None = None,
+) -> dict[str, Any]:
+    """Extract the image from a Gemini response, save it and build the result.
+
+    Args:
+        response: generate_content response
+        output_path: Path to save the image
+        model: Model that produced the response
+        aspect_ratio: Requested aspect ratio
+        effective_resolution: Resolution from build_content_request()
+        reference_image_count: Number of reference images sent
+        postprocessor: Optional PostProcessor or ImageWriter to write the image with
+
+    Returns:
+        dict with generation results (see generate_image docstring)
+
+    Raises:
+        GenerationError: If the response has no image or it can't be saved
+    """
+    # Extract image from response
+    if not response.candidates:
+        logger.error("No candidates returned from API")
+        raise GenerationError("No candidates returned from API. Request may have been blocked.")
+
+    candidate = response.candidates[0]
+    logger.debug(f"Response has {len(response.candidates)} candidate(s)")
+
+    # Check for content filtering
+    if not candidate.content or not candidate.content.parts:
+        finish_reason = getattr(candidate, "finish_reason", "UNKNOWN")
+        logger.error(f"No content generated, finish_reason={finish_reason}")
+        raise GenerationError(
+            f"No content generated. Finish reason: {finish_reason}. "
+            f"The prompt may have been blocked by safety filters."
+        )
+
+    # Find the image part
+    logger.debug(f"Extracting image from {len(candidate.content.parts)} part(s)")
+    image_part = None
+    for part in candidate.content.parts:
+        if hasattr(part, "inline_data") and part.inline_data:
+            image_part = part
+            break
+
+    if not image_part:
+        logger.error("No image data found in response")
+        raise GenerationError(
+            "No image data found in response. The model may have returned text only."
+        )
+
+    # Decode and save image
+    postprocessed = None
+    try:
+        logger.debug("Decoding and saving image...")
+        # Handle both bytes and base64-encoded string. The SDK's bytes are
+        # written as they are; a2b_base64 reads an ASCII str in place, where
+        # b64decode would encode a copy of the text first.
+        if image_part.inline_data and image_part.inline_data.data:
+            image_bytes = (
+                binascii.a2b_base64(image_part.inline_data.data)
+                if isinstance(image_part.inline_data.data, str)
+                else image_part.inline_data.data
+            )
+            logger.debug(f"Image size: {len(image_bytes)} bytes")
+            if postprocessor is not None:
+                postprocessed = postprocessor.save(image_bytes, output_path)
+            else:
+                save_image(image_bytes, output_path)
+            logger.info(f"Image saved successfully to: {output_path}")
+        else:
+            logger.error("No image data available in response")
+            raise GenerationError("No image data available in response")
+    except Exception as e:
+        logger.error(f"Failed to save generated image: {e}")
+        logger.debug("Image save error details:", exc_info=True)
+        raise GenerationError(f"Failed to save generated image: {e}")
+
+    # Extract token usage
+    token_count = 0
+    if hasattr(response, "usage_metadata") and response.usage_metadata:
+        token_count = getattr(response.usage_metadata, "total_token_count", 0)
+    logger.debug(f"Token usage: {token_count}")
+
+    # Calculate cost based on token usage
+    cost_per_token = COST_PER_TOKEN.get(model, 0.0)
+    estimated_cost = token_count * cost_per_token if token_count > 0 else 0.0
+    logger.debug(
+        f"Cost calculation: {token_count} tokens × ${cost_per_token} = ${estimated_cost:.4f}"
+    )
+
+    # Format resolution
+    width, height = ASPECT_RATIO_RESOLUTIONS.get(aspect_ratio, (0, 0))
+    resolution_str = f"{width}x{height}"
+    logger.debug(f"Image resolution: {resolution_str}")
+
+    # Build result
+    result = {
+        "output_path": output_path,
+        "model": model,
+        "aspect_ratio": aspect_ratio,
+        "resolution": resolution_str,
+        "resolution_quality": effective_resolution or DEFAULT_RESOLUTION,
+        "reference_image_count": reference_image_count,
+        "token_count": token_count,
+        "estimated_cost_usd": round(estimated_cost, 4),
+        "estimated_cost_per_image_usd": None,  # Gemini uses token-based pricing
+        "metadata": {
+            "model_type": "gemini",
+            "finish_reason": getattr(candidate, "finish_reason", "UNKNOWN"),
+            "safety_ratings": getattr(candidate, "safety_ratings", None),
+        },
+    }
+    if postprocessed is not None:
+        result["postprocess"] = postprocessed
+    logger.debug(f"Generation completed successfully: {result}")
+    return result
 
 
 def _generate_with_imagen(
@@ -307,6 +543,9 @@ def _generate_with_imagen(
     aspect_ratio: str,
     model: str,
     resolution: str | None = None,
+    http_options: types.HttpOptions | None = None,
+    deadline: Deadline | None = None,
+    postprocessor: ImageSink | None = None,
 ) -> dict[str, Any]:
     """Generate image using Imagen 4 API.
 
@@ -317,6 +556,9 @@ def _generate_with_imagen(
         aspect_ratio: Aspect ratio (e.g., "16:9")
         model: Imagen model to use
         resolution: Resolution quality (1K/2K/4K) if supported
+        http_options: Per-request SDK HTTP options (timeout)
+        deadline: Checked again before the image is saved
+        postprocessor: Optional PostProcessor or ImageWriter to write the image with
 
     Returns:
         dict with generation results (see generate_image docstring)
@@ -325,21 +567,9 @@ def _generate_with_imagen(
         GenerationError: If image generation fails
     """
     try:
-        logger.debug(f"Configuring Imagen generation: aspect_ratio={aspect_ratio}")
-
-        # Build GenerateImagesConfig
-        config_params: dict[str, Any] = {}
-
-        # Add resolution if provided
-        if resolution:
-            config_params["image_size"] = resolution
-            logger.debug(f"Using image_size={resolution}")
-
-        # Add aspect ratio
-        config_params["aspect_ratio"] = aspect_ratio
-        logger.debug(f"Using aspect_ratio={aspect_ratio}")
-
-        config = types.GenerateImagesConfig(**config_params)
+        config = build_imagen_config(aspect_ratio, resolution)
+        if http_options:
+            config = config.model_copy(update={"http_options": http_options})
 
         # Generate image
         logger.info(f"Calling Imagen API: model={model}")
@@ -352,69 +582,134 @@ def _generate_with_imagen(
         )
         logger.debug("API call completed")
 
-        # Check response
-        if not response.generated_images:
-            logger.error("No images returned from Imagen API")
-            raise GenerationError(
-                "No images returned from Imagen API. Request may have been blocked."
-            )
-
-        # Get first image
-        generated_image = response.generated_images[0]
-        logger.debug("Retrieved generated image")
-
-        # Verify image exists
-        if not generated_image.image:
-            logger.error("No image data in response")
-            raise GenerationError("No image data in response from Imagen API")
-
-        # Save image using PIL Image object
-        try:
-            logger.debug(f"Saving image to: {output_path}")
-            generated_image.image.save(output_path)
-            logger.info(f"Image saved successfully to: {output_path}")
-        except Exception as e:
-            logger.error(f"Failed to save Imagen output: {e}")
-            logger.debug("Image save error details:", exc_info=True)
-            raise GenerationError(f"Failed to save Imagen output: {e}")
-
-        # Calculate cost (per-image pricing for Imagen)
-        cost_per_image = COST_PER_IMAGE.get(model, 0.0)
-        logger.debug(f"Cost: ${cost_per_image} per image")
-
-        # Format resolution
-        width, height = ASPECT_RATIO_RESOLUTIONS.get(aspect_ratio, (0, 0))
-        resolution_str = f"{width}x{height}"
-        logger.debug(f"Image resolution: {resolution_str}")
-
-        # Build result
-        result = {
-            "output_path": output_path,
-            "model": model,
-            "aspect_ratio": aspect_ratio,
-            "resolution": resolution_str,
-            "resolution_quality": resolution if resolution else None,
-            "reference_image_count": 0,  # Imagen doesn't support reference images
-            "token_count": None,  # Imagen uses per-image pricing
-            "estimated_cost_usd": None,  # Token-based cost not applicable
-            "estimated_cost_per_image_usd": round(cost_per_image, 4),
-            "metadata": {
-                "model_type": "imagen",
-                "generation_method": "generate_images",
-            },
-        }
-        logger.debug(f"Imagen generation completed successfully: {result}")
-        return result
+        _check_deadline(deadline)
+        return save_imagen_response(
+            response, output_path, model, aspect_ratio, resolution, postprocessor
+        )
 
     except GenerationError:
         raise
+    except httpx.TimeoutException as e:
+        logger.error("Imagen generation timed out")
+        raise DeadlineExceededError("Imagen generation timed out") from e
     except Exception as e:
         logger.error(f"Imagen generation failed: {type(e).__name__}: {e}")
         logger.debug("Imagen error details:", exc_info=True)
         raise GenerationError(
             f"Imagen generation failed: {e}. "
             f"Check your API key, network connection, and input parameters."
-        )
+        ) from e
+
+
+def build_imagen_config(aspect_ratio: str, resolution: str | None) -> types.GenerateImagesConfig:
+    """Build the generate_images config for an Imagen request.
+
+    Args:
+        aspect_ratio: Aspect ratio (e.g., "16:9")
+        resolution: Resolution quality (1K/2K/4K) if supported
+
+    Returns:
+        GenerateImagesConfig
+    """
+    logger.debug(f"Configuring Imagen generation: aspect_ratio={aspect_ratio}")
+
+    # Build GenerateImagesConfig
+    config_params: dict[str, Any] = {}
+
+    # Add resolution if provided
+    if resolution:
+        config_params["image_size"] = resolution
+        logger.debug(f"Using image_size={resolution}")
+
+    # Add aspect ratio
+    config_params["aspect_ratio"] = aspect_ratio
+    logger.debug(f"Using aspect_ratio={aspect_ratio}")
+
+    return types.GenerateImagesConfig(**config_params)
+
+
+def save_imagen_response(
+    response: types.GenerateImagesResponse,
+    output_path: str,
+    model: str,
+    aspect_ratio: str,
+    resolution: str | None,
+    postprocessor: ImageSink | None = None,
+) -> dict[str, Any]:
+    """Extract the image from an Imagen response, save it and build the result.
+
+    Args:
+        response: generate_images response
+        output_path: Path to save the image
+        model: Imagen model that produced the response
+        aspect_ratio: Requested aspect ratio
+        resolution: Requested resolution quality
+        postprocessor: Optional PostProcessor or ImageWriter to write the image with
+
+    Returns:
+        dict with generation results (see generate_image docstring)
+
+    Raises:
+        GenerationError: If the response has no image or it can't be saved
+    """
+    # Check response
+    if not response.generated_images:
+        logger.error("No images returned from Imagen API")
+        raise GenerationError("No images returned from Imagen API. Request may have been blocked.")
+
+    # Get first image
+    generated_image = response.generated_images[0]
+    logger.debug("Retrieved generated image")
+
+    # Verify image exists
+    if not generated_image.image or not generated_image.image.image_bytes:
+        logger.error("No image data in response")
+        raise GenerationError("No image data in response from Imagen API")
+
+    # Write the SDK's bytes directly (and atomically), not through Image.save()
+    postprocessed = None
+    try:
+        logger.debug(f"Saving image to: {output_path}")
+        image_bytes = generated_image.image.image_bytes
+        if postprocessor is not None:
+            postprocessed = postprocessor.save(image_bytes, output_path)
+        else:
+            save_image(image_bytes, output_path)
+        logger.info(f"Image saved successfully to: {output_path}")
+    except Exception as e:
+        logger.error(f"Failed to save Imagen output: {e}")
+        logger.debug("Image save error details:", exc_info=True)
+        raise GenerationError(f"Failed to save Imagen output: {e}")
+
+    # Calculate cost (per-image pricing for Imagen)
+    cost_per_image = COST_PER_IMAGE.get(model, 0.0)
+    logger.debug(f"Cost: ${cost_per_image} per image")
+
+    # Format resolution
+    width, height = ASPECT_RATIO_RESOLUTIONS.get(aspect_ratio, (0, 0))
+    resolution_str = f"{width}x{height}"
+    logger.debug(f"Image resolution: {resolution_str}")
+
+    # Build result
+    result = {
+        "output_path": output_path,
+        "model": model,
+        "aspect_ratio": aspect_ratio,
+        "resolution": resolution_str,
+        "resolution_quality": resolution if resolution else None,
+        "reference_image_count": 0,  # Imagen doesn't support reference images
+        "token_count": None,  # Imagen uses per-image pricing
+        "estimated_cost_usd": None,  # Token-based cost not applicable
+        "estimated_cost_per_image_usd": round(cost_per_image, 4),
+        "metadata": {
+            "model_type": "imagen",
+            "generation_method": "generate_images",
+        },
+    }
+    if postprocessed is not None:
+        result["postprocess"] = postprocessed
+    logger.debug(f"Imagen generation completed successfully: {result}")
+    return result
 
 
 def _get_mime_type(file_path: str) -> str:
@@ -0,0 +1,239 @@
+"""Hedged requests to cut tail latency.
+
+HedgedClient wraps a client and exposes the same ``models.generate_content``
+/ ``models.generate_images`` surface. Every call runs on its own thread; if it
+hasn't returned by the model's observed p95 latency (from a rolling window of
+recent successful calls), a duplicate request is fired and whichever succeeds
+first is returned. The other call can't be cancelled mid-flight by the SDK, so
+it is left to finish in the background and its result is ignored.
+
+Wrapping a ClientPool sends the hedge to a different member: the primary call
+is still in flight, so least-loaded and weighted round robin both pick another
+client.
+
+Hedges cost a second request, so they are capped at a fraction of all requests
+(and optionally an absolute number), and no hedge is fired until a model has
+enough latency samples. Fired, won and budget-skipped hedges are counted in the
+metrics.
+
+Note: This code was generated with assistance from AI coding tools
+and has been reviewed and tested by a human.
+"""
+
+import logging
+import math
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import Any
+
+from google import genai
+
+from gemini_nano_banana_tool.core.metrics import Metrics
+
+logger = logging.getLogger(__name__)
+
+# Latency samples kept per model
+DEFAULT_WINDOW_SIZE = 100
+
+# Samples needed before a model's p95 is trusted
+DEFAULT_MIN_SAMPLES = 20
+
+# Never hedge earlier than this, whatever the p95
+DEFAULT_MIN_DELAY_SECONDS = 1.0
+
+# Hedges allowed per request made
+DEFAULT_MAX_HEDGE_RATIO = 0.1
+
+
+class LatencyWindow:
+    """Rolling window of recent call latencies, thread safe."""
+
+    def __init__(self, size: int = DEFAULT_WINDOW_SIZE):
+        """Create an empty window keeping the last size samples."""
+        self._samples: deque[float] = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._samples)
+
+    def add(self, seconds: float) -> None:
+        """Record a latency sample."""
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, fraction: float) -> float | None:
+        """Return the nearest-rank percentile (fraction in 0..1), or None if empty."""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        rank = max(1, math.ceil(fraction * len(samples)))
+        return samples[rank - 1]
+
+
+class HedgedClient:
+    """Client wrapper that duplicates slow calls, safe to share between threads.
+
+    Example:
+        >>> client = HedgedClient(create_client(pool_config="pool.json"))
+        >>> generate_image(client, "A cat", "cat.png")
+        >>> client.metrics.snapshot()
+        {'hedge.fired': 1, 'hedge.won': 1, 'hedge.requests': 40}
+    """
+
+    def __init__(
+        self,
+        client: genai.Client,
+        max_hedge_ratio: float = DEFAULT_MAX_HEDGE_RATIO,
+        max_hedges: int | None = None,
+        min_samples: int = DEFAULT_MIN_SAMPLES,
+        min_delay_seconds: float = DEFAULT_MIN_DELAY_SECONDS,
+        window_size: int = DEFAULT_WINDOW_SIZE,
+        metrics: Metrics | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Wrap a client.
+
+        Args:
+            client: Client (or ClientPool) to send calls and hedges to
+            max_hedge_ratio: Spend cap: hedges allowed per request made
+            max_hedges: Optional absolute cap on hedges for this client
+            min_samples: Latency samples needed before a model is hedged
+            min_delay_seconds: Lower bound for the hedge delay
+            window_size: Latency samples kept per model
+            metrics: Metrics to record hedge counters in (default: a new one)
+            clock: Monotonic clock for latency measurement
+        """
+        self.client = client
+        self.max_hedge_ratio = max_hedge_ratio
+        self.max_hedges = max_hedges
+        self.min_samples = min_samples
+        self.min_delay_seconds = min_delay_seconds
+        self.window_size = window_size
+        self.metrics = metrics or Metrics()
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._windows: dict[str, LatencyWindow] = {}
+        self._requests = 0
+        self._hedges = 0
+        self.models = _HedgedModels(self)
+
+    @property
+    def batches(self) -> Any:
+        """Batch jobs aren't hedged: use the wrapped client's."""
+        return self.client.batches
+
+    @property
+    def files(self) -> Any:
+        """Files aren't hedged: use the wrapped client's."""
+        return self.client.files
+
+    @property
+    def caches(self) -> Any:
+        """Caches aren't hedged: use the wrapped client's."""
+        return self.client.caches
+
+    def window(self, model: str) -> LatencyWindow:
+        """Return the model's latency window, creating it on first use."""
+        with self._lock:
+            if model not in self._windows:
+                self._windows[model] = LatencyWindow(self.window_size)
+            return self._windows[model]
+
+    def hedge_delay(self, model: str) -> float | None:
+        """Seconds after which a call to the model is hedged, or None before warm-up."""
+        window = self.window(model)
+        if len(window) < self.min_samples:
+            return None
+        p95 = window.percentile(0.95)
+        assert p95 is not None
+        return max(p95, self.min_delay_seconds)
+
+    def call(self, method: str, model: str, **kwargs: Any) -> Any:
+        """Call a ``models`` method, hedging it if it runs past the model's p95.
+
+        Args:
+            method: ``models`` method name (generate_content, generate_images)
+            model: Model name
+            **kwargs: Other arguments for the method
+
+        Returns:
+            The response of whichever call succeeded first
+
+        Raises:
+            Exception: The primary call's error if neither call succeeded
+        """
+        with self._lock:
+            self._requests += 1
+        self.metrics.count("hedge.requests")
+
+        primary = self._start(method, model, kwargs)
+        delay = self.hedge_delay(model)
+        if delay is None:
+            return primary.result()
+        done, _ = wait([primary], timeout=delay)
+        if done or not self._claim_hedge():
+            return primary.result()
+
+        logger.info(f"{model} call still running after {delay:.1f}s, sending hedge request")
+        hedge = self._start(method, model, kwargs)
+        pending = {primary, hedge}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        self.metrics.count("hedge.won")
+                    return future.result()
+        return primary.result()
+
+    def _claim_hedge(self) -> bool:
+        """Take a hedge from the spend budget, counting skipped hedges."""
+        with self._lock:
+            allowed = self._hedges < self.max_hedge_ratio * self._requests and (
+                self.max_hedges is None or self._hedges < self.max_hedges
+            )
+            if allowed:
+                self._hedges += 1
+        self.metrics.count("hedge.fired" if allowed else "hedge.skipped_budget")
+        return allowed
+
+    def _start(self, method: str, model: str, kwargs: dict[str, Any]) -> Future[Any]:
+        """Run one call on a daemon thread and record its latency on success."""
+        future: Future[Any] = Future()
+        upstream = getattr(self.client.models, method)
+        window = self.window(model)
+
+        def run() -> None:
+            started = self._clock()
+            try:
+                result = upstream(model=model, **kwargs)
+            except BaseException as e:
+                future.set_exception(e)
+                return
+            window.add(self._clock() - started)
+            future.set_result(result)
+
+        # A thread per call: a losing call may block for a long time and must
+        # not hold up a shared worker
+        threading.Thread(target=run, name=f"hedge-{method}", daemon=True).start()
+        return future
+
+
+class _HedgedModels:
+    """The ``models`` namespace of a HedgedClient."""
+
+    def __init__(self, owner: HedgedClient):
+        self._owner = owner
+
+    def generate_content(self, model: str, contents: Any, config: Any = None) -> Any:
+        """Run a generate_content call with hedging."""
+        return self._owner.call("generate_content", model, contents=contents, config=config)
+
+    def generate_images(self, model: str, prompt: str, config: Any = None) -> Any:
+        """Run a generate_images call with hedging."""
+        return self._owner.call("generate_images", model, prompt=prompt, config=config)
@@ -0,0 +1,236 @@
+"""Checkpoint journal for resumable batch runs.
+
+The journal is an append-only JSONL file with one entry per finished request:
+the request hash (prompt, output, reference image contents, aspect ratio,
+model and resolution), the output path, the output's SHA-256 and size, the status
+("ok" or "error") and the result or error message. Each entry is flushed as
+soon as its request finishes, so a crashed or interrupted run loses at most
+the requests that were in flight.
+
+On load the entries are indexed by request hash (later entries win), so
+rerunning the same manifest skips each completed request with one dict lookup
+and one stat() of its output. A request is only skipped when its last entry
+is "ok" and the output still exists with the recorded size; failed, changed
+and missing requests run again, as do requests whose reference images were
+edited in place. A truncated last line from a crash, and entries missing
+fields, are ignored.
+
+Note: This code was generated with assistance from AI coding tools
+and has been reviewed and tested by a human.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections.abc import Callable
+from datetime import datetime
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# Request fields that identify a request's output
+HASHED_FIELDS = ("prompt", "output", "images", "aspect_ratio", "model", "resolution")
+
+OK = "ok"
+ERROR = "error"
+
+
+def request_hash(request: dict[str, Any]) -> str:
+    """Return a stable SHA-256 of a resolved request's identifying fields.
+
+    Args:
+        request: Resolved request (see batch.resolve_request)
+
+    Returns:
+        Hex digest
+
+    Raises:
+        OSError: If a reference image can't be read
+    """
+    identity = {field: request.get(field) for field in HASHED_FIELDS}
+    # A reference image edited in place changes the output, a renamed one doesn't
+    identity["images"] = [file_sha256(path) for path in request.get("images") or []]
+    encoded = json.dumps(identity, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def file_sha256(path: str) -> str:
+    """Return the SHA-256 hex digest of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _entry_problem(entry: Any) -> str | None:
+    """Return why a journal entry can't be used, or None if it is well-formed."""
+    if not isinstance(entry, dict):
+        return "not a JSON object"
+    if not isinstance(entry.get("request_hash"), str):
+        return "missing request_hash"
+    if entry.get("status") not in (OK, ERROR):
+        return f"invalid status {entry.get('status')!r}"
+    if entry["status"] == OK:
+        if not isinstance(entry.get("output"), str):
+            return "missing output"
+        if not isinstance(entry.get("size"), int) or isinstance(entry["size"], bool):
+            return "missing size"
+        if not isinstance(entry.get("result"), dict):
+            return "missing result"
+    return None
+
+
+def _ends_with_newline(path: str) -> bool:
+    """Return whether a non-empty file's last byte is a newline."""
+    with open(path, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+
+class Journal:
+    """Append-only checkpoint journal, safe to share between threads.
+
+    Example:
+        >>> with Journal("manifest.jsonl.journal.jsonl") as journal:
+        ...     result = journal.run(resolved, lambda r: generate_image(client, ...))
+    """
+
+    def __init__(self, path: str):
+        """Open a journal, loading its existing entries.
+
+        Args:
+            path: Journal file path (created on first write)
+        """
+        self.path = path
+        self.entries: dict[str, dict[str, Any]] = {}
+        self.skipped = 0
+        self.recorded = 0
+        self._lock = threading.Lock()
+        self._load()
+        self._file = open(path, "a", encoding="utf-8")
+        if self._file.tell() and not _ends_with_newline(path):
+            # Terminate a line cut short by a crash so the next entry stays readable
+            self._file.write("\n")
+
+    def __enter__(self) -> Journal:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def _load(self) -> None:
+        """Index existing entries by request hash, skipping unreadable or incomplete lines."""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as f:
+            for line_number, line in enumerate(f, start=1):
+                try:
+                    entry = json.loads(line)
+                except ValueError as e:
+                    logger.warning(f"{self.path}:{line_number}: ignoring journal entry: {e}")
+                    continue
+                problem = _entry_problem(entry)
+                if problem is not None:
+                    logger.warning(f"{self.path}:{line_number}: ignoring journal entry: {problem}")
+                    continue
+                self.entries[entry["request_hash"]] = entry
+        logger.info(f"Loaded journal {self.path} ({len(self.entries)} request(s))")
+
+    def completed(self, key: str) -> dict[str, Any] | None:
+        """Return the entry of a completed request whose output is intact, else None.
+
+        Args:
+            key: Request hash
+
+        Returns:
+            The "ok" entry, or None if the request must run (again)
+        """
+        entry = self.entries.get(key)
+        if entry is None or entry["status"] != OK:
+            return None
+        try:
+            if os.stat(entry["output"]).st_size != entry["size"]:
+                return None
+        except OSError:
+            return None
+        return entry
+
+    def record(
+        self,
+        key: str,
+        output: str,
+        result: dict[str, Any] | None = None,
+        error: str | None = None,
+    ) -> dict[str, Any]:
+        """Append and flush the outcome of a request.
+
+        Args:
+            key: Request hash
+            output: Output path of the request
+            result: Result of a successful request
+            error: Error message of a failed request
+
+        Returns:
+            The journal entry
+        """
+        entry: dict[str, Any] = {
+            "request_hash": key,
+            "output": output,
+            "status": ERROR if error is not None else OK,
+            "completed_at": datetime.now().isoformat(),
+        }
+        if error is not None:
+            entry["error"] = error
+        else:
+            # A post-processed or queued result already carries the hash and size
+            # of what it writes (a queued file may not exist yet)
+            postprocessed = (result or {}).get("postprocess") or {}
+            entry["sha256"] = postprocessed.get("sha256") or file_sha256(output)
+            entry["size"] = postprocessed.get("size") or os.path.getsize(output)
+            entry["result"] = result or {}
+        line = json.dumps(entry, ensure_ascii=False, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+            self.entries[key] = entry
+            self.recorded += 1
+        return entry
+
+    def run(
+        self, request: dict[str, Any], fn: Callable[[dict[str, Any]], dict[str, Any]]
+    ) -> dict[str, Any]:
+        """Run a resolved request unless it already completed, journaling the outcome.
+
+        Args:
+            request: Resolved request with "output"
+            fn: Runs the request and returns its result
+
+        Returns:
+            fn's result, or the journaled result plus "skipped": True
+        """
+        key = request_hash(request)
+        entry = self.completed(key)
+        if entry is not None:
+            with self._lock:
+                self.skipped += 1
+            logger.debug(f"Skipping completed request for {request['output']}")
+            return {**entry["result"], "skipped": True}
+        try:
+            result = fn(request)
+        except Exception as e:
+            self.record(key, request["output"], error=str(e))
+            raise
+        self.record(key, request["output"], result=result)
+        return result
+
+    def close(self) -> None:
+        """Flush the journal to disk and close it."""
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
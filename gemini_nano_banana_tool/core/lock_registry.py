@@ -0,0 +1,347 @@
+"""Cross-process registry of in-flight requests, using lock files.
+
+Independent processes (e.g. cron jobs) that point at the same registry
+directory coalesce identical requests: the process that creates
+``<key>.lock`` (atomically, with O_EXCL) makes the API call, and processes
+that find the lock wait for it to disappear instead of paying for the same
+call. Before releasing its lock the leader publishes its image as
+``<key>.<token>.<ext>`` and the result as ``<key>.result.json``; a waiter only
+uses a result carrying the token of the lock it waited on, so a result left
+over from an earlier flight is never mistaken for the current one. If the
+leader failed there is no matching result, and the waiter runs the request
+itself.
+
+Each lock records the holder's pid, host and an expiry time (its request
+timeout plus a grace period). A lock is stale when its expiry has passed, or
+its holder runs on this host and no longer exists; stale locks are broken by
+renaming them away, so only one waiter takes over.
+
+Waiters pick up a published result within a poll interval of the lock's
+release, so results don't need to live long. A leader sweeps the directory
+after publishing, at most once per result TTL, removing results, images and
+leftover temporary files older than the TTL. A result whose key is locked
+again is kept until the new flight replaces it. Publishing is best effort:
+if it fails, the leader still returns its (paid) result and waiters run the
+request themselves.
+
+Note: This code was generated with assistance from AI coding tools
+and has been reviewed and tested by a human.
+"""
+
+import json
+import logging
+import os
+import socket
+import time
+import uuid
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from gemini_nano_banana_tool.core.generator import DeadlineExceededError
+from gemini_nano_banana_tool.utils import link_or_copy
+
+logger = logging.getLogger(__name__)
+
+# How long a lock is trusted beyond its holder's request timeout
+DEFAULT_GRACE_SECONDS = 60.0
+
+# Lock lifetime when the holder has no request timeout
+DEFAULT_LOCK_TTL = 900.0
+
+# Seconds between checks while waiting for another process
+DEFAULT_POLL_INTERVAL = 0.5
+
+# How long published results and images are kept for waiters
+DEFAULT_RESULT_TTL = 600.0
+
+RESULT_SUFFIX = ".result.json"
+
+
+class LockRegistry:
+    """Lock-file registry in a directory shared by several processes.
+
+    Example:
+        >>> registry = LockRegistry("/var/tmp/gemini-flights")
+        >>> result, shared = registry.run(key, lambda: generate_image(...), timeout=300)
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        grace_seconds: float = DEFAULT_GRACE_SECONDS,
+        result_ttl: float = DEFAULT_RESULT_TTL,
+        clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        """Create a registry, creating the directory if needed.
+
+        Args:
+            directory: Registry directory shared by all cooperating processes
+            poll_interval: Seconds between checks while waiting
+            grace_seconds: Time a lock is trusted beyond its holder's timeout
+            result_ttl: Seconds published results and images are kept
+            clock: Wall clock (shared between processes; injectable for tests)
+            sleep: Sleep function (injectable for tests)
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.poll_interval = poll_interval
+        self.grace_seconds = grace_seconds
+        self.result_ttl = result_ttl
+        self._clock = clock
+        self._sleep = sleep
+        self._host = socket.gethostname()
+        self._last_sweep: float | None = None
+
+    def lock_path(self, key: str) -> Path:
+        """Path of a request's lock file."""
+        return self.directory / f"{key}.lock"
+
+    def result_path(self, key: str) -> Path:
+        """Path of a request's published result."""
+        return self.directory / f"{key}{RESULT_SUFFIX}"
+
+    def try_acquire(self, key: str, timeout: float | None) -> str | None:
+        """Create the request's lock unless another process holds it.
+
+        Args:
+            key: Request key
+            timeout: Holder's request timeout, used for the lock's expiry
+
+        Returns:
+            Token identifying this flight, or None if the lock exists
+        """
+        token = uuid.uuid4().hex
+        now = self._clock()
+        ttl = timeout + self.grace_seconds if timeout is not None else DEFAULT_LOCK_TTL
+        info = {
+            "token": token,
+            "pid": os.getpid(),
+            "host": self._host,
+            "created": now,
+            "expires": now + ttl,
+        }
+        try:
+            fd = os.open(self.lock_path(key), os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            return None
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(info, f)
+        return token
+
+    def release(self, key: str, token: str) -> None:
+        """Remove the request's lock if this flight still holds it."""
+        info = self._read_lock(key)
+        if info is not None and info.get("token") == token:
+            self.lock_path(key).unlink(missing_ok=True)
+
+    def publish(self, key: str, token: str, result: dict[str, Any]) -> None:
+        """Share a leader's image and result with waiting processes.
+
+        Args:
+            key: Request key
+            token: Token of the leader's flight
+            result: generate_image() result of the leader
+        """
+        previous = self._read_json(self.result_path(key))
+        suffix = Path(result["output_path"]).suffix
+        image = self.directory / f"{key}.{token}{suffix}"
+        link_or_copy(result["output_path"], str(image))
+        record = {"token": token, "result": {**result, "output_path": str(image)}}
+        tmp_path = self.directory / f".{key}.{token}.result.tmp"
+        tmp_path.write_text(json.dumps(record, default=str), encoding="utf-8")
+        os.replace(tmp_path, self.result_path(key))
+        if previous and previous.get("token") != token:
+            Path(previous["result"]["output_path"]).unlink(missing_ok=True)
+        now = self._clock()
+        if self._last_sweep is None or now - self._last_sweep >= self.result_ttl:
+            self._last_sweep = now
+            self.sweep()
+
+    def sweep(self) -> int:
+        """Remove published results, images and temporary files older than the result TTL.
+
+        Locks are left alone (stale ones are broken by waiters), as are results
+        whose key is locked and the images of results still kept.
+
+        Returns:
+            Number of files removed
+        """
+        cutoff = self._clock() - self.result_ttl
+        kept: set[str] = set()
+        expired: list[Path] = []
+        for path in self.directory.iterdir():
+            name = path.name
+            if name.endswith(".lock"):
+                continue
+            try:
+                mtime = path.stat().st_mtime
+            except FileNotFoundError:
+                continue
+            if name.endswith(RESULT_SUFFIX):
+                if mtime > cutoff or self.lock_path(name[: -len(RESULT_SUFFIX)]).exists():
+                    record = self._read_json(path)
+                    if record and isinstance(record.get("result"), dict):
+                        kept.add(str(record["result"].get("output_path")))
+                    continue
+            elif mtime > cutoff:
+                continue
+            expired.append(path)
+
+        removed = 0
+        for path in expired:
+            if str(path) in kept:
+                continue
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                continue
+            except OSError as e:
+                logger.warning(f"Could not remove {path.name} from the registry: {e}")
+                continue
+            removed += 1
+        if removed:
+            logger.debug(f"Removed {removed} expired file(s) from {self.directory}")
+        return removed
+
+    def shared_result(self, key: str, token: str) -> dict[str, Any] | None:
+        """Return the result published by the flight with the given token, if any."""
+        record = self._read_json(self.result_path(key))
+        if not record or record.get("token") != token:
+            return None
+        result: dict[str, Any] = record["result"]
+        return result if os.path.exists(result["output_path"]) else None
+
+    def is_stale(self, info: dict[str, Any] | None, mtime: float) -> bool:
+        """Return whether a lock's holder is gone or has overrun its expiry.
+
+        Args:
+            info: Lock contents (None if unreadable, e.g. still being written)
+            mtime: Lock file modification time
+        """
+        now = self._clock()
+        if info is None:
+            return now > mtime + self.grace_seconds
+        if now > float(info.get("expires", 0)):
+            return True
+        return info.get("host") == self._host and not _process_alive(int(info.get("pid", 0)))
+
+    def wait(self, key: str, limit: float | None) -> str | None:
+        """Wait for another process's flight to end.
+
+        Args:
+            key: Request key
+            limit: Seconds to wait at most, or None
+
+        Returns:
+            Token of the flight waited on, or None if there was no live lock
+            (it vanished or was stale and has been broken)
+
+        Raises:
+            DeadlineExceededError: If the flight is still running after limit
+        """
+        started = self._clock()
+        token = None
+        while True:
+            try:
+                mtime = self.lock_path(key).stat().st_mtime
+            except FileNotFoundError:
+                return token
+            info = self._read_lock(key)
+            if self.is_stale(info, mtime):
+                self._break(key, info)
+                return None
+            if info is not None:
+                token = info.get("token")
+            if limit is not None and self._clock() - started >= limit:
+                raise DeadlineExceededError(
+                    "Timed out waiting for another process generating the same image"
+                )
+            self._sleep(self.poll_interval)
+
+    def run(
+        self, key: str, fn: Callable[[], dict[str, Any]], timeout: float | None
+    ) -> tuple[dict[str, Any], bool]:
+        """Run a request once across processes.
+
+        Args:
+            key: Request key
+            fn: Makes the request (called only if this process leads)
+            timeout: Request timeout, also the longest wait for another process
+
+        Returns:
+            (result, shared): fn's result and False, or another process's
+            published result (output_path in the registry) and True. A leader
+            that fails to publish still returns its result.
+        """
+        while True:
+            token = self.try_acquire(key, timeout)
+            if token is not None:
+                try:
+                    result = fn()
+                    try:
+                        self.publish(key, token, result)
+                    except Exception as e:
+                        # The call is paid for; waiters run the request themselves
+                        logger.warning(f"Could not publish result to {self.directory}: {e}")
+                    return result, False
+                finally:
+                    self.release(key, token)
+
+            logger.info(f"Another process is generating the same image, waiting ({key[:12]})")
+            waited = self.wait(key, timeout)
+            if waited is not None:
+                shared = self.shared_result(key, waited)
+                if shared is not None:
+                    return shared, True
+                logger.info("The other process didn't produce the image, generating it here")
+
+    def _break(self, key: str, info: dict[str, Any] | None) -> None:
+        """Remove a stale lock, unless it was replaced by a fresh one meanwhile."""
+        lock = self.lock_path(key)
+        aside = self.directory / f".{key}.{uuid.uuid4().hex}.stale"
+        try:
+            os.rename(lock, aside)
+        except FileNotFoundError:
+            return
+        moved = self._read_json(aside)
+        if info is not None and moved is not None and moved.get("token") != info.get("token"):
+            # Another process replaced the stale lock before the rename: put it back
+            try:
+                os.link(aside, lock)
+            except OSError:
+                pass
+        else:
+            logger.warning(f"Recovered stale lock {lock.name} (holder {info or 'unknown'})")
+        aside.unlink(missing_ok=True)
+
+    def _read_lock(self, key: str) -> dict[str, Any] | None:
+        """Read a lock file, or None if it is missing or not yet written."""
+        return self._read_json(self.lock_path(key))
+
+    @staticmethod
+    def _read_json(path: Path) -> dict[str, Any] | None:
+        """Read a JSON object from a file, or None if it is missing or unreadable."""
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except OSError:
+            return None
+        except ValueError:
+            # Half-written by another process
+            return None
+        return data if isinstance(data, dict) else None
+
+
+def _process_alive(pid: int) -> bool:
+    """Return whether a local process exists (always True where it can't be checked)."""
+    if pid <= 0 or os.name != "posix":
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
@@ -0,0 +1,294 @@
+"""Byte budget for image payloads in flight, with backpressure.
+
+Concurrency limits count requests, not bytes. A 4K Pro response is several
+megabytes once decoded, and the base64 text it came in and the raw HTTP
+body are alive at the same time. Reference images are held as Blob bytes
+plus their base64 copy in the request body. Thirty such requests in flight
+at once can exhaust a container's memory.
+
+A ByteBudget caps the estimated bytes held by requests in flight.
+BudgetedGenerator sits in front of generate_image(). It estimates a
+request's footprint from the size of its reference image files and its
+output resolution, then waits until that many bytes fit in the budget
+before the request is built. The reservation is returned as soon as the
+image is written and the call returns, which is when its buffers become
+garbage. When an ImageWriter queues the write instead, one decoded image
+stays reserved until the I/O thread has written it, so queued images count
+against the budget too. Waiters are admitted first come, first served, so a 4K request
+isn't starved by a stream of small ones. A request larger than the whole
+budget runs alone.
+
+The budget's peak and the process's peak RSS are recorded in its metrics,
+for commands to report at the end of a run.
+
+Note: This code was generated with assistance from AI coding tools
+and has been reviewed and tested by a human.
+"""
+
+import logging
+import os
+import re
+import sys
+import threading
+from collections import deque
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from typing import Any
+
+from google import genai
+
+from gemini_nano_banana_tool.core.deadline import Deadline
+from gemini_nano_banana_tool.core.generator import DeadlineExceededError, generate_image
+from gemini_nano_banana_tool.core.metrics import Metrics
+from gemini_nano_banana_tool.core.models import (
+    DEFAULT_MODEL,
+    DEFAULT_RESOLUTION,
+    MODELS_WITH_RESOLUTION_SUPPORT,
+)
+from gemini_nano_banana_tool.core.writer import ImageSink, ImageWriter
+from gemini_nano_banana_tool.utils import ValidationError
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+# Decoded size assumed for a generated image, by resolution quality
+ESTIMATED_IMAGE_BYTES = {"1K": 2 * 1024**2, "2K": 8 * 1024**2, "4K": 24 * 1024**2}
+
+# Copies of an image alive while its response is parsed (HTTP body, base64 text, decoded bytes)
+RESPONSE_COPIES = 3.0
+
+# Copies of a reference image alive while its request is sent (Blob bytes, base64 text)
+REFERENCE_COPIES = 2.5
+
+# Seconds between deadline checks while waiting for budget
+DEFAULT_WAIT_SLICE = 1.0
+
+_SIZE_UNITS = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3}
+
+
+def parse_size(value: str) -> int:
+    """Parse a byte size such as "512M", "2GB", "1.5GiB" or "1048576" (binary units).
+
+    Raises:
+        ValidationError: If the value isn't a positive size
+    """
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMG]?)(?:I?B)?\s*", value.upper())
+    if not match or float(match.group(1)) <= 0:
+        raise ValidationError(f"Invalid size '{value}': use e.g. 512M or 2G")
+    return int(float(match.group(1)) * _SIZE_UNITS[match.group(2)])
+
+
+def format_size(nbytes: float) -> str:
+    """Format a byte count in MiB, e.g. "312.4 MiB"."""
+    return f"{nbytes / 1024**2:.1f} MiB"
+
+
+def peak_rss_bytes() -> int | None:
+    """Return the process's peak resident set size, or None where unavailable."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return int(peak) if sys.platform == "darwin" else int(peak) * 1024
+
+
+def estimate_image_bytes(model: str, resolution: str | None) -> int:
+    """Estimate the decoded size of one generated image.
+
+    Args:
+        model: Model used
+        resolution: Requested resolution quality (ignored by models without it)
+    """
+    if model not in MODELS_WITH_RESOLUTION_SUPPORT or resolution is None:
+        resolution = DEFAULT_RESOLUTION
+    return ESTIMATED_IMAGE_BYTES.get(resolution, ESTIMATED_IMAGE_BYTES[DEFAULT_RESOLUTION])
+
+
+def estimate_request_bytes(
+    reference_images: list[str] | None, model: str, resolution: str | None
+) -> int:
+    """Estimate the bytes a request holds at its peak.
+
+    Args:
+        reference_images: Reference image paths (missing files count as empty)
+        model: Model used
+        resolution: Requested resolution quality (ignored by models without it)
+
+    Returns:
+        Estimated bytes for reference payloads plus the decoded output
+    """
+    references = 0
+    for path in reference_images or []:
+        try:
+            references += os.path.getsize(path)
+        except OSError:
+            pass
+    output = estimate_image_bytes(model, resolution)
+    return int(references * REFERENCE_COPIES + output * RESPONSE_COPIES)
+
+
+class ByteBudget:
+    """Counting semaphore over bytes, admitting waiters in arrival order; thread-safe.
+
+    Example:
+        >>> budget = ByteBudget(512 * 1024**2)
+        >>> with budget.reserve(80 * 1024**2):
+        ...     ...  # build the request, call the API, write the image
+    """
+
+    def __init__(self, max_bytes: int, metrics: Metrics | None = None):
+        """Create a budget.
+
+        Args:
+            max_bytes: Bytes that may be reserved at once
+            metrics: Metrics to record bytes in flight, the peak and waits in
+        """
+        self.max_bytes = max_bytes
+        self.in_use = 0
+        self.peak = 0
+        self.metrics = metrics or Metrics()
+        self._cond = threading.Condition()
+        self._queue: deque[object] = deque()
+
+    def acquire(self, nbytes: int, deadline: Deadline | None = None) -> int:
+        """Wait until nbytes fit in the budget and reserve them.
+
+        Args:
+            nbytes: Bytes to reserve (capped at the whole budget)
+            deadline: Stop waiting when it passes or is cancelled
+
+        Returns:
+            Bytes reserved, to pass to release()
+
+        Raises:
+            DeadlineExceededError: If the deadline passed while waiting
+        """
+        nbytes = min(nbytes, self.max_bytes)
+        ticket = object()
+        with self._cond:
+            self._queue.append(ticket)
+            try:
+                if not self._admissible(ticket, nbytes):
+                    self.metrics.count("memory.waits")
+                    logger.debug(f"Waiting for {format_size(nbytes)} of memory budget")
+                while not self._admissible(ticket, nbytes):
+                    if deadline is not None and deadline.expired:
+                        raise DeadlineExceededError(f"Request not started: {deadline.reason}")
+                    self._cond.wait(DEFAULT_WAIT_SLICE if deadline is not None else None)
+            except BaseException:
+                self._queue.remove(ticket)
+                self._cond.notify_all()
+                raise
+            self._queue.popleft()
+            self.in_use += nbytes
+            self.peak = max(self.peak, self.in_use)
+            self.metrics.set_gauge("memory.in_flight_bytes", self.in_use)
+            self.metrics.set_gauge("memory.peak_bytes", self.peak)
+            # The next waiter may fit as well
+            self._cond.notify_all()
+        return nbytes
+
+    def release(self, nbytes: int) -> None:
+        """Return reserved bytes to the budget."""
+        with self._cond:
+            self.in_use -= nbytes
+            self.metrics.set_gauge("memory.in_flight_bytes", self.in_use)
+            self._cond.notify_all()
+
+    @contextmanager
+    def reserve(self, nbytes: int, deadline: Deadline | None = None) -> Iterator[None]:
+        """Hold a reservation for the duration of a block (see acquire())."""
+        reserved = self.acquire(nbytes, deadline)
+        try:
+            yield
+        finally:
+            self.release(reserved)
+
+    def report(self) -> dict[str, float]:
+        """Return the metrics snapshot, with the process's peak RSS added."""
+        rss = peak_rss_bytes()
+        if rss is not None:
+            self.metrics.set_gauge("memory.peak_rss_bytes", rss)
+        return self.metrics.snapshot()
+
+    def _admissible(self, ticket: object, nbytes: int) -> bool:
+        """Whether a waiter is first in line and its bytes fit."""
+        return self._queue[0] is ticket and self.in_use + nbytes <= self.max_bytes
+
+
+class BudgetedGenerator:
+    """generate_image() layer that reserves memory budget around each call.
+
+    Example:
+        >>> budgeted = BudgetedGenerator(ByteBudget(1024**3))
+        >>> budgeted.generate_image(client, "A cat", "cat.png", resolution="4K")
+    """
+
+    def __init__(
+        self,
+        budget: ByteBudget,
+        generate_fn: Callable[..., dict[str, Any]] = generate_image,
+    ):
+        """Create a budgeted layer.
+
+        Args:
+            budget: Budget shared by all calls
+            generate_fn: Function making the call, with the signature of
+                generate_image() (e.g. ModelRouter().generate_image)
+        """
+        self.budget = budget
+        self.generate_fn = generate_fn
+
+    def generate_image(
+        self,
+        client: genai.Client,
+        prompt: str,
+        output_path: str,
+        reference_images: list[str] | None = None,
+        aspect_ratio: str = "1:1",
+        model: str = DEFAULT_MODEL,
+        resolution: str | None = None,
+        timeout: float | None = None,
+        deadline: Deadline | None = None,
+        postprocessor: ImageSink | None = None,
+    ) -> dict[str, Any]:
+        """Wait for memory budget, then generate an image.
+
+        Same arguments, result and errors as generate_image(). The estimated
+        footprint is reserved before the request is built and released when
+        the image has been written. If an ImageWriter queued the write, one
+        image's worth stays reserved until the I/O thread has written it.
+        """
+        nbytes = estimate_request_bytes(reference_images, model, resolution)
+        reserved = self.budget.acquire(nbytes, deadline)
+        try:
+            result = self.generate_fn(
+                client=client,
+                prompt=prompt,
+                output_path=output_path,
+                reference_images=reference_images,
+                aspect_ratio=aspect_ratio,
+                model=model,
+                resolution=resolution,
+                timeout=timeout,
+                deadline=deadline,
+                postprocessor=postprocessor,
+            )
+        except BaseException:
+            self.budget.release(reserved)
+            raise
+
+        write = (
+            postprocessor.pending(output_path) if isinstance(postprocessor, ImageWriter) else None
+        )
+        if write is None:
+            self.budget.release(reserved)
+            return result
+        queued = min(estimate_image_bytes(model, resolution), reserved)
+        self.budget.release(reserved - queued)
+        write.add_done_callback(lambda _: self.budget.release(queued))
+        return result
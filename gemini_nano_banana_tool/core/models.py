@@ -104,6 +104,17 @@ MODELS_WITH_RESOLUTION_SUPPORT: list[str] = [
     "gemini-3-pro-image-preview",
 ]
 
+# Aspect ratios accepted by Imagen 4 models (a subset of ASPECT_RATIO_RESOLUTIONS)
+IMAGEN_ASPECT_RATIOS: list[str] = ["1:1", "3:4", "4:3", "9:16", "16:9"]
+
+# Models tried in order when a model's circuit breaker is open (see core/fallback.py)
+MODEL_FALLBACK_CHAINS: dict[str, list[str]] = {
+    "gemini-3-pro-image-preview": ["gemini-2.5-flash-image", "imagen-4.0-fast-generate-001"],
+    "gemini-2.5-flash-image": ["imagen-4.0-fast-generate-001"],
+    "imagen-4.0-ultra-generate-001": ["imagen-4.0-generate-001", "imagen-4.0-fast-generate-001"],
+    "imagen-4.0-generate-001": ["imagen-4.0-fast-generate-001"],
+}
+
 # Default resolution for Pro model
 DEFAULT_RESOLUTION = "1K"
 
@@ -0,0 +1,323 @@
+"""Streaming NDJSON request processing.
+
+Reads one JSON request object per line, processes requests concurrently on a
+thread pool that shares one client, and writes one JSON result per line as each
+request completes (so output order may differ from input order). Every result
+carries the request's correlation ``id`` and a ``status`` of "ok" or "error".
+
+Input is consumed lazily with a bounded number of pending requests, so an
+unbounded stream runs in constant memory.
+
+Requests that need two dependent calls (e.g. prompt enhancement, then image
+generation) can run as a two-stage pipeline: a ``prepare`` stage with its own
+worker pool feeds a bounded queue that the main stage's workers drain, so
+preparing request N+1 overlaps with processing request N and each stage gets a
+concurrency limit that fits its model's quota and latency.
+
+An optional Deadline bounds the whole stream: requests that haven't started
+when it expires fail without being sent. The first Ctrl-C stops reading input
+and drops queued requests but lets in-flight requests finish and report their
+results; a second Ctrl-C cancels the deadline so in-flight handlers sharing it
+stop before writing results.
+
+An optional Progress object is told when requests start and finish, for live
+progress reporting.
+
+Note: This code was generated with assistance from AI coding tools
+and has been reviewed and tested by a human.
+"""
+
+import json
+import logging
+import queue
+import threading
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from gemini_nano_banana_tool.core.deadline import Deadline
+from gemini_nano_banana_tool.core.progress import Progress
+
+logger = logging.getLogger(__name__)
+
+BatchHandler = Callable[[list[dict[str, Any]]], list[dict[str, Any] | Exception]]
+
+# Pending requests allowed per worker before reading more input
+PENDING_PER_WORKER = 2
+
+
+class _ResultWriter:
+    """Writes result lines through one lock, counting them and reporting progress."""
+
+    def __init__(self, write: Callable[[str], None], progress: Progress | None):
+        self.counts = {"total": 0, "succeeded": 0, "failed": 0}
+        self._write = write
+        self._progress = progress
+        self._lock = threading.Lock()
+
+    def emit(self, record: dict[str, Any], in_flight: bool = True) -> None:
+        """Write one result line ("id", "status" and result fields or "error")."""
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._lock:
+            self._write(line)
+            self.counts["total"] += 1
+            self.counts["succeeded" if record["status"] == "ok" else "failed"] += 1
+        if self._progress:
+            self._progress.finished(record, in_flight)
+
+    def emit_result(self, request_id: Any, result: dict[str, Any] | Exception) -> None:
+        """Write a request's handler result, or its error."""
+        if isinstance(result, Exception):
+            logger.debug(f"Request {request_id} failed", exc_info=result)
+            self.emit({"id": request_id, "status": "error", "error": str(result)})
+        else:
+            fields = {k: v for k, v in result.items() if k not in ("id", "status")}
+            self.emit({"id": request_id, "status": "ok", **fields})
+
+
+def run_ndjson_stream(
+    lines: Iterable[str],
+    handler: Callable[[dict[str, Any]], dict[str, Any]],
+    write: Callable[[str], None],
+    concurrency: int = 4,
+    batch_size: int = 1,
+    batch_handler: BatchHandler | None = None,
+    prepare: Callable[[dict[str, Any]], dict[str, Any]] | None = None,
+    prepare_concurrency: int = 4,
+    deadline: Deadline | None = None,
+    progress: Progress | None = None,
+) -> dict[str, int]:
+    """Process an NDJSON request stream.
+
+    Args:
+        lines: Input lines, one JSON object each (blank lines are skipped)
+        handler: Processes one request and returns its result fields; raising
+            an exception produces an error line for that request
+        write: Called with each serialized output line (without newline),
+            serialized by an internal lock
+        concurrency: Number of requests (or batches) processed in parallel
+        batch_size: Consecutive requests grouped per batch_handler call
+        batch_handler: Processes a list of requests at once and returns one
+            result dict or exception per request, in order; raising fails the
+            whole batch. When None, handler is called per request.
+        prepare: Optional first pipeline stage; its result is passed to handler
+            instead of the raw request. Raising fails the request.
+        prepare_concurrency: Number of requests prepared in parallel
+        deadline: Shared deadline; expired requests fail without calling the
+            handler, and it is cancelled on a second KeyboardInterrupt
+        progress: Optional progress tracker, told when requests start and finish
+
+    Returns:
+        dict with counts: total, succeeded, failed
+
+    Example:
+        >>> run_ndjson_stream(sys.stdin, lambda req: {"echo": req}, click.echo)
+    """
+    if prepare is not None:
+        return _run_pipeline(
+            lines, prepare, handler, write, prepare_concurrency, concurrency, deadline, progress
+        )
+
+    results = _ResultWriter(write, progress)
+    counts = results.counts
+    pending = threading.BoundedSemaphore(max(1, concurrency) * PENDING_PER_WORKER)
+
+    def process(request_id: Any, request: dict[str, Any]) -> None:
+        if progress:
+            progress.started()
+        try:
+            _check_deadline(deadline)
+            results.emit_result(request_id, handler(request))
+        except Exception as e:
+            results.emit_result(request_id, e)
+        finally:
+            pending.release()
+
+    def process_batch(batch: list[tuple[Any, dict[str, Any]]]) -> None:
+        assert batch_handler is not None
+        if progress:
+            progress.started(len(batch))
+        try:
+            _check_deadline(deadline)
+            outcomes = batch_handler([request for _, request in batch])
+            if len(outcomes) != len(batch):
+                raise ValueError(f"batch handler returned {len(outcomes)} of {len(batch)} results")
+        except Exception as e:
+            logger.debug(f"Batch of {len(batch)} requests failed", exc_info=True)
+            outcomes = [e] * len(batch)
+        try:
+            for (request_id, _), outcome in zip(batch, outcomes, strict=True):
+                results.emit_result(request_id, outcome)
+        finally:
+            pending.release()
+
+    batch: list[tuple[Any, dict[str, Any]]] = []
+
+    def flush() -> None:
+        if batch:
+            pending.acquire()
+            pool.submit(process_batch, list(batch))
+            batch.clear()
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        try:
+            for line_number, line in enumerate(lines, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("request must be a JSON object")
+                except ValueError as e:
+                    results.emit(
+                        {"id": line_number, "status": "error", "error": f"Invalid JSON: {e}"},
+                        in_flight=False,
+                    )
+                    continue
+                request_id = request.get("id", line_number)
+                if batch_handler is None:
+                    pending.acquire()
+                    pool.submit(process, request_id, request)
+                    continue
+                batch.append((request_id, request))
+                if len(batch) >= batch_size:
+                    flush()
+            flush()
+        except KeyboardInterrupt:
+            _drain(pool, deadline)
+            raise
+
+    logger.info(
+        f"NDJSON stream finished: {counts['succeeded']} succeeded, {counts['failed']} failed"
+    )
+    return counts
+
+
+def _run_pipeline(
+    lines: Iterable[str],
+    prepare: Callable[[dict[str, Any]], dict[str, Any]],
+    handler: Callable[[dict[str, Any]], dict[str, Any]],
+    write: Callable[[str], None],
+    prepare_concurrency: int,
+    concurrency: int,
+    deadline: Deadline | None = None,
+    progress: Progress | None = None,
+) -> dict[str, int]:
+    """Run an NDJSON stream as a two-stage pipeline (see run_ndjson_stream)."""
+    prepare_workers = max(1, prepare_concurrency)
+    workers = max(1, concurrency)
+    results = _ResultWriter(write, progress)
+    counts = results.counts
+    # Prepared requests wait here for a free stage 2 worker; a full queue blocks
+    # stage 1 workers, which in turn stops input from being read
+    handoff: queue.Queue[tuple[Any, dict[str, Any]] | None] = queue.Queue(
+        maxsize=workers * PENDING_PER_WORKER
+    )
+    pending = threading.BoundedSemaphore(
+        (prepare_workers + workers) * PENDING_PER_WORKER + handoff.maxsize
+    )
+
+    def finish(request_id: Any, result: dict[str, Any] | Exception) -> None:
+        # Always give the pending slot back, or input reading blocks forever
+        try:
+            results.emit_result(request_id, result)
+        except Exception:
+            logger.error(f"Could not write the result of request {request_id}", exc_info=True)
+        finally:
+            pending.release()
+
+    def stage_one(request_id: Any, request: dict[str, Any]) -> None:
+        if progress:
+            progress.started()
+        try:
+            _check_deadline(deadline)
+            prepared = prepare(request)
+        except Exception as e:
+            finish(request_id, e)
+            return
+        handoff.put((request_id, prepared))
+
+    def stage_two() -> None:
+        while (item := handoff.get()) is not None:
+            request_id, prepared = item
+            try:
+                _check_deadline(deadline)
+                result: dict[str, Any] | Exception = handler(prepared)
+            except Exception as e:
+                result = e
+            finish(request_id, result)
+
+    threads = [
+        threading.Thread(target=stage_two, name=f"ndjson-stage2-{i}", daemon=True)
+        for i in range(workers)
+    ]
+    for thread in threads:
+        thread.start()
+
+    pool = ThreadPoolExecutor(max_workers=prepare_workers, thread_name_prefix="ndjson-stage1")
+    try:
+        for line_number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("request must be a JSON object")
+            except ValueError as e:
+                results.emit(
+                    {"id": line_number, "status": "error", "error": f"Invalid JSON: {e}"},
+                    in_flight=False,
+                )
+                continue
+            pending.acquire()
+            pool.submit(stage_one, request.get("id", line_number), request)
+        pool.shutdown(wait=True)
+    except KeyboardInterrupt:
+        # Requests already prepared are in flight too: stage 2 finishes them
+        _drain(pool, deadline)
+        raise
+    finally:
+        for _ in threads:
+            handoff.put(None)
+        for thread in threads:
+            thread.join()
+
+    logger.info(
+        f"NDJSON pipeline finished: {counts['succeeded']} succeeded, {counts['failed']} failed"
+    )
+    return counts
+
+
+def _drain(pool: ThreadPoolExecutor, deadline: Deadline | None) -> None:
+    """Drop queued requests and wait for in-flight ones; a second Ctrl-C cancels them."""
+    logger.warning("Interrupted: finishing in-flight requests (press Ctrl-C again to cancel them)")
+    try:
+        pool.shutdown(wait=True, cancel_futures=True)
+    except KeyboardInterrupt:
+        logger.warning("Cancelling in-flight requests")
+        if deadline:
+            deadline.cancel()
+        pool.shutdown(wait=True)
+
+
+def _check_deadline(deadline: Deadline | None) -> None:
+    """Fail a request that would start after the stream's deadline."""
+    if deadline is not None and deadline.expired:
+        raise TimeoutError(f"Request not started: {deadline.reason}")
+
+
+def upstream_error(request: dict[str, Any]) -> str | None:
+    """Return the error of a request that is itself a failed upstream result.
+
+    Lets ``promptgen --ndjson | generate --ndjson`` propagate failures instead of
+    processing incomplete requests.
+
+    Args:
+        request: Parsed request object
+
+    Returns:
+        Upstream error message, or None if the request is not a failed result
+    """
+    if request.get("status") == "error":
+        return str(request.get("error", "upstream request failed"))
+    return None
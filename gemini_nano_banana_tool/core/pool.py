@@ -0,0 +1,339 @@
+"""Load-balanced pool of Gemini clients with separate quotas.
+
+Each pool member is a client bound to its own API key or Vertex AI
+project/location, and therefore to its own quota. A ClientPool exposes the same
+``models.generate_content`` / ``models.generate_images`` surface as
+``genai.Client`` and dispatches every call to one member, either the least
+loaded one (fewest in-flight requests relative to its weight) or by smooth
+weighted round robin.
+
+Every call outcome is recorded per member. A member whose share of 429
+(RESOURCE_EXHAUSTED) responses over a rolling window reaches the threshold is
+saturated and quarantined for a while; a throttled call is retried once on
+each other member before the 429 is raised. When every member is quarantined,
+the one whose quarantine ends first is used.
+
+Note: This code was generated with assistance from AI coding tools
+and has been reviewed and tested by a human.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from typing import Any
+
+from google import genai
+from google.genai import errors
+
+from gemini_nano_banana_tool.core.client import GeminiClientError, create_client
+
+logger = logging.getLogger(__name__)
+
+STRATEGIES = ("least-loaded", "weighted")
+
+# Rolling window over which each member's 429 rate is computed
+DEFAULT_WINDOW_SECONDS = 60.0
+
+# A member is saturated when at least this share of its recent calls got a 429...
+DEFAULT_THROTTLE_THRESHOLD = 0.5
+
+# ...over at least this many calls in the window
+DEFAULT_MIN_SAMPLES = 4
+
+# How long a saturated member receives no traffic
+DEFAULT_QUARANTINE_SECONDS = 30.0
+
+
+class PoolMember:
+    """One client in a pool, with its load and throttling statistics."""
+
+    def __init__(self, name: str, client: genai.Client, weight: float = 1.0):
+        """Create a pool member.
+
+        Args:
+            name: Name used in logs and stats
+            client: Client bound to this member's credentials
+            weight: Relative share of traffic (must be positive)
+
+        Raises:
+            GeminiClientError: If weight isn't positive
+        """
+        if weight <= 0:
+            raise GeminiClientError(f"Pool member {name}: weight must be positive")
+        self.name = name
+        self.client = client
+        self.weight = weight
+        self.in_flight = 0
+        self.requests = 0
+        self.throttled = 0
+        self.quarantined_until = 0.0
+        self.current_weight = 0.0
+        self.outcomes: deque[tuple[float, bool]] = deque()
+
+
+class ClientPool:
+    """Client facade that spreads requests over several clients, safe to share between threads.
+
+    Example:
+        >>> eu = create_client(use_vertex=True, project="p", location="europe-west4")
+        >>> us = create_client(use_vertex=True, project="p", location="us-central1")
+        >>> pool = ClientPool([PoolMember("eu", eu), PoolMember("us", us)])
+        >>> generate_image(pool, "A cat", "cat.png")
+    """
+
+    def __init__(
+        self,
+        members: list[PoolMember],
+        strategy: str = "least-loaded",
+        window_seconds: float = DEFAULT_WINDOW_SECONDS,
+        throttle_threshold: float = DEFAULT_THROTTLE_THRESHOLD,
+        min_samples: int = DEFAULT_MIN_SAMPLES,
+        quarantine_seconds: float = DEFAULT_QUARANTINE_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Create a pool.
+
+        Args:
+            members: Pool members (at least one)
+            strategy: "least-loaded" or "weighted" (smooth weighted round robin)
+            window_seconds: Rolling window for the 429 rate
+            throttle_threshold: 429 share at which a member is quarantined
+            min_samples: Calls in the window needed before quarantining
+            quarantine_seconds: How long a saturated member is skipped
+            clock: Monotonic clock (injectable for tests)
+
+        Raises:
+            GeminiClientError: If there are no members or the strategy is unknown
+        """
+        if not members:
+            raise GeminiClientError("A client pool needs at least one member")
+        if strategy not in STRATEGIES:
+            raise GeminiClientError(
+                f"Unknown pool strategy '{strategy}', use one of: {', '.join(STRATEGIES)}"
+            )
+        self.members = members
+        self.strategy = strategy
+        self.window_seconds = window_seconds
+        self.throttle_threshold = throttle_threshold
+        self.min_samples = min_samples
+        self.quarantine_seconds = quarantine_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.models = _PoolModels(self)
+
+    @property
+    def primary(self) -> genai.Client:
+        """The first member's client, for calls that must stay on one credential."""
+        return self.members[0].client
+
+    @property
+    def batches(self) -> Any:
+        """Batch jobs are bound to the credential that created them: use the primary."""
+        return self.primary.batches
+
+    @property
+    def files(self) -> Any:
+        """Uploaded files belong to the primary member, like batch jobs."""
+        return self.primary.files
+
+    @property
+    def caches(self) -> Any:
+        """Cached content belongs to the primary member, like batch jobs."""
+        return self.primary.caches
+
+    def acquire(self, exclude: frozenset[PoolMember] = frozenset()) -> PoolMember:
+        """Pick a member for a request and count it as in flight.
+
+        Args:
+            exclude: Members already tried for this request
+
+        Returns:
+            The chosen member; pass it to release() when the call is done
+        """
+        with self._lock:
+            now = self._clock()
+            candidates = [m for m in self.members if m not in exclude] or self.members
+            available = [m for m in candidates if m.quarantined_until <= now]
+            if not available:
+                member = min(candidates, key=lambda m: m.quarantined_until)
+            elif self.strategy == "weighted":
+                # Smooth weighted round robin: spreads picks evenly within each cycle
+                total = sum(m.weight for m in available)
+                for m in available:
+                    m.current_weight += m.weight
+                member = max(available, key=lambda m: m.current_weight)
+                member.current_weight -= total
+            else:
+                member = min(available, key=lambda m: (m.in_flight / m.weight, m.requests))
+            member.in_flight += 1
+            member.requests += 1
+            return member
+
+    def release(self, member: PoolMember, throttled: bool) -> None:
+        """Record a finished call and quarantine the member if it is saturated.
+
+        Args:
+            member: Member returned by acquire()
+            throttled: Whether the call got a 429 response
+        """
+        with self._lock:
+            now = self._clock()
+            member.in_flight -= 1
+            member.throttled += throttled
+            member.outcomes.append((now, throttled))
+            while member.outcomes and member.outcomes[0][0] < now - self.window_seconds:
+                member.outcomes.popleft()
+            if not throttled or len(member.outcomes) < self.min_samples:
+                return
+            rate = sum(t for _, t in member.outcomes) / len(member.outcomes)
+            if rate >= self.throttle_threshold:
+                member.quarantined_until = now + self.quarantine_seconds
+                # Start over after the quarantine instead of re-triggering on old samples
+                member.outcomes.clear()
+                logger.warning(
+                    f"Pool member {member.name} saturated ({rate:.0%} throttled), "
+                    f"quarantined for {self.quarantine_seconds:.0f}s"
+                )
+
+    def call(self, method: str, **kwargs: Any) -> Any:
+        """Call a ``models`` method on a member, failing over to others on 429.
+
+        Args:
+            method: ``models`` method name (generate_content, generate_images)
+            **kwargs: Arguments for the method
+
+        Returns:
+            The method's response
+
+        Raises:
+            errors.APIError: The last 429 if every member was throttled, or any
+                other API error immediately
+        """
+        tried: set[PoolMember] = set()
+        while True:
+            member = self.acquire(frozenset(tried))
+            tried.add(member)
+            throttled = False
+            try:
+                return getattr(member.client.models, method)(**kwargs)
+            except errors.APIError as e:
+                throttled = e.code == 429
+                if not throttled or len(tried) >= len(self.members):
+                    raise
+                logger.info(f"Pool member {member.name} throttled, retrying on another member")
+            finally:
+                self.release(member, throttled)
+
+    def stats(self) -> list[dict[str, Any]]:
+        """Return per-member counters for logging and metrics."""
+        with self._lock:
+            now = self._clock()
+            return [
+                {
+                    "name": m.name,
+                    "weight": m.weight,
+                    "in_flight": m.in_flight,
+                    "requests": m.requests,
+                    "throttled": m.throttled,
+                    "quarantined": m.quarantined_until > now,
+                }
+                for m in self.members
+            ]
+
+
+class _PoolModels:
+    """The ``models`` namespace of a ClientPool."""
+
+    def __init__(self, pool: ClientPool):
+        self._pool = pool
+
+    def generate_content(self, model: str, contents: Any, config: Any = None) -> Any:
+        """Dispatch a generate_content call to a pool member."""
+        return self._pool.call("generate_content", model=model, contents=contents, config=config)
+
+    def generate_images(self, model: str, prompt: str, config: Any = None) -> Any:
+        """Dispatch a generate_images call to a pool member."""
+        return self._pool.call("generate_images", model=model, prompt=prompt, config=config)
+
+
+def create_client_pool(
+    config_path: str,
+    strategy: str | None = None,
+    base_url: str | None = None,
+    retry_attempts: int | None = None,
+) -> ClientPool:
+    """Create a client pool from a JSON config file.
+
+    The file holds {"strategy": ..., "members": [...]} (or just the member
+    list). Each member has optional "name" (default: its location) and
+    "weight", plus the credentials of create_client(): "api_key" or
+    "api_key_env" (name of the environment variable holding the key), or
+    "use_vertex" with "project" and "location". Names must be unique.
+
+    Args:
+        config_path: Pool config file path
+        strategy: Override the file's strategy ("least-loaded" or "weighted")
+        base_url: Endpoint override for every member
+        retry_attempts: SDK retry attempts for every member
+
+    Returns:
+        Configured ClientPool
+
+    Raises:
+        GeminiClientError: If the config can't be read or is invalid (e.g. two
+            members with the same name)
+        AuthenticationError: If a member's credentials are incomplete
+
+    Example:
+        >>> # pool.json:
+        >>> # {"members": [
+        >>> #   {"name": "key-a", "api_key_env": "GEMINI_API_KEY_A"},
+        >>> #   {"name": "eu", "use_vertex": true, "project": "p", "location": "europe-west4",
+        >>> #    "weight": 2}]}
+        >>> pool = create_client_pool("pool.json")
+    """
+    try:
+        with open(config_path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        raise GeminiClientError(f"Cannot read client pool config {config_path}: {e}") from e
+    if isinstance(data, list):
+        data = {"members": data}
+    if not isinstance(data, dict) or not isinstance(data.get("members"), list):
+        raise GeminiClientError(f"Client pool config {config_path} needs a 'members' list")
+
+    members: list[PoolMember] = []
+    for index, entry in enumerate(data["members"]):
+        if not isinstance(entry, dict):
+            raise GeminiClientError(f"Client pool member {index} must be a JSON object")
+        name = str(entry.get("name") or entry.get("location") or f"member-{index}")
+        if any(member.name == name for member in members):
+            # Names key the stats and logs
+            raise GeminiClientError(
+                f"Client pool members must have unique names: '{name}' is used twice "
+                '(give members in the same location a "name")'
+            )
+        api_key = entry.get("api_key")
+        if entry.get("api_key_env"):
+            api_key = os.getenv(entry["api_key_env"])
+            if not api_key:
+                raise GeminiClientError(
+                    f"Pool member {name}: environment variable {entry['api_key_env']} is not set"
+                )
+        client = create_client(
+            api_key=api_key,
+            use_vertex=bool(entry.get("use_vertex")),
+            project=entry.get("project"),
+            location=entry.get("location"),
+            base_url=base_url,
+            retry_attempts=retry_attempts,
+        )
+        members.append(PoolMember(name, client, float(entry.get("weight", 1.0))))
+
+    strategy = strategy or data.get("strategy") or "least-loaded"
+    logger.info(f"Created client pool with {len(members)} member(s), strategy={strategy}")
+    return ClientPool(members, strategy=str(strategy))
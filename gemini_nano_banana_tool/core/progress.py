@@ -0,0 +1,238 @@
+"""Live progress, throughput and ETA reporting for long runs.
+
+A Progress object counts requests as they start and finish (a few integer
+updates under a lock, whatever the run size) and a reporter thread renders
+the counters on a timer, never per request:
+
+- On a terminal, one status line on stderr is redrawn in place (twice a second).
+- Otherwise (logs, CI) a plain status line is written every 30 seconds.
+- With a status file, the same counters are written as JSON (atomically) on
+  every tick and at the end, for an orchestrator to poll.
+
+Throughput and ETA only count requests that were actually processed; rows
+skipped by the checkpoint journal finish instantly and would skew both.
+
+Note: This code was generated with assistance from AI coding tools
+and has been reviewed and tested by a human.
+"""
+
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections.abc import Callable
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any, TextIO
+
+logger = logging.getLogger(__name__)
+
+# Seconds between redraws of the terminal status line
+DEFAULT_TTY_INTERVAL = 0.5
+
+# Seconds between plain status lines when stderr is not a terminal
+DEFAULT_LOG_INTERVAL = 30.0
+
+# Seconds between status file updates when nothing is displayed
+DEFAULT_STATUS_INTERVAL = 5.0
+
+
+def result_cost(record: dict[str, Any]) -> float:
+    """Return the estimated USD spend of a result line (image plus prompt enhancement)."""
+    cost = record.get("estimated_cost_usd") or record.get("estimated_cost_per_image_usd") or 0.0
+    promptgen = record.get("promptgen")
+    if isinstance(promptgen, dict):
+        cost += promptgen.get("estimated_cost_usd") or 0.0
+    return float(cost)
+
+
+def format_duration(seconds: float) -> str:
+    """Format seconds as e.g. "45s", "12m05s" or "3h07m"."""
+    seconds = int(seconds)
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+
+
+class Progress:
+    """Thread-safe run counters with a periodic stderr display and JSON status file.
+
+    Example:
+        >>> with Progress(total=5000, status_path="run.status.json") as progress:
+        ...     run_ndjson_stream(lines, handle, click.echo, 8, progress=progress)
+    """
+
+    def __init__(
+        self,
+        total: int | None = None,
+        display: bool = True,
+        status_path: str | None = None,
+        interval: float | None = None,
+        stream: TextIO | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Create a progress tracker.
+
+        Args:
+            total: Number of requests in the run, if known (enables the ETA)
+            display: Whether to report on the stream
+            status_path: Optional JSON status file to keep up to date
+            interval: Seconds between reports (default: depends on the mode)
+            stream: Output stream (default: stderr)
+            clock: Monotonic clock (injectable for tests)
+        """
+        self.total = total
+        self.display = display
+        self.status_path = status_path
+        self.stream = stream or sys.stderr
+        self.tty = display and self.stream.isatty()
+        if interval is None:
+            if self.tty:
+                interval = DEFAULT_TTY_INTERVAL
+            else:
+                interval = DEFAULT_LOG_INTERVAL if display else DEFAULT_STATUS_INTERVAL
+        self.interval = interval
+        self.succeeded = 0
+        self.failed = 0
+        self.skipped = 0
+        self.in_flight = 0
+        self.spend_usd = 0.0
+        self._clock = clock
+        self._started = clock()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def started(self, count: int = 1) -> None:
+        """Record requests that started processing."""
+        with self._lock:
+            self.in_flight += count
+
+    def finished(self, record: dict[str, Any], in_flight: bool = True) -> None:
+        """Record a result line.
+
+        Args:
+            record: Result line ("status", optional "skipped"/"coalesced" and
+                cost fields)
+            in_flight: Whether the request was counted by started() (False for
+                lines rejected before processing, e.g. invalid JSON)
+        """
+        ok = record.get("status") == "ok"
+        skipped = ok and bool(record.get("skipped"))
+        # A coalesced result carries the cost of the call it shared, paid once by its leader
+        paid = ok and not skipped and not record.get("coalesced")
+        cost = result_cost(record) if paid else 0.0
+        with self._lock:
+            if in_flight:
+                self.in_flight -= 1
+            if not ok:
+                self.failed += 1
+            elif skipped:
+                self.skipped += 1
+            else:
+                self.succeeded += 1
+            self.spend_usd += cost
+
+    def snapshot(self, state: str = "running") -> dict[str, Any]:
+        """Return the counters, throughput and ETA as a JSON-serializable dict."""
+        with self._lock:
+            succeeded, failed, skipped = self.succeeded, self.failed, self.skipped
+            in_flight, spend = self.in_flight, self.spend_usd
+        # At least a second, so a report right after the start shows no absurd rate
+        elapsed = max(self._clock() - self._started, 1.0)
+        completed = succeeded + failed + skipped
+        processed = succeeded + failed
+        eta = None
+        if self.total is not None and processed:
+            remaining = max(self.total - completed, 0)
+            eta = round(remaining / (processed / elapsed), 1)
+        return {
+            "state": state,
+            "total": self.total,
+            "completed": completed,
+            "succeeded": succeeded,
+            "failed": failed,
+            "skipped": skipped,
+            "in_flight": in_flight,
+            "elapsed_seconds": round(elapsed, 1),
+            "images_per_minute": round(succeeded / elapsed * 60, 2),
+            "spend_usd": round(spend, 4),
+            "eta_seconds": eta,
+            "updated_at": datetime.now(UTC).isoformat(timespec="seconds"),
+        }
+
+    def render(self, snapshot: dict[str, Any]) -> str:
+        """Format a snapshot as one status line."""
+        total = snapshot["total"]
+        if total:
+            done = f"{snapshot['completed']}/{total} ({snapshot['completed'] * 100 // total}%)"
+        else:
+            done = str(snapshot["completed"])
+        parts = [
+            done,
+            f"ok {snapshot['succeeded']}",
+            f"failed {snapshot['failed']}",
+            f"in flight {snapshot['in_flight']}",
+        ]
+        if snapshot["skipped"]:
+            parts.append(f"skipped {snapshot['skipped']}")
+        parts += [f"{snapshot['images_per_minute']:.1f} img/min", f"${snapshot['spend_usd']:.2f}"]
+        if snapshot["eta_seconds"] is not None:
+            parts.append(f"ETA {format_duration(snapshot['eta_seconds'])}")
+        return " | ".join(parts)
+
+    def report(self, state: str = "running") -> None:
+        """Write one report to the stream and the status file."""
+        snapshot = self.snapshot(state)
+        if self.display:
+            line = self.render(snapshot)
+            if self.tty:
+                end = "\n" if state != "running" else ""
+                self.stream.write(f"\r\x1b[K{line}{end}")
+            else:
+                self.stream.write(f"Progress: {line}\n")
+            self.stream.flush()
+        if self.status_path:
+            self._write_status(snapshot)
+
+    def start(self) -> None:
+        """Start the reporter thread."""
+        if not (self.display or self.status_path) or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="progress", daemon=True)
+        self._thread.start()
+
+    def stop(self, state: str = "finished") -> None:
+        """Stop the reporter thread and write the final report."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self.display or self.status_path:
+            self.report(state)
+
+    def __enter__(self) -> Progress:
+        self.start()
+        return self
+
+    def __exit__(self, exc_type: type[BaseException] | None, *exc_info: object) -> None:
+        self.stop("finished" if exc_type is None or exc_type is SystemExit else "interrupted")
+
+    def _run(self) -> None:
+        """Report every interval until stopped."""
+        while not self._stop.wait(self.interval):
+            try:
+                self.report()
+            except OSError as e:
+                logger.warning(f"Progress report failed: {e}")
+
+    def _write_status(self, snapshot: dict[str, Any]) -> None:
+        """Replace the status file atomically, so pollers never read half a file."""
+        path = Path(self.status_path or "")
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(snapshot, indent=2) + "\n", encoding="utf-8")
+        os.replace(tmp_path, path)
@@ -0,0 +1,206 @@
+"""Context caching of promptgen system prompts.
+
+The system prompt and template instructions sent by generate_prompt() are the
+same for every description with the same model and template, and make up most
+of the input tokens. PromptCacheManager stores them once as Gemini cached
+content per (model, template) and hands out the cache name to reference from
+``GenerateContentConfig.cached_content``.
+
+Cache entries are tracked locally: they are created on first use, recreated
+shortly before their TTL runs out and deleted on close(). A superseded entry
+is kept until close() (or its TTL), since requests sent by other threads may
+still reference it. An entry the API rejects (e.g. it expired server-side)
+is deleted and recreated on next use; after MAX_REJECTIONS rejections of one
+key it is treated like a key the API refuses to cache. When the API refuses
+to cache (unsupported model, content below the minimum cacheable size, a
+client without cache support such as a replay cassette), the key is marked
+unavailable and callers fall back to sending the text inline.
+
+Cached content belongs to the credential that created it. With a ClientPool,
+entries live on the primary member, and requests referencing them are sent
+through PromptCacheManager.client (the primary) instead of being spread over
+members that would reject the name.
+
+Note: This code was generated with assistance from AI coding tools
+and has been reviewed and tested by a human.
+"""
+
+import logging
+import threading
+import time
+from collections.abc import Callable
+
+from google import genai
+from google.genai import types
+
+from gemini_nano_banana_tool.core.pool import ClientPool
+
+logger = logging.getLogger(__name__)
+
+# Default lifetime of a cache entry in seconds
+DEFAULT_CACHE_TTL = 3600
+
+# Entries are recreated when they have less than this many seconds left
+REFRESH_MARGIN = 60
+
+# Rejected entries of one key after which caching is turned off for the key
+MAX_REJECTIONS = 3
+
+CacheKey = tuple[str, str | None, str]
+
+
+class PromptCacheManager:
+    """Creates, reuses and deletes cached system prompts, safe to share between threads.
+
+    Example:
+        >>> with PromptCacheManager(client, ttl_seconds=600) as cache:
+        ...     for description in descriptions:
+        ...         generate_prompt(client, description, template="food", cache=cache)
+    """
+
+    def __init__(
+        self,
+        client: genai.Client,
+        ttl_seconds: int = DEFAULT_CACHE_TTL,
+        refresh_margin: float = REFRESH_MARGIN,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Initialize the manager (no API calls are made until get()).
+
+        Args:
+            client: Gemini client used to create and delete cache entries (for a
+                ClientPool, its primary member, which must also send the
+                requests referencing them)
+            ttl_seconds: Lifetime of each cache entry
+            refresh_margin: Seconds before expiry at which an entry is recreated
+            clock: Monotonic time source (injectable for tests)
+
+        Raises:
+            ValueError: If ttl_seconds is not greater than refresh_margin
+        """
+        if ttl_seconds <= refresh_margin:
+            raise ValueError(
+                f"ttl_seconds ({ttl_seconds}) must be greater than refresh_margin "
+                f"({refresh_margin})"
+            )
+        self.client = client.primary if isinstance(client, ClientPool) else client
+        self.ttl_seconds = ttl_seconds
+        self.refresh_margin = refresh_margin
+        self._clock = clock
+        self._entries: dict[CacheKey, tuple[str, float]] = {}
+        self._superseded: list[str] = []
+        self._rejections: dict[CacheKey, int] = {}
+        self._unavailable: set[CacheKey] = set()
+        self._key_locks: dict[CacheKey, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def get(self, model: str, template: str | None, system_prompt: str) -> str | None:
+        """Return the cache name holding a system prompt, creating it if needed.
+
+        Args:
+            model: Model the cache is created for (caches are model specific)
+            template: Template name the system prompt was built from
+            system_prompt: Full system prompt text
+
+        Returns:
+            Cached content name (e.g. "cachedContents/abc123"), or None if
+            caching is unavailable and the prompt must be sent inline
+        """
+        key = (model, template, system_prompt)
+        with self._lock:
+            if key in self._unavailable:
+                return None
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # Only one thread creates a given entry; others wait and reuse it
+        with key_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry and entry[1] - self._clock() > self.refresh_margin:
+                return entry[0]
+
+            name = self._create(model, template, system_prompt)
+            with self._lock:
+                if name is None:
+                    self._unavailable.add(key)
+                    self._entries.pop(key, None)
+                else:
+                    self._entries[key] = (name, self._clock() + self.ttl_seconds)
+                if entry:
+                    # Requests in flight may still reference it: delete it on close()
+                    self._superseded.append(entry[0])
+            return name
+
+    def invalidate(
+        self, model: str, template: str | None, system_prompt: str, name: str | None = None
+    ) -> None:
+        """Delete a cache entry the API no longer accepts; the next get() recreates it.
+
+        Args:
+            model: Model passed to get()
+            template: Template passed to get()
+            system_prompt: System prompt passed to get()
+            name: Name of the rejected entry; ignored if the key has moved on
+                to a newer entry since
+        """
+        key = (model, template, system_prompt)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (name is not None and entry[0] != name):
+                return
+            del self._entries[key]
+            self._rejections[key] = self._rejections.get(key, 0) + 1
+            disabled = self._rejections[key] >= MAX_REJECTIONS
+            if disabled:
+                self._unavailable.add(key)
+        if disabled:
+            logger.warning(f"Cached content {entry[0]} rejected again, sending prompts inline")
+        else:
+            logger.warning(f"Cached content {entry[0]} rejected, recreating it on next use")
+        self._delete(entry[0])
+
+    def close(self) -> None:
+        """Delete all cache entries created by this manager."""
+        with self._lock:
+            names = [name for name, _ in self._entries.values()] + self._superseded
+            self._entries.clear()
+            self._superseded = []
+        for name in names:
+            self._delete(name)
+
+    def __enter__(self) -> PromptCacheManager:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def _create(self, model: str, template: str | None, system_prompt: str) -> str | None:
+        """Create a cache entry, returning None if caching is unavailable."""
+        caches = getattr(self.client, "caches", None)
+        if caches is None:
+            logger.info("Client has no context cache support, sending prompts inline")
+            return None
+        try:
+            cached = caches.create(
+                model=model,
+                config=types.CreateCachedContentConfig(
+                    system_instruction=system_prompt,
+                    ttl=f"{self.ttl_seconds}s",
+                    display_name=f"promptgen-{template or 'default'}",
+                ),
+            )
+        except Exception as e:
+            logger.info(f"Context caching unavailable for model={model}, sending inline: {e}")
+            return None
+        if not cached.name:
+            return None
+        logger.debug(f"Created cached content {cached.name} (model={model}, template={template})")
+        return str(cached.name)
+
+    def _delete(self, name: str) -> None:
+        """Delete a cache entry, ignoring failures (it expires on its own)."""
+        try:
+            self.client.caches.delete(name=name)
+            logger.debug(f"Deleted cached content {name}")
+        except Exception as e:
+            logger.debug(f"Failed to delete cached content {name}: {e}")
@@ -4,6 +4,7 @@ Note: This code was generated with assistance from AI coding tools
 and has been reviewed and tested by a human.
 """
 
+import re
 from typing import Final
 
 # Template definitions based on prompting guide best practices
@@ -101,6 +102,7 @@ CATEGORY_KEYWORDS: Final[dict[str, list[str]]] = {
     "photography": [
         "photo",
         "photograph",
+        "photography",
         "portrait",
         "landscape",
         "macro",
@@ -152,6 +154,52 @@ CATEGORY_KEYWORDS: Final[dict[str, list[str]]] = {
     ],
 }
 
+# Score multiplier per category, applied to its number of matched keywords
+CATEGORY_WEIGHTS: Final[dict[str, float]] = {category: 1.0 for category in CATEGORY_KEYWORDS}
+
+# Words of a lowercased description
+_WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def _build_keyword_index(
+    category_keywords: dict[str, list[str]],
+) -> dict[str, tuple[str, tuple[str, ...]]]:
+    """Index every keyword and its plural forms for whole-word lookup.
+
+    Matching words against this index instead of searching for each keyword as
+    a substring means "art" no longer matches inside "party", while "dishes"
+    still matches "dish".
+
+    Args:
+        category_keywords: Keywords per category (single words)
+
+    Returns:
+        dict mapping each word form to (keyword, categories containing it)
+
+    Raises:
+        ValueError: If a keyword is not a single word
+    """
+    categories_by_keyword: dict[str, tuple[str, ...]] = {}
+    for category, keywords in category_keywords.items():
+        for keyword in keywords:
+            keyword = keyword.lower()
+            if not _WORD_PATTERN.fullmatch(keyword):
+                raise ValueError(f"Category keyword must be a single word: {keyword!r}")
+            categories_by_keyword[keyword] = categories_by_keyword.get(keyword, ()) + (category,)
+
+    index: dict[str, tuple[str, tuple[str, ...]]] = {}
+    for keyword, categories in categories_by_keyword.items():
+        index[keyword + "s"] = (keyword, categories)
+        index[keyword + "es"] = (keyword, categories)
+    # Exact keywords win over plural forms of other keywords
+    for keyword, categories in categories_by_keyword.items():
+        index[keyword] = (keyword, categories)
+    return index
+
+
+# Built once at import time; detect_category() is a single pass over the words
+_KEYWORD_INDEX = _build_keyword_index(CATEGORY_KEYWORDS)
+
 
 def get_template(template_name: str) -> str:
     """Get template instructions by name.
@@ -174,6 +222,10 @@ def get_template(template_name: str) -> str:
 def detect_category(description: str) -> str | None:
     """Auto-detect category from description using keyword matching.
 
+    Each category scores the number of distinct keywords found as whole words,
+    multiplied by its CATEGORY_WEIGHTS entry. Ties go to the category listed
+    first in CATEGORY_KEYWORDS.
+
     Args:
         description: User's simple description
 
@@ -186,20 +238,24 @@ def detect_category(description: str) -> str | None:
         >>> detect_category("food on a plate")
         'food'
     """
-    description_lower = description.lower()
-
-    # Count keyword matches for each category
-    scores: dict[str, int] = {}
-    for category, keywords in CATEGORY_KEYWORDS.items():
-        score = sum(1 for keyword in keywords if keyword in description_lower)
-        if score > 0:
-            scores[category] = score
+    # Collect distinct keyword matches in one pass over the words
+    matched = {
+        _KEYWORD_INDEX[word]
+        for word in _WORD_PATTERN.findall(description.lower())
+        if word in _KEYWORD_INDEX
+    }
+    if not matched:
+        return None
 
-    # Return category with highest score
-    if scores:
-        return max(scores, key=scores.get)  # type: ignore[arg-type]
+    # Score each category by its weighted number of matched keywords
+    scores: dict[str, float] = {}
+    for _, categories in matched:
+        for category in categories:
+            scores[category] = scores.get(category, 0.0) + CATEGORY_WEIGHTS[category]
 
-    return None
+    # Return category with highest score (max keeps the first listed on ties)
+    best = max((c for c in CATEGORY_KEYWORDS if c in scores), key=scores.__getitem__)
+    return best if scores[best] > 0 else None
 
 
 def list_templates() -> list[tuple[str, str]]:
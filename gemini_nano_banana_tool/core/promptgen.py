@@ -4,14 +4,64 @@ Note: This code was generated with assistance from AI coding tools
 and has been reviewed and tested by a human.
 """
 
+import json
 from typing import Any
 
 from google import genai
-from google.genai import types
+from google.genai import errors, types
 
 from .models import COST_PER_TOKEN
+from .prompt_cache import PromptCacheManager
 from .prompt_templates import detect_category, get_template
 
+# Default LLM model for prompt generation
+DEFAULT_PROMPTGEN_MODEL = "gemini-2.0-flash-exp"
+
+# Default number of descriptions packed into one request by generate_prompts_packed()
+DEFAULT_PACK_SIZE = 10
+
+# Best-practice instructions shared by every prompt generation request
+SYSTEM_PROMPT = """You are an expert prompt engineer for image generation models.
+Transform simple descriptions into detailed, effective image generation prompts.
+
+Follow these principles:
+1. Be specific and descriptive - include details about subjects, objects, and their relationships
+2. Include style, mood, and atmosphere - specify artistic approach and emotional tone
+3. Describe composition and perspective - camera angles, framing, depth
+4. Specify colors and palette - be explicit about color choices
+5. Include technical details - quality level, detail, texture, lighting
+
+"""
+
+SINGLE_OUTPUT_INSTRUCTIONS = (
+    "Output only the enhanced prompt text, nothing else. "
+    "Do not include explanations or metadata.\n"
+    "Make the prompt detailed but concise (aim for 50-100 words).\n"
+)
+
+PACKED_OUTPUT_INSTRUCTIONS = (
+    "You will receive several numbered descriptions. Enhance each one independently.\n"
+    'Return a JSON array with one object per description: {"index": <number>, "prompt": "..."}.\n'
+    "Each prompt must be detailed but concise (aim for 50-100 words) "
+    "and contain only prompt text.\n"
+)
+
+# API error codes meaning a cached content reference is no longer usable
+CACHE_REJECTED_CODES = frozenset({403, 404})
+
+# Structured output schema for packed requests
+PACKED_RESPONSE_SCHEMA = types.Schema(
+    type=types.Type.ARRAY,
+    items=types.Schema(
+        type=types.Type.OBJECT,
+        properties={
+            "index": types.Schema(type=types.Type.INTEGER),
+            "prompt": types.Schema(type=types.Type.STRING),
+        },
+        required=["index", "prompt"],
+    ),
+)
+
 
 class PromptGenerationError(Exception):
     """Raised when prompt generation fails."""
@@ -23,7 +73,8 @@ def generate_prompt(
     template: str | None = None,
     category: str | None = None,
     style: str | None = None,
-    model: str = "gemini-2.0-flash-exp",
+    model: str = DEFAULT_PROMPTGEN_MODEL,
+    cache: PromptCacheManager | None = None,
 ) -> dict[str, Any]:
     """Generate detailed image prompt from simple description using LLM.
 
@@ -34,6 +85,8 @@ def generate_prompt(
         category: Category hint (overrides template detection)
         style: Style hint (photorealistic, watercolor, anime, etc.)
         model: Gemini model to use for generation (default: gemini-2.0-flash-exp)
+        cache: Context cache for the system prompt (sent inline when None or
+            when caching is unavailable)
 
     Returns:
         dict with keys:
@@ -43,6 +96,7 @@ def generate_prompt(
             - category: Detected or specified category
             - style: Specified style (if any)
             - tokens_used: Token count for generation
+            - cached_tokens: Input tokens served from the context cache
             - estimated_cost_usd: Estimated cost in USD (rounded to 4 decimals)
 
     Raises:
@@ -58,51 +112,27 @@ def generate_prompt(
     detected_category = category or (detect_category(description) if not template else None)
 
     # Build system prompt with best practices
-    system_prompt = """You are an expert prompt engineer for image generation models.
-Transform simple descriptions into detailed, effective image generation prompts.
-
-Follow these principles:
-1. Be specific and descriptive - include details about subjects, objects, and their relationships
-2. Include style, mood, and atmosphere - specify artistic approach and emotional tone
-3. Describe composition and perspective - camera angles, framing, depth
-4. Specify colors and palette - be explicit about color choices
-5. Include technical details - quality level, detail, texture, lighting
-
-Output only the enhanced prompt text, nothing else. Do not include explanations or metadata.
-Make the prompt detailed but concise (aim for 50-100 words).
-"""
-
-    # Add template instructions if specified
-    if template:
-        try:
-            template_instructions = get_template(template)
-            system_prompt += f"\n\nUse this template approach:\n{template_instructions}"
-        except ValueError as e:
-            raise PromptGenerationError(str(e)) from e
+    system_prompt = _build_system_prompt(template, SINGLE_OUTPUT_INSTRUCTIONS)
 
     # Build user prompt
     user_prompt = (
         "Transform this simple description into a detailed image generation prompt:\n\n"
         f"{description}"
-    )
-
-    # Add category hint if available
-    if detected_category:
-        user_prompt += f"\n\nCategory context: {detected_category}"
-
-    # Add style hint if provided
-    if style:
-        user_prompt += f"\nDesired style: {style}"
+    ) + _build_hints(detected_category, style)
 
     try:
         # Generate prompt using Gemini
-        response = client.models.generate_content(
-            model=model,
-            contents=system_prompt + "\n\n" + user_prompt,
-            config=types.GenerateContentConfig(
+        response = _generate_content(
+            client,
+            model,
+            template,
+            system_prompt,
+            user_prompt,
+            types.GenerateContentConfig(
                 temperature=0.7,  # Some creativity but consistent
                 max_output_tokens=500,  # Enough for detailed prompts
             ),
+            cache,
         )
 
         # Extract generated prompt
@@ -136,6 +166,7 @@ Make the prompt detailed but concise (aim for 50-100 words).
             "category": detected_category or category,
             "style": style,
             "tokens_used": token_count,
+            "cached_tokens": _cached_tokens(response),
             "estimated_cost_usd": round(estimated_cost, 4),
         }
 
@@ -143,6 +174,227 @@ Make the prompt detailed but concise (aim for 50-100 words).
         raise PromptGenerationError(f"Prompt generation failed: {e}") from e
 
 
+def generate_prompts_packed(
+    client: genai.Client,
+    items: list[dict[str, Any]],
+    template: str | None = None,
+    model: str = DEFAULT_PROMPTGEN_MODEL,
+    pack_size: int = DEFAULT_PACK_SIZE,
+    cache: PromptCacheManager | None = None,
+) -> list[dict[str, Any]]:
+    """Generate prompts for many descriptions, packing several into each request.
+
+    The system prompt and template are sent once per request instead of once per
+    description, and the model returns structured JSON that is split back per
+    item. Descriptions the model skipped are retried individually with
+    generate_prompt(). Token usage of each request is apportioned to its items:
+    input tokens are shared evenly, output tokens by generated prompt length.
+
+    Args:
+        client: Gemini client instance
+        items: One dict per description with "description" and optional
+            "category", "style" and "template" (overrides the template argument)
+        template: Default template for items without their own
+        model: Gemini model to use for generation
+        pack_size: Maximum descriptions per request
+        cache: Context cache for the system prompt (see generate_prompt)
+
+    Returns:
+        One result per item, in input order, with the same keys as
+        generate_prompt() plus "packed": {"size", "tokens_used"} for the request
+        the item was part of
+
+    Raises:
+        PromptGenerationError: If a request fails or a template is unknown
+
+    Example:
+        >>> results = generate_prompts_packed(
+        ...     client, [{"description": "wizard cat"}, {"description": "sushi", "style": "anime"}]
+        ... )
+        >>> [r["prompt"] for r in results]
+    """
+    if pack_size < 1:
+        raise PromptGenerationError(f"pack_size must be at least 1, got {pack_size}")
+
+    # Requests share one system prompt, so group items by template first
+    groups: dict[str | None, list[int]] = {}
+    for index, item in enumerate(items):
+        groups.setdefault(item.get("template") or template, []).append(index)
+
+    results: list[dict[str, Any]] = [{} for _ in items]
+    for group_template, indexes in groups.items():
+        for start in range(0, len(indexes), pack_size):
+            pack = indexes[start : start + pack_size]
+            pack_results = _generate_pack(
+                client, [items[i] for i in pack], group_template, model, cache
+            )
+            for index, result in zip(pack, pack_results, strict=True):
+                results[index] = result
+    return results
+
+
+def _generate_pack(
+    client: genai.Client,
+    items: list[dict[str, Any]],
+    template: str | None,
+    model: str,
+    cache: PromptCacheManager | None,
+) -> list[dict[str, Any]]:
+    """Run one packed request (see generate_prompts_packed)."""
+    system_prompt = _build_system_prompt(template, PACKED_OUTPUT_INSTRUCTIONS)
+    categories = [
+        item.get("category") or (detect_category(item["description"]) if not template else None)
+        for item in items
+    ]
+    sections = [
+        f"Description {index}:\n{item['description']}"
+        + _build_hints(categories[index], item.get("style"))
+        for index, item in enumerate(items)
+    ]
+    user_prompt = (
+        "Transform each of these simple descriptions into a detailed image generation "
+        "prompt:\n\n" + "\n\n".join(sections)
+    )
+
+    try:
+        response = _generate_content(
+            client,
+            model,
+            template,
+            system_prompt,
+            user_prompt,
+            types.GenerateContentConfig(
+                temperature=0.7,
+                max_output_tokens=min(500 * len(items), 8192),
+                response_mime_type="application/json",
+                response_schema=PACKED_RESPONSE_SCHEMA,
+            ),
+            cache,
+        )
+        text = response.text
+        if not text:
+            raise PromptGenerationError("Empty response from model")
+        entries = json.loads(text)
+    except PromptGenerationError:
+        raise
+    except Exception as e:
+        raise PromptGenerationError(f"Packed prompt generation failed: {e}") from e
+
+    prompts: dict[int, str] = {}
+    for entry in entries if isinstance(entries, list) else []:
+        if not isinstance(entry, dict) or not isinstance(entry.get("prompt"), str):
+            continue
+        try:
+            # Via str() so that any non-numeric index, not just a bad string, fails alike
+            index = int(str(entry.get("index")))
+        except ValueError:
+            # Treated like a skipped description: its item is retried on its own
+            continue
+        prompts[index] = entry["prompt"].strip()
+
+    usage = response.usage_metadata
+    total_tokens = (usage.total_token_count if usage else 0) or 0
+    output_tokens = (usage.candidates_token_count if usage else 0) or 0
+    input_share = (total_tokens - output_tokens) / len(items)
+    output_chars = sum(len(p) for p in prompts.values()) or 1
+    cost_per_token = COST_PER_TOKEN.get(model, 0.0)
+
+    results: list[dict[str, Any]] = []
+    for index, item in enumerate(items):
+        if index not in prompts or not prompts[index]:
+            # The model skipped this description; fall back to a single request
+            result = generate_prompt(
+                client,
+                item["description"],
+                template=template,
+                category=item.get("category"),
+                style=item.get("style"),
+                model=model,
+                cache=cache,
+            )
+        else:
+            tokens = round(input_share + output_tokens * len(prompts[index]) / output_chars)
+            result = {
+                "prompt": prompts[index],
+                "original": item["description"],
+                "template_used": template,
+                "category": categories[index],
+                "style": item.get("style"),
+                "tokens_used": tokens,
+                "cached_tokens": round(_cached_tokens(response) / len(items)),
+                "estimated_cost_usd": round(tokens * cost_per_token, 4),
+            }
+        result["packed"] = {"size": len(items), "tokens_used": total_tokens}
+        results.append(result)
+    return results
+
+
+def _generate_content(
+    client: genai.Client,
+    model: str,
+    template: str | None,
+    system_prompt: str,
+    user_prompt: str,
+    config: types.GenerateContentConfig,
+    cache: PromptCacheManager | None,
+) -> types.GenerateContentResponse:
+    """Send a promptgen request, referencing the cached system prompt if possible.
+
+    Falls back to sending the system prompt inline when no cache is available,
+    or when the API rejects the cache entry (e.g. it expired server-side).
+    Requests referencing the cache go through the client owning it.
+    """
+    cache_name = cache.get(model, template, system_prompt) if cache else None
+    if cache and cache_name:
+        try:
+            return cache.client.models.generate_content(
+                model=model,
+                contents=user_prompt,
+                config=config.model_copy(update={"cached_content": cache_name}),
+            )
+        except errors.ClientError as e:
+            if e.code not in CACHE_REJECTED_CODES:
+                raise
+            cache.invalidate(model, template, system_prompt, cache_name)
+    return client.models.generate_content(
+        model=model,
+        contents=system_prompt + "\n\n" + user_prompt,
+        config=config,
+    )
+
+
+def _cached_tokens(response: types.GenerateContentResponse) -> int:
+    """Return the number of input tokens a response served from the context cache."""
+    usage = response.usage_metadata
+    return (usage.cached_content_token_count if usage else 0) or 0
+
+
+def _build_system_prompt(template: str | None, output_instructions: str) -> str:
+    """Build the system prompt, appending template instructions if requested.
+
+    Raises:
+        PromptGenerationError: If the template is unknown
+    """
+    system_prompt = SYSTEM_PROMPT + output_instructions
+    if template:
+        try:
+            template_instructions = get_template(template)
+            system_prompt += f"\n\nUse this template approach:\n{template_instructions}"
+        except ValueError as e:
+            raise PromptGenerationError(str(e)) from e
+    return system_prompt
+
+
+def _build_hints(category: str | None, style: str | None) -> str:
+    """Build the category and style hint lines appended to a description."""
+    hints = ""
+    if category:
+        hints += f"\n\nCategory context: {category}"
+    if style:
+        hints += f"\nDesired style: {style}"
+    return hints
+
+
 def format_verbose_output(result: dict[str, Any]) -> str:
     """Format prompt generation result as verbose human-readable text.
 
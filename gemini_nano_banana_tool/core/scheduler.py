@@ -0,0 +1,310 @@
+"""Priority scheduling of API calls sharing one quota.
+
+A PriorityScheduler limits the number of API calls in flight and decides who
+goes next when a slot frees up: first by priority class (interactive, then
+batch, then backfill), then earliest deadline first within a class, then
+arrival order. To prevent starvation, a waiting call moves up one class for
+every ``aging_seconds`` it has waited, so backfill work still makes progress
+under a steady stream of interactive calls.
+
+Calls are tagged with request_priority(), a context manager that sets the
+class and due time for the current thread or task (contextvars, so it also
+follows asyncio.to_thread). ScheduledClient wraps a client and passes every
+``models`` call through the scheduler, so it composes with ClientPool,
+HedgedClient and the generate_image() layers. A queued call stops waiting
+when its request's deadline passes, and its SDK timeout is recomputed once
+it is admitted (see deadline.request_limits()):
+
+    scheduler = PriorityScheduler(max_in_flight=4)
+    client = ScheduledClient(create_client(), scheduler)
+    with request_priority("interactive"):
+        generate_image(client, "A cat", "cat.png")  # jumps the backfill queue
+
+Note: This code was generated with assistance from AI coding tools
+and has been reviewed and tested by a human.
+"""
+
+import contextvars
+import itertools
+import logging
+import math
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any
+
+from google import genai
+
+from gemini_nano_banana_tool.core.deadline import (
+    Deadline,
+    current_limits,
+    refresh_timeout,
+    wait_slice,
+)
+from gemini_nano_banana_tool.core.generator import DeadlineExceededError
+from gemini_nano_banana_tool.core.metrics import Metrics
+from gemini_nano_banana_tool.utils import ValidationError
+
+logger = logging.getLogger(__name__)
+
+# Priority classes, most urgent first
+PRIORITIES = ("interactive", "batch", "backfill")
+
+DEFAULT_PRIORITY = "batch"
+
+# A waiting call moves up one class per this many seconds waited
+DEFAULT_AGING_SECONDS = 30.0
+
+_current: contextvars.ContextVar[tuple[str, float | None]] = contextvars.ContextVar(
+    "request_priority", default=(DEFAULT_PRIORITY, None)
+)
+
+
+@contextmanager
+def request_priority(priority: str, due: float | None = None) -> Iterator[None]:
+    """Tag the API calls made in this block with a priority class and due time.
+
+    Args:
+        priority: "interactive", "batch" or "backfill"
+        due: Due time on the time.monotonic() clock, for earliest-deadline-first
+
+    Raises:
+        ValidationError: If the priority class is unknown
+    """
+    validate_priority(priority)
+    token = _current.set((priority, due))
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+def validate_priority(priority: str) -> None:
+    """Raise ValidationError unless priority is a known class."""
+    if priority not in PRIORITIES:
+        raise ValidationError(f"Unknown priority '{priority}', use one of: {', '.join(PRIORITIES)}")
+
+
+def parse_due(value: Any) -> float | None:
+    """Convert a request's "deadline" field to a due time on the monotonic clock.
+
+    Args:
+        value: ISO 8601 timestamp (with time zone, or local time), Unix
+            timestamp, or None
+
+    Returns:
+        time.monotonic() based due time, or None
+
+    Raises:
+        ValidationError: If the value can't be parsed
+    """
+    if value is None or value == "":
+        return None
+    try:
+        if isinstance(value, int | float):
+            epoch = float(value)
+        else:
+            epoch = datetime.fromisoformat(str(value)).timestamp()
+    except ValueError as e:
+        raise ValidationError(f"Invalid deadline '{value}': use ISO 8601 or Unix time") from e
+    return time.monotonic() + (epoch - time.time())
+
+
+def request_schedule(request: dict[str, Any], default_priority: str) -> tuple[str, float | None]:
+    """Read a request's "priority" and "deadline" tags.
+
+    Args:
+        request: Request object (manifest row or --ndjson line)
+        default_priority: Class for requests without a "priority" field
+
+    Returns:
+        (priority, due) for request_priority()
+
+    Raises:
+        ValidationError: If a tag is invalid
+    """
+    priority = request.get("priority") or default_priority
+    validate_priority(priority)
+    return priority, parse_due(request.get("deadline"))
+
+
+class _Waiter:
+    """A call waiting for a slot."""
+
+    def __init__(self, priority: str, due: float | None, seq: int, since: float):
+        self.rank = PRIORITIES.index(priority)
+        self.priority = priority
+        self.due = math.inf if due is None else due
+        self.seq = seq
+        self.since = since
+
+
+class PriorityScheduler:
+    """Admits API calls by priority class, deadline and age; safe to share between threads.
+
+    Example:
+        >>> scheduler = PriorityScheduler(max_in_flight=2)
+        >>> with scheduler.slot("backfill"):
+        ...     client.models.generate_content(...)
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int,
+        aging_seconds: float = DEFAULT_AGING_SECONDS,
+        metrics: Metrics | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Create a scheduler.
+
+        Args:
+            max_in_flight: API calls allowed at the same time
+            aging_seconds: Wait after which a call moves up one class
+            metrics: Metrics to record admissions and queue length in
+            clock: Monotonic clock (injectable for tests)
+        """
+        self.max_in_flight = max(1, max_in_flight)
+        self.aging_seconds = aging_seconds
+        self.metrics = metrics or Metrics()
+        self.in_flight = 0
+        self._clock = clock
+        self._cond = threading.Condition()
+        self._waiters: list[_Waiter] = []
+        self._seq = itertools.count()
+
+    @property
+    def waiting(self) -> int:
+        """Number of calls waiting for a slot."""
+        with self._cond:
+            return len(self._waiters)
+
+    def _key(self, waiter: _Waiter, now: float) -> tuple[int, float, int]:
+        """Order waiters by aged class, then due time, then arrival."""
+        promoted = int((now - waiter.since) // self.aging_seconds) if self.aging_seconds else 0
+        return (max(0, waiter.rank - promoted), waiter.due, waiter.seq)
+
+    def _next(self) -> _Waiter:
+        """Return the waiter that gets the next free slot."""
+        now = self._clock()
+        return min(self._waiters, key=lambda w: self._key(w, now))
+
+    def acquire(
+        self,
+        priority: str = DEFAULT_PRIORITY,
+        due: float | None = None,
+        deadline: Deadline | None = None,
+    ) -> None:
+        """Wait for a slot.
+
+        Args:
+            priority: Priority class of the call
+            due: Due time on the scheduler's clock, or None
+            deadline: Stop waiting when it passes or is cancelled
+
+        Raises:
+            DeadlineExceededError: If the deadline passed while waiting
+        """
+        validate_priority(priority)
+        with self._cond:
+            waiter = _Waiter(priority, due, next(self._seq), self._clock())
+            self._waiters.append(waiter)
+            self.metrics.set_gauge("scheduler.waiting", len(self._waiters))
+            try:
+                while True:
+                    # Checked after admission too: the wait may end as the deadline passes
+                    if deadline is not None and deadline.expired:
+                        self.metrics.count("scheduler.expired")
+                        raise DeadlineExceededError(f"Request not sent: {deadline.reason}")
+                    if self.in_flight < self.max_in_flight and self._next() is waiter:
+                        break
+                    self._cond.wait(wait_slice(deadline))
+            finally:
+                self._waiters.remove(waiter)
+                self.metrics.set_gauge("scheduler.waiting", len(self._waiters))
+                # A waiter leaving may make another one next in line
+                self._cond.notify_all()
+            self.in_flight += 1
+        self.metrics.count(f"scheduler.admitted.{priority}")
+
+    def release(self) -> None:
+        """Free a slot taken by acquire()."""
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(
+        self,
+        priority: str = DEFAULT_PRIORITY,
+        due: float | None = None,
+        deadline: Deadline | None = None,
+    ) -> Iterator[None]:
+        """Hold a slot for the duration of the block (see acquire())."""
+        self.acquire(priority, due, deadline)
+        try:
+            yield
+        finally:
+            self.release()
+
+
+class ScheduledClient:
+    """Client wrapper that admits every ``models`` call through a PriorityScheduler.
+
+    The class and due time come from the enclosing request_priority() block
+    (default: batch, no deadline).
+    """
+
+    def __init__(self, client: genai.Client, scheduler: PriorityScheduler):
+        """Wrap a client.
+
+        Args:
+            client: Client (or ClientPool, HedgedClient) making the calls
+            scheduler: Scheduler shared by everything using this quota
+        """
+        self.client = client
+        self.scheduler = scheduler
+        self.models = _ScheduledModels(self)
+
+    @property
+    def batches(self) -> Any:
+        """Batch jobs don't take interactive quota: use the wrapped client's."""
+        return self.client.batches
+
+    @property
+    def files(self) -> Any:
+        """Files aren't scheduled: use the wrapped client's."""
+        return self.client.files
+
+    @property
+    def caches(self) -> Any:
+        """Caches aren't scheduled: use the wrapped client's."""
+        return self.client.caches
+
+    def call(self, method: str, **kwargs: Any) -> Any:
+        """Call a ``models`` method once the scheduler admits it.
+
+        The request's deadline bounds the wait; once admitted, the call's SDK
+        timeout is recomputed from the time left.
+        """
+        priority, due = _current.get()
+        _, deadline = current_limits()
+        with self.scheduler.slot(priority, due, deadline):
+            kwargs["config"] = refresh_timeout(kwargs.get("config"))
+            return getattr(self.client.models, method)(**kwargs)
+
+
+class _ScheduledModels:
+    """The ``models`` namespace of a ScheduledClient."""
+
+    def __init__(self, owner: ScheduledClient):
+        self._owner = owner
+
+    def generate_content(self, model: str, contents: Any, config: Any = None) -> Any:
+        """Run a generate_content call when admitted."""
+        return self._owner.call("generate_content", model=model, contents=contents, config=config)
+
+    def generate_images(self, model: str, prompt: str, config: Any = None) -> Any:
+        """Run a generate_images call when admitted."""
+        return self._owner.call("generate_images", model=model, prompt=prompt, config=config)
@@ -0,0 +1,313 @@
+"""Single-flight coalescing of identical in-flight image requests.
+
+Identical requests (same model, prompt, reference image contents, aspect
+ratio and resolution, plus the output format when a PostProcessor converts
+images) often arrive together, e.g. duplicate manifest rows.
+SingleFlight.generate_image() has the same signature as generate_image(): the
+first caller of a request (the leader) makes the upstream call, and callers
+that ask for the same request while it is in flight (followers) wait for it.
+The leader's image is then fanned out to every follower's output path as a
+hardlink, or a copy where hardlinks aren't possible (other filesystem,
+Windows share).
+
+Leaders and followers can be threads or asyncio tasks in any mix: waiters
+share a concurrent.futures.Future, which tasks await through
+asyncio.wrap_future. Only requests in flight at the same time are coalesced;
+this is not a cache. If a leader is cancelled, a waiting follower takes over
+as the new leader.
+
+With a LockRegistry, leaders also coalesce with other processes sharing the
+registry directory: a leader whose request is already being made by another
+process waits for that process's image instead of calling the API.
+
+Note: This code was generated with assistance from AI coding tools
+and has been reviewed and tested by a human.
+"""
+
+import asyncio
+import concurrent.futures
+import hashlib
+import json
+import logging
+import threading
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from gemini_nano_banana_tool.core.deadline import Deadline, request_timeout
+from gemini_nano_banana_tool.core.generator import (
+    DeadlineExceededError,
+    generate_image,
+    generate_image_async,
+)
+from gemini_nano_banana_tool.core.journal import file_sha256
+from gemini_nano_banana_tool.core.lock_registry import LockRegistry
+from gemini_nano_banana_tool.core.models import DEFAULT_MODEL
+from gemini_nano_banana_tool.core.postprocess import PostProcessor, target_format
+from gemini_nano_banana_tool.core.writer import ImageSink, ImageWriter
+from gemini_nano_banana_tool.utils import link_or_copy
+
+logger = logging.getLogger(__name__)
+
+
+class _LeaderCancelledError(Exception):
+    """Set on a flight whose leader was cancelled, so a follower takes over."""
+
+    pass
+
+
+def coalesce_key(
+    prompt: str,
+    reference_images: list[str] | None,
+    aspect_ratio: str,
+    model: str,
+    resolution: str | None,
+    output_format: str | None = None,
+) -> str:
+    """Return the key under which identical requests are coalesced.
+
+    Reference images are identified by content, so the same image under two
+    paths still coalesces.
+
+    Args:
+        prompt: Text prompt
+        reference_images: Reference image paths
+        aspect_ratio: Aspect ratio
+        model: Model name
+        resolution: Resolution quality
+        output_format: Format the image is converted to (see output_format())
+
+    Returns:
+        SHA-256 hex digest
+    """
+    identity = {
+        "prompt": prompt,
+        "references": [file_sha256(path) for path in reference_images or []],
+        "aspect_ratio": aspect_ratio,
+        "model": model,
+        "resolution": resolution,
+    }
+    if output_format is not None:
+        identity["format"] = output_format
+    encoded = json.dumps(identity, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def output_format(output_path: str, postprocessor: ImageSink | None) -> str | None:
+    """Return the format a PostProcessor converts an output to, else None.
+
+    Without a PostProcessor the API's bytes are written unchanged whatever
+    the extension, so outputs of any format can share them.
+    """
+    if isinstance(postprocessor, PostProcessor):
+        return target_format(output_path) or Path(output_path).suffix.lower()
+    return None
+
+
+class SingleFlight:
+    """Coalesces identical in-flight generate_image() calls, safe across threads and tasks.
+
+    Example:
+        >>> flight = SingleFlight()
+        >>> # Both calls run concurrently; only one reaches the API
+        >>> flight.generate_image(client, "A cat", "a/cat.png")
+        >>> flight.generate_image(client, "A cat", "b/cat.png")
+    """
+
+    def __init__(
+        self,
+        generate_fn: Callable[..., dict[str, Any]] = generate_image,
+        registry: LockRegistry | None = None,
+    ):
+        """Create a coalescing layer.
+
+        Args:
+            generate_fn: Function making the upstream call, with the signature
+                of generate_image() (e.g. ModelRouter().generate_image)
+            registry: Optional lock-file registry to coalesce across processes
+        """
+        self.generate_fn = generate_fn
+        self.registry = registry
+        self.leaders = 0
+        self.followers = 0
+        self._lock = threading.Lock()
+        self._flights: dict[str, concurrent.futures.Future[dict[str, Any]]] = {}
+
+    def _join(self, key: str) -> tuple[concurrent.futures.Future[dict[str, Any]], bool]:
+        """Return the flight for a key and whether the caller leads it."""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                self.followers += 1
+                return flight, False
+            flight = concurrent.futures.Future()
+            self._flights[key] = flight
+            self.leaders += 1
+            return flight, True
+
+    def _land(
+        self,
+        key: str,
+        flight: concurrent.futures.Future[dict[str, Any]],
+        result: dict[str, Any] | None,
+        error: BaseException | None,
+    ) -> None:
+        """Publish a leader's outcome to its followers and end the flight."""
+        with self._lock:
+            del self._flights[key]
+        if error is None:
+            flight.set_result(result or {})
+        elif isinstance(error, Exception):
+            flight.set_exception(error)
+        else:
+            # KeyboardInterrupt or task cancellation: let a follower lead instead
+            flight.set_exception(_LeaderCancelledError())
+
+    def generate_image(
+        self,
+        client: Any,
+        prompt: str,
+        output_path: str,
+        reference_images: list[str] | None = None,
+        aspect_ratio: str = "1:1",
+        model: str = DEFAULT_MODEL,
+        resolution: str | None = None,
+        timeout: float | None = None,
+        deadline: Deadline | None = None,
+        postprocessor: ImageSink | None = None,
+    ) -> dict[str, Any]:
+        """Generate an image, sharing the upstream call with identical requests in flight.
+
+        Same arguments, result and errors as generate_image(). Followers'
+        results carry their own output_path and "coalesced": True.
+        """
+        key = coalesce_key(
+            prompt,
+            reference_images,
+            aspect_ratio,
+            model,
+            resolution,
+            output_format(output_path, postprocessor),
+        )
+        kwargs: dict[str, Any] = {
+            "client": client,
+            "prompt": prompt,
+            "output_path": output_path,
+            "reference_images": reference_images,
+            "aspect_ratio": aspect_ratio,
+            "model": model,
+            "resolution": resolution,
+            "timeout": timeout,
+            "deadline": deadline,
+            "postprocessor": postprocessor,
+        }
+        while True:
+            flight, leader = self._join(key)
+            if leader:
+                try:
+                    result = self._lead(key, kwargs)
+                except BaseException as e:
+                    self._land(key, flight, None, e)
+                    raise
+                self._land(key, flight, result, None)
+                return result
+
+            logger.info(f"Identical request in flight, waiting for it: {output_path}")
+            try:
+                shared = flight.result(timeout=request_timeout(timeout, deadline))
+            except concurrent.futures.TimeoutError as e:
+                raise DeadlineExceededError(
+                    "Timed out waiting for an identical request in flight"
+                ) from e
+            except _LeaderCancelledError:
+                continue
+            return _fan_out(shared, output_path, postprocessor)
+
+    async def generate_image_async(
+        self,
+        client: Any,
+        prompt: str,
+        output_path: str,
+        reference_images: list[str] | None = None,
+        aspect_ratio: str = "1:1",
+        model: str = DEFAULT_MODEL,
+        resolution: str | None = None,
+        timeout: float | None = None,
+        deadline: Deadline | None = None,
+        postprocessor: ImageSink | None = None,
+    ) -> dict[str, Any]:
+        """Async variant of generate_image(), coalescing with threads and tasks alike.
+
+        The leader uses generator.generate_image_async() unless a custom
+        generate_fn or a registry was given; it then runs in a worker thread.
+        """
+        key = await asyncio.to_thread(
+            coalesce_key,
+            prompt,
+            reference_images,
+            aspect_ratio,
+            model,
+            resolution,
+            output_format(output_path, postprocessor),
+        )
+        kwargs: dict[str, Any] = {
+            "client": client,
+            "prompt": prompt,
+            "output_path": output_path,
+            "reference_images": reference_images,
+            "aspect_ratio": aspect_ratio,
+            "model": model,
+            "resolution": resolution,
+            "timeout": timeout,
+            "deadline": deadline,
+            "postprocessor": postprocessor,
+        }
+        while True:
+            flight, leader = self._join(key)
+            if leader:
+                try:
+                    if self.registry is None and self.generate_fn is generate_image:
+                        result = await generate_image_async(**kwargs)
+                    else:
+                        result = await asyncio.to_thread(self._lead, key, kwargs)
+                except BaseException as e:
+                    self._land(key, flight, None, e)
+                    raise
+                self._land(key, flight, result, None)
+                return result
+
+            logger.info(f"Identical request in flight, waiting for it: {output_path}")
+            try:
+                async with asyncio.timeout(request_timeout(timeout, deadline)):
+                    # shield: a cancelled follower must not cancel the shared flight
+                    shared = await asyncio.shield(asyncio.wrap_future(flight))
+            except TimeoutError as e:
+                raise DeadlineExceededError(
+                    "Timed out waiting for an identical request in flight"
+                ) from e
+            except _LeaderCancelledError:
+                continue
+            return await asyncio.to_thread(_fan_out, shared, output_path, postprocessor)
+
+    def _lead(self, key: str, kwargs: dict[str, Any]) -> dict[str, Any]:
+        """Make a leader's call, through the cross-process registry if there is one."""
+        if self.registry is None:
+            return self.generate_fn(**kwargs)
+        result, shared = self.registry.run(
+            key,
+            lambda: self.generate_fn(**kwargs),
+            request_timeout(kwargs["timeout"], kwargs["deadline"]),
+        )
+        return _fan_out(result, kwargs["output_path"]) if shared else result
+
+
+def _fan_out(
+    result: dict[str, Any], output_path: str, postprocessor: ImageSink | None = None
+) -> dict[str, Any]:
+    """Place the leader's image at a follower's output path and adapt the result."""
+    if isinstance(postprocessor, ImageWriter):
+        # The leader's image may still be queued for writing
+        postprocessor.wait(result["output_path"])
+    method = link_or_copy(result["output_path"], output_path)
+    logger.debug(f"Fanned out {result['output_path']} to {output_path} ({method})")
+    return {**result, "output_path": output_path, "coalesced": True}
@@ -0,0 +1,278 @@
+"""Durable SQLite work queue with leases, for multi-process workers.
+
+One generate-batch process is bounded by the GIL and by one machine's
+process. A WorkQueue is a single SQLite file that any number of worker
+processes on the host share without a broker: ``enqueue`` adds manifest rows
+as jobs, and each worker leases jobs, generates their images and records
+the results back in the file.
+
+A lease is a visibility timeout: a leased job is invisible to other workers
+until its lease expires. If a worker dies mid-job, the job becomes visible
+again and another worker retries it. Failed jobs (and jobs whose lease
+expired) are retried until they have been attempted ``max_attempts`` times;
+invalid requests fail at once. A worker renews its lease while a job is still
+running, so slow jobs (e.g. retried or falling back to another model) aren't
+handed to a second worker. Every state change is a short ``BEGIN IMMEDIATE``
+transaction, so two workers never lease the same job.
+
+SQLite needs working POSIX file locks: use a local disk. On NFS it only works
+where the mount supports locking reliably.
+
+Note: This code was generated with assistance from AI coding tools
+and has been reviewed and tested by a human.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+# Seconds a leased job stays invisible to other workers (longer than a request)
+DEFAULT_VISIBILITY_TIMEOUT = 600.0
+
+# Attempts before a job is marked failed
+DEFAULT_MAX_ATTEMPTS = 3
+
+# Seconds to wait for another process's write lock
+DEFAULT_BUSY_TIMEOUT = 30.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    request TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires REAL,
+    result TEXT,
+    error TEXT,
+    enqueued_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, lease_expires);
+"""
+
+
+class Job:
+    """A leased job."""
+
+    def __init__(self, job_id: int, request: dict[str, Any], attempts: int):
+        self.id = job_id
+        self.request = request
+        self.attempts = attempts
+
+
+class WorkQueue:
+    """Job queue in a SQLite file shared by several processes; safe to share between threads.
+
+    Example:
+        >>> queue = WorkQueue("jobs.db")
+        >>> queue.enqueue([{"prompt": "A cat", "output": "cat.png"}])
+        >>> for job in queue.lease("worker-1"):
+        ...     queue.complete(job.id, "worker-1", {"output_path": "cat.png"})
+    """
+
+    def __init__(
+        self,
+        path: str,
+        visibility_timeout: float = DEFAULT_VISIBILITY_TIMEOUT,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        clock: Callable[[], float] = time.time,
+    ):
+        """Open (and create if needed) a queue file.
+
+        Args:
+            path: SQLite database file
+            visibility_timeout: Seconds a lease hides a job from other workers
+            max_attempts: Attempts before a failing job is given up
+            clock: Wall clock shared between processes (injectable for tests)
+        """
+        self.path = path
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self._clock = clock
+        self._local = threading.local()
+        self._connection().executescript(_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return this thread's connection (sqlite3 connections aren't shared)."""
+        db: sqlite3.Connection | None = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=DEFAULT_BUSY_TIMEOUT, isolation_level=None)
+            self._local.db = db
+        return db
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run a block in a write transaction, taken up front to avoid lock upgrades."""
+        db = self._connection()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+    def enqueue(self, requests: Iterable[dict[str, Any]]) -> int:
+        """Add requests as queued jobs, in one transaction.
+
+        Returns:
+            Number of jobs added
+        """
+        now = self._clock()
+        rows = [(json.dumps(request, ensure_ascii=False), now, now) for request in requests]
+        with self._transaction() as db:
+            db.executemany(
+                "INSERT INTO jobs (request, enqueued_at, updated_at) VALUES (?, ?, ?)", rows
+            )
+        return len(rows)
+
+    def lease(self, owner: str, limit: int = 1) -> list[Job]:
+        """Lease queued jobs, and jobs whose lease expired, oldest first.
+
+        Args:
+            owner: Unique name of the leasing worker
+            limit: Jobs to lease at most
+
+        Returns:
+            Leased jobs (empty when nothing is available)
+        """
+        now = self._clock()
+        with self._transaction() as db:
+            # Jobs whose workers kept dying on them are given up, not retried forever
+            db.execute(
+                "UPDATE jobs SET state = ?, error = ?, lease_owner = NULL, lease_expires = NULL,"
+                " updated_at = ? WHERE state = ? AND lease_expires < ? AND attempts >= ?",
+                (FAILED, "Lease expired on every attempt", now, LEASED, now, self.max_attempts),
+            )
+            rows = db.execute(
+                "SELECT id, request, attempts FROM jobs"
+                " WHERE state = ? OR (state = ? AND lease_expires < ?)"
+                " ORDER BY id LIMIT ?",
+                (QUEUED, LEASED, now, limit),
+            ).fetchall()
+            for job_id, _, attempts in rows:
+                if attempts:
+                    logger.info(f"Job {job_id} retried (attempt {attempts + 1})")
+                db.execute(
+                    "UPDATE jobs SET state = ?, attempts = attempts + 1, lease_owner = ?,"
+                    " lease_expires = ?, updated_at = ? WHERE id = ?",
+                    (LEASED, owner, now + self.visibility_timeout, now, job_id),
+                )
+        return [
+            Job(job_id, json.loads(request), attempts + 1) for job_id, request, attempts in rows
+        ]
+
+    def complete(self, job_id: int, owner: str, result: dict[str, Any]) -> bool:
+        """Record a leased job's result.
+
+        Returns:
+            False if the lease was lost (expired and taken by another worker)
+        """
+        return self._finish(job_id, owner, "?", (DONE, json.dumps(result, default=str), None))
+
+    def fail(self, job_id: int, owner: str, error: str, retry: bool = True) -> bool:
+        """Record a leased job's failure; requeue it unless out of attempts.
+
+        Args:
+            job_id: Job id
+            owner: Worker holding the lease
+            error: Error message
+            retry: False for permanent errors (e.g. invalid requests)
+
+        Returns:
+            False if the lease was lost (expired and taken by another worker)
+        """
+        max_attempts = self.max_attempts if retry else 0
+        return self._finish(
+            job_id,
+            owner,
+            "CASE WHEN attempts < ? THEN ? ELSE ? END",
+            (max_attempts, QUEUED, FAILED, None, error),
+        )
+
+    def renew(self, job_id: int, owner: str) -> bool:
+        """Extend a lease by the visibility timeout, counting from now.
+
+        Returns:
+            False if the lease was lost (expired and taken by another worker)
+        """
+        now = self._clock()
+        with self._transaction() as db:
+            cursor = db.execute(
+                "UPDATE jobs SET lease_expires = ?, updated_at = ?"
+                " WHERE id = ? AND state = ? AND lease_owner = ?",
+                (now + self.visibility_timeout, now, job_id, LEASED, owner),
+            )
+        return cursor.rowcount > 0
+
+    @contextmanager
+    def renewing(self, job_id: int, owner: str, interval: float | None = None) -> Iterator[None]:
+        """Renew a lease from a background thread while a block runs.
+
+        Args:
+            job_id: Job id
+            owner: Worker holding the lease
+            interval: Seconds between renewals (default: a third of the visibility timeout)
+        """
+        stop = threading.Event()
+
+        def renew() -> None:
+            try:
+                while not stop.wait(interval or self.visibility_timeout / 3):
+                    if not self.renew(job_id, owner):
+                        logger.warning(f"Lease on job {job_id} was lost; stopped renewing it")
+                        return
+                    logger.debug(f"Renewed lease on job {job_id}")
+            except sqlite3.Error as e:
+                logger.warning(f"Could not renew lease on job {job_id}: {e}")
+            finally:
+                self.close()
+
+        thread = threading.Thread(target=renew, name=f"lease-{job_id}", daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+
+    def _finish(self, job_id: int, owner: str, state_sql: str, values: tuple[Any, ...]) -> bool:
+        """End a lease if the owner still holds it, setting state, result and error."""
+        with self._transaction() as db:
+            cursor = db.execute(
+                f"UPDATE jobs SET state = {state_sql}, result = ?, error = ?,"
+                " lease_owner = NULL, lease_expires = NULL, updated_at = ?"
+                " WHERE id = ? AND state = ? AND lease_owner = ?",
+                (*values, self._clock(), job_id, LEASED, owner),
+            )
+        if cursor.rowcount == 0:
+            logger.warning(f"Lease on job {job_id} was lost; another worker owns it now")
+            return False
+        return True
+
+    def counts(self) -> dict[str, int]:
+        """Number of jobs per state (queued, leased, done, failed)."""
+        counts = dict.fromkeys((QUEUED, LEASED, DONE, FAILED), 0)
+        rows = self._connection().execute("SELECT state, COUNT(*) FROM jobs GROUP BY state")
+        counts.update(dict(rows.fetchall()))
+        return counts
+
+    def close(self) -> None:
+        """Close this thread's connection."""
+        db = getattr(self._local, "db", None)
+        if db is not None:
+            db.close()
+            self._local.db = None
@@ -0,0 +1,156 @@
+"""Background image writer with optional fsync.
+
+save_image() already writes each image atomically: to a temporary sibling
+that is renamed into place, so readers never see a half-written file and a
+crash leaves no truncated image at the output path. On a slow network
+filesystem that write can still take seconds, and a request thread that
+waits for it is a thread not making API calls.
+
+An ImageWriter moves the writes to a background I/O thread. A request
+thread hashes the image, puts it on a bounded queue and returns; it only
+waits when the queue is full, which keeps the images waiting to be written
+(and their memory) bounded. The I/O thread writes them in order through
+save_image(). With fsync, each file and its rename are flushed to disk
+before the write counts as done.
+
+Because a request's result is returned before its file is written, a
+write can fail after the result was reported. Failures are logged and kept
+in ImageWriter.failed, and close() waits for every queued write, so
+commands can report them before exiting. Code that needs a file right away
+(e.g. to copy it) calls wait() first.
+
+Note: This code was generated with assistance from AI coding tools
+and has been reviewed and tested by a human.
+"""
+
+import hashlib
+import logging
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Any, Protocol
+
+from gemini_nano_banana_tool.core.metrics import Metrics
+from gemini_nano_banana_tool.utils import save_image
+
+logger = logging.getLogger(__name__)
+
+
+class ImageSink(Protocol):
+    """Writes generated images for generate_image(): an ImageWriter or a PostProcessor."""
+
+    def save(self, data: bytes, output_path: str) -> dict[str, Any]:
+        """Write an image and return its "postprocess" result entry."""
+        ...
+
+
+class ImageWriter:
+    """Writes images atomically, optionally fsync'd, on a background I/O thread.
+
+    Example:
+        >>> with ImageWriter(queue_size=16, fsync=True) as writer:
+        ...     generate_image(client, "A cat", "cat.png", postprocessor=writer)
+    """
+
+    def __init__(self, queue_size: int = 0, fsync: bool = False, metrics: Metrics | None = None):
+        """Create a writer, starting its I/O thread if it has a queue.
+
+        Args:
+            queue_size: Images that may wait to be written; 0 writes in the
+                calling thread instead of a background thread
+            fsync: Flush each file and its rename to disk
+            metrics: Metrics to record writes, failures and queue waits in
+        """
+        self.queue_size = queue_size
+        self.fsync = fsync
+        self.metrics = metrics or Metrics()
+        self.failed: list[str] = []
+        self._lock = threading.Lock()
+        self._pending: dict[str, Future[None]] = {}
+        self._queue: queue.Queue[tuple[bytes | memoryview, str, Future[None]] | None] | None = None
+        self._thread: threading.Thread | None = None
+        if queue_size > 0:
+            self._queue = queue.Queue(maxsize=queue_size)
+            self._thread = threading.Thread(target=self._run, name="image-writer", daemon=True)
+            self._thread.start()
+
+    def save(self, data: bytes | memoryview, output_path: str) -> dict[str, Any]:
+        """Write an image, or queue it for the I/O thread.
+
+        Args:
+            data: Encoded image
+            output_path: Output file path
+
+        Returns:
+            dict with the image's "sha256" and "size"
+
+        Raises:
+            ValidationError: If the write fails (in the calling thread only)
+        """
+        info = {"sha256": hashlib.sha256(data).hexdigest(), "size": len(data)}
+        if self._queue is None:
+            save_image(data, output_path, fsync=self.fsync)
+            self.metrics.count("writer.written")
+            return info
+
+        done: Future[None] = Future()
+        with self._lock:
+            self._pending[output_path] = done
+        item = (data, output_path, done)
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.metrics.count("writer.queue_full_waits")
+            logger.debug(f"Write queue full, waiting to queue {output_path}")
+            self._queue.put(item)
+        return info
+
+    def wait(self, output_path: str) -> None:
+        """Wait until a queued image has been written.
+
+        Raises:
+            ValidationError: If its write failed
+        """
+        done = self.pending(output_path)
+        if done is not None:
+            done.result()
+
+    def pending(self, output_path: str) -> Future[None] | None:
+        """Return the future of an image's queued write, or None once it is written."""
+        with self._lock:
+            return self._pending.get(output_path)
+
+    def close(self) -> None:
+        """Write every queued image and stop the I/O thread."""
+        if self._queue is None or self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._queue = None
+        if self.failed:
+            logger.error(f"{len(self.failed)} image(s) could not be written")
+
+    def __enter__(self) -> ImageWriter:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def _run(self) -> None:
+        """Write queued images in order until close() queues the stop marker."""
+        assert self._queue is not None
+        while (item := self._queue.get()) is not None:
+            data, output_path, done = item
+            try:
+                save_image(data, output_path, fsync=self.fsync)
+            except Exception as e:
+                # save_image() has logged it; keep the thread draining the queue
+                self.failed.append(output_path)
+                self.metrics.count("writer.failed")
+                done.set_exception(e)
+            else:
+                self.metrics.count("writer.written")
+                done.set_result(None)
+            with self._lock:
+                if self._pending.get(output_path) is done:
+                    del self._pending[output_path]
@@ -6,7 +6,9 @@ and has been reviewed and tested by a human.
 
 import logging
 import os
+import shutil
 import sys
+import threading
 from pathlib import Path
 
 from gemini_nano_banana_tool.core.models import (
@@ -249,12 +251,21 @@ def validate_resolution(resolution: str | None, model: str) -> None:
         )
 
 
-def save_image(image_data: bytes, output_path: str) -> None:
+def save_image(image_data: bytes | memoryview, output_path: str, fsync: bool = False) -> None:
     """Save image bytes to file.
 
+    The bytes are written to a temporary file next to output_path and renamed
+    into place, so an interrupted or cancelled write never leaves a truncated
+    image at output_path. They are written straight from the caller's buffer
+    with os.write (one call for a regular file), without a copy through a
+    buffered file object. Parent directories are created the first time a
+    directory is written to and remembered, not checked on every write.
+
     Args:
-        image_data: Image data as bytes
+        image_data: Image data as bytes, or a memoryview over them
         output_path: Output file path
+        fsync: Flush the file and the rename to disk before returning, so the
+            image survives a power loss or host crash (slower)
 
     Raises:
         ValidationError: If save fails
@@ -264,16 +275,28 @@ def save_image(image_data: bytes, output_path: str) -> None:
     """
     try:
         logger.debug(f"Saving image to: {output_path}")
-        # Ensure parent directory exists
         output_file = Path(output_path)
-        if not output_file.parent.exists():
-            logger.debug(f"Creating parent directory: {output_file.parent}")
-            output_file.parent.mkdir(parents=True, exist_ok=True)
+        _ensure_dir(output_file.parent)
 
-        # Write image data
+        # Write image data to a temporary sibling, then rename it into place
         logger.debug(f"Writing {len(image_data)} bytes to file")
-        with open(output_path, "wb") as f:
-            f.write(image_data)
+        tmp_path = output_file.with_name(
+            f".{output_file.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+        )
+        try:
+            try:
+                _write_all(tmp_path, image_data, fsync)
+            except FileNotFoundError:
+                # The directory was removed since it was remembered
+                _known_dirs.discard(output_file.parent)
+                _ensure_dir(output_file.parent)
+                _write_all(tmp_path, image_data, fsync)
+            os.replace(tmp_path, output_path)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        if fsync:
+            _fsync_dir(output_file.parent)
         logger.debug(f"Image saved successfully to: {output_path}")
     except PermissionError:
         logger.error(f"Permission denied writing to: {output_path}")
@@ -287,6 +310,82 @@ def save_image(image_data: bytes, output_path: str) -> None:
         raise ValidationError(f"Failed to save image to {output_path}: {e}")
 
 
+# Directories save_image() has created or found, so each is only checked once
+_known_dirs: set[Path] = set()
+
+
+def _ensure_dir(directory: Path) -> None:
+    """Create a directory (and its parents) unless it was seen before."""
+    if directory in _known_dirs:
+        return
+    if not directory.exists():
+        logger.debug(f"Creating parent directory: {directory}")
+        directory.mkdir(parents=True, exist_ok=True)
+    _known_dirs.add(directory)
+
+
+def _write_all(path: Path, data: bytes | memoryview, fsync: bool = False) -> None:
+    """Create or truncate a file and write a buffer to it without copying."""
+    view = memoryview(data).cast("B")
+    flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+    fd = os.open(path, flags, 0o666)
+    try:
+        written = 0
+        # os.write may write less than asked (pipes, some network filesystems)
+        while written < len(view):
+            written += os.write(fd, view[written:])
+        if fsync:
+            os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _fsync_dir(directory: Path) -> None:
+    """Flush a directory's entries (e.g. a rename) to disk, where directories can be opened."""
+    if not hasattr(os, "O_DIRECTORY"):
+        # Windows can't open a directory to fsync it
+        return
+    fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def link_or_copy(source: str, target: str) -> str:
+    """Make target a hardlink of source, or a copy where links aren't supported.
+
+    The link or copy is created next to target and renamed into place, so
+    target is never seen half-written.
+
+    Args:
+        source: Existing file
+        target: Path to create or replace
+
+    Returns:
+        "link", "copy" or "same" (target is source)
+    """
+    if os.path.abspath(source) == os.path.abspath(target):
+        return "same"
+    target_file = Path(target)
+    target_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = target_file.with_name(
+        f".{target_file.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+    )
+    try:
+        try:
+            os.link(source, tmp_path)
+            method = "link"
+        except OSError:
+            shutil.copyfile(source, tmp_path)
+            method = "copy"
+        os.replace(tmp_path, target)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    return method
+
+
 def format_resolution(aspect_ratio: str) -> str:
     """Format resolution string from aspect ratio.
 
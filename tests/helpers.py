@@ -0,0 +1,25 @@
+"""Shared test helpers: a fake clock and canned API responses.
+
+Note: This code was generated with assistance from AI coding tools
+and has been reviewed and tested by a human.
+"""
+
+from google.genai import types
+
+
+class FakeClock:
+    """Manually advanced clock, for injecting as a monotonic or wall clock."""
+
+    def __init__(self, now: float = 0.0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def image_response(data: bytes = b"png") -> types.GenerateContentResponse:
+    """Build a response carrying one inline PNG image."""
+    part = types.Part(inline_data=types.Blob(mime_type="image/png", data=data))
+    return types.GenerateContentResponse(
+        candidates=[types.Candidate(content=types.Content(role="model", parts=[part]))]
+    )
@@ -0,0 +1,258 @@
+"""Tests for the generate-batch command and Gemini Batch API mode.
+
+Note: This code was generated with assistance from AI coding tools
+and has been reviewed and tested by a human.
+"""
+
+import json
+from pathlib import Path
+from typing import Any
+from unittest.mock import Mock, patch
+
+import pytest
+from click.testing import CliRunner
+from google.genai import types
+
+from gemini_nano_banana_tool.cli import main
+from gemini_nano_banana_tool.core.batch import BatchError, load_manifest
+from gemini_nano_banana_tool.core.batch_api import run_batch_job
+
+IMAGE_BYTES = b"\x89PNG\r\n\x1a\nbatch-image"
+
+
+def _image_response() -> types.GenerateContentResponse:
+    """Build a response carrying one inline image."""
+    return types.GenerateContentResponse(
+        candidates=[
+            types.Candidate(
+                content=types.Content(
+                    role="model",
+                    parts=[
+                        types.Part(inline_data=types.Blob(mime_type="image/png", data=IMAGE_BYTES))
+                    ],
+                )
+            )
+        ],
+        usage_metadata=types.GenerateContentResponseUsageMetadata(total_token_count=1290),
+    )
+
+
+def _job(state: str, responses: list[types.InlinedResponse] | None = None) -> types.BatchJob:
+    """Build a batch job in the given state, optionally with inline responses."""
+    dest = types.BatchJobDestination(inlined_responses=responses) if responses else None
+    return types.BatchJob(name="batches/job-1", state=types.JobState(state), dest=dest)
+
+
+def _requests(tmp_path: Path, count: int) -> list[dict[str, Any]]:
+    """Build resolved requests writing into tmp_path."""
+    return [
+        {
+            "id": f"r{i}",
+            "prompt": f"image {i}",
+            "output": str(tmp_path / f"image-{i}.png"),
+            "images": [],
+            "aspect_ratio": "1:1",
+            "model": "gemini-2.5-flash-image",
+            "resolution": None,
+        }
+        for i in range(count)
+    ]
+
+
+def test_submits_inline_job_polls_with_backoff_and_writes_images(tmp_path: Path) -> None:
+    """Test one inline job per model, backoff between polls and parallel decoding."""
+    client = Mock()
+    done = _job(
+        "JOB_STATE_SUCCEEDED",
+        [
+            types.InlinedResponse(response=_image_response()),
+            types.InlinedResponse(error=types.JobError(code=400, message="blocked")),
+        ],
+    )
+    client.batches.create.return_value = _job("JOB_STATE_PENDING")
+    client.batches.get.side_effect = [
+        _job("JOB_STATE_RUNNING"),
+        _job("JOB_STATE_RUNNING"),
+        done,
+        done,
+    ]
+    sleeps: list[float] = []
+
+    records = run_batch_job(
+        client,
+        _requests(tmp_path, 2),
+        state_path=str(tmp_path / "state.json"),
+        poll_interval=10,
+        max_poll_interval=15,
+        sleep=sleeps.append,
+    )
+
+    assert client.batches.create.call_count == 1
+    src = client.batches.create.call_args.kwargs["src"]
+    assert [r.metadata for r in src] == [{"key": "r0"}, {"key": "r1"}]
+    assert src[0].config.image_config.aspect_ratio == "1:1"
+    assert sleeps == [10, 15]
+
+    assert records[0]["status"] == "ok"
+    assert records[0]["metadata"]["batch"] is True
+    assert (tmp_path / "image-0.png").read_bytes() == IMAGE_BYTES
+    assert records[1] == {"id": "r1", "status": "error", "error": "blocked (code 400)"}
+
+
+def test_resumes_from_state_without_resubmitting(tmp_path: Path) -> None:
+    """Test that a rerun polls the saved job and skips images already written."""
+    state_path = str(tmp_path / "state.json")
+    requests = _requests(tmp_path, 2)
+    client = Mock()
+    client.batches.create.return_value = _job("JOB_STATE_PENDING")
+    client.batches.get.side_effect = KeyboardInterrupt
+    with pytest.raises(KeyboardInterrupt):
+        run_batch_job(client, requests, state_path=state_path, sleep=lambda _: None)
+
+    done = _job(
+        "JOB_STATE_SUCCEEDED",
+        [types.InlinedResponse(response=_image_response())] * 2,
+    )
+    resumed = Mock()
+    resumed.batches.get.return_value = done
+    first = run_batch_job(resumed, requests, state_path=state_path, sleep=lambda _: None)
+    again = Mock()
+    second = run_batch_job(again, requests, state_path=state_path, sleep=lambda _: None)
+
+    resumed.batches.create.assert_not_called()
+    again.batches.create.assert_not_called()
+    again.batches.get.assert_not_called()
+    assert [r["status"] for r in first] == ["ok", "ok"]
+    assert second == first
+
+
+def test_failed_jobs_are_resubmitted_on_rerun(tmp_path: Path) -> None:
+    """Test that requests of a failed job are reported but not saved, so a rerun retries them."""
+    state_path = str(tmp_path / "state.json")
+    requests = _requests(tmp_path, 1)
+    client = Mock()
+    client.batches.create.return_value = _job("JOB_STATE_PENDING")
+    client.batches.get.return_value = _job("JOB_STATE_FAILED")
+    first = run_batch_job(client, requests, state_path=state_path, sleep=lambda _: None)
+    assert first[0]["status"] == "error" and "JOB_STATE_FAILED" in first[0]["error"]
+
+    retry = Mock()
+    retry.batches.create.return_value = _job("JOB_STATE_PENDING")
+    retry.batches.get.return_value = _job(
+        "JOB_STATE_SUCCEEDED", [types.InlinedResponse(response=_image_response())]
+    )
+    second = run_batch_job(retry, requests, state_path=state_path, sleep=lambda _: None)
+
+    assert retry.batches.create.call_count == 1
+    assert second[0]["status"] == "ok"
+    assert len(json.loads(Path(state_path).read_text())["jobs"]) == 1
+
+
+def test_rejects_state_of_another_manifest_and_imagen(tmp_path: Path) -> None:
+    """Test that mismatched state files and Imagen requests are refused."""
+    state_path = tmp_path / "state.json"
+    state_path.write_text(json.dumps({"keys": ["other"], "jobs": [], "results": {}}))
+    with pytest.raises(BatchError, match="different manifest"):
+        run_batch_job(Mock(), _requests(tmp_path, 1), state_path=str(state_path))
+
+    imagen = _requests(tmp_path, 1)
+    imagen[0]["model"] = "imagen-4.0-generate-001"
+    with pytest.raises(BatchError, match="Imagen"):
+        run_batch_job(Mock(), imagen, state_path=str(tmp_path / "other.json"))
+
+
+def test_large_jobs_use_uploaded_jsonl(tmp_path: Path) -> None:
+    """Test the JSONL file path for requests over the inline limit."""
+    uploaded: list[dict[str, Any]] = []
+
+    def upload(file: str, config: types.UploadFileConfig) -> types.File:
+        uploaded.extend(json.loads(line) for line in Path(file).read_text().splitlines())
+        return types.File(name="files/input")
+
+    response = _image_response().model_dump(mode="json", by_alias=True, exclude_none=True)
+    output = json.dumps({"key": "r0", "response": response}) + "\n"
+    client = Mock()
+    client.files.upload.side_effect = upload
+    client.files.download.return_value = output.encode()
+    client.batches.create.return_value = _job("JOB_STATE_PENDING")
+    client.batches.get.return_value = types.BatchJob(
+        name="batches/job-1",
+        state=types.JobState.JOB_STATE_SUCCEEDED,
+        dest=types.BatchJobDestination(file_name="files/output"),
+    )
+
+    with patch("gemini_nano_banana_tool.core.batch_api.INLINE_LIMIT_BYTES", 0):
+        records = run_batch_job(
+            client, _requests(tmp_path, 1), state_path=str(tmp_path / "state.json")
+        )
+
+    assert client.batches.create.call_args.kwargs["src"] == "files/input"
+    assert uploaded[0]["key"] == "r0"
+    assert uploaded[0]["request"]["contents"][0]["parts"][0]["text"] == "image 0"
+    assert uploaded[0]["request"]["generationConfig"]["imageConfig"]["aspectRatio"] == "1:1"
+    assert records[0]["status"] == "ok"
+    assert (tmp_path / "image-0.png").read_bytes() == IMAGE_BYTES
+
+
+def test_load_manifest_defaults_ids_and_rejects_duplicate_outputs(tmp_path: Path) -> None:
+    """Test manifest ids and duplicate output detection."""
+    manifest = tmp_path / "manifest.jsonl"
+    manifest.write_text('{"prompt": "a", "output": "a.png"}\n\n{"id": "b", "prompt": "b"}\n')
+    assert [row["id"] for row in load_manifest(str(manifest))] == [1, "b"]
+
+    manifest.write_text('{"prompt": "a", "output": "a.png"}\n{"prompt": "b", "output": "a.png"}\n')
+    with pytest.raises(BatchError, match="Duplicate output"):
+        load_manifest(str(manifest))
+
+
+def test_generate_batch_rejects_duplicates_in_both_modes(tmp_path: Path) -> None:
+    """Test that duplicate ids are refused before any request, streamed or not."""
+    manifest = tmp_path / "manifest.jsonl"
+    rows = [
+        {"id": "x", "prompt": "a cat", "output": str(tmp_path / "cat.png")},
+        "not a request",
+        {"id": "x", "prompt": "a dog", "output": str(tmp_path / "dog.png")},
+    ]
+    manifest.write_text("".join(json.dumps(row) + "\n" for row in rows))
+    client = Mock()
+    with patch(
+        "gemini_nano_banana_tool.commands.generate_batch_command.create_client",
+        return_value=client,
+    ):
+        interactive = CliRunner().invoke(main, ["generate-batch", str(manifest)])
+        rows.pop(1)
+        manifest.write_text("".join(json.dumps(row) + "\n" for row in rows))
+        batch = CliRunner().invoke(main, ["generate-batch", str(manifest), "--async-batch"])
+
+    for result in (interactive, batch):
+        assert result.exit_code == 1
+        assert "Duplicate id in manifest" in result.output
+    client.models.generate_content.assert_not_called()
+    client.batches.create.assert_not_called()
+
+
+def test_generate_batch_command_async_mode(tmp_path: Path) -> None:
+    """Test the CLI writes one record per manifest row, including invalid rows."""
+    manifest = tmp_path / "manifest.jsonl"
+    rows = [
+        {"id": "ok", "prompt": "a cat", "output": str(tmp_path / "cat.png")},
+        {"id": "bad", "prompt": "", "output": str(tmp_path / "bad.png")},
+    ]
+    manifest.write_text("".join(json.dumps(row) + "\n" for row in rows))
+    client = Mock()
+    client.batches.create.return_value = _job("JOB_STATE_PENDING")
+    client.batches.get.return_value = _job(
+        "JOB_STATE_SUCCEEDED", [types.InlinedResponse(response=_image_response())]
+    )
+
+    with patch(
+        "gemini_nano_banana_tool.commands.generate_batch_command.create_client",
+        return_value=client,
+    ):
+        result = CliRunner().invoke(main, ["generate-batch", str(manifest), "--async-batch"])
+
+    records = [json.loads(line) for line in result.output.splitlines()]
+    assert result.exit_code == 1
+    assert [(r["id"], r["status"]) for r in records] == [("ok", "ok"), ("bad", "error")]
+    assert (tmp_path / "cat.png").exists()
+    assert (tmp_path / "manifest.jsonl.batch-state.json").exists()
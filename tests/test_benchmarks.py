@@ -0,0 +1,80 @@
+"""Tests for the offline benchmark harness and fake client.
+
+Note: This code was generated with assistance from AI coding tools
+and has been reviewed and tested by a human.
+"""
+
+from pathlib import Path
+from typing import Any
+
+import pytest
+from PIL import Image
+
+from benchmarks.fake_client import FakeClient, make_png
+from benchmarks.harness import baseline_caveats, build_report, find_regressions, metric
+from gemini_nano_banana_tool.core.generator import GenerationError, generate_image
+from gemini_nano_banana_tool.core.promptgen import generate_prompt
+
+
+def test_make_png_is_valid_and_sized(tmp_path: Path) -> None:
+    """Test that padded PNGs decode and reach the requested size."""
+    data = make_png(64 * 1024)
+    assert abs(len(data) - 64 * 1024) < 64
+    path = tmp_path / "padded.png"
+    path.write_bytes(data)
+    with Image.open(path) as img:
+        img.load()
+        assert img.size == (1, 1)
+
+
+def test_generate_image_with_fake_client(tmp_path: Path) -> None:
+    """Test that generate_image runs end-to-end against the fake client."""
+    client: Any = FakeClient(payload_size=10_000, total_token_count=1000)
+    output = tmp_path / "out.png"
+    result = generate_image(client, "A sunset", str(output))
+    assert output.read_bytes() == client.image_bytes
+    assert result["token_count"] == 1000
+    assert client.call_count == 1
+
+
+def test_generate_prompt_with_fake_client() -> None:
+    """Test that text-only requests get the canned text back."""
+    client: Any = FakeClient(text="Enhanced prompt")
+    result = generate_prompt(client, "wizard cat")
+    assert result["prompt"] == "Enhanced prompt"
+
+
+def test_fake_client_error_injection(tmp_path: Path) -> None:
+    """Test that injected errors surface as GenerationError."""
+    client: Any = FakeClient(error_rate=1.0)
+    with pytest.raises(GenerationError, match="503"):
+        generate_image(client, "A sunset", str(tmp_path / "out.png"))
+    assert client.error_count == 1
+
+
+def test_find_regressions_respects_direction_and_threshold() -> None:
+    """Test regression detection for lower- and higher-is-better metrics."""
+    baseline = build_report(
+        {"latency": metric(100.0, "us"), "throughput": metric(50.0, "images/s", "higher")}
+    )
+    ok = build_report(
+        {"latency": metric(110.0, "us"), "throughput": metric(45.0, "images/s", "higher")}
+    )
+    bad = build_report(
+        {"latency": metric(200.0, "us"), "throughput": metric(10.0, "images/s", "higher")}
+    )
+    assert find_regressions(ok, baseline, threshold=0.25) == []
+    regressions = find_regressions(bad, baseline, threshold=0.25)
+    assert len(regressions) == 2
+
+
+def test_baseline_caveats_flag_other_python_and_missing_metrics() -> None:
+    """Test that a baseline from another Python or without a metric is reported."""
+    current = build_report({"latency": metric(100.0, "us"), "write": metric(30.0, "ms")})
+    assert baseline_caveats(current, current) == []
+
+    stale = {**current, "python": "3.0.1", "metrics": {"latency": metric(100.0, "us")}}
+    caveats = baseline_caveats(current, stale)
+    assert len(caveats) == 2
+    assert "Python 3.0.1" in caveats[0]
+    assert caveats[1].endswith(": write")
@@ -0,0 +1,86 @@
+"""Tests for record/replay cassettes.
+
+Note: This code was generated with assistance from AI coding tools
+and has been reviewed and tested by a human.
+"""
+
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from benchmarks.fake_client import FakeClient
+from gemini_nano_banana_tool.core.cassette import (
+    Cassette,
+    CassetteClient,
+    CassetteError,
+    request_fingerprint,
+)
+from gemini_nano_banana_tool.core.client import GeminiClientError, create_client
+from gemini_nano_banana_tool.core.generator import GenerationError, generate_image
+from gemini_nano_banana_tool.core.promptgen import generate_prompt
+
+
+def test_record_then_replay_roundtrip(tmp_path: Path) -> None:
+    """Test that replayed responses reproduce recorded images and metadata."""
+    cassette_dir = str(tmp_path / "cassette")
+    upstream: Any = FakeClient(payload_size=5000, total_token_count=777)
+    recorder: Any = CassetteClient(Cassette(cassette_dir, "record"), upstream)
+    recorded = generate_image(recorder, "A sunset", str(tmp_path / "a.png"), aspect_ratio="16:9")
+    generate_image(recorder, "A sunset", str(tmp_path / "b.png"), model="imagen-4.0-generate-001")
+    generate_prompt(recorder, "wizard cat")
+    assert upstream.call_count == 3
+
+    replayer: Any = create_client(replay_dir=cassette_dir)
+    replayed = generate_image(replayer, "A sunset", str(tmp_path / "c.png"), aspect_ratio="16:9")
+    generate_image(replayer, "A sunset", str(tmp_path / "d.png"), model="imagen-4.0-generate-001")
+    assert (tmp_path / "c.png").read_bytes() == upstream.image_bytes
+    assert (tmp_path / "d.png").read_bytes() == upstream.image_bytes
+    assert replayed["token_count"] == recorded["token_count"] == 777
+    assert generate_prompt(replayer, "wizard cat")["prompt"] == upstream.text
+
+
+def test_blobs_are_content_addressed(tmp_path: Path) -> None:
+    """Test that identical image payloads are stored once."""
+    cassette_dir = tmp_path / "cassette"
+    recorder: Any = CassetteClient(Cassette(str(cassette_dir), "record"), FakeClient())
+    for i in range(3):
+        generate_image(recorder, f"Prompt {i}", str(tmp_path / f"{i}.png"))
+    assert len(list((cassette_dir / "blobs").iterdir())) == 1
+    assert len(Cassette(str(cassette_dir), "replay")) == 3
+
+
+def test_replay_miss_raises(tmp_path: Path) -> None:
+    """Test that an unrecorded request fails instead of calling the API."""
+    cassette_dir = str(tmp_path / "cassette")
+    recorder: Any = CassetteClient(Cassette(cassette_dir, "record"), FakeClient())
+    generate_image(recorder, "Recorded", str(tmp_path / "a.png"))
+    replayer: Any = create_client(replay_dir=cassette_dir)
+    with pytest.raises(GenerationError, match="No recorded response"):
+        generate_image(replayer, "Not recorded", str(tmp_path / "b.png"))
+
+
+def test_fingerprint_ignores_http_options_and_hashes_bytes() -> None:
+    """Test fingerprint stability for equivalent requests."""
+    from google.genai import types
+
+    part = types.Part(inline_data=types.Blob(mime_type="image/png", data=b"ref"))
+    plain = types.GenerateContentConfig(response_modalities=["IMAGE"])
+    timed = types.GenerateContentConfig(
+        response_modalities=["IMAGE"], http_options=types.HttpOptions(timeout=5000)
+    )
+    assert request_fingerprint("generate_content", "m", [part], plain) == request_fingerprint(
+        "generate_content", "m", [part], timed
+    )
+    other = types.Part(inline_data=types.Blob(mime_type="image/png", data=b"other"))
+    assert request_fingerprint("generate_content", "m", [part], plain) != request_fingerprint(
+        "generate_content", "m", [other], plain
+    )
+
+
+def test_create_client_cassette_arguments(tmp_path: Path) -> None:
+    """Test create_client validation of cassette options."""
+    with pytest.raises(GeminiClientError, match="not both"):
+        create_client(record_dir=str(tmp_path), replay_dir=str(tmp_path))
+    with pytest.raises(CassetteError, match="Cassette not found"):
+        create_client(replay_dir=str(tmp_path / "missing"))
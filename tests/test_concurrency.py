@@ -0,0 +1,154 @@
+"""Tests for adaptive (AIMD) concurrency control.
+
+Note: This code was generated with assistance from AI coding tools
+and has been reviewed and tested by a human.
+"""
+
+import asyncio
+import threading
+import time
+from pathlib import Path
+from typing import Any
+from unittest.mock import Mock
+
+import pytest
+from google.genai import errors, types
+
+from gemini_nano_banana_tool.core.concurrency import AdaptiveClient, AdaptiveLimiter
+from gemini_nano_banana_tool.core.deadline import Deadline
+from gemini_nano_banana_tool.core.generator import DeadlineExceededError, generate_image_async
+from tests.helpers import FakeClock, image_response
+
+
+def _throttled() -> errors.ClientError:
+    """Build a 429 API error."""
+    return errors.ClientError(429, {"error": {"code": 429, "message": "Resource exhausted"}})
+
+
+def test_limit_grows_additively_and_halves_once_per_throttle_burst() -> None:
+    """Test additive increase on healthy calls and one multiplicative cut per burst."""
+    clock = FakeClock()
+    limiter = AdaptiveLimiter(initial_limit=2, max_limit=8, clock=clock)
+    model = "m"
+
+    for _ in range(30):
+        started = limiter.acquire(model)
+        clock.now += 1
+        limiter.release(model, started)
+    assert limiter.limit(model) == 8
+    assert limiter.metrics.snapshot()["concurrency.limit.m"] == 8
+
+    # Three calls in flight get throttled: only the first cuts the limit
+    starts = [limiter.acquire(model) for _ in range(3)]
+    clock.now += 1
+    for started in starts:
+        limiter.release(model, started, _throttled())
+    assert limiter.limit(model) == 4
+    assert limiter.metrics.snapshot()["concurrency.throttled.m"] == 3
+
+    # Other errors (bad requests) leave the limit alone
+    started = limiter.acquire(model)
+    limiter.release(model, started, ValueError("bad prompt"))
+    assert limiter.limit(model) == 4
+
+
+def test_latency_spike_cuts_the_limit() -> None:
+    """Test that a call far slower than the model's baseline counts as congestion."""
+    clock = FakeClock()
+    limiter = AdaptiveLimiter(initial_limit=4, clock=clock)
+    for latency in (1.0, 1.0, 5.0):
+        started = limiter.acquire("m")
+        clock.now += latency
+        limiter.release("m", started)
+    assert limiter.limit("m") == 2
+    assert limiter.metrics.snapshot()["concurrency.latency_spikes.m"] == 1
+
+
+def test_client_calls_wait_for_a_slot() -> None:
+    """Test that threads calling through AdaptiveClient never exceed the model's limit."""
+    in_flight = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def generate_content(model: str, contents: Any, config: Any) -> str:
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        time.sleep(0.01)
+        with lock:
+            in_flight -= 1
+        return "response"
+
+    inner = Mock(spec=["models"])
+    inner.models.generate_content.side_effect = generate_content
+    client = AdaptiveClient(inner, AdaptiveLimiter(initial_limit=1, max_limit=1))
+    threads = [
+        threading.Thread(target=client.models.generate_content, args=("m", "c")) for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    assert inner.models.generate_content.call_count == 4
+    assert peak == 1
+    assert not hasattr(client, "aio")
+
+
+def test_waiting_calls_stop_at_the_deadline() -> None:
+    """Test that sync and async waiters give up when their deadline passes or is cancelled."""
+    limiter = AdaptiveLimiter(initial_limit=1, max_limit=1)
+    started = limiter.acquire("m")
+    deadline = Deadline()
+    threading.Timer(0.1, deadline.cancel).start()
+    with pytest.raises(DeadlineExceededError, match="cancelled"):
+        limiter.acquire("m", deadline)
+
+    async def wait_async() -> None:
+        with pytest.raises(DeadlineExceededError, match="deadline exceeded"):
+            await limiter.acquire_async("m", Deadline(0.2))
+
+    asyncio.run(wait_async())
+    limiter.release("m", started)
+    limiter.acquire("m", Deadline(1.0))
+    assert limiter.metrics.counters["concurrency.expired.m"] == 2
+
+
+def test_async_calls_are_limited(tmp_path: Path) -> None:
+    """Test that generate_image_async() tasks go through the limiter on the aio surface."""
+    in_flight = 0
+    peak = 0
+    response = image_response()
+
+    async def generate_content(**kwargs: Any) -> types.GenerateContentResponse:
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return response
+
+    inner = Mock()
+    inner.aio.models.generate_content.side_effect = generate_content
+    limiter = AdaptiveLimiter(initial_limit=1, max_limit=1)
+    client = AdaptiveClient(inner, limiter)
+
+    async def main() -> list[dict[str, Any]]:
+        return await asyncio.gather(
+            *(generate_image_async(client, "A cat", str(tmp_path / f"{i}.png")) for i in range(3))
+        )
+
+    results = asyncio.run(main())
+    assert peak == 1
+    assert [r["output_path"] for r in results] == [str(tmp_path / f"{i}.png") for i in range(3)]
+    inner.models.generate_content.assert_not_called()
+
+
+@pytest.mark.parametrize("code, cuts", [(503, True), (500, False)])
+def test_only_throttle_codes_cut(code: int, cuts: bool) -> None:
+    """Test that 503 cuts the limit like 429 while other server errors don't."""
+    limiter = AdaptiveLimiter(initial_limit=4, clock=FakeClock())
+    started = limiter.acquire("m")
+    limiter.release("m", started, errors.ServerError(code, {"error": {"code": code}}))
+    assert limiter.limit("m") == (2 if cuts else 4)
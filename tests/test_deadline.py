@@ -0,0 +1,144 @@
+"""Tests for per-request timeouts, run deadlines and cooperative cancellation.
+
+Note: This code was generated with assistance from AI coding tools
+and has been reviewed and tested by a human.
+"""
+
+import asyncio
+import io
+import json
+from pathlib import Path
+from typing import Any
+from unittest.mock import Mock
+
+import httpx
+import pytest
+from google.genai import types
+
+from gemini_nano_banana_tool.core.deadline import Deadline, timeout_http_options
+from gemini_nano_banana_tool.core.generator import (
+    DeadlineExceededError,
+    generate_image,
+    generate_image_async,
+)
+from gemini_nano_banana_tool.core.ndjson import run_ndjson_stream
+from gemini_nano_banana_tool.utils import save_image
+from tests.helpers import FakeClock, image_response
+
+
+def test_deadline_caps_request_timeout_and_cancels() -> None:
+    """Test remaining time, timeout capping, expiry and cancellation."""
+    clock = FakeClock()
+    deadline = Deadline(100, clock=clock)
+    assert deadline.timeout(300) == 100
+    clock.now = 90
+    assert deadline.timeout(300) == 10
+    assert deadline.timeout(5) == 5
+    clock.now = 120
+    assert deadline.expired
+    assert deadline.reason == "deadline exceeded"
+
+    unbounded = Deadline()
+    assert unbounded.timeout(None) is None
+    assert not unbounded.expired
+    unbounded.cancel()
+    assert unbounded.expired
+    assert unbounded.reason == "cancelled"
+
+    assert timeout_http_options(None) is None
+    assert timeout_http_options(0.0001).timeout == 1  # type: ignore[union-attr]
+
+
+def test_timeout_is_sent_to_sdk_and_mapped(tmp_path: Path) -> None:
+    """Test that the timeout reaches http_options and SDK timeouts map to DeadlineExceededError."""
+    output = tmp_path / "out.png"
+    client = Mock()
+    client.models.generate_content.return_value = image_response()
+
+    generate_image(client, "A cat", str(output), timeout=12.5)
+    config = client.models.generate_content.call_args.kwargs["config"]
+    assert config.http_options.timeout == 12500
+    assert output.read_bytes() == b"png"
+
+    client.models.generate_content.side_effect = httpx.ReadTimeout("stuck")
+    with pytest.raises(DeadlineExceededError, match="timed out after 12s"):
+        generate_image(client, "A cat", str(tmp_path / "slow.png"), timeout=12)
+    assert not (tmp_path / "slow.png").exists()
+
+
+def test_expired_or_cancelled_deadline_writes_nothing(tmp_path: Path) -> None:
+    """Test that no request is sent after expiry and no output after cancellation."""
+    client = Mock()
+    expired = Deadline(0)
+    with pytest.raises(DeadlineExceededError, match="deadline exceeded"):
+        generate_image(client, "A cat", str(tmp_path / "a.png"), deadline=expired)
+    client.models.generate_content.assert_not_called()
+
+    deadline = Deadline()
+
+    def cancel_during_call(**kwargs: Any) -> types.GenerateContentResponse:
+        deadline.cancel()
+        return image_response()
+
+    client.models.generate_content.side_effect = cancel_during_call
+    with pytest.raises(DeadlineExceededError, match="cancelled"):
+        generate_image(client, "A cat", str(tmp_path / "b.png"), deadline=deadline)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_async_path_times_out_stuck_call(tmp_path: Path) -> None:
+    """Test that generate_image_async abandons a call that never returns."""
+
+    async def stuck(**kwargs: Any) -> types.GenerateContentResponse:
+        await asyncio.sleep(60)
+        return image_response()
+
+    async def fast(**kwargs: Any) -> types.GenerateContentResponse:
+        return image_response()
+
+    client = Mock()
+    client.aio.models.generate_content.side_effect = stuck
+    with pytest.raises(DeadlineExceededError):
+        asyncio.run(generate_image_async(client, "A cat", str(tmp_path / "a.png"), timeout=0.05))
+    assert not (tmp_path / "a.png").exists()
+
+    client.aio.models.generate_content.side_effect = fast
+    result = asyncio.run(generate_image_async(client, "A cat", str(tmp_path / "b.png"), timeout=5))
+    assert result["output_path"] == str(tmp_path / "b.png")
+    assert (tmp_path / "b.png").read_bytes() == b"png"
+    client.models.generate_content.assert_not_called()
+
+
+def test_ndjson_stream_fails_requests_after_deadline() -> None:
+    """Test that requests not started before the deadline fail without running."""
+    deadline = Deadline()
+    handled: list[str] = []
+    lines = io.StringIO("".join(json.dumps({"id": str(i)}) + "\n" for i in range(3)))
+
+    def handler(request: dict[str, Any]) -> dict[str, Any]:
+        handled.append(request["id"])
+        deadline.cancel()
+        return {}
+
+    output: list[str] = []
+    counts = run_ndjson_stream(lines, handler, output.append, concurrency=1, deadline=deadline)
+
+    assert handled == ["0"]
+    assert counts == {"total": 3, "succeeded": 1, "failed": 2}
+    errors = [json.loads(line) for line in output if '"error"' in line]
+    assert all("cancelled" in record["error"] for record in errors)
+
+
+def test_save_image_is_atomic(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that a failed write keeps the previous file and leaves no temp file."""
+    output = tmp_path / "img.png"
+    save_image(b"old", str(output))
+
+    def fail_replace(src: Any, dst: Any) -> None:
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr("gemini_nano_banana_tool.utils.os.replace", fail_replace)
+    with pytest.raises(KeyboardInterrupt):
+        save_image(b"new", str(output))
+    assert output.read_bytes() == b"old"
+    assert [p.name for p in tmp_path.iterdir()] == ["img.png"]
@@ -0,0 +1,133 @@
+"""Tests for per-model circuit breakers and automatic model fallback.
+
+Note: This code was generated with assistance from AI coding tools
+and has been reviewed and tested by a human.
+"""
+
+from pathlib import Path
+from typing import Any
+from unittest.mock import Mock
+
+import pytest
+from google.genai import errors
+
+from gemini_nano_banana_tool.core.circuit_breaker import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    is_overload_error,
+)
+from gemini_nano_banana_tool.core.fallback import ModelRouter, adapt_request
+from gemini_nano_banana_tool.core.generator import GenerationError
+from tests.helpers import FakeClock, image_response
+
+PRO = "gemini-3-pro-image-preview"
+FLASH = "gemini-2.5-flash-image"
+IMAGEN_FAST = "imagen-4.0-fast-generate-001"
+
+
+def _overloaded() -> errors.ServerError:
+    """Build a 503 API error."""
+    return errors.ServerError(503, {"error": {"code": 503, "status": "UNAVAILABLE"}})
+
+
+def _client(overloaded_models: set[str]) -> Mock:
+    """Build a client whose generate_content fails for the given models."""
+
+    def generate_content(model: str, contents: Any, config: Any) -> Any:
+        if model in overloaded_models:
+            raise _overloaded()
+        return image_response()
+
+    client = Mock()
+    client.models.generate_content.side_effect = generate_content
+    return client
+
+
+def test_breaker_opens_probes_and_closes() -> None:
+    """Test closed → open on error rate, half-open single probe, then closed."""
+    clock = FakeClock()
+    breaker = CircuitBreaker("pro", min_requests=4, open_seconds=30, clock=clock)
+
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow_request()
+
+    clock.now = 30
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+    clock.now = 60
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.allow_request()
+
+
+def test_overload_classification() -> None:
+    """Test that only 429/5xx and timeouts count as overload."""
+    assert not is_overload_error(GenerationError("no cause"))
+    wrapped = GenerationError("failed")
+    wrapped.__cause__ = _overloaded()
+    assert is_overload_error(wrapped)
+    assert is_overload_error(TimeoutError())
+    assert not is_overload_error(errors.ClientError(400, {"error": {"code": 400}}))
+
+
+def test_adapt_request_rewrites_unsupported_parameters() -> None:
+    """Test resolution dropping, reference trimming and Imagen skipping."""
+    images = [f"ref{i}.png" for i in range(5)]
+    assert adapt_request(FLASH, images, "1:1", "4K") == (
+        images[:3],
+        None,
+        ["reference images trimmed from 5 to 3", "resolution 4K dropped"],
+    )
+    assert adapt_request(PRO, images, "1:1", "4K") == (images, "4K", [])
+    assert adapt_request(IMAGEN_FAST, images, "1:1", None) is None
+    assert adapt_request(IMAGEN_FAST, None, "21:9", None) is None
+
+
+def test_router_falls_back_while_circuit_is_open(tmp_path: Path) -> None:
+    """Test fallback on overload, skipping an open circuit, and served_by_model."""
+    router = ModelRouter(min_requests=1, open_seconds=60)
+    client = _client({PRO})
+    output = str(tmp_path / "out.png")
+
+    result = router.generate_image(client, "a cat", output, model=PRO, resolution="2K")
+
+    assert result["requested_model"] == PRO
+    assert result["served_by_model"] == FLASH
+    assert result["fallback_rewrites"] == ["resolution 2K dropped"]
+    assert router.breaker(PRO).state == OPEN
+
+    client.models.generate_content.reset_mock()
+    result = router.generate_image(client, "a dog", output, model=PRO)
+    assert result["served_by_model"] == FLASH
+    assert [c.kwargs["model"] for c in client.models.generate_content.call_args_list] == [FLASH]
+
+
+def test_router_raises_non_overload_errors_and_exhausted_chains(tmp_path: Path) -> None:
+    """Test that bad requests aren't retried elsewhere and an exhausted chain raises."""
+    client = Mock()
+    client.models.generate_content.side_effect = errors.ClientError(
+        400, {"error": {"code": 400, "message": "bad prompt"}}
+    )
+    router = ModelRouter(min_requests=1)
+    with pytest.raises(GenerationError, match="bad prompt"):
+        router.generate_image(client, "x", str(tmp_path / "a.png"), model=PRO)
+    assert client.models.generate_content.call_count == 1
+    assert router.breaker(PRO).state == CLOSED
+
+    router = ModelRouter(chains={PRO: [FLASH]}, min_requests=1)
+    with pytest.raises(GenerationError, match="503"):
+        router.generate_image(_client({PRO, FLASH}), "x", str(tmp_path / "b.png"), model=PRO)
+    with pytest.raises(GenerationError, match="No model available"):
+        router.generate_image(_client(set()), "x", str(tmp_path / "c.png"), model=PRO)
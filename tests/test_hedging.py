@@ -0,0 +1,93 @@
+"""Tests for hedged requests.
+
+Note: This code was generated with assistance from AI coding tools
+and has been reviewed and tested by a human.
+"""
+
+import threading
+from typing import Any
+from unittest.mock import Mock
+
+import pytest
+
+from gemini_nano_banana_tool.core.hedging import HedgedClient, LatencyWindow
+from gemini_nano_banana_tool.core.metrics import Metrics
+
+
+def _client(delays: list[float], results: list[Any]) -> Mock:
+    """Build a client whose successive calls block for the given delays."""
+    calls = iter(zip(delays, results, strict=True))
+    lock = threading.Lock()
+
+    def generate_content(model: str, contents: Any, config: Any) -> Any:
+        with lock:
+            delay, result = next(calls)
+        threading.Event().wait(delay)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    client = Mock()
+    client.models.generate_content.side_effect = generate_content
+    return client
+
+
+def _warm(client: HedgedClient, model: str, seconds: float, samples: int) -> None:
+    """Fill a model's latency window."""
+    for _ in range(samples):
+        client.window(model).add(seconds)
+
+
+def test_latency_window_percentile() -> None:
+    """Test nearest-rank percentiles over the rolling window."""
+    window = LatencyWindow(size=20)
+    assert window.percentile(0.95) is None
+    for i in range(1, 41):
+        window.add(float(i))
+    assert len(window) == 20
+    assert window.percentile(0.95) == 39.0
+    assert window.percentile(0.5) == 30.0
+
+
+def test_slow_call_is_hedged_and_hedge_wins() -> None:
+    """Test that a call past the p95 fires a hedge whose result is returned."""
+    inner = _client([1.0, 0.0], ["slow", "fast"])
+    client = HedgedClient(inner, max_hedge_ratio=1.0, min_samples=5, min_delay_seconds=0.0)
+    _warm(client, "m", 0.05, 5)
+
+    assert client.models.generate_content(model="m", contents="x") == "fast"
+    assert inner.models.generate_content.call_count == 2
+    assert client.metrics.snapshot() == {"hedge.fired": 1, "hedge.requests": 1, "hedge.won": 1}
+
+
+def test_no_hedge_before_warm_up_or_over_budget() -> None:
+    """Test the warm-up threshold and the spend cap on hedges."""
+    metrics = Metrics()
+    inner = _client([0.2, 0.2], ["a", "b"])
+    client = HedgedClient(
+        inner, max_hedge_ratio=0.5, min_samples=3, min_delay_seconds=0.0, metrics=metrics
+    )
+
+    assert client.models.generate_content(model="m", contents="x") == "a"
+    assert client.hedge_delay("m") is None
+
+    _warm(client, "m", 0.01, 20)
+    client.max_hedges = 0
+    assert client.models.generate_content(model="m", contents="x") == "b"
+    assert inner.models.generate_content.call_count == 2
+    assert metrics.counters["hedge.skipped_budget"] == 1
+    assert metrics.counters["hedge.fired"] == 0
+
+
+def test_failed_primary_falls_back_to_hedge_and_both_failing_raises() -> None:
+    """Test that the first success wins and the primary error surfaces otherwise."""
+    inner = _client([0.3, 0.0], [RuntimeError("primary"), "hedge"])
+    client = HedgedClient(inner, max_hedge_ratio=1.0, min_samples=1, min_delay_seconds=0.0)
+    _warm(client, "m", 0.01, 1)
+    assert client.models.generate_content(model="m", contents="x") == "hedge"
+
+    inner = _client([0.3, 0.0], [RuntimeError("primary"), RuntimeError("hedge")])
+    client = HedgedClient(inner, max_hedge_ratio=1.0, min_samples=1, min_delay_seconds=0.0)
+    _warm(client, "m", 0.01, 1)
+    with pytest.raises(RuntimeError, match="primary"):
+        client.models.generate_content(model="m", contents="x")
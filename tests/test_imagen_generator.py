@@ -4,9 +4,11 @@ Note: This code was generated with assistance from AI coding tools
 and has been reviewed and tested by a human.
 """
 
+from pathlib import Path
 from unittest.mock import Mock, patch
 
 import pytest
+from google.genai import types
 
 from gemini_nano_banana_tool.core.generator import GenerationError, generate_image
 from gemini_nano_banana_tool.core.models import is_imagen_model
@@ -147,6 +149,27 @@ class TestImagenGeneration:
         assert call_args.kwargs["config"].image_size == "2K"
         assert result["resolution_quality"] == "2K"
 
+    def test_generate_with_imagen_writes_sdk_bytes(self, tmp_path: Path) -> None:
+        """Test that Imagen bytes are written atomically, not through Image.save()."""
+        image = types.Image(image_bytes=b"imagen png", mime_type="image/png")
+        mock_client = Mock()
+        mock_client.models.generate_images.return_value = types.GenerateImagesResponse(
+            generated_images=[types.GeneratedImage(image=image)]
+        )
+        output = tmp_path / "out" / "imagen.png"
+
+        with patch.object(types.Image, "save") as sdk_save:
+            generate_image(
+                client=mock_client,
+                prompt="A sunset",
+                output_path=str(output),
+                model="imagen-4.0-generate-001",
+            )
+
+        sdk_save.assert_not_called()
+        assert output.read_bytes() == b"imagen png"
+        assert [p.name for p in output.parent.iterdir()] == ["imagen.png"]
+
     def test_generate_with_imagen_no_images_returned(self) -> None:
         """Test error handling when no images returned."""
         # Mock client with empty response
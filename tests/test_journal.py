@@ -0,0 +1,157 @@
+"""Tests for the checkpoint journal and resumable generate-batch runs.
+
+Note: This code was generated with assistance from AI coding tools
+and has been reviewed and tested by a human.
+"""
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Any
+from unittest.mock import Mock, patch
+
+import pytest
+from click.testing import CliRunner
+
+from gemini_nano_banana_tool.cli import main
+from gemini_nano_banana_tool.core.journal import Journal, request_hash
+from tests.helpers import image_response
+
+
+def _request(tmp_path: Path, name: str, prompt: str = "a cat") -> dict[str, Any]:
+    """Build a resolved request writing into tmp_path."""
+    return {
+        "prompt": prompt,
+        "output": str(tmp_path / f"{name}.png"),
+        "images": [],
+        "aspect_ratio": "1:1",
+        "model": "gemini-2.5-flash-image",
+        "resolution": None,
+    }
+
+
+def _write(request: dict[str, Any]) -> dict[str, Any]:
+    """Stand-in generator: write the output and return a result."""
+    Path(request["output"]).write_bytes(b"image")
+    return {"output_path": request["output"]}
+
+
+def test_completed_requests_are_skipped_after_reload(tmp_path: Path) -> None:
+    """Test that a reloaded journal skips ok requests and records hashes and status."""
+    path = str(tmp_path / "journal.jsonl")
+    done = _request(tmp_path, "done")
+    failed = _request(tmp_path, "failed")
+    with Journal(path) as journal:
+        journal.run(done, _write)
+        with pytest.raises(RuntimeError):
+            journal.run(failed, Mock(side_effect=RuntimeError("boom")))
+
+    entries = [json.loads(line) for line in Path(path).read_text().splitlines()]
+    assert [e["status"] for e in entries] == ["ok", "error"]
+    assert entries[0]["request_hash"] == request_hash(done)
+    assert entries[0]["sha256"] == hashlib.sha256(b"image").hexdigest()
+
+    fn = Mock(side_effect=_write)
+    with Journal(path) as journal:
+        assert journal.run(done, fn) == {"output_path": done["output"], "skipped": True}
+        journal.run(failed, fn)
+        assert journal.skipped == 1
+    assert fn.call_count == 1
+
+
+def test_missing_or_changed_requests_run_again(tmp_path: Path) -> None:
+    """Test that deleted outputs and edited requests aren't skipped."""
+    path = str(tmp_path / "journal.jsonl")
+    request = _request(tmp_path, "img")
+    with Journal(path) as journal:
+        journal.run(request, _write)
+
+    Path(request["output"]).unlink()
+    fn = Mock(side_effect=_write)
+    with Journal(path) as journal:
+        journal.run(request, fn)
+        journal.run({**request, "prompt": "a dog"}, fn)
+    assert fn.call_count == 2
+
+    # Reference images count by content: edited ones run again, renamed ones don't
+    reference = tmp_path / "ref.png"
+    reference.write_bytes(b"v1")
+    with_reference = {**request, "images": [str(reference)]}
+    renamed = tmp_path / "renamed.png"
+    renamed.write_bytes(b"v1")
+    with Journal(path) as journal:
+        journal.run(with_reference, fn)
+        reference.write_bytes(b"v2")
+        journal.run(with_reference, fn)
+        journal.run({**request, "images": [str(renamed)]}, fn)
+    assert fn.call_count == 4
+
+
+def test_truncated_last_entry_is_ignored(tmp_path: Path) -> None:
+    """Test that a line cut short by a crash doesn't break loading or appending."""
+    path = tmp_path / "journal.jsonl"
+    request = _request(tmp_path, "img")
+    with Journal(str(path)) as journal:
+        journal.run(request, _write)
+    with open(path, "a") as f:
+        f.write('{"request_hash": "abc", "stat')
+
+    with Journal(str(path)) as journal:
+        assert journal.completed(request_hash(request)) is not None
+        journal.run(_request(tmp_path, "other"), _write)
+    with Journal(str(path)) as journal:
+        assert len(journal.entries) == 2
+
+
+def test_incomplete_entries_are_ignored(tmp_path: Path) -> None:
+    """Test that entries missing the fields a skip relies on don't break loading."""
+    path = tmp_path / "journal.jsonl"
+    request = _request(tmp_path, "img")
+    key = request_hash(request)
+    _write(request)
+    lines = [
+        ["not", "an", "entry"],
+        {"request_hash": key},
+        {"request_hash": key, "status": "ok", "output": request["output"]},
+        {"request_hash": key, "status": "ok", "output": request["output"], "size": "5"},
+    ]
+    path.write_text("".join(json.dumps(line) + "\n" for line in lines))
+
+    fn = Mock(side_effect=_write)
+    with Journal(str(path)) as journal:
+        assert journal.entries == {}
+        journal.run(request, fn)
+    assert fn.call_count == 1
+
+
+def test_generate_batch_resumes_from_journal(tmp_path: Path) -> None:
+    """Test that rerunning a manifest only generates what didn't complete."""
+    manifest = tmp_path / "manifest.jsonl"
+    rows = [
+        {"id": str(i), "prompt": f"image {i}", "output": str(tmp_path / f"{i}.png")}
+        for i in range(3)
+    ]
+    manifest.write_text("".join(json.dumps(row) + "\n" for row in rows))
+    response = image_response()
+    client = Mock(spec=["models"])
+
+    def generate_content(model: str, contents: Any, config: Any) -> Any:
+        if "image 1" in str(contents) and client.models.generate_content.call_count <= 3:
+            raise RuntimeError("overloaded")
+        return response
+
+    client.models.generate_content.side_effect = generate_content
+    with patch(
+        "gemini_nano_banana_tool.commands.generate_batch_command.create_client",
+        return_value=client,
+    ):
+        first = CliRunner().invoke(main, ["generate-batch", str(manifest), "--concurrency", "1"])
+        second = CliRunner().invoke(main, ["generate-batch", str(manifest), "--concurrency", "1"])
+
+    assert first.exit_code == 1
+    assert second.exit_code == 0
+    assert client.models.generate_content.call_count == 4
+    records = {r["id"]: r for r in map(json.loads, second.output.splitlines())}
+    assert records["0"]["skipped"] and records["2"]["skipped"]
+    assert "skipped" not in records["1"]
+    assert (tmp_path / "manifest.jsonl.journal.jsonl").exists()
@@ -0,0 +1,158 @@
+"""Tests for cross-process request coalescing with lock files.
+
+Note: This code was generated with assistance from AI coding tools
+and has been reviewed and tested by a human.
+"""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any
+from unittest.mock import Mock
+
+import pytest
+
+from gemini_nano_banana_tool.core.generator import DeadlineExceededError
+from gemini_nano_banana_tool.core.lock_registry import LockRegistry
+from gemini_nano_banana_tool.core.singleflight import SingleFlight
+from tests.helpers import FakeClock
+
+
+def _write(path: Path) -> dict[str, Any]:
+    """Stand-in generator: write an image and return its result."""
+    path.write_bytes(b"png")
+    return {"output_path": str(path), "model": "m"}
+
+
+def _dead_pid() -> int:
+    """Return the pid of a process that has exited."""
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def test_waiter_uses_other_process_result(tmp_path: Path) -> None:
+    """Test that a second process waits for the lock holder and reuses its image."""
+    shared_dir = str(tmp_path / "flights")
+    other = LockRegistry(shared_dir)
+    token = other.try_acquire("key", timeout=300)
+    assert token is not None
+
+    def other_finishes(seconds: float) -> None:
+        other.publish("key", token, _write(tmp_path / "other.png"))
+        other.release("key", token)
+
+    registry = LockRegistry(shared_dir, sleep=other_finishes)
+    fn = Mock()
+    result, shared = registry.run("key", fn, timeout=300)
+
+    fn.assert_not_called()
+    assert shared
+    assert Path(result["output_path"]).read_bytes() == b"png"
+    assert not registry.lock_path("key").exists()
+
+
+def test_failed_leader_and_stale_locks_are_taken_over(tmp_path: Path) -> None:
+    """Test takeover after a leader failure, a dead holder and an expired lock."""
+    clock = FakeClock(1000.0)
+    registry = LockRegistry(str(tmp_path), clock=clock, sleep=lambda s: None)
+
+    # Leader released its lock without publishing: the waiter generates itself
+    token = registry.try_acquire("failed", timeout=300)
+    assert token is not None
+
+    def leader_fails(seconds: float) -> None:
+        registry.release("failed", token)
+
+    registry._sleep = leader_fails
+    result, shared = registry.run("failed", lambda: _write(tmp_path / "a.png"), timeout=300)
+    assert not shared and result["output_path"] == str(tmp_path / "a.png")
+
+    # Holder on this host has died
+    lock = {"token": "t", "pid": _dead_pid(), "host": registry._host, "expires": clock() + 999}
+    registry.lock_path("dead").write_text(json.dumps(lock))
+    result, shared = registry.run("dead", lambda: _write(tmp_path / "b.png"), timeout=300)
+    assert not shared
+
+    # Holder on another host overran its expiry
+    lock = {"token": "t", "pid": 1, "host": "elsewhere", "expires": clock() + 10}
+    registry.lock_path("expired").write_text(json.dumps(lock))
+    clock.now += 11
+    result, shared = registry.run("expired", lambda: _write(tmp_path / "c.png"), timeout=300)
+    assert not shared
+    assert list(tmp_path.glob("*.lock")) == []
+
+
+def test_waiting_is_bounded_by_timeout(tmp_path: Path) -> None:
+    """Test that a live lock held past the wait limit raises DeadlineExceededError."""
+    clock = FakeClock(1000.0)
+
+    def advance(seconds: float) -> None:
+        clock.now += seconds
+
+    holder = LockRegistry(str(tmp_path), clock=clock)
+    assert holder.try_acquire("key", timeout=600)
+    registry = LockRegistry(str(tmp_path), clock=clock, sleep=advance)
+    with pytest.raises(DeadlineExceededError):
+        registry.run("key", Mock(), timeout=5)
+
+
+def test_single_flight_fans_out_shared_result(tmp_path: Path) -> None:
+    """Test that SingleFlight links another process's image to its own output."""
+    shared_dir = str(tmp_path / "flights")
+    registry = LockRegistry(shared_dir)
+    flight = SingleFlight(Mock(), registry)
+    output = tmp_path / "mine.png"
+
+    other = LockRegistry(shared_dir)
+    image = _write(tmp_path / "theirs.png")
+
+    def run(key: str, fn: Any, timeout: float | None) -> tuple[dict[str, Any], bool]:
+        token = other.try_acquire(key, timeout)
+        assert token is not None
+        other.publish(key, token, image)
+        other.release(key, token)
+        return other.shared_result(key, token) or {}, True
+
+    registry.run = run  # type: ignore[method-assign]
+    result = flight.generate_image(Mock(), "A cat", str(output), timeout=60)
+
+    flight.generate_fn.assert_not_called()  # type: ignore[attr-defined]
+    assert result["coalesced"] and result["output_path"] == str(output)
+    assert output.read_bytes() == b"png"
+    assert os.stat(output).st_ino == os.stat(tmp_path / "theirs.png").st_ino
+
+
+def test_expired_results_are_swept(tmp_path: Path) -> None:
+    """Test that old results, images and leftovers go, unless their key is locked again."""
+    clock = FakeClock(1000.0)
+    clock.now = os.path.getmtime(tmp_path)
+    registry = LockRegistry(str(tmp_path / "flights"), result_ttl=60, clock=clock)
+    tokens = {}
+    for key in ("old", "relocked"):
+        token = registry.try_acquire(key, timeout=300)
+        assert token is not None
+        registry.publish(key, token, _write(tmp_path / f"{key}.png"))
+        registry.release(key, token)
+        tokens[key] = token
+    (registry.directory / ".old.abc.result.tmp").write_text("{}")
+    assert registry.try_acquire("relocked", timeout=300)
+
+    assert registry.sweep() == 0
+    clock.now += 61
+    assert registry.sweep() == 3
+    assert [p.name for p in registry.directory.iterdir() if "old" in p.name] == []
+    assert registry.shared_result("relocked", tokens["relocked"]) is not None
+
+
+def test_publish_failure_keeps_the_leaders_result(tmp_path: Path) -> None:
+    """Test that a leader whose publish fails still returns its paid result."""
+    registry = LockRegistry(str(tmp_path / "flights"))
+    registry.publish = Mock(side_effect=OSError("disk full"))  # type: ignore[method-assign]
+
+    result, shared = registry.run("key", lambda: _write(tmp_path / "a.png"), timeout=300)
+
+    assert not shared and result["output_path"] == str(tmp_path / "a.png")
+    assert not registry.lock_path("key").exists()
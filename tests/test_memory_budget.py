@@ -0,0 +1,166 @@
+"""Tests for the memory budget on payloads in flight.
+
+Note: This code was generated with assistance from AI coding tools
+and has been reviewed and tested by a human.
+"""
+
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Any
+from unittest.mock import Mock, patch
+
+import pytest
+from click.testing import CliRunner
+from google.genai import types
+
+from gemini_nano_banana_tool.cli import main
+from gemini_nano_banana_tool.core.deadline import Deadline
+from gemini_nano_banana_tool.core.generator import DeadlineExceededError
+from gemini_nano_banana_tool.core.memory_budget import (
+    BudgetedGenerator,
+    ByteBudget,
+    estimate_request_bytes,
+    parse_size,
+)
+from gemini_nano_banana_tool.core.writer import ImageWriter
+from gemini_nano_banana_tool.utils import ValidationError
+from tests.helpers import image_response
+
+MIB = 1024**2
+
+
+def test_parse_size_and_estimate(tmp_path: Path) -> None:
+    """Test size parsing and request footprints by resolution and reference size."""
+    assert parse_size("512M") == 512 * MIB
+    assert parse_size("1.5GiB") == 1536 * MIB
+    assert parse_size("2kb") == 2048 and parse_size("100") == 100
+    for value in ("", "0", "-1G", "2T", "lots"):
+        with pytest.raises(ValidationError):
+            parse_size(value)
+
+    reference = tmp_path / "ref.png"
+    reference.write_bytes(b"x" * MIB)
+    pro = "gemini-3-pro-image-preview"
+    assert estimate_request_bytes(None, pro, "4K") == 72 * MIB
+    # Flash has no resolution setting: always estimated at 1K
+    assert estimate_request_bytes(None, "gemini-2.5-flash-image", "4K") == 6 * MIB
+    assert estimate_request_bytes([str(reference)], pro, None) == int(8.5 * MIB)
+
+
+def test_waiters_are_admitted_in_order() -> None:
+    """Test that a large waiter isn't overtaken by smaller ones that would fit."""
+    budget = ByteBudget(10 * MIB)
+    budget.acquire(6 * MIB)
+    admitted: list[str] = []
+
+    def take(name: str, nbytes: int) -> None:
+        budget.acquire(nbytes)
+        admitted.append(name)
+
+    large = threading.Thread(target=take, args=("large", 8 * MIB))
+    large.start()
+    while not budget.metrics.counters["memory.waits"]:
+        time.sleep(0.01)
+    small = threading.Thread(target=take, args=("small", 1 * MIB))
+    small.start()
+    time.sleep(0.1)
+    assert admitted == []
+
+    budget.release(6 * MIB)
+    large.join(5)
+    small.join(5)
+    assert admitted == ["large", "small"]
+    assert budget.in_use == 9 * MIB and budget.peak == 9 * MIB
+    # Larger than the whole budget: capped, so it can run alone
+    budget.release(9 * MIB)
+    assert budget.acquire(50 * MIB) == 10 * MIB
+
+
+def test_waiting_stops_at_the_deadline() -> None:
+    """Test that a cancelled deadline ends the wait and frees the waiter's place."""
+    budget = ByteBudget(4 * MIB)
+    budget.acquire(4 * MIB)
+    deadline = Deadline()
+    errors: list[BaseException] = []
+
+    def wait() -> None:
+        try:
+            budget.acquire(MIB, deadline)
+        except DeadlineExceededError as e:
+            errors.append(e)
+
+    waiter = threading.Thread(target=wait)
+    waiter.start()
+    deadline.cancel()
+    waiter.join(5)
+    assert len(errors) == 1
+    budget.release(4 * MIB)
+    assert budget.acquire(4 * MIB) == 4 * MIB
+
+
+def test_queued_writes_hold_one_image_of_budget(tmp_path: Path) -> None:
+    """Test that an image waiting in the write queue stays reserved until it is written."""
+    release = threading.Event()
+
+    def slow_save(data: bytes, output_path: str, fsync: bool = False) -> None:
+        release.wait(5)
+
+    def generate(**kwargs: Any) -> dict[str, Any]:
+        kwargs["postprocessor"].save(b"png", kwargs["output_path"])
+        return {"output_path": kwargs["output_path"]}
+
+    budget = ByteBudget(1024 * MIB)
+    budgeted = BudgetedGenerator(budget, generate)
+    with patch("gemini_nano_banana_tool.core.writer.save_image", side_effect=slow_save):
+        writer = ImageWriter(queue_size=2)
+        output = str(tmp_path / "a.png")
+        budgeted.generate_image(Mock(), "A cat", output, postprocessor=writer)
+        assert budget.in_use == 2 * MIB
+
+        release.set()
+        writer.close()
+    assert budget.in_use == 0
+
+    budgeted.generate_image(Mock(), "A cat", output, postprocessor=ImageWriter())
+    assert budget.in_use == 0
+
+
+def test_generate_batch_respects_budget(tmp_path: Path) -> None:
+    """Test that --max-memory limits requests in flight and reports the peak."""
+    manifest = tmp_path / "manifest.jsonl"
+    manifest.write_text(
+        "".join(
+            json.dumps({"prompt": f"image {i}", "output": str(tmp_path / f"{i}.png")}) + "\n"
+            for i in range(6)
+        )
+    )
+    response = image_response()
+    lock = threading.Lock()
+    active = {"now": 0, "max": 0}
+
+    def generate_content(**kwargs: Any) -> types.GenerateContentResponse:
+        with lock:
+            active["now"] += 1
+            active["max"] = max(active["max"], active["now"])
+        time.sleep(0.02)
+        with lock:
+            active["now"] -= 1
+        return response
+
+    client = Mock(spec=["models"])
+    client.models.generate_content.side_effect = generate_content
+    with patch(
+        "gemini_nano_banana_tool.commands.generate_batch_command.create_client",
+        return_value=client,
+    ):
+        # 1K requests are estimated at 6 MiB: two fit in 12M
+        args = ["generate-batch", str(manifest), "--no-journal", "--concurrency", "6", "-v"]
+        result = CliRunner().invoke(main, [*args, "--max-memory", "12M"])
+        bad = CliRunner().invoke(main, [*args, "--max-memory", "lots"])
+
+    assert result.exit_code == 0
+    assert active["max"] <= 2
+    assert "memory.peak_bytes': 12582912" in result.stderr
+    assert bad.exit_code == 2 and "--max-memory" in bad.output
@@ -0,0 +1,173 @@
+"""Tests for streaming NDJSON mode.
+
+Note: This code was generated with assistance from AI coding tools
+and has been reviewed and tested by a human.
+"""
+
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Any
+from unittest.mock import Mock, patch
+
+from click.testing import CliRunner
+
+from benchmarks.fake_client import FakeClient
+from gemini_nano_banana_tool.cli import main as cli
+from gemini_nano_banana_tool.core.ndjson import run_ndjson_stream
+
+
+def test_results_are_written_as_they_complete() -> None:
+    """Test that a slow request doesn't hold back faster ones."""
+    lines = [json.dumps({"id": "slow", "delay": 0.2}), json.dumps({"id": "fast", "delay": 0})]
+    output: list[str] = []
+
+    def handler(request: dict[str, Any]) -> dict[str, Any]:
+        time.sleep(request["delay"])
+        return {"thread": threading.get_ident()}
+
+    counts = run_ndjson_stream(lines, handler, output.append, concurrency=2)
+    assert [json.loads(line)["id"] for line in output] == ["fast", "slow"]
+    assert counts == {"total": 2, "succeeded": 2, "failed": 0}
+
+
+def test_errors_and_invalid_lines_are_reported_per_request() -> None:
+    """Test that failures produce error lines without stopping the stream."""
+    lines = ["not json", "", json.dumps({"id": 7}), json.dumps({"value": 1})]
+    output: list[str] = []
+
+    def handler(request: dict[str, Any]) -> dict[str, Any]:
+        if request.get("id") == 7:
+            raise ValueError("boom")
+        return {"value": request["value"]}
+
+    counts = run_ndjson_stream(lines, handler, output.append, concurrency=1)
+    records = {json.loads(line)["id"]: json.loads(line) for line in output}
+    assert records[1]["status"] == "error"
+    assert records[7] == {"id": 7, "status": "error", "error": "boom"}
+    assert records[4] == {"id": 4, "status": "ok", "value": 1}
+    assert counts["failed"] == 2
+
+
+@patch("gemini_nano_banana_tool.commands.generate_command.create_client")
+@patch("gemini_nano_banana_tool.commands.promptgen_command.create_client")
+def test_promptgen_pipes_into_generate(
+    mock_promptgen_client: Mock, mock_generate_client: Mock, tmp_path: Path
+) -> None:
+    """Test the promptgen --ndjson | generate --ndjson pipeline."""
+    fake = FakeClient(text="Enhanced prompt")
+    mock_promptgen_client.return_value = fake
+    mock_generate_client.return_value = fake
+    requests = "\n".join(
+        json.dumps({"id": f"r{i}", "description": f"cat {i}", "output": str(tmp_path / f"{i}.png")})
+        for i in range(3)
+    )
+
+    runner = CliRunner()
+    enhanced = runner.invoke(cli, ["promptgen", "--ndjson"], input=requests)
+    assert enhanced.exit_code == 0, enhanced.output
+    lines = enhanced.output.strip().splitlines()
+    assert all(json.loads(line)["prompt"] == "Enhanced prompt" for line in lines)
+
+    generated = runner.invoke(cli, ["generate", "--ndjson", "-a", "16:9"], input=enhanced.output)
+    assert generated.exit_code == 0, generated.output
+    results = [json.loads(line) for line in generated.output.strip().splitlines()]
+    assert sorted(r["id"] for r in results) == ["r0", "r1", "r2"]
+    assert all(r["aspect_ratio"] == "16:9" for r in results)
+    assert all(Path(r["output_path"]).exists() for r in results)
+
+
+def test_generate_ndjson_rejects_single_mode_arguments() -> None:
+    """Test that --ndjson can't be combined with a prompt or output."""
+    result = CliRunner().invoke(cli, ["generate", "--ndjson", "-o", "x.png"], input="")
+    assert result.exit_code == 2
+    assert "--ndjson" in result.output
+
+
+def test_pipeline_overlaps_stages_with_separate_limits() -> None:
+    """Test that preparing later requests overlaps with handling earlier ones."""
+    lock = threading.Lock()
+    active = {"prepare": 0, "handle": 0}
+    peak = {"prepare": 0, "handle": 0, "overlap": 0}
+
+    def track(stage: str, delay: float) -> None:
+        with lock:
+            active[stage] += 1
+            peak[stage] = max(peak[stage], active[stage])
+            peak["overlap"] = max(peak["overlap"], min(active["prepare"], active["handle"]))
+        time.sleep(delay)
+        with lock:
+            active[stage] -= 1
+
+    def prepare(request: dict[str, Any]) -> dict[str, Any]:
+        if request["id"] == 3:
+            raise ValueError("bad request")
+        track("prepare", 0.01)
+        return {"value": request["id"] * 10}
+
+    def handle(prepared: dict[str, Any]) -> dict[str, Any]:
+        track("handle", 0.03)
+        return prepared
+
+    lines = [json.dumps({"id": i}) for i in range(8)]
+    output: list[str] = []
+    counts = run_ndjson_stream(
+        lines, handle, output.append, concurrency=1, prepare=prepare, prepare_concurrency=3
+    )
+
+    records = {json.loads(line)["id"]: json.loads(line) for line in output}
+    assert counts == {"total": 8, "succeeded": 7, "failed": 1}
+    assert records[3] == {"id": 3, "status": "error", "error": "bad request"}
+    assert records[5] == {"id": 5, "status": "ok", "value": 50}
+    assert peak["handle"] == 1
+    assert peak["prepare"] > 1
+    assert peak["overlap"] == 1
+
+
+def test_pipeline_keeps_going_when_writing_a_result_fails() -> None:
+    """Test that a failed result write still frees its slot for later requests."""
+    output: list[str] = []
+
+    def write(line: str) -> None:
+        if json.loads(line)["id"] == 0:
+            raise OSError("disk full")
+        output.append(line)
+
+    lines = [json.dumps({"id": i}) for i in range(8)]
+    done: dict[str, Any] = {}
+    runner = threading.Thread(
+        target=lambda: done.update(
+            counts=run_ndjson_stream(
+                lines, lambda prepared: prepared, write, concurrency=1, prepare=dict
+            )
+        ),
+        daemon=True,
+    )
+    runner.start()
+    runner.join(timeout=5)
+
+    assert not runner.is_alive()
+    assert done["counts"] == {"total": 7, "succeeded": 7, "failed": 0}
+    assert sorted(json.loads(line)["id"] for line in output) == list(range(1, 8))
+
+
+@patch("gemini_nano_banana_tool.commands.generate_command.create_client")
+def test_generate_promptgen_runs_as_pipeline(mock_client: Mock, tmp_path: Path) -> None:
+    """Test generate --ndjson --promptgen enhances and generates every request."""
+    mock_client.return_value = FakeClient(text="Enhanced prompt")
+    requests = "\n".join(
+        json.dumps({"id": i, "prompt": f"cat {i}", "output": str(tmp_path / f"{i}.png")})
+        for i in range(4)
+    )
+
+    result = CliRunner().invoke(
+        cli,
+        ["generate", "--ndjson", "--promptgen", "--promptgen-concurrency", "3"],
+        input=requests,
+    )
+
+    assert result.exit_code == 0, result.output
+    records = [json.loads(line) for line in result.output.strip().splitlines()]
+    assert len(records) == 4
+    assert all(r["promptgen"]["enhanced_prompt"] == "Enhanced prompt" for r in records)
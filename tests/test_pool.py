@@ -0,0 +1,138 @@
+"""Tests for the load-balanced client pool.
+
+Note: This code was generated with assistance from AI coding tools
+and has been reviewed and tested by a human.
+"""
+
+import json
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import pytest
+from google.genai import errors
+
+from gemini_nano_banana_tool.core.client import GeminiClientError, create_client
+from gemini_nano_banana_tool.core.pool import ClientPool, PoolMember
+from tests.helpers import FakeClock
+
+
+def _throttled() -> errors.ClientError:
+    """Build a 429 API error."""
+    return errors.ClientError(429, {"error": {"code": 429, "status": "RESOURCE_EXHAUSTED"}})
+
+
+def _member(name: str, weight: float = 1.0) -> PoolMember:
+    """Build a member with a mock client answering with its own name."""
+    client = Mock()
+    client.models.generate_content.return_value = name
+    return PoolMember(name, client, weight)
+
+
+def test_least_loaded_prefers_idle_members() -> None:
+    """Test that least-loaded picks the member with the fewest in-flight calls per weight."""
+    pool = ClientPool([_member("a"), _member("b", weight=2)])
+
+    first = pool.acquire()
+    second = pool.acquire()
+    third = pool.acquire()
+
+    assert [first.name, second.name, third.name] == ["a", "b", "b"]
+    pool.release(first, throttled=False)
+    assert pool.acquire().name == "a"
+
+
+def test_weighted_round_robin_follows_weights() -> None:
+    """Test that smooth weighted round robin interleaves picks by weight."""
+    pool = ClientPool([_member("a", weight=2), _member("b")], strategy="weighted")
+
+    picks = []
+    for _ in range(6):
+        member = pool.acquire()
+        picks.append(member.name)
+        pool.release(member, throttled=False)
+
+    assert picks == ["a", "b", "a", "a", "b", "a"]
+
+
+def test_throttled_member_fails_over_and_is_quarantined() -> None:
+    """Test 429 failover to another member and quarantine of a saturated member."""
+    clock = FakeClock()
+    a, b = _member("a"), _member("b")
+    a.client.models.generate_content.side_effect = _throttled()
+    pool = ClientPool([a, b], min_samples=2, quarantine_seconds=30, clock=clock)
+
+    assert pool.models.generate_content(model="m", contents="x") == "b"
+    assert pool.models.generate_content(model="m", contents="x") == "b"
+    # Both members were idle for the second call, so "a" was tried first again
+    assert a.client.models.generate_content.call_count == 2
+    assert pool.stats()[0] == {
+        "name": "a",
+        "weight": 1.0,
+        "in_flight": 0,
+        "requests": 2,
+        "throttled": 2,
+        "quarantined": True,
+    }
+
+    pool.models.generate_content(model="m", contents="x")
+    assert a.client.models.generate_content.call_count == 2
+
+    clock.now = 31
+    assert pool.acquire().name == "a"
+
+
+def test_raises_when_every_member_is_throttled() -> None:
+    """Test that the last 429 is raised after trying each member once."""
+    a, b = _member("a"), _member("b")
+    a.client.models.generate_content.side_effect = _throttled()
+    b.client.models.generate_content.side_effect = _throttled()
+    pool = ClientPool([a, b])
+
+    with pytest.raises(errors.ClientError):
+        pool.models.generate_content(model="m", contents="x")
+    assert b.client.models.generate_content.call_count == 1
+
+    # Members are told apart by identity, so same-named ones are each tried once too
+    a, b = _member("us-central1"), _member("us-central1")
+    a.client.models.generate_content.side_effect = _throttled()
+    b.client.models.generate_content.side_effect = _throttled()
+    with pytest.raises(errors.ClientError):
+        ClientPool([a, b]).models.generate_content(model="m", contents="x")
+    assert a.client.models.generate_content.call_count == 1
+    assert b.client.models.generate_content.call_count == 1
+
+
+def test_create_client_with_pool_config(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test building a pool from a config file with keys from the environment."""
+    monkeypatch.setenv("POOL_KEY_B", "key-b")
+    config = tmp_path / "pool.json"
+    config.write_text(
+        json.dumps(
+            {
+                "strategy": "weighted",
+                "members": [
+                    {"name": "a", "api_key": "key-a", "weight": 3},
+                    {"name": "b", "api_key_env": "POOL_KEY_B"},
+                ],
+            }
+        )
+    )
+
+    with patch("gemini_nano_banana_tool.core.client.genai.Client") as client_class:
+        pool = create_client(pool_config=str(config))
+
+    assert isinstance(pool, ClientPool)
+    assert pool.strategy == "weighted"
+    assert [(m.name, m.weight) for m in pool.members] == [("a", 3.0), ("b", 1.0)]
+    keys = [call.kwargs["api_key"] for call in client_class.call_args_list]
+    assert keys == ["key-a", "key-b"]
+
+    monkeypatch.delenv("POOL_KEY_B")
+    with pytest.raises(GeminiClientError, match="POOL_KEY_B"):
+        create_client(pool_config=str(config))
+
+    # Vertex members in one region need explicit names
+    vertex = {"use_vertex": True, "location": "us-central1"}
+    config.write_text(json.dumps([{**vertex, "project": "p1"}, {**vertex, "project": "p2"}]))
+    with pytest.raises(GeminiClientError, match="unique names: 'us-central1'"):
+        create_client(pool_config=str(config))
@@ -0,0 +1,103 @@
+"""Tests for process-pool image post-processing.
+
+Note: This code was generated with assistance from AI coding tools
+and has been reviewed and tested by a human.
+"""
+
+import hashlib
+import io
+import json
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import pytest
+from click.testing import CliRunner
+from PIL import Image
+
+from gemini_nano_banana_tool.cli import main
+from gemini_nano_banana_tool.core.generator import generate_image
+from gemini_nano_banana_tool.core.postprocess import PostProcessor, postprocess_image
+from tests.helpers import image_response
+
+
+def _png(mode: str = "RGBA", size: tuple[int, int] = (8, 6)) -> bytes:
+    """Encode a small PNG image."""
+    buffer = io.BytesIO()
+    Image.new(mode, size, "red").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _client(data: bytes) -> Mock:
+    """Build a mock client returning one image."""
+    client = Mock(spec=["models"])
+    client.models.generate_content.return_value = image_response(data)
+    return client
+
+
+def test_postprocess_converts_to_output_format(tmp_path: Path) -> None:
+    """Test that bytes are converted to the extension's format, or written as they are."""
+    data = _png()
+    jpeg = tmp_path / "out.jpg"
+    info = postprocess_image(data, str(jpeg))
+    assert (info["format"], info["converted_from"]) == ("JPEG", "PNG")
+    assert (info["width"], info["height"]) == (8, 6)
+    assert info["sha256"] == hashlib.sha256(jpeg.read_bytes()).hexdigest()
+    with Image.open(jpeg) as image:
+        assert image.format == "JPEG" and image.mode == "RGB"
+
+    png = tmp_path / "out.png"
+    info = postprocess_image(data, str(png))
+    assert png.read_bytes() == data and "converted_from" not in info
+    assert info == {
+        "sha256": hashlib.sha256(data).hexdigest(),
+        "size": len(data),
+        "format": "PNG",
+        "width": 8,
+        "height": 6,
+    }
+
+
+def test_postprocess_rejects_corrupt_images(tmp_path: Path) -> None:
+    """Test that a truncated image fails instead of being written."""
+    with pytest.raises(OSError):
+        postprocess_image(_png()[:40], str(tmp_path / "out.png"))
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_generate_image_in_worker_process(tmp_path: Path) -> None:
+    """Test that generate_image hands the image to the pool and reports its result."""
+    output = tmp_path / "cat.webp"
+    with PostProcessor(workers=2) as postprocessor:
+        result = generate_image(
+            _client(_png("RGB")), "A cat", str(output), postprocessor=postprocessor
+        )
+    assert result["postprocess"]["format"] == "WEBP"
+    assert result["postprocess"]["sha256"] == hashlib.sha256(output.read_bytes()).hexdigest()
+
+
+def test_generate_batch_journal_reuses_hash(tmp_path: Path) -> None:
+    """Test that generate-batch post-processes in workers and journals their hashes."""
+    manifest = tmp_path / "manifest.jsonl"
+    manifest.write_text(
+        "".join(
+            json.dumps({"id": str(i), "prompt": f"image {i}", "output": str(tmp_path / f"{i}.jpg")})
+            + "\n"
+            for i in range(4)
+        )
+    )
+    with (
+        patch(
+            "gemini_nano_banana_tool.commands.generate_batch_command.create_client",
+            return_value=_client(_png()),
+        ),
+        patch("gemini_nano_banana_tool.core.journal.file_sha256") as file_sha256,
+    ):
+        result = CliRunner().invoke(
+            main, ["generate-batch", str(manifest), "--postprocess-workers", "2"]
+        )
+
+    assert result.exit_code == 0
+    assert file_sha256.call_count == 0
+    journal = (tmp_path / "manifest.jsonl.journal.jsonl").read_text().splitlines()
+    for entry in map(json.loads, journal):
+        assert entry["sha256"] == hashlib.sha256(Path(entry["output"]).read_bytes()).hexdigest()
@@ -0,0 +1,115 @@
+"""Tests for progress, throughput and ETA reporting.
+
+Note: This code was generated with assistance from AI coding tools
+and has been reviewed and tested by a human.
+"""
+
+import io
+import json
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+from click.testing import CliRunner
+
+from gemini_nano_banana_tool.cli import main
+from gemini_nano_banana_tool.core.ndjson import run_ndjson_stream
+from gemini_nano_banana_tool.core.progress import Progress, format_duration
+from tests.helpers import FakeClock, image_response
+
+
+def test_counters_throughput_eta_and_spend() -> None:
+    """Test that skipped rows count as completed but not towards rate, ETA or spend.
+
+    Coalesced results count as succeeded, but their leader already paid for the call.
+    """
+    clock = FakeClock()
+    progress = Progress(total=100, stream=io.StringIO(), clock=clock)
+    for _ in range(10):
+        progress.started()
+        progress.finished({"status": "ok", "skipped": True, "estimated_cost_usd": 1.0})
+    progress.started(12)
+    progress.finished({"status": "ok", "coalesced": True, "estimated_cost_usd": 0.04})
+    for _ in range(8):
+        progress.finished(
+            {
+                "status": "ok",
+                "estimated_cost_usd": 0.04,
+                "promptgen": {"enabled": True, "estimated_cost_usd": 0.01},
+            }
+        )
+    progress.finished({"status": "error", "error": "boom"})
+    progress.finished({"status": "error", "error": "Invalid JSON"}, in_flight=False)
+    clock.now = 60.0
+
+    snapshot = progress.snapshot()
+    assert snapshot["completed"] == 21
+    assert (snapshot["succeeded"], snapshot["failed"], snapshot["skipped"]) == (9, 2, 10)
+    assert snapshot["in_flight"] == 2
+    assert snapshot["images_per_minute"] == 9.0
+    assert snapshot["spend_usd"] == 0.4
+    # 79 left at 11 processed per minute
+    assert snapshot["eta_seconds"] == round(79 / (11 / 60), 1)
+    assert progress.render(snapshot).startswith("21/100 (21%) | ok 9 | failed 2 | in flight 2")
+    assert format_duration(431) == "7m11s" and format_duration(11220) == "3h07m"
+
+
+def test_plain_reports_and_status_file(tmp_path: Path) -> None:
+    """Test plain log lines off a terminal and the JSON status file's final state."""
+    stream = io.StringIO()
+    status = tmp_path / "run.status.json"
+    clock = FakeClock()
+    progress = Progress(stream=stream, status_path=str(status), clock=clock)
+    assert not progress.tty and progress.interval == 30.0
+
+    with progress:
+        progress.started()
+        progress.finished({"status": "ok"})
+        clock.now = 60.0
+        progress.report()
+        assert json.loads(status.read_text())["state"] == "running"
+
+    lines = stream.getvalue().splitlines()
+    assert lines == ["Progress: 1 | ok 1 | failed 0 | in flight 0 | 1.0 img/min | $0.00"] * 2
+    final = json.loads(status.read_text())
+    assert final["state"] == "finished" and final["succeeded"] == 1 and final["eta_seconds"] is None
+    assert list(tmp_path.iterdir()) == [status]
+
+
+def test_ndjson_stream_reports_to_progress() -> None:
+    """Test that the stream tells progress about every request, including invalid lines."""
+    progress = Progress(display=False)
+    lines = ['{"id": 1}', "not json", '{"id": 2, "fail": true}']
+
+    def handler(request: dict[str, object]) -> dict[str, object]:
+        if request.get("fail"):
+            raise RuntimeError("boom")
+        return {}
+
+    run_ndjson_stream(lines, handler, lambda line: None, concurrency=2, progress=progress)
+    assert (progress.succeeded, progress.failed, progress.in_flight) == (1, 2, 0)
+
+
+def test_generate_batch_status_file(tmp_path: Path) -> None:
+    """Test that generate-batch writes a status file with the manifest total."""
+    manifest = tmp_path / "manifest.jsonl"
+    manifest.write_text(
+        "".join(
+            json.dumps({"prompt": f"image {i}", "output": str(tmp_path / f"{i}.png")}) + "\n\n"
+            for i in range(3)
+        )
+    )
+    client = Mock(spec=["models"])
+    client.models.generate_content.return_value = image_response()
+    status = tmp_path / "status.json"
+    with patch(
+        "gemini_nano_banana_tool.commands.generate_batch_command.create_client",
+        return_value=client,
+    ):
+        result = CliRunner().invoke(
+            main, ["generate-batch", str(manifest), "--no-journal", "--status-file", str(status)]
+        )
+
+    assert result.exit_code == 0
+    snapshot = json.loads(status.read_text())
+    assert snapshot["state"] == "finished"
+    assert (snapshot["total"], snapshot["succeeded"], snapshot["eta_seconds"]) == (3, 3, 0.0)
@@ -0,0 +1,123 @@
+"""Tests for context caching of promptgen system prompts.
+
+Note: This code was generated with assistance from AI coding tools
+and has been reviewed and tested by a human.
+"""
+
+from collections.abc import Iterator
+from unittest.mock import Mock
+
+import pytest
+from google.genai import types
+
+from benchmarks.fake_client import FakeClient
+from benchmarks.standin_server import CACHED_TOKEN_COUNT, StandInServer
+from gemini_nano_banana_tool.core.client import create_client
+from gemini_nano_banana_tool.core.pool import ClientPool, PoolMember
+from gemini_nano_banana_tool.core.prompt_cache import PromptCacheManager
+from gemini_nano_banana_tool.core.promptgen import generate_prompt
+
+
+@pytest.fixture
+def server() -> Iterator[StandInServer]:
+    """Run a zero-latency stand-in server for one test."""
+    with StandInServer() as srv:
+        yield srv
+
+
+def test_one_cache_entry_per_model_and_template(server: StandInServer) -> None:
+    """Test that cache entries are reused per (model, template) and deleted on close."""
+    client = create_client(api_key="standin", base_url=server.base_url)
+    with PromptCacheManager(client) as cache:
+        for description in ("wizard cat", "knight", "pirate"):
+            result = generate_prompt(client, description, template="character", cache=cache)
+            assert result["cached_tokens"] == CACHED_TOKEN_COUNT
+        generate_prompt(client, "sushi", template="food", cache=cache)
+        assert server.stats()["caches.created"] == 2
+        assert len(server.caches) == 2
+
+    assert server.stats()["caches.deleted"] == 2
+    assert server.caches == {}
+
+
+def test_falls_back_to_inline_when_caching_unavailable() -> None:
+    """Test that a refused cache creation sends prompts inline without retrying it."""
+    with StandInServer(cache_support=False) as srv:
+        client = create_client(api_key="standin", base_url=srv.base_url)
+        with PromptCacheManager(client) as cache:
+            for _ in range(2):
+                result = generate_prompt(client, "wizard cat", cache=cache)
+                assert result["cached_tokens"] == 0
+        assert srv.stats()["requests.cachedContents.create"] == 1
+        assert srv.stats()["requests.generateContent"] == 2
+
+
+def test_rejected_cache_entry_falls_back_inline(server: StandInServer) -> None:
+    """Test that a cache entry that vanished server-side doesn't fail the request."""
+    client = create_client(api_key="standin", base_url=server.base_url)
+    with PromptCacheManager(client) as cache:
+        generate_prompt(client, "wizard cat", cache=cache)
+        server.caches.clear()
+        result = generate_prompt(client, "wizard cat", cache=cache)
+        assert result["cached_tokens"] == 0
+        assert server.stats()["status.403"] == 1
+
+        # The next request recreates the entry instead of giving up on caching
+        result = generate_prompt(client, "wizard cat", cache=cache)
+        assert result["cached_tokens"] == CACHED_TOKEN_COUNT
+        assert server.stats()["caches.created"] == 2
+
+
+def test_pool_sends_cached_requests_to_the_cache_owner(server: StandInServer) -> None:
+    """Test that with a pool, cached requests stay on the member whose cache they use."""
+    with StandInServer() as other:
+        pool = ClientPool(
+            [
+                PoolMember("a", create_client(api_key="a", base_url=server.base_url)),
+                PoolMember("b", create_client(api_key="b", base_url=other.base_url)),
+            ]
+        )
+        with PromptCacheManager(pool) as cache:
+            for description in ("wizard cat", "knight", "pirate", "sushi"):
+                result = generate_prompt(pool, description, cache=cache)
+                assert result["cached_tokens"] == CACHED_TOKEN_COUNT
+        assert server.stats()["caches.created"] == 1
+        assert server.stats()["requests.generateContent"] == 4
+        assert other.stats().get("requests.generateContent", 0) == 0
+
+
+def test_entries_are_recreated_before_expiry() -> None:
+    """Test that an entry close to its TTL is replaced, and the old one deleted on close."""
+    now = [0.0]
+    client = Mock()
+    client.caches.create.side_effect = [
+        types.CachedContent(name="cachedContents/a"),
+        types.CachedContent(name="cachedContents/b"),
+    ]
+    cache = PromptCacheManager(client, ttl_seconds=600, refresh_margin=60, clock=lambda: now[0])
+
+    assert cache.get("m", None, "system") == "cachedContents/a"
+    now[0] = 500.0
+    assert cache.get("m", None, "system") == "cachedContents/a"
+    now[0] = 545.0
+    assert cache.get("m", None, "system") == "cachedContents/b"
+    assert client.caches.create.call_args.kwargs["config"].ttl == "600s"
+
+    # A late rejection of the superseded entry doesn't drop the new one
+    cache.invalidate("m", None, "system", "cachedContents/a")
+    assert cache.get("m", None, "system") == "cachedContents/b"
+    client.caches.delete.assert_not_called()
+    cache.close()
+    assert {c.kwargs["name"] for c in client.caches.delete.call_args_list} == {
+        "cachedContents/a",
+        "cachedContents/b",
+    }
+
+
+def test_clients_without_cache_support_send_inline() -> None:
+    """Test that clients without a caches API (e.g. fakes, cassettes) work unchanged."""
+    client = FakeClient(text="Enhanced prompt")
+    cache = PromptCacheManager(client)  # type: ignore[arg-type]
+    result = generate_prompt(client, "wizard cat", cache=cache)  # type: ignore[arg-type]
+    assert result["prompt"] == "Enhanced prompt"
+    assert result["cached_tokens"] == 0
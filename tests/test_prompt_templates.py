@@ -0,0 +1,50 @@
+"""Tests for prompt template category detection.
+
+Note: This code was generated with assistance from AI coding tools
+and has been reviewed and tested by a human.
+"""
+
+from unittest.mock import patch
+
+import pytest
+
+from gemini_nano_banana_tool.core import prompt_templates
+from gemini_nano_banana_tool.core.prompt_templates import detect_category
+
+
+@pytest.mark.parametrize(
+    ("description", "expected"),
+    [
+        ("a character in armor", "character"),
+        ("food on a plate", "food"),
+        ("Macro PHOTOGRAPHY of a leaf", "photography"),
+        ("three desserts and two dishes", "food"),
+        ("a birthday party", None),
+        ("a starship", None),
+        ("", None),
+    ],
+)
+def test_detect_category(description: str, expected: str | None) -> None:
+    """Test whole-word, case-insensitive matching with plural forms."""
+    assert detect_category(description) == expected
+
+
+def test_keywords_do_not_match_inside_words() -> None:
+    """Test that keywords only match as whole words."""
+    assert detect_category("an iconic brandy bottle") is None
+    assert detect_category("an icon") == "logo"
+
+
+def test_ties_go_to_first_category() -> None:
+    """Test that shared keywords resolve to the first listed category."""
+    # "portrait" is both a photography and a character keyword
+    assert detect_category("portrait") == "photography"
+    assert detect_category("portrait of a hero") == "character"
+
+
+def test_category_weights_change_the_winner() -> None:
+    """Test that per-category weights scale keyword scores."""
+    weights = {**prompt_templates.CATEGORY_WEIGHTS, "character": 2.0}
+    with patch.dict(prompt_templates.CATEGORY_WEIGHTS, weights):
+        assert detect_category("portrait photo of a person") == "character"
+    assert detect_category("portrait photo of a person") == "photography"
@@ -0,0 +1,111 @@
+"""Tests for packed multi-description prompt generation.
+
+Note: This code was generated with assistance from AI coding tools
+and has been reviewed and tested by a human.
+"""
+
+import json
+from typing import Any
+from unittest.mock import Mock
+
+from google.genai import types
+
+from gemini_nano_banana_tool.core.ndjson import run_ndjson_stream
+from gemini_nano_banana_tool.core.promptgen import generate_prompts_packed
+
+
+def _response(text: str, total_tokens: int, output_tokens: int) -> types.GenerateContentResponse:
+    """Build a text response with usage metadata."""
+    return types.GenerateContentResponse(
+        candidates=[
+            types.Candidate(content=types.Content(role="model", parts=[types.Part(text=text)]))
+        ],
+        usage_metadata=types.GenerateContentResponseUsageMetadata(
+            total_token_count=total_tokens, candidates_token_count=output_tokens
+        ),
+    )
+
+
+def test_packs_descriptions_and_splits_results() -> None:
+    """Test that one request serves several descriptions with per-item hints and tokens."""
+    client = Mock()
+    entries = [{"index": 1, "prompt": "Sushi, anime style"}, {"index": 0, "prompt": "A cat"}]
+    client.models.generate_content.return_value = _response(json.dumps(entries), 100, 20)
+
+    results = generate_prompts_packed(
+        client,
+        [{"description": "wizard cat"}, {"description": "sushi", "style": "anime"}],
+    )
+
+    assert client.models.generate_content.call_count == 1
+    call = client.models.generate_content.call_args.kwargs
+    assert call["config"].response_mime_type == "application/json"
+    assert "Description 1:\nsushi" in call["contents"]
+    assert "Desired style: anime" in call["contents"]
+    assert call["contents"].count("You are an expert prompt engineer") == 1
+
+    assert [r["prompt"] for r in results] == ["A cat", "Sushi, anime style"]
+    assert [r["original"] for r in results] == ["wizard cat", "sushi"]
+    assert results[1]["style"] == "anime"
+    assert results[0]["packed"] == {"size": 2, "tokens_used": 100}
+    # Input tokens (80) shared evenly, output tokens (20) by prompt length
+    assert results[0]["tokens_used"] == round(40 + 20 * 5 / 23)
+    assert results[1]["tokens_used"] == round(40 + 20 * 18 / 23)
+
+
+def test_missing_items_fall_back_to_single_requests() -> None:
+    """Test that descriptions the model skipped or mis-indexed are generated individually."""
+    client = Mock()
+    client.models.generate_content.side_effect = [
+        _response(
+            json.dumps([{"index": 0, "prompt": "First"}, {"index": "second", "prompt": "?"}]),
+            50,
+            10,
+        ),
+        _response("Second", 30, 10),
+    ]
+
+    results = generate_prompts_packed(client, [{"description": "a"}, {"description": "b"}])
+
+    assert [r["prompt"] for r in results] == ["First", "Second"]
+    assert results[1]["tokens_used"] == 30
+    assert client.models.generate_content.call_count == 2
+
+
+def test_groups_by_template_and_pack_size() -> None:
+    """Test that items are split into packs per template and pack size."""
+    client = Mock()
+
+    def generate(model: str, contents: str, config: Any) -> types.GenerateContentResponse:
+        count = contents.count("Description ")
+        entries = [{"index": i, "prompt": f"p{i}"} for i in range(count)]
+        return _response(json.dumps(entries), 10, 5)
+
+    client.models.generate_content.side_effect = generate
+    items = [{"description": f"d{i}"} for i in range(5)] + [
+        {"description": "logo", "template": "logo"}
+    ]
+
+    results = generate_prompts_packed(client, items, pack_size=2)
+
+    assert client.models.generate_content.call_count == 4
+    assert [r["packed"]["size"] for r in results] == [2, 2, 2, 2, 1, 1]
+    assert results[5]["template_used"] == "logo"
+
+
+def test_ndjson_batches_requests() -> None:
+    """Test that the NDJSON stream hands consecutive requests to the batch handler."""
+    lines = [json.dumps({"id": i}) for i in range(5)]
+    output: list[str] = []
+    batches: list[int] = []
+
+    def batch_handler(requests: list[dict[str, Any]]) -> list[dict[str, Any] | Exception]:
+        batches.append(len(requests))
+        return [ValueError("odd") if r["id"] % 2 else {"ok": True} for r in requests]
+
+    counts = run_ndjson_stream(
+        lines, lambda r: r, output.append, concurrency=2, batch_size=2, batch_handler=batch_handler
+    )
+
+    assert sorted(batches) == [1, 2, 2]
+    assert counts == {"total": 5, "succeeded": 3, "failed": 2}
@@ -0,0 +1,165 @@
+"""Tests for priority scheduling of API calls.
+
+Note: This code was generated with assistance from AI coding tools
+and has been reviewed and tested by a human.
+"""
+
+import json
+import threading
+import time
+from collections.abc import Callable
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import pytest
+from click.testing import CliRunner
+from google.genai import types
+
+from gemini_nano_banana_tool.cli import main
+from gemini_nano_banana_tool.core.deadline import Deadline, request_limits
+from gemini_nano_banana_tool.core.generator import DeadlineExceededError
+from gemini_nano_banana_tool.core.scheduler import (
+    PriorityScheduler,
+    ScheduledClient,
+    request_priority,
+    request_schedule,
+)
+from gemini_nano_banana_tool.utils import ValidationError
+from tests.helpers import FakeClock, image_response
+
+
+def _admission_order(
+    scheduler: PriorityScheduler,
+    waiters: list[tuple[str, str, float | None]],
+    on_queued: Callable[[str], None] = lambda name: None,
+) -> list[str]:
+    """Queue (name, priority, due) waiters behind a held slot, release it, return their order."""
+    order: list[str] = []
+
+    def wait(name: str, priority: str, due: float | None) -> None:
+        with scheduler.slot(priority, due):
+            order.append(name)
+
+    scheduler.acquire("interactive")
+    threads = []
+    for name, priority, due in waiters:
+        thread = threading.Thread(target=wait, args=(name, priority, due))
+        thread.start()
+        threads.append(thread)
+        while scheduler.waiting < len(threads):
+            time.sleep(0.001)
+        on_queued(name)
+    scheduler.release()
+    for thread in threads:
+        thread.join(5)
+    return order
+
+
+def test_classes_then_earliest_deadline_then_arrival() -> None:
+    """Test that interactive calls go first and deadlines order calls within a class."""
+    scheduler = PriorityScheduler(max_in_flight=1)
+    order = _admission_order(
+        scheduler,
+        [
+            ("backfill", "backfill", None),
+            ("batch-late", "batch", 200.0),
+            ("batch-no-deadline", "batch", None),
+            ("batch-soon", "batch", 100.0),
+            ("ui", "interactive", None),
+        ],
+    )
+    assert order == ["ui", "batch-soon", "batch-late", "batch-no-deadline", "backfill"]
+    snapshot = scheduler.metrics.snapshot()
+    assert snapshot["scheduler.admitted.batch"] == 3
+    assert snapshot["scheduler.waiting"] == 0
+
+
+def test_aging_prevents_starvation() -> None:
+    """Test that a long-waiting backfill call is promoted ahead of a newer interactive call."""
+    clock = FakeClock()
+    scheduler = PriorityScheduler(max_in_flight=1, aging_seconds=30, clock=clock)
+
+    def advance(name: str) -> None:
+        clock.now += 61
+
+    # After 61s the backfill call has moved up two classes; it arrived first
+    order = _admission_order(
+        scheduler, [("backfill", "backfill", None), ("ui", "interactive", None)], advance
+    )
+    assert order == ["backfill", "ui"]
+
+
+def test_scheduled_client_uses_request_priority() -> None:
+    """Test that calls carry the enclosing request_priority() tags and tags are validated."""
+    scheduler = PriorityScheduler(max_in_flight=2)
+    scheduler.acquire = Mock(wraps=scheduler.acquire)  # type: ignore[method-assign]
+    inner = Mock()
+    client = ScheduledClient(inner, scheduler)
+
+    with request_priority("interactive", due=5.0):
+        client.models.generate_content(model="m", contents="c")
+    client.models.generate_images(model="m", prompt="p")
+
+    assert [c.args for c in scheduler.acquire.call_args_list] == [
+        ("interactive", 5.0, None),
+        ("batch", None, None),
+    ]
+    assert scheduler.in_flight == 0
+    assert client.batches is inner.batches
+
+    assert request_schedule({"priority": "backfill"}, "batch") == ("backfill", None)
+    priority, due = request_schedule({"deadline": time.time() + 60}, "interactive")
+    assert priority == "interactive" and due is not None
+    assert 50 < due - time.monotonic() <= 60
+    with pytest.raises(ValidationError):
+        request_schedule({"priority": "urgent"}, "batch")
+    with pytest.raises(ValidationError):
+        request_schedule({"deadline": "tomorrow"}, "batch")
+
+
+def test_queued_calls_respect_the_deadline() -> None:
+    """Test that a call queued past its deadline isn't sent, and a late one gets the time left."""
+    scheduler = PriorityScheduler(max_in_flight=1)
+    inner = Mock()
+    client = ScheduledClient(inner, scheduler)
+    config = types.GenerateContentConfig(http_options=types.HttpOptions(timeout=300_000))
+    scheduler.acquire()  # hold the only slot
+
+    with request_limits(300, Deadline(0.3)):
+        with pytest.raises(DeadlineExceededError, match="deadline exceeded"):
+            client.models.generate_content(model="m", contents="c", config=config)
+    inner.models.generate_content.assert_not_called()
+    assert scheduler.waiting == 0 and scheduler.metrics.counters["scheduler.expired"] == 1
+
+    threading.Timer(0.3, scheduler.release).start()
+    with request_limits(300, Deadline(5.0)):
+        client.models.generate_content(model="m", contents="c", config=config)
+    sent = inner.models.generate_content.call_args.kwargs["config"]
+    assert sent.http_options.timeout <= 4800
+
+
+def test_generate_batch_schedules_tagged_rows(tmp_path: Path) -> None:
+    """Test that generate-batch runs tagged rows through the scheduler and rejects bad tags."""
+    manifest = tmp_path / "manifest.jsonl"
+    rows = [
+        {"id": "ui", "prompt": "a", "output": str(tmp_path / "a.png"), "priority": "interactive"},
+        {"id": "bad", "prompt": "b", "output": str(tmp_path / "b.png"), "priority": "urgent"},
+        {"id": "late", "prompt": "c", "output": str(tmp_path / "c.png"), "deadline": "2030-01-01"},
+    ]
+    manifest.write_text("".join(json.dumps(row) + "\n" for row in rows))
+    client = Mock(spec=["models"])
+    client.models.generate_content.return_value = image_response()
+    with patch(
+        "gemini_nano_banana_tool.commands.generate_batch_command.create_client",
+        return_value=client,
+    ):
+        result = CliRunner().invoke(
+            main,
+            ["generate-batch", str(manifest), "--no-journal", "--max-in-flight", "1"],
+        )
+
+    records = {r["id"]: r for r in map(json.loads, result.output.splitlines())}
+    assert result.exit_code == 1
+    assert records["ui"]["status"] == "ok" and records["late"]["status"] == "ok"
+    assert "Unknown priority" in records["bad"]["error"]
+    assert client.models.generate_content.call_count == 2
@@ -0,0 +1,96 @@
+"""Tests for deterministic manifest sharding.
+
+Note: This code was generated with assistance from AI coding tools
+and has been reviewed and tested by a human.
+"""
+
+import json
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import pytest
+from click.testing import CliRunner
+
+from gemini_nano_banana_tool.cli import main
+from gemini_nano_banana_tool.core.batch import load_manifest, parse_shard, shard_lines
+from gemini_nano_banana_tool.utils import ValidationError
+from tests.helpers import image_response
+
+
+def _lines(count: int, start: int = 0) -> list[str]:
+    """Build manifest lines, half of them with an explicit id."""
+    rows = []
+    for i in range(start, start + count):
+        row = {"prompt": f"image {i}", "output": f"out/{i}.png"}
+        if i % 2:
+            row["id"] = f"row-{i}"
+        rows.append(json.dumps(row) + "\n")
+    return rows
+
+
+def _kept(lines: list[str], shard: tuple[int, int]) -> set[str]:
+    """Return the non-blank lines a shard keeps."""
+    return {line for line in shard_lines(lines, shard) if line.strip()}
+
+
+def test_parse_shard() -> None:
+    """Test valid and invalid shard specs."""
+    assert parse_shard("2/4") == (2, 4)
+    for spec in ("0/4", "5/4", "2", "a/b", "1/2/3"):
+        with pytest.raises(ValidationError):
+            parse_shard(spec)
+
+
+def test_shards_are_disjoint_complete_and_stable() -> None:
+    """Test that shards partition the manifest and appended rows don't move others."""
+    lines = _lines(300) + ["not json\n"]
+    shards = [_kept(lines, (i, 3)) for i in (1, 2, 3)]
+    assert sum(len(s) for s in shards) == len(lines)
+    assert set().union(*shards) == set(lines)
+    assert all(70 < len(s) < 130 for s in shards)
+
+    appended = lines + _lines(50, start=300)
+    assert all(shards[i - 1] <= _kept(appended, (i, 3)) for i in (1, 2, 3))
+
+    # Dropped lines become blank, so line numbers still match the manifest
+    assert len(list(shard_lines(lines, (1, 3)))) == len(lines)
+
+
+def test_load_manifest_shard_keeps_line_number_ids(tmp_path: Path) -> None:
+    """Test that a sharded load keeps manifest line numbers as default ids."""
+    manifest = tmp_path / "manifest.jsonl"
+    manifest.write_text("".join(_lines(20)))
+    everything = {str(row["id"]): row for row in load_manifest(str(manifest))}
+    parts = [load_manifest(str(manifest), (i, 2)) for i in (1, 2)]
+    assert sorted(str(row["id"]) for part in parts for row in part) == sorted(everything)
+    assert all(row == everything[str(row["id"])] for part in parts for row in part)
+
+
+def test_generate_batch_shards_have_own_journals(tmp_path: Path) -> None:
+    """Test that two shards of one manifest generate every row exactly once."""
+    manifest = tmp_path / "manifest.jsonl"
+    manifest.write_text(
+        "".join(
+            json.dumps({"id": str(i), "prompt": f"image {i}", "output": str(tmp_path / f"{i}.png")})
+            + "\n"
+            for i in range(10)
+        )
+    )
+    client = Mock(spec=["models"])
+    client.models.generate_content.return_value = image_response()
+    ids: list[str] = []
+    with patch(
+        "gemini_nano_banana_tool.commands.generate_batch_command.create_client",
+        return_value=client,
+    ):
+        for shard in ("1/2", "2/2"):
+            result = CliRunner().invoke(main, ["generate-batch", str(manifest), "--shard", shard])
+            assert result.exit_code == 0
+            ids += [json.loads(line)["id"] for line in result.output.splitlines()]
+        bad = CliRunner().invoke(main, ["generate-batch", str(manifest), "--shard", "3/2"])
+
+    assert sorted(ids) == sorted(str(i) for i in range(10))
+    assert client.models.generate_content.call_count == 10
+    assert (tmp_path / "manifest.jsonl.shard-1-of-2.journal.jsonl").exists()
+    assert (tmp_path / "manifest.jsonl.shard-2-of-2.journal.jsonl").exists()
+    assert bad.exit_code == 2 and "--shard" in bad.output
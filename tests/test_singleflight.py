@@ -0,0 +1,187 @@
+"""Tests for single-flight coalescing of identical requests.
+
+Note: This code was generated with assistance from AI coding tools
+and has been reviewed and tested by a human.
+"""
+
+import asyncio
+import io
+import os
+import threading
+from pathlib import Path
+from typing import Any
+from unittest.mock import Mock
+
+import pytest
+from google.genai import types
+from PIL import Image
+
+from gemini_nano_banana_tool.core.postprocess import PostProcessor
+from gemini_nano_banana_tool.core.singleflight import SingleFlight, coalesce_key
+from gemini_nano_banana_tool.utils import link_or_copy
+from tests.helpers import image_response
+
+
+def _blocking_client(release: threading.Event, error: Exception | None = None) -> Mock:
+    """Build a client whose calls block until release is set, then return or raise."""
+
+    def generate_content(model: str, contents: Any, config: Any) -> Any:
+        release.wait(5)
+        if error:
+            raise error
+        return image_response()
+
+    client = Mock(spec=["models"])
+    client.models.generate_content.side_effect = generate_content
+    return client
+
+
+def _run_threads(
+    flight: SingleFlight, client: Mock, outputs: list[Path]
+) -> tuple[list[threading.Thread], list[Any]]:
+    """Start one generate_image thread per output; the first one leads, the others follow."""
+    results: list[Any] = [None] * len(outputs)
+
+    def run(index: int) -> None:
+        try:
+            results[index] = flight.generate_image(client, "A cat", str(outputs[index]))
+        except Exception as e:
+            results[index] = e
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(len(outputs))]
+    threads[0].start()
+    while not flight.leaders:
+        threading.Event().wait(0.001)
+    for thread in threads[1:]:
+        thread.start()
+    while flight.followers < len(outputs) - 1:
+        threading.Event().wait(0.001)
+    return threads, results
+
+
+def test_identical_thread_requests_share_one_call(tmp_path: Path) -> None:
+    """Test that concurrent identical requests make one call and get hardlinked outputs."""
+    release = threading.Event()
+    client = _blocking_client(release)
+    flight = SingleFlight()
+    outputs = [tmp_path / f"out-{i}" / "cat.png" for i in range(4)]
+
+    threads, results = _run_threads(flight, client, outputs)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert client.models.generate_content.call_count == 1
+    assert [r["output_path"] for r in results] == [str(p) for p in outputs]
+    assert [bool(r.get("coalesced")) for r in results] == [False, True, True, True]
+    assert len({os.stat(p).st_ino for p in outputs}) == 1
+    assert all(p.read_bytes() == b"png" for p in outputs)
+
+
+def test_leader_error_reaches_followers_and_flight_ends(tmp_path: Path) -> None:
+    """Test that followers see the leader's error and later requests call again."""
+    release = threading.Event()
+    client = _blocking_client(release, RuntimeError("boom"))
+    flight = SingleFlight()
+    threads, results = _run_threads(flight, client, [tmp_path / "a.png", tmp_path / "b.png"])
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert all("boom" in str(r) for r in results)
+
+    client.models.generate_content.side_effect = None
+    client.models.generate_content.return_value = image_response()
+    flight.generate_image(client, "A cat", str(tmp_path / "c.png"))
+    assert client.models.generate_content.call_count == 2
+
+
+def test_async_tasks_coalesce(tmp_path: Path) -> None:
+    """Test that identical asyncio tasks share one async call."""
+    calls = 0
+
+    async def generate_content(**kwargs: Any) -> types.GenerateContentResponse:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return image_response()
+
+    client = Mock()
+    client.aio.models.generate_content.side_effect = generate_content
+    flight = SingleFlight()
+
+    async def main() -> list[dict[str, Any]]:
+        return await asyncio.gather(
+            *(
+                flight.generate_image_async(client, "A cat", str(tmp_path / f"{i}.png"))
+                for i in range(3)
+            )
+        )
+
+    results = asyncio.run(main())
+    assert calls == 1
+    assert sum(bool(r.get("coalesced")) for r in results) == 2
+    assert all((tmp_path / f"{i}.png").read_bytes() == b"png" for i in range(3))
+
+
+def test_converted_outputs_only_coalesce_within_a_format(tmp_path: Path) -> None:
+    """Test that with a PostProcessor, a .jpg output doesn't share a .png leader's file."""
+    buffer = io.BytesIO()
+    Image.new("RGB", (8, 8), "red").save(buffer, format="PNG")
+    release = threading.Event()
+
+    def generate_content(model: str, contents: Any, config: Any) -> Any:
+        release.wait(5)
+        return image_response(buffer.getvalue())
+
+    client = Mock(spec=["models"])
+    client.models.generate_content.side_effect = generate_content
+    flight = SingleFlight()
+    outputs = [tmp_path / "a.png", tmp_path / "b.jpg", tmp_path / "c.png"]
+
+    with PostProcessor(workers=1) as postprocessor:
+        threads = [
+            threading.Thread(
+                target=flight.generate_image,
+                args=(client, "A cat", str(output)),
+                kwargs={"postprocessor": postprocessor},
+            )
+            for output in outputs
+        ]
+        threads[0].start()
+        while not flight.leaders:
+            threading.Event().wait(0.001)
+        for thread in threads[1:]:
+            thread.start()
+        waited = 0
+        while (flight.leaders < 2 or not flight.followers) and waited < 5000:
+            threading.Event().wait(0.001)
+            waited += 1
+        release.set()
+        for thread in threads:
+            thread.join()
+
+    assert client.models.generate_content.call_count == 2
+    assert [Image.open(p).format for p in outputs] == ["PNG", "JPEG", "PNG"]
+    assert os.stat(outputs[0]).st_ino == os.stat(outputs[2]).st_ino
+
+
+def test_key_uses_reference_contents_and_copy_fallback(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test content-based keys and the copy fallback when hardlinks fail."""
+    first, second, other = tmp_path / "a.png", tmp_path / "b.png", tmp_path / "c.png"
+    first.write_bytes(b"same")
+    second.write_bytes(b"same")
+    other.write_bytes(b"other")
+    key = coalesce_key("p", [str(first)], "1:1", "m", None)
+    assert key == coalesce_key("p", [str(second)], "1:1", "m", None)
+    assert key != coalesce_key("p", [str(other)], "1:1", "m", None)
+    assert key != coalesce_key("p", [str(first)], "16:9", "m", None)
+
+    def no_link(src: Any, dst: Any) -> None:
+        raise OSError("cross-device link")
+
+    monkeypatch.setattr("gemini_nano_banana_tool.utils.os.link", no_link)
+    assert link_or_copy(str(first), str(tmp_path / "copy.png")) == "copy"
+    assert (tmp_path / "copy.png").read_bytes() == b"same"
+    assert link_or_copy(str(first), str(first)) == "same"
@@ -6,6 +6,8 @@ and has been reviewed and tested by a human.
 
 import os
 import tempfile
+from pathlib import Path
+from unittest.mock import patch
 
 import pytest
 
@@ -13,6 +15,7 @@ from gemini_nano_banana_tool.utils import (
     ValidationError,
     format_resolution,
     load_prompt,
+    save_image,
     validate_aspect_ratio,
     validate_model,
     validate_reference_images,
@@ -143,3 +146,33 @@ def test_format_resolution() -> None:
     assert format_resolution("16:9") == "1344x768"
     assert format_resolution("9:16") == "768x1344"
     assert format_resolution("invalid") == "unknown"
+
+
+def test_save_image_writes_buffers_in_full(tmp_path: Path) -> None:
+    """Test that short writes are resumed and memoryviews are written without a copy."""
+    data = bytes(range(256)) * 1000
+    real_write = os.write
+    calls: list[int] = []
+
+    def short_write(fd: int, buffer: memoryview) -> int:
+        calls.append(len(buffer))
+        return real_write(fd, buffer[:100_000])
+
+    output = tmp_path / "sub" / "out.png"
+    with patch("gemini_nano_banana_tool.utils.os.write", side_effect=short_write):
+        save_image(memoryview(data), str(output))
+
+    assert output.read_bytes() == data
+    assert calls == [256_000, 156_000, 56_000]
+    assert [p.name for p in output.parent.iterdir()] == ["out.png"]
+
+
+def test_save_image_failure_leaves_no_file(tmp_path: Path) -> None:
+    """Test that a failed write removes the temporary file and keeps the old image."""
+    output = tmp_path / "out.png"
+    output.write_bytes(b"old")
+    with patch("gemini_nano_banana_tool.utils.os.write", side_effect=OSError("disk full")):
+        with pytest.raises(ValidationError, match="disk full"):
+            save_image(b"new image", str(output))
+    assert output.read_bytes() == b"old"
+    assert list(tmp_path.iterdir()) == [output]
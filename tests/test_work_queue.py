@@ -0,0 +1,142 @@
+"""Tests for the SQLite work queue and the enqueue/worker commands.
+
+Note: This code was generated with assistance from AI coding tools
+and has been reviewed and tested by a human.
+"""
+
+import json
+import threading
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+from click.testing import CliRunner
+
+from gemini_nano_banana_tool.cli import main
+from gemini_nano_banana_tool.core.work_queue import WorkQueue
+from tests.helpers import FakeClock, image_response
+
+
+def test_lease_is_exclusive_until_it_expires(tmp_path: Path) -> None:
+    """Test that a leased job is invisible to others until its visibility timeout."""
+    clock = FakeClock(1000.0)
+    queue = WorkQueue(str(tmp_path / "q.db"), visibility_timeout=60, clock=clock)
+    assert queue.enqueue([{"prompt": "a"}, {"prompt": "b"}]) == 2
+
+    first = queue.lease("w1")
+    clock.now += 30
+    second = queue.lease("w2")
+    assert [job.request["prompt"] for job in first + second] == ["a", "b"]
+    assert queue.lease("w3") == []
+
+    clock.now += 31
+    (retried,) = queue.lease("w3", limit=5)
+    assert retried.id == first[0].id and retried.attempts == 2 and second[0].id != retried.id
+    # The first lease was lost to w3; w1's late result is rejected
+    assert not queue.complete(first[0].id, "w1", {})
+    assert queue.complete(retried.id, "w3", {"output_path": "a.png"})
+    assert queue.counts() == {"queued": 0, "leased": 1, "done": 1, "failed": 0}
+
+
+def test_running_jobs_renew_their_lease(tmp_path: Path) -> None:
+    """Test that a renewed lease outlives the visibility timeout, and a lost one can't be."""
+    clock = FakeClock(1000.0)
+    queue = WorkQueue(str(tmp_path / "q.db"), visibility_timeout=60, clock=clock)
+    queue.enqueue([{"prompt": "slow"}])
+    (job,) = queue.lease("w1")
+
+    renewed = threading.Event()
+    real_renew = queue.renew
+
+    def renew(job_id: int, owner: str) -> bool:
+        late = clock.now >= 1050
+        ok = real_renew(job_id, owner)
+        if late:
+            renewed.set()
+        return ok
+
+    queue.renew = renew  # type: ignore[method-assign]
+    with queue.renewing(job.id, "w1", interval=0.01):
+        clock.now += 50
+        assert renewed.wait(5)
+        clock.now += 50
+        assert queue.lease("w2") == []
+
+    assert not queue.renew(job.id, "w2")
+    clock.now += 61
+    assert queue.lease("w2")[0].id == job.id
+    assert not queue.renew(job.id, "w1")
+
+
+def test_failures_retry_until_max_attempts(tmp_path: Path) -> None:
+    """Test retries after failures and expired leases, and permanent failures."""
+    clock = FakeClock(1000.0)
+    queue = WorkQueue(str(tmp_path / "q.db"), visibility_timeout=60, max_attempts=2, clock=clock)
+    queue.enqueue([{"prompt": "flaky"}, {"prompt": "invalid"}, {"prompt": "stuck"}])
+
+    flaky, invalid, stuck = queue.lease("w1", limit=3)
+    assert queue.fail(flaky.id, "w1", "503")
+    assert queue.fail(invalid.id, "w1", "bad request", retry=False)
+    (flaky,) = queue.lease("w1")
+    assert flaky.attempts == 2
+    assert queue.fail(flaky.id, "w1", "503 again")
+
+    clock.now += 61
+    (stuck,) = queue.lease("w2")
+    clock.now += 61
+    assert queue.lease("w2") == []
+    assert queue.counts() == {"queued": 0, "leased": 0, "done": 0, "failed": 3}
+
+
+def test_enqueue_and_workers(tmp_path: Path) -> None:
+    """Test that workers drain a queue, retry transient errors and report invalid rows."""
+    manifest = tmp_path / "manifest.jsonl"
+    rows = [
+        {"id": str(i), "prompt": f"image {i}", "output": str(tmp_path / f"{i}.png")}
+        for i in range(6)
+    ]
+    rows.append({"id": "bad", "prompt": "no output"})
+    manifest.write_text("".join(json.dumps(row) + "\n" for row in rows))
+    queue_path = str(tmp_path / "jobs.db")
+
+    response = image_response()
+    client = Mock(spec=["models"])
+    client.models.generate_content.side_effect = [RuntimeError("503")] + [response] * 6
+
+    result = CliRunner().invoke(main, ["enqueue", queue_path, str(manifest)])
+    assert result.exit_code == 0
+    assert json.loads(result.output) == {
+        "enqueued": 7,
+        "queued": 7,
+        "leased": 0,
+        "done": 0,
+        "failed": 0,
+    }
+
+    with patch(
+        "gemini_nano_banana_tool.commands.queue_commands.create_client", return_value=client
+    ):
+        result = CliRunner().invoke(main, ["worker", queue_path, "--concurrency", "3"])
+
+    records = [json.loads(line) for line in result.stdout.splitlines()]
+    assert result.exit_code == 1
+    assert sorted(r["id"] for r in records if r["status"] == "ok") == [str(i) for i in range(6)]
+    assert [r["id"] for r in records if r["status"] == "error" and not r.get("will_retry")] == [
+        "bad"
+    ]
+    assert sum(bool(r.get("will_retry")) for r in records) == 1
+    assert all((tmp_path / f"{i}.png").exists() for i in range(6))
+    assert WorkQueue(queue_path).counts() == {"queued": 0, "leased": 0, "done": 6, "failed": 1}
+
+
+def test_queue_errors_are_reported(tmp_path: Path) -> None:
+    """Test that an unusable queue file fails both commands with a message."""
+    queue_path = tmp_path / "jobs.db"
+    queue_path.write_text("not a database" * 100)
+
+    enqueued = CliRunner().invoke(main, ["enqueue", str(queue_path)])
+    with patch("gemini_nano_banana_tool.commands.queue_commands.create_client"):
+        worked = CliRunner().invoke(main, ["worker", str(queue_path)])
+
+    for result in (enqueued, worked):
+        assert result.exit_code == 1
+        assert "Queue Error" in result.output
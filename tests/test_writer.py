@@ -0,0 +1,117 @@
+"""Tests for atomic, fsync'd and background image writes.
+
+Note: This code was generated with assistance from AI coding tools
+and has been reviewed and tested by a human.
+"""
+
+import hashlib
+import json
+import shutil
+import threading
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+from click.testing import CliRunner
+
+from gemini_nano_banana_tool.cli import main
+from gemini_nano_banana_tool.core.writer import ImageWriter
+from gemini_nano_banana_tool.utils import save_image
+from tests.helpers import image_response
+
+
+def test_save_image_fsyncs_and_remembers_directories(tmp_path: Path) -> None:
+    """Test fsync of file and directory, and that each directory is checked once."""
+    out_dir = tmp_path / "a" / "b"
+    with (
+        patch("gemini_nano_banana_tool.utils.os.fsync") as fsync,
+        patch.object(Path, "exists", autospec=True, side_effect=Path.exists) as exists,
+    ):
+        save_image(b"one", str(out_dir / "1.png"), fsync=True)
+        save_image(b"two", str(out_dir / "2.png"))
+        assert fsync.call_count == 2
+        assert exists.call_count == 1
+
+        # A remembered directory that was removed is created again
+        shutil.rmtree(out_dir)
+        save_image(b"three", str(out_dir / "3.png"))
+        assert exists.call_count == 2
+
+    assert sorted(p.name for p in out_dir.iterdir()) == ["3.png"]
+    assert (out_dir / "3.png").read_bytes() == b"three"
+
+
+def test_queued_writes_do_not_block_callers(tmp_path: Path) -> None:
+    """Test that save() returns before the write, and close() waits for all of them."""
+    started = threading.Event()
+    release = threading.Event()
+    writes: list[str] = []
+
+    def slow_save(data: bytes, output_path: str, fsync: bool = False) -> None:
+        started.set()
+        release.wait(5)
+        if "bad" in output_path:
+            raise OSError("network filesystem gone")
+        Path(output_path).write_bytes(data)
+        writes.append(Path(output_path).name)
+
+    with patch("gemini_nano_banana_tool.core.writer.save_image", side_effect=slow_save):
+        writer = ImageWriter(queue_size=2)
+        info = writer.save(b"image 1", str(tmp_path / "1.png"))
+        assert info == {"sha256": hashlib.sha256(b"image 1").hexdigest(), "size": 7}
+        started.wait(5)
+        writer.save(b"image 2", str(tmp_path / "bad.png"))
+        writer.save(b"image 3", str(tmp_path / "3.png"))
+        assert writes == []
+
+        # One image is being written and two wait; the next caller waits for room
+        fourth = threading.Thread(target=writer.save, args=(b"image 4", str(tmp_path / "4.png")))
+        fourth.start()
+        fourth.join(0.2)
+        assert fourth.is_alive()
+
+        release.set()
+        fourth.join(5)
+        writer.wait(str(tmp_path / "1.png"))
+        assert (tmp_path / "1.png").read_bytes() == b"image 1"
+        writer.close()
+
+    assert writes == ["1.png", "3.png", "4.png"]
+    assert writer.failed == [str(tmp_path / "bad.png")]
+    assert writer.metrics.snapshot() == {
+        "writer.failed": 1,
+        "writer.queue_full_waits": 1,
+        "writer.written": 3,
+    }
+
+
+def test_generate_batch_with_write_queue(tmp_path: Path) -> None:
+    """Test that generate-batch writes and journals images through the I/O thread."""
+    manifest = tmp_path / "manifest.jsonl"
+    manifest.write_text(
+        "".join(
+            json.dumps({"prompt": f"image {i}", "output": str(tmp_path / "out" / f"{i}.png")})
+            + "\n"
+            for i in range(4)
+        )
+    )
+    response = image_response()
+    client = Mock(spec=["models"])
+    client.models.generate_content.return_value = response
+    with (
+        patch(
+            "gemini_nano_banana_tool.commands.generate_batch_command.create_client",
+            return_value=client,
+        ),
+        patch("gemini_nano_banana_tool.utils.os.fsync") as fsync,
+    ):
+        args = ["generate-batch", str(manifest), "--write-queue", "2", "--fsync"]
+        result = CliRunner().invoke(main, [*args, "--concurrency", "4"])
+        bad = CliRunner().invoke(main, [*args, "--postprocess-workers", "2"])
+
+    assert result.exit_code == 0
+    assert all((tmp_path / "out" / f"{i}.png").read_bytes() == b"png" for i in range(4))
+    # Each file and its directory entry were flushed, then the journal on close
+    assert fsync.call_count == 2 * 4 + 1
+    journal = (tmp_path / "manifest.jsonl.journal.jsonl").read_text().splitlines()
+    assert {json.loads(line)["size"] for line in journal} == {3}
+    assert bad.exit_code == 2 and "--postprocess-workers" in bad.output